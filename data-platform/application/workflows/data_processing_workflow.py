@@ -14,6 +14,7 @@ from core.processors.data_processor import DataProcessor
 from core.domain.interfaces import APIClient, DataStorage, DataValidator
 from shared.types.core_types import ProcessingResult, CategoryType, QueryData
 from shared.config import ScraperConfig
+from shared.deadline import Deadline
 from shared.logger import get_logger
 from shared.exceptions import ValidationError, ConfigurationError
 
@@ -21,6 +22,10 @@ from shared.exceptions import ValidationError, ConfigurationError
 class DataProcessingWorkflow:
     """Data processing workflow controller for scraper operations"""
 
+    # 期限付き実行時に部分結果の保存へ残しておく時間
+    SAVE_RESERVE_RATIO = 0.1
+    SAVE_RESERVE_MAX_SECONDS = 60.0
+
     def __init__(
         self,
         processor: DataProcessor,
@@ -78,9 +83,56 @@ class DataProcessingWorkflow:
         category: CategoryType,
         mode: str = 'standard',  # モードパラメータを追加
         dry_run: bool = False,
-        separate_location: bool = True
+        separate_location: bool = True,
+        deadline: Optional[Deadline] = None
     ) -> ProcessingResult:
         """Execute category-specific data processing"""
+        file_path = self._prepare_category(category, mode, dry_run)
+        if dry_run:
+            return self._dry_run_result(category)
+
+        try:
+            # クエリファイル解析
+            queries = self._processor.parse_query_file(str(file_path))
+
+            # モードに応じた処理実行
+            result = self._processor.process_all_queries(
+                queries, mode=mode, deadline=self._processing_deadline(deadline)
+            )
+            return self._finalize_category_result(category, result, separate_location)
+
+        except Exception as e:
+            return self._category_error_result(category, e)
+
+    async def process_category_async(
+        self,
+        category: CategoryType,
+        mode: str = 'standard',
+        dry_run: bool = False,
+        separate_location: bool = True,
+        deadline: Optional[Deadline] = None
+    ) -> ProcessingResult:
+        """Execute category-specific data processing with the async processor
+
+        When a deadline is given, processing stops early enough to save the
+        partial results before it expires.
+        """
+        file_path = self._prepare_category(category, mode, dry_run)
+        if dry_run:
+            return self._dry_run_result(category)
+
+        try:
+            queries = self._processor.parse_query_file(str(file_path))
+            result = await self._processor.process_all_queries_async(
+                queries, mode=mode, deadline=self._processing_deadline(deadline)
+            )
+            return self._finalize_category_result(category, result, separate_location)
+
+        except Exception as e:
+            return self._category_error_result(category, e)
+
+    def _prepare_category(self, category: CategoryType, mode: str, dry_run: bool) -> Path:
+        """Validate the category data file and return its path"""
 
         # データファイル確認
         data_file = self.data_files.get(category)
@@ -101,56 +153,74 @@ class DataProcessingWorkflow:
                          mode=mode,  # モード情報をログに追加
                          query_count=query_count,
                          dry_run=dry_run)
-
-        if dry_run:
-            self._logger.info("ドライラン完了 - 実際の処理は実行されませんでした")
-            return ProcessingResult(
-                success=True,
-                category=category,
-                processed_count=0,
-                error_count=0,
-                duration=0.0,
-                errors=[]
+        return file_path
+
+    def _dry_run_result(self, category: CategoryType) -> ProcessingResult:
+        """Result returned for dry runs"""
+        self._logger.info("ドライラン完了 - 実際の処理は実行されませんでした")
+        return ProcessingResult(
+            success=True,
+            category=category,
+            processed_count=0,
+            error_count=0,
+            duration=0.0,
+            errors=[]
+        )
+
+    def _processing_deadline(self, deadline: Optional[Deadline]) -> Optional[Deadline]:
+        """Deadline for query processing, reserving time to save partial results"""
+        if deadline is None:
+            return None
+        reserve = min(self.SAVE_RESERVE_MAX_SECONDS, deadline.remaining() * self.SAVE_RESERVE_RATIO)
+        return deadline.with_reserve(reserve)
+
+    def _finalize_category_result(
+        self,
+        category: CategoryType,
+        result: ProcessingResult,
+        separate_location: bool
+    ) -> ProcessingResult:
+        """Save processed data (including partial results) and log the outcome"""
+        result.category = category
+
+        # スプレッドシート保存（期限切れで中断した場合も処理済み分を保存）
+        if result.success and result.processed_count > 0:
+            sheet_name = category.capitalize()
+            save_success = self._processor.save_to_spreadsheet(
+                sheet_name,
+                separate_location=separate_location
             )
 
-        try:
-            # クエリファイル解析
-            queries = self._processor.parse_query_file(str(file_path))
-
-            # モードに応じた処理実行
-            result = self._processor.process_all_queries(queries, mode=mode)
-            result.category = category
-
-            # スプレッドシート保存
-            if result.success and result.processed_count > 0:
-                sheet_name = category.capitalize()
-                save_success = self._processor.save_to_spreadsheet(
-                    sheet_name,
-                    separate_location=separate_location
-                )
-
-                if not save_success:
-                    self._logger.warning("スプレッドシート保存に失敗")
-
-            self._logger.info("カテゴリ処理完了",
-                            category=category,
-                            success=result.success,
-                            processed_count=result.processed_count,
-                            error_count=result.error_count,
-                            duration=result.duration)
-
-            return result
-
-        except Exception as e:
-            self._logger.error("カテゴリ処理エラー", category=category, error=str(e))
-            return ProcessingResult(
-                success=False,
-                category=category,
-                processed_count=0,
-                error_count=1,
-                duration=0.0,
-                errors=[str(e)]
-            )
+            if not save_success:
+                self._logger.warning("スプレッドシート保存に失敗")
+
+        if result.skipped_count > 0:
+            self._logger.warning("実行期限により部分完了",
+                               category=category,
+                               processed_count=result.processed_count,
+                               skipped_count=result.skipped_count)
+
+        self._logger.info("カテゴリ処理完了",
+                        category=category,
+                        success=result.success,
+                        processed_count=result.processed_count,
+                        error_count=result.error_count,
+                        skipped_count=result.skipped_count,
+                        duration=result.duration)
+
+        return result
+
+    def _category_error_result(self, category: CategoryType, error: Exception) -> ProcessingResult:
+        """Result returned when category processing raises"""
+        self._logger.error("カテゴリ処理エラー", category=category, error=str(error))
+        return ProcessingResult(
+            success=False,
+            category=category,
+            processed_count=0,
+            error_count=1,
+            duration=0.0,
+            errors=[str(error)]
+        )
 
     def run_all_categories(
         self,
@@ -13,7 +13,7 @@ import re
 import time
 import asyncio
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple, Any
+from typing import Iterator, List, Dict, Optional, Tuple, Any
 from urllib.parse import unquote, parse_qs, urlparse
 
 # 新しいアーキテクチャ対応インポート
@@ -22,13 +22,19 @@ from core.domain.location_service import LocationService
 from shared.types.core_types import PlaceData, ProcessingResult, CategoryType, QueryData
 from shared.config import ScraperConfig
 from shared.logger import get_logger
-from shared.exceptions import APIError, ValidationError, ConfigurationError
+from shared.deadline import Deadline, deadline_scope
+from shared.exceptions import (
+    APIError, ValidationError, ConfigurationError, DeadlineExceededError, is_throttling_error
+)
 from shared.utils.translators import translate_business_status, translate_types
 
 # Phase 2改善: 新しい共有コンポーネント
 from shared.error_handler import ErrorHandler, ErrorSeverity, ErrorCategory
 from shared.performance_monitor import PerformanceMonitor
-from shared.async_processor import OptimizedAsyncProcessor, OptimizedBatchConfig, ProcessingResult as AsyncProcessingResult
+from shared.async_processor import (
+    OptimizedAsyncProcessor, OptimizedBatchConfig, ProcessingState,
+    ProcessingResult as AsyncProcessingResult
+)
 
 # コスト最適化: Place IDキャッシュシステム
 from infrastructure.storage.place_id_cache import PlaceIdCache
@@ -38,6 +44,8 @@ from infrastructure.storage.place_id_cache import PlaceIdCache
 class ProcessorConstants:
     """DataProcessor用の定数定義"""
     PLACE_ID_KEY = 'Place ID'
+    # 期限付き実行時の処理優先度（小さいほど先に処理: API呼び出しが少なく確度の高い順）
+    QUERY_TYPE_PRIORITY = {'cid_url': 0, 'store_name': 1, 'maps_url': 2}
 
 
 class DataProcessor:
@@ -79,12 +87,17 @@ class DataProcessor:
                 batch_size=config.processing.batch_size if hasattr(config.processing, 'batch_size') else 10,
                 max_concurrent=config.processing.max_workers if hasattr(config.processing, 'max_workers') else 5,
                 retry_attempts=3,
-                timeout=30.0
+                timeout=30.0,
+                scheduling_mode=getattr(config.processing, 'scheduling_mode', 'batch'),
+                adaptive_concurrency=getattr(config.processing, 'adaptive_concurrency', False),
+                requests_per_second=getattr(config.processing, 'rate_limit_per_second', 0.0),
+                instrumentation=getattr(config.processing, 'async_instrumentation', False)
             )
             self._async_processor = OptimizedAsyncProcessor("DataProcessor", batch_config)
 
         self.results: List[Dict[str, Any]] = []
         self.failed_queries: List[QueryData] = []
+        self.skipped_queries: List[QueryData] = []
         self.raw_places_data: List[PlaceData] = []
 
         self._logger.info("データプロセッサー初期化完了",
@@ -93,67 +106,81 @@ class DataProcessor:
                          async_enabled=enable_async)
 
     def parse_query_file(self, file_path: str) -> List[QueryData]:
-        """クエリファイルを解析"""
-        queries: List[QueryData] = []
+        """クエリファイルを解析
 
+        モード別の件数制限や期限付き実行時の優先度ソートに全件が必要なため、
+        ワークフローはリストとして受け取る。一定メモリで処理したい場合は
+        iter_query_file を process_stream_optimized へ直接渡す。
+        """
+        queries = list(self.iter_query_file(file_path))
+        self._logger.info("クエリファイル解析完了", count=len(queries), file_path=file_path)
+        return queries
+
+    def iter_query_file(self, file_path: str) -> Iterator[QueryData]:
+        """クエリファイルを1行ずつ解析して返す
+
+        ファイル全体を読み込まないため、process_stream_optimized へ渡せば
+        大きなクエリファイルも一定メモリで処理できる。
+        """
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-
-            for line_num, line in enumerate(lines, 1):
-                line = line.strip()
+                for line_num, line in enumerate(f, 1):
+                    query_data = self._parse_query_line(line, line_num)
+                    if query_data is not None:
+                        yield query_data
 
-                # コメント行や空行をスキップ
-                if not line or line.startswith('#'):
-                    continue
+        except Exception as e:
+            self._logger.error("ファイル読み込みエラー", error=str(e), file_path=file_path)
+            raise ValidationError(f"ファイル読み込みエラー: {e}", "file_path", file_path)
 
-                query_data: QueryData = {
-                    'line_number': line_num,
-                    'original_line': line,
-                    'type': 'store_name',  # デフォルト値
-                    'store_name': ''
-                }
+    def _parse_query_line(self, line: str, line_num: int) -> Optional[QueryData]:
+        """クエリファイルの1行を解析"""
+        line = line.strip()
 
-                # CID URL形式の判定
-                if 'maps.google.com/place?cid=' in line:
-                    # CID URLを解析
-                    parts = line.split('#', 1)
-                    url = parts[0].strip()
-                    store_name = parts[1].strip() if len(parts) > 1 else ''
-
-                    # CIDを抽出
-                    cid_match = re.search(r'cid=(\d+)', url)
-                    if cid_match:
-                        query_data.update({
-                            'type': 'cid_url',
-                            'cid': cid_match.group(1),
-                            'url': url,
-                            'store_name': store_name
-                        })
-
-                # Google Maps URL形式の判定
-                elif 'www.google.com/maps/' in line:
-                    query_data.update({
-                        'type': 'maps_url',
-                        'url': line,
-                        'store_name': self.extract_name_from_url(line)
-                    })
-
-                # 店舗名のみの判定
-                else:
-                    query_data.update({
-                        'type': 'store_name',
-                        'store_name': line
-                    })
+        # コメント行や空行をスキップ
+        if not line or line.startswith('#'):
+            return None
 
-                queries.append(query_data)
+        query_data: QueryData = {
+            'line_number': line_num,
+            'original_line': line,
+            'type': 'store_name',  # デフォルト値
+            'store_name': ''
+        }
 
-            self._logger.info("クエリファイル解析完了", count=len(queries), file_path=file_path)
-            return queries
+        # CID URL形式の判定
+        if 'maps.google.com/place?cid=' in line:
+            # CID URLを解析
+            parts = line.split('#', 1)
+            url = parts[0].strip()
+            store_name = parts[1].strip() if len(parts) > 1 else ''
+
+            # CIDを抽出
+            cid_match = re.search(r'cid=(\d+)', url)
+            if cid_match:
+                query_data.update({
+                    'type': 'cid_url',
+                    'cid': cid_match.group(1),
+                    'url': url,
+                    'store_name': store_name
+                })
+
+        # Google Maps URL形式の判定
+        elif 'www.google.com/maps/' in line:
+            query_data.update({
+                'type': 'maps_url',
+                'url': line,
+                'store_name': self.extract_name_from_url(line)
+            })
+
+        # 店舗名のみの判定
+        else:
+            query_data.update({
+                'type': 'store_name',
+                'store_name': line
+            })
 
-        except Exception as e:
-            self._logger.error("ファイル読み込みエラー", error=str(e), file_path=file_path)
-            raise ValidationError(f"ファイル読み込みエラー: {e}", "file_path", file_path)
+        return query_data
 
     def extract_name_from_url(self, url: str) -> str:
         """URLから店舗名を抽出"""
@@ -179,15 +206,22 @@ class DataProcessor:
         except Exception:
             return ''
 
-    def process_all_queries(self, queries: List[QueryData], mode: str = 'standard') -> ProcessingResult:
-        """全クエリを処理"""
+    def process_all_queries(
+        self,
+        queries: List[QueryData],
+        mode: str = 'standard',
+        deadline: Optional[Deadline] = None
+    ) -> ProcessingResult:
+        """全クエリを処理
+
+        deadlineを指定すると価値の高いクエリから処理し、期限切れ時点で
+        残りをスキップして部分結果を返す。
+        """
         start_time = time.time()
         self._logger.info("クエリ処理開始", count=len(queries), mode=mode)
 
         # 処理開始時に生データ配列をクリア
-        self.raw_places_data = []
-        self.results = []
-        self.failed_queries = []
+        self._initialize_processing_state()
 
         # モードに応じた処理フィルタリング
         filtered_queries = self._filter_queries_by_mode(queries, mode)
@@ -195,37 +229,48 @@ class DataProcessor:
                          original=len(queries),
                          filtered=len(filtered_queries),
                          mode=mode)
-
-        for i, query_data in enumerate(filtered_queries, 1):
-            self._logger.info("クエリ処理中",
-                            current=i,
-                            total=len(queries),
-                            store_name=query_data.get('store_name', 'Unknown'))
-
-            try:
-                result = None
-                query_type = query_data.get('type', 'store_name')  # デフォルトはstore_name
-
-                if query_type == 'cid_url':
-                    result = self.process_cid_url(query_data)
-                elif query_type == 'maps_url':
-                    result = self.process_maps_url(query_data)
-                elif query_type == 'store_name':
-                    result = self.process_store_name(query_data)
-
-                if result:
-                    self.results.append(result)
-                    self._logger.info("クエリ処理成功", place_id=result.get(ProcessorConstants.PLACE_ID_KEY))
-                else:
+        if deadline is not None:
+            filtered_queries = self._prioritize_queries(filtered_queries)
+
+        with deadline_scope(deadline):
+            for i, query_data in enumerate(filtered_queries, 1):
+                if deadline is not None and deadline.expired:
+                    self.skipped_queries.extend(filtered_queries[i - 1:])
+                    self._logger.warning("実行期限到達のため残りのクエリをスキップ",
+                                       skipped=len(self.skipped_queries))
+                    break
+
+                self._logger.info("クエリ処理中",
+                                current=i,
+                                total=len(queries),
+                                store_name=query_data.get('store_name', 'Unknown'))
+
+                try:
+                    result = None
+                    query_type = query_data.get('type', 'store_name')  # デフォルトはstore_name
+
+                    if query_type == 'cid_url':
+                        result = self.process_cid_url(query_data)
+                    elif query_type == 'maps_url':
+                        result = self.process_maps_url(query_data)
+                    elif query_type == 'store_name':
+                        result = self.process_store_name(query_data)
+
+                    if result:
+                        self.results.append(result)
+                        self._logger.info("クエリ処理成功", place_id=result.get(ProcessorConstants.PLACE_ID_KEY))
+                    else:
+                        self.failed_queries.append(query_data)
+                        self._logger.warning("クエリ処理失敗", query_data=query_data)
+
+                    # API制限対応
+                    time.sleep(self._config.processing.api_delay)
+
+                except DeadlineExceededError:
+                    self.skipped_queries.append(query_data)
+                except Exception as e:
+                    self._logger.error("クエリ処理エラー", error=str(e), query_data=query_data)
                     self.failed_queries.append(query_data)
-                    self._logger.warning("クエリ処理失敗", query_data=query_data)
-
-                # API制限対応
-                time.sleep(self._config.processing.api_delay)
-
-            except Exception as e:
-                self._logger.error("クエリ処理エラー", error=str(e), query_data=query_data)
-                self.failed_queries.append(query_data)
 
         duration = time.time() - start_time
         result = ProcessingResult(
@@ -234,31 +279,45 @@ class DataProcessor:
             processed_count=len(self.results),
             error_count=len(self.failed_queries),
             duration=duration,
-            errors=[str(q) for q in self.failed_queries]
+            errors=[str(q) for q in self.failed_queries],
+            skipped_count=len(self.skipped_queries)
         )
 
         self._logger.info("クエリ処理完了",
                          success_count=len(self.results),
                          error_count=len(self.failed_queries),
+                         skipped_count=len(self.skipped_queries),
                          duration=duration)
         return result
 
-    async def process_all_queries_async(self, queries: List[QueryData], mode: str = 'standard') -> ProcessingResult:
-        """非同期版全クエリ処理 - Phase 2改善"""
+    async def process_all_queries_async(
+        self,
+        queries: List[QueryData],
+        mode: str = 'standard',
+        deadline: Optional[Deadline] = None
+    ) -> ProcessingResult:
+        """非同期版全クエリ処理 - Phase 2改善
+
+        deadlineは各API呼び出しのタイムアウトまで伝播し、期限切れ後の
+        クエリはスキップされる（処理済み分は部分結果として返す）。
+        """
         if not self._enable_async or not self._async_processor:
             self._logger.warning("非同期処理が無効化されています。同期処理にフォールバック")
-            return self.process_all_queries(queries, mode)
+            return self.process_all_queries(queries, mode, deadline=deadline)
 
         start_time = time.time()
 
-        with self._performance_monitor.measure_time("process_all_queries_async"):
+        with self._performance_monitor.measure_time("process_all_queries_async"), deadline_scope(deadline):
             try:
-                self._logger.info("非同期クエリ処理開始", count=len(queries), mode=mode)
+                self._logger.info("非同期クエリ処理開始", count=len(queries), mode=mode,
+                                 deadline_seconds=deadline.remaining() if deadline else None)
                 self._initialize_processing_state()
 
                 # モードに応じた処理フィルタリング
                 filtered_queries = self._filter_queries_by_mode(queries, mode)
                 self._log_filtering_results(len(queries), len(filtered_queries), mode)
+                if deadline is not None:
+                    filtered_queries = self._prioritize_queries(filtered_queries)
 
                 # 非同期バッチ処理実行
                 batch_result = await self._execute_async_batch_processing(filtered_queries)
@@ -269,13 +328,28 @@ class DataProcessor:
 
             except Exception as e:
                 duration = time.time() - start_time
-                return self._handle_async_processing_error(e, queries, mode, duration)
+                return self._handle_async_processing_error(e, queries, mode, duration, deadline)
 
     def _initialize_processing_state(self) -> None:
         """処理状態の初期化"""
         self.raw_places_data = []
         self.results = []
         self.failed_queries = []
+        self.skipped_queries = []
+
+    def _prioritize_queries(self, queries: List[QueryData]) -> List[QueryData]:
+        """残り時間を価値の高いクエリへ回すための並べ替え
+
+        明示的なpriority（大きいほど優先）→ クエリ種別（少ないAPI呼び出しで
+        確実に特定できる順）→ ファイル内の順序。
+        """
+        return sorted(
+            queries,
+            key=lambda q: (
+                -float(q.get('priority', 0) or 0),
+                ProcessorConstants.QUERY_TYPE_PRIORITY.get(q.get('type', 'store_name'), 99)
+            )
+        )
 
     def _log_filtering_results(self, original_count: int, filtered_count: int, mode: str) -> None:
         """フィルタリング結果のログ出力"""
@@ -300,11 +374,18 @@ class DataProcessor:
         for result in batch_result.results:
             if result.success and result.data:
                 self.results.append(result.data)
+            elif result.state == ProcessingState.CANCELLED:
+                skipped_query = result.metadata.get('item') if result.metadata else None
+                if skipped_query:
+                    self.skipped_queries.append(skipped_query)
             else:
                 self._handle_failed_result(result)
 
     def _handle_failed_result(self, result: Any) -> None:
         """失敗した結果の処理"""
+        metadata = result.metadata or {}
+        failed_query = metadata.get('query_data') or metadata.get('item')
+
         if result.error:
             self._error_handler.handle_error(
                 result.error,
@@ -312,12 +393,11 @@ class DataProcessor:
                 {
                     "severity": ErrorSeverity.MEDIUM.value,
                     "category": ErrorCategory.PROCESSING.value,
-                    "query_data": result.metadata.get('query_data') if result.metadata else None
+                    "query_data": failed_query
                 }
             )
 
         # クエリデータを復元して失敗リストに追加
-        failed_query = result.metadata.get('query_data') if result.metadata else None
         if failed_query:
             self.failed_queries.append(failed_query)
 
@@ -339,18 +419,27 @@ class DataProcessor:
             processed_count=len(self.results),
             error_count=len(self.failed_queries),
             duration=duration,
-            errors=[str(q) for q in self.failed_queries]
+            errors=[str(q) for q in self.failed_queries],
+            skipped_count=len(self.skipped_queries)
         )
 
         self._logger.info("非同期クエリ処理完了",
                          success_count=len(self.results),
                          error_count=len(self.failed_queries),
+                         skipped_count=len(self.skipped_queries),
                          duration=duration,
                          success_rate=batch_result.success_rate)
 
         return processing_result
 
-    def _handle_async_processing_error(self, error: Exception, queries: List[QueryData], mode: str, _duration: float) -> ProcessingResult:
+    def _handle_async_processing_error(
+        self,
+        error: Exception,
+        queries: List[QueryData],
+        mode: str,
+        _duration: float,
+        deadline: Optional[Deadline] = None
+    ) -> ProcessingResult:
         """非同期処理エラーのハンドリング"""
         self._error_handler.handle_error(
             error,
@@ -360,7 +449,7 @@ class DataProcessor:
 
         # フォールバック処理
         self._logger.warning(f"非同期処理でエラー発生。同期処理にフォールバック: {str(error)}")
-        return self.process_all_queries(queries, mode)
+        return self.process_all_queries(queries, mode, deadline=deadline)
 
     async def _process_single_query_async(self, query_data: QueryData) -> Optional[Dict[str, Any]]:
         """単一クエリの非同期処理"""
@@ -406,9 +495,8 @@ class DataProcessor:
 
             try:
                 # 同期版のsearch_by_nameを非同期実行
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(
-                    None,
+                # to_threadは実行期限のコンテキストをスレッドへ引き継ぐ
+                result = await asyncio.to_thread(
                     self.search_by_name,
                     store_name,
                     query_data,
@@ -431,6 +519,8 @@ class DataProcessor:
                         "query_data": query_data
                     }
                 )
+                if is_throttling_error(e) or isinstance(e, DeadlineExceededError):
+                    raise  # 非同期プロセッサの同時実行制御・期限管理へ伝える
         else:
             # 店舗名がない場合は警告
             self._logger.warning(
@@ -444,8 +534,7 @@ class DataProcessor:
     async def _process_maps_url_async(self, query_data: QueryData) -> Optional[Dict[str, Any]]:
         """Maps URLの非同期処理"""
         # 同期版と同じロジックを非同期実行
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.process_maps_url, query_data)
+        return await asyncio.to_thread(self.process_maps_url, query_data)
 
     async def _process_store_name_async(self, query_data: QueryData) -> Optional[Dict[str, Any]]:
         """店舗名の非同期処理"""
@@ -454,9 +543,7 @@ class DataProcessor:
         if store_name:
             try:
                 # API呼び出しを非同期実行
-                loop = asyncio.get_event_loop()
-                search_results = await loop.run_in_executor(
-                    None,
+                search_results = await asyncio.to_thread(
                     self._api_client.search_places,
                     store_name
                 )
@@ -479,6 +566,8 @@ class DataProcessor:
                         "store_name": query_data.get('store_name')
                     }
                 )
+                if is_throttling_error(e) or isinstance(e, DeadlineExceededError):
+                    raise  # 非同期プロセッサの同時実行制御・期限管理へ伝える
 
         return None
 
@@ -639,8 +728,13 @@ class DataProcessor:
 
                 time.sleep(self._config.processing.api_delay)
 
+            except DeadlineExceededError:
+                raise
             except APIError as e:
                 self._logger.error("API検索エラー", query=query, error=str(e))
+                if is_throttling_error(e):
+                    # スロットリング中は別クエリを試さず呼び出し元へ伝える
+                    raise
                 continue
             except Exception as e:
                 self._logger.error("予期しない検索エラー", query=query, error=str(e))
@@ -9,8 +9,11 @@ Places API Adapter - 新しいアーキテクチャ対応版
 from typing import List, Dict, Optional, Any
 from core.domain.interfaces import APIClient
 from shared.types.core_types import PlaceData
-from shared.exceptions import APIError, ConfigurationError
+from shared.exceptions import APIError, APIQuotaExceededError, ConfigurationError, DeadlineExceededError
+from shared.deadline import remaining_timeout
+from shared.distributed_rate_limiter import DistributedRateLimiter
 from shared.logger import get_logger
+from infrastructure.storage.negative_result_cache import NegativeResultCache
 import os
 import time
 import requests
@@ -20,6 +23,12 @@ from dataclasses import dataclass
 # 定数定義
 CONTENT_TYPE_JSON = 'application/json'
 
+# 分散レートリミッターのキー（SKU単位でレート上限を共有）
+SKU_TEXT_SEARCH_ID_ONLY = 'places:text_search_id_only'
+SKU_TEXT_SEARCH = 'places:text_search'
+SKU_PLACE_DETAILS = 'places:place_details'
+SKU_ID_REFRESH = 'places:id_refresh'
+
 @dataclass
 class APIConfig:
     """API設定クラス"""
@@ -41,8 +50,17 @@ class LocationBounds:
 class PlacesAPIAdapter(APIClient):
     """Places API Client adapter for new architecture"""
 
-    def __init__(self, api_key: str, delay: float = 1.0, max_retries: int = 3, timeout: int = 30):
-        """Initialize the Places API adapter"""
+    def __init__(self, api_key: str, delay: float = 1.0, max_retries: int = 3, timeout: int = 30,
+                 negative_cache: Optional[NegativeResultCache] = None,
+                 session: Optional[requests.Session] = None,
+                 rate_limiter: Optional[DistributedRateLimiter] = None):
+        """Initialize the Places API adapter
+
+        Args:
+            negative_cache: 検索結果なしクエリのキャッシュ（Noneの場合は無効）
+            session: 接続を再利用するHTTPセッション（Noneの場合はリクエスト毎に接続）
+            rate_limiter: ワーカー間で共有するレートリミッター（Noneの場合はdelay間隔で待機）
+        """
         self.config = APIConfig(
             api_key=api_key or os.environ.get('PLACES_API_KEY', ''),
             request_delay=delay
@@ -51,13 +69,24 @@ class PlacesAPIAdapter(APIClient):
         self.last_request_time = 0
         self._max_retries = max_retries
         self._timeout = timeout
+        self._negative_cache = negative_cache
+        self._http = session or requests
+        self._rate_limiter = rate_limiter
         self._logger = get_logger(__name__)
 
         if not self.config.api_key:
             raise ConfigurationError("Places API key is required")
 
-    def _wait_for_rate_limit(self) -> None:
+    def _request_timeout(self) -> float:
+        """HTTPタイムアウト（実行期限があれば残り時間で切り詰める）"""
+        return remaining_timeout(self._timeout)
+
+    def _wait_for_rate_limit(self, sku: str = SKU_PLACE_DETAILS) -> None:
         """レート制限に従って待機"""
+        if self._rate_limiter is not None:
+            self._rate_limiter.acquire(sku)
+            return
+
         elapsed = time.time() - self.last_request_time
         if elapsed < self.config.request_delay:
             time.sleep(self.config.request_delay - elapsed)
@@ -140,6 +169,8 @@ class PlacesAPIAdapter(APIClient):
                 return self._normalize_place_data(place_data)
             return None
 
+        except (APIError, DeadlineExceededError):
+            raise
         except Exception as e:
             self._logger.error("Failed to fetch place details", place_id=place_id, error=str(e))
             raise APIError(f"Failed to fetch place details: {e}")
@@ -182,7 +213,10 @@ class PlacesAPIAdapter(APIClient):
         Returns:
             Place ID（見つからない場合はNone）
         """
-        self._wait_for_rate_limit()
+        if self._negative_cache and self._negative_cache.should_skip(text_query):
+            return None
+
+        self._wait_for_rate_limit(SKU_TEXT_SEARCH_ID_ONLY)
 
         request_body = {
             "textQuery": text_query,
@@ -204,11 +238,11 @@ class PlacesAPIAdapter(APIClient):
                           url='https://places.googleapis.com/v1/places:searchText')
 
         try:
-            response = requests.post(
+            response = self._http.post(
                 'https://places.googleapis.com/v1/places:searchText',
                 headers=headers,
                 json=request_body,
-                timeout=self._timeout
+                timeout=self._request_timeout()
             )
 
             self._logger.debug("API レスポンス",
@@ -225,9 +259,13 @@ class PlacesAPIAdapter(APIClient):
                 self._logger.info("Place ID取得成功（無料SKU）",
                                 query=text_query,
                                 place_id=place_id)
+                if self._negative_cache:
+                    self._negative_cache.record_hit(text_query)
                 return place_id
             else:
                 self._logger.warning("Place ID取得失敗: 結果なし", query=text_query)
+                if self._negative_cache:
+                    self._negative_cache.record_miss(text_query, 'ZERO_RESULTS')
                 return None
 
         except requests.exceptions.HTTPError as e:
@@ -245,6 +283,7 @@ class PlacesAPIAdapter(APIClient):
                 error=str(e),
                 response_body=error_detail
             )
+            self._raise_if_throttled(e)
             return None
         except requests.exceptions.RequestException as e:
             self._logger.error(
@@ -266,7 +305,7 @@ class PlacesAPIAdapter(APIClient):
         Returns:
             新しいPlace ID（更新失敗時はNone）
         """
-        self._wait_for_rate_limit()
+        self._wait_for_rate_limit(SKU_ID_REFRESH)
 
         headers = {
             'Content-Type': CONTENT_TYPE_JSON,
@@ -275,10 +314,10 @@ class PlacesAPIAdapter(APIClient):
         }
 
         try:
-            response = requests.get(
+            response = self._http.get(
                 f'https://places.googleapis.com/v1/places/{old_place_id}',
                 headers=headers,
-                timeout=self._timeout
+                timeout=self._request_timeout()
             )
 
             if response.status_code == 404:
@@ -314,6 +353,7 @@ class PlacesAPIAdapter(APIClient):
                 error=str(e),
                 response_body=error_detail
             )
+            self._raise_if_throttled(e)
             return None
         except requests.exceptions.RequestException as e:
             self._logger.error(
@@ -327,7 +367,7 @@ class PlacesAPIAdapter(APIClient):
         """
         Place IDから詳細情報を取得
         """
-        self._wait_for_rate_limit()
+        self._wait_for_rate_limit(SKU_PLACE_DETAILS)
 
         headers = {
             'Content-Type': CONTENT_TYPE_JSON,
@@ -336,10 +376,10 @@ class PlacesAPIAdapter(APIClient):
         }
 
         try:
-            response = requests.get(
+            response = self._http.get(
                 f'https://places.googleapis.com/v1/places/{place_id}',
                 headers=headers,
-                timeout=self._timeout
+                timeout=self._request_timeout()
             )
 
             if response.status_code == 404:
@@ -357,6 +397,7 @@ class PlacesAPIAdapter(APIClient):
                 response_text=e.response.text[:200] if hasattr(e, 'response') else None,
                 error=str(e)
             )
+            self._raise_if_throttled(e)
             return None
         except requests.exceptions.RequestException as e:
             self._logger.error(
@@ -388,7 +429,7 @@ class PlacesAPIAdapter(APIClient):
             else:
                 raise APIError(f"API returned status: {status}")
 
-        except APIError:
+        except (APIError, DeadlineExceededError):
             raise
         except Exception as e:
             self._logger.error("Failed to search places", query=query, error=str(e))
@@ -398,8 +439,14 @@ class PlacesAPIAdapter(APIClient):
                    included_type: Optional[str] = None) -> Tuple[str, List[Dict]]:
         """
         Text Search API を使用して場所を検索
+
+        ネガティブキャッシュ有効期間内のクエリはAPIを呼ばずに
+        ZERO_RESULTS を返す。
         """
-        self._wait_for_rate_limit()
+        if self._negative_cache and self._negative_cache.should_skip(text_query):
+            return 'ZERO_RESULTS', []
+
+        self._wait_for_rate_limit(SKU_TEXT_SEARCH)
 
         request_body = {
             "textQuery": text_query,
@@ -418,11 +465,11 @@ class PlacesAPIAdapter(APIClient):
         }
 
         try:
-            response = requests.post(
+            response = self._http.post(
                 'https://places.googleapis.com/v1/places:searchText',
                 headers=headers,
                 json=request_body,
-                timeout=self._timeout
+                timeout=self._request_timeout()
             )
             response.raise_for_status()
 
@@ -430,11 +477,35 @@ class PlacesAPIAdapter(APIClient):
             places = data.get('places', [])
 
             status = 'OK' if places else 'ZERO_RESULTS'
+            if self._negative_cache:
+                if places:
+                    self._negative_cache.record_hit(text_query)
+                else:
+                    self._negative_cache.record_miss(text_query, status)
             return status, places
 
+        except requests.exceptions.HTTPError as e:
+            self._raise_if_throttled(e)
+            return 'REQUEST_FAILED', []
         except requests.exceptions.RequestException:
             return 'REQUEST_FAILED', []
 
+    def _raise_if_throttled(self, error: requests.exceptions.HTTPError) -> None:
+        """429/5xx を呼び出し元の同時実行制御へ伝えるため例外として送出"""
+        response = getattr(error, 'response', None)
+        status_code = getattr(response, 'status_code', None)
+        if status_code is None:
+            return
+
+        if status_code == 429:
+            retry_after = response.headers.get('Retry-After') if response.headers else None
+            raise APIQuotaExceededError(
+                "Places API rate limit exceeded",
+                retry_after=int(retry_after) if retry_after and str(retry_after).isdigit() else None
+            )
+        if status_code >= 500:
+            raise APIError(f"Places API server error: {status_code}", status_code=status_code)
+
     def is_healthy(self) -> bool:
         """
         Check if the API client is healthy and can make requests.
@@ -520,6 +591,8 @@ class PlacesAPIAdapter(APIClient):
                 return self._normalize_place_data(place_data)
             return None
 
+        except (APIError, DeadlineExceededError):
+            raise
         except Exception as e:
             self._logger.error("Failed to search by CID", cid_url=cid_url, error=str(e))
             raise APIError(f"Failed to search by CID: {e}")
@@ -570,7 +643,7 @@ class PlacesAPIAdapter(APIClient):
 
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get API usage statistics"""
-        return {
+        stats: Dict[str, Any] = {
             "api_key_configured": bool(self.config.api_key),
             "request_delay": self.config.request_delay,
             "max_results": self.config.max_results,
@@ -582,3 +655,8 @@ class PlacesAPIAdapter(APIClient):
                 "west": self.bounds.west
             }
         }
+
+        if self._negative_cache:
+            stats["negative_cache"] = self._negative_cache.get_statistics()
+
+        return stats
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+検索失敗（ネガティブ）キャッシュ
+
+Text Search が ZERO_RESULTS / NOT_FOUND を返したクエリを記録し、
+TTL内の再検索をスキップしてAPI呼び出しを削減するためのキャッシュ機構。
+失敗が繰り返されたクエリはTTLを段階的に延長（降格）し、
+データファイル修正用に一覧を出力できるようにする。
+"""
+
+import json
+import os
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+from shared.logger import get_logger
+
+
+class NegativeResultCache:
+    """検索失敗キャッシュマネージャー"""
+
+    DEFAULT_TTL_HOURS = 72          # Place IDキャッシュ(365日)より大幅に短いTTL
+    DEFAULT_MAX_BACKOFF = 8         # TTL延長倍率の上限
+    DEFAULT_UNRESOLVABLE_THRESHOLD = 3  # この回数以上の失敗で「解決不能」扱い
+
+    def __init__(
+        self,
+        cache_file_path: Optional[str] = None,
+        ttl_hours: float = DEFAULT_TTL_HOURS,
+        unresolvable_threshold: int = DEFAULT_UNRESOLVABLE_THRESHOLD,
+        max_backoff: int = DEFAULT_MAX_BACKOFF
+    ):
+        """
+        初期化
+
+        Args:
+            cache_file_path: キャッシュファイルのパス（Noneの場合はデフォルトパス使用）
+            ttl_hours: 初回失敗時のスキップ期間（時間）
+            unresolvable_threshold: 解決不能と判定する失敗回数
+            max_backoff: 連続失敗時のTTL延長倍率の上限
+        """
+        self._logger = get_logger(__name__)
+        self._lock = threading.Lock()
+
+        # デフォルトパス: data-platform/data/negative_result_cache.json
+        if cache_file_path is None:
+            base_dir = Path(__file__).parent.parent.parent  # data-platform/
+            cache_file_path = str(base_dir / "data" / "negative_result_cache.json")
+
+        self._cache_file_path = cache_file_path
+        self._ttl = timedelta(hours=ttl_hours)
+        self._unresolvable_threshold = unresolvable_threshold
+        self._max_backoff = max_backoff
+        self._skipped_count = 0
+        self._cache_data: Dict[str, Any] = {
+            "queries": {},
+            "metadata": {
+                "version": "1.0"
+            }
+        }
+
+        self._load_cache()
+
+    @property
+    def cache_file_path(self) -> str:
+        """キャッシュファイルパスを取得"""
+        return self._cache_file_path
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """クエリ文字列を正規化（全角/半角・空白・大文字小文字の揺れを吸収）"""
+        normalized = unicodedata.normalize('NFKC', query or '')
+        return ' '.join(normalized.split()).lower()
+
+    def _load_cache(self) -> None:
+        """キャッシュファイルから読み込み"""
+        try:
+            if os.path.exists(self._cache_file_path):
+                with open(self._cache_file_path, 'r', encoding='utf-8') as f:
+                    loaded_data = json.load(f)
+                    if self._validate_cache_structure(loaded_data):
+                        self._cache_data = loaded_data
+                        self._logger.info("ネガティブキャッシュ読み込み成功",
+                                        count=len(self._cache_data['queries']))
+                    else:
+                        self._logger.warning("ネガティブキャッシュ構造が不正です。初期化します")
+        except Exception as e:
+            self._logger.error("ネガティブキャッシュ読み込みエラー", error=str(e))
+
+    def _validate_cache_structure(self, data: Dict) -> bool:
+        """キャッシュデータ構造の検証"""
+        return (
+            isinstance(data, dict) and
+            isinstance(data.get("queries"), dict) and
+            isinstance(data.get("metadata"), dict)
+        )
+
+    def _save_cache(self) -> bool:
+        """キャッシュファイルに保存（ロック取得済みで呼び出すこと）"""
+        try:
+            os.makedirs(os.path.dirname(self._cache_file_path), exist_ok=True)
+
+            with open(self._cache_file_path, 'w', encoding='utf-8') as f:
+                json.dump(self._cache_data, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            self._logger.error("ネガティブキャッシュ保存エラー", error=str(e))
+            return False
+
+    def should_skip(self, query: str) -> bool:
+        """
+        クエリのAPI呼び出しをスキップすべきか判定
+
+        Args:
+            query: 検索クエリ
+
+        Returns:
+            ネガティブキャッシュが有効期間内の場合はTrue
+        """
+        with self._lock:
+            entry = self._cache_data['queries'].get(self.normalize_query(query))
+            if not entry:
+                return False
+
+            try:
+                expires_at = datetime.fromisoformat(entry.get('expires_at', ''))
+            except (ValueError, TypeError):
+                return False
+
+            if datetime.now() < expires_at:
+                self._skipped_count += 1
+                self._logger.debug("ネガティブキャッシュによりスキップ",
+                                 query=query,
+                                 failure_count=entry.get('failure_count', 0))
+                return True
+            return False
+
+    def record_miss(self, query: str, status: str = 'ZERO_RESULTS') -> int:
+        """
+        検索結果なしを記録
+
+        失敗回数に応じてTTLを倍増させ、繰り返し失敗するクエリほど
+        長期間スキップされるようにする（上限: max_backoff倍）。
+
+        Args:
+            query: 検索クエリ
+            status: APIステータス（ZERO_RESULTS / NOT_FOUND）
+
+        Returns:
+            記録後の失敗回数
+        """
+        key = self.normalize_query(query)
+        if not key:
+            return 0
+
+        now = datetime.now()
+        with self._lock:
+            entry = self._cache_data['queries'].get(key) or {
+                "query": query,
+                "failure_count": 0,
+                "first_failed": now.isoformat()
+            }
+
+            failure_count = entry['failure_count'] + 1
+            backoff = min(2 ** (failure_count - 1), self._max_backoff)
+
+            entry.update({
+                "failure_count": failure_count,
+                "last_status": status,
+                "last_failed": now.isoformat(),
+                "expires_at": (now + self._ttl * backoff).isoformat()
+            })
+            self._cache_data['queries'][key] = entry
+            self._save_cache()
+
+        if failure_count >= self._unresolvable_threshold:
+            self._logger.warning("解決不能クエリ",
+                               query=query,
+                               failure_count=failure_count,
+                               recommendation="データファイルの店舗名を確認してください")
+        else:
+            self._logger.debug("ネガティブキャッシュ記録", query=query, failure_count=failure_count)
+
+        return failure_count
+
+    def record_hit(self, query: str) -> bool:
+        """
+        検索成功を記録（ネガティブエントリがあれば削除）
+
+        Args:
+            query: 検索クエリ
+
+        Returns:
+            エントリを削除した場合はTrue
+        """
+        key = self.normalize_query(query)
+        with self._lock:
+            if key not in self._cache_data['queries']:
+                return False
+            del self._cache_data['queries'][key]
+            self._save_cache()
+
+        self._logger.info("ネガティブキャッシュ解除", query=query)
+        return True
+
+    def get_failure_count(self, query: str) -> int:
+        """クエリの累積失敗回数を取得"""
+        with self._lock:
+            entry = self._cache_data['queries'].get(self.normalize_query(query))
+            return entry.get('failure_count', 0) if entry else 0
+
+    def is_unresolvable(self, query: str) -> bool:
+        """クエリが解決不能（閾値以上の失敗）か判定"""
+        return self.get_failure_count(query) >= self._unresolvable_threshold
+
+    def get_unresolvable(self) -> List[Dict[str, Any]]:
+        """
+        解決不能クエリの一覧を取得
+
+        Returns:
+            失敗回数の多い順に並べたエントリのリスト
+        """
+        with self._lock:
+            entries = [
+                dict(entry, normalized_query=key)
+                for key, entry in self._cache_data['queries'].items()
+                if entry.get('failure_count', 0) >= self._unresolvable_threshold
+            ]
+
+        return sorted(entries, key=lambda e: e['failure_count'], reverse=True)
+
+    def clear_all(self) -> bool:
+        """全エントリをクリア"""
+        with self._lock:
+            self._cache_data['queries'] = {}
+            self._logger.warning("ネガティブキャッシュ全クリア")
+            return self._save_cache()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        キャッシュ統計情報を取得
+
+        Returns:
+            統計情報辞書
+        """
+        now = datetime.now()
+        with self._lock:
+            entries = list(self._cache_data['queries'].values())
+
+        active = 0
+        for entry in entries:
+            try:
+                if now < datetime.fromisoformat(entry.get('expires_at', '')):
+                    active += 1
+            except (ValueError, TypeError):
+                continue
+
+        return {
+            "total_entries": len(entries),
+            "active_entries": active,
+            "unresolvable": sum(
+                1 for e in entries if e.get('failure_count', 0) >= self._unresolvable_threshold
+            ),
+            "skipped_requests": self._skipped_count,
+            "ttl_hours": self._ttl.total_seconds() / 3600,
+            "cache_file": self._cache_file_path
+        }
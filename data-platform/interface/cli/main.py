@@ -10,10 +10,11 @@ Phase 2改善: 非同期処理・エラーハンドリング・パフォーマ
 
 import argparse
 import sys
+import time
 import asyncio
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, cast
 
 # パス設定
 current_dir = Path(__file__).parent
@@ -27,6 +28,7 @@ sys.path.insert(0, str(shared_path))
 # 新しいアーキテクチャ対応インポート
 from shared.config import ScraperConfig
 from shared.container import DIContainer, create_container
+from shared.deadline import Deadline, parse_duration
 from shared.logger import get_logger, configure_logging, LoggingConfig
 from shared.exceptions import ConfigurationError, ValidationError
 from application.workflows.data_processing_workflow import DataProcessingWorkflow
@@ -35,6 +37,7 @@ from shared.types.core_types import CategoryType
 # Phase 2改善: 新しい共有コンポーネント
 from shared.error_handler import ErrorHandler, ErrorSeverity, ErrorCategory
 from shared.performance_monitor import PerformanceMonitor
+from shared.processing_time_model import OnlineProcessingTimeModel, PROCESSING_RUN_OPERATION
 
 # 定数定義
 class ScraperConstants:
@@ -94,6 +97,10 @@ class ScraperCLI:
         self._error_handler = ErrorHandler("ScraperCLI")
         self._performance_monitor = PerformanceMonitor("ScraperCLI")
 
+        # 実行タイミングから処理時間をオンライン学習（実行計画の推定に使用）
+        self._processing_time_model = OnlineProcessingTimeModel()
+        self._performance_monitor.add_listener(self._processing_time_model.observe_measurement)
+
     def validate_environment(self) -> bool:
         """環境設定の検証"""
         try:
@@ -133,25 +140,30 @@ class ScraperCLI:
         print(f"   対象データ: {target}")
 
         total_queries = 0
+        estimated_seconds = 0.0
+        learned = True
         file_details = []
 
-        if target == 'all':
-            for category, file_path in self.data_files.items():
-                if self.validate_file(file_path):
-                    count = self.count_queries(file_path)
-                    total_queries += count
-                    file_details.append(f"   📄 {category}: {count}件")
-        else:
-            if target in self.data_files:
-                file_path = self.data_files[target]
-                if self.validate_file(file_path):
-                    count = self.count_queries(file_path)
-                    total_queries += count
-                    file_details.append(f"   📄 {target}: {count}件")
+        categories = list(self.data_files) if target == 'all' else [target]
+        for category in categories:
+            file_path = self.data_files.get(category)
+            if file_path and self.validate_file(file_path):
+                count = self.count_queries(file_path)
+                total_queries += count
+                file_details.append(f"   📄 {category}: {count}件")
+
+                estimate = self._processing_time_model.estimate(
+                    count, category, mode, self._config.processing.max_workers
+                )
+                if estimate is None:
+                    learned = False
+                    estimate = count * ScraperConstants.ESTIMATED_TIME_PER_QUERY
+                estimated_seconds += estimate
 
+        basis = "実測学習" if learned and total_queries else "固定値"
         print(f"   総クエリ数: {total_queries}件")
         print(f"   推定コスト: ${total_queries * ScraperConstants.COST_PER_QUERY:.3f} USD")
-        print(f"   推定実行時間: {total_queries * ScraperConstants.ESTIMATED_TIME_PER_QUERY / ScraperConstants.SECONDS_TO_MINUTES:.1f} 分")
+        print(f"   推定実行時間: {estimated_seconds / ScraperConstants.SECONDS_TO_MINUTES:.1f} 分（{basis}）")
 
         print("\n📁 ファイル詳細:")
         for detail in file_details:
@@ -168,7 +180,8 @@ class ScraperCLI:
         }
         return descriptions.get(mode, mode)
 
-    def run_category(self, category: CategoryType, mode: str, dry_run: bool = False, separate_location: bool = True) -> bool:
+    def run_category(self, category: CategoryType, mode: str, dry_run: bool = False, separate_location: bool = True,
+                     deadline: Optional[Deadline] = None) -> bool:
         """カテゴリごとの処理実行"""
         file_path: Optional[str] = self.data_files.get(category)
 
@@ -193,17 +206,23 @@ class ScraperCLI:
 
         try:
             # ワークフローを使用して処理実行（モード情報を渡す）
+            start_time = time.perf_counter()
             result = self._workflow.run_category_processing(
                 category=category,
                 mode=mode,  # モード情報を渡す
                 dry_run=dry_run,
-                separate_location=separate_location
+                separate_location=separate_location,
+                deadline=deadline
             )
 
             if result.success:
+                self._record_processing_run(category, mode, result.skipped_count,
+                                            time.perf_counter() - start_time)
                 self._logger.info("Category processing completed successfully",
                                 category=category, processed_count=result.processed_count)
                 print(f"✅ {category}データ処理完了: {result.processed_count}件")
+                if result.skipped_count > 0:
+                    print(f"⏰ 実行期限により未処理: {result.skipped_count}件")
                 return True
             else:
                 self._logger.error("Category processing failed",
@@ -230,8 +249,13 @@ class ScraperCLI:
             return False
 
     def run_unified_processing(self, target: str = 'all', mode: str = 'standard',
-                             dry_run: bool = False, separate_location: bool = True) -> bool:
-        """統合処理実行"""
+                             dry_run: bool = False, separate_location: bool = True,
+                             deadline_seconds: Optional[float] = None) -> bool:
+        """統合処理実行
+
+        deadline_secondsを指定すると、確認後からの経過時間で実行期限を設け、
+        期限内に処理できた分のみ保存して終了する。
+        """
 
         # 実行計画表示
         total_queries = self.show_execution_plan(target, mode)
@@ -256,15 +280,19 @@ class ScraperCLI:
         # 処理実行
         success_count = 0
         total_count = 0
+        deadline = self._create_deadline(deadline_seconds)
 
+        # data_files のキーはカテゴリ名（CategoryType）
         if target == 'all':
-            categories = list(self.data_files.keys())
+            categories = cast(List[CategoryType], list(self.data_files.keys()))
         else:
-            categories = [target] if target in self.data_files else []
+            categories = cast(List[CategoryType], [target] if target in self.data_files else [])
 
         for category in categories:
             total_count += 1
-            if self.run_category(category, mode, dry_run, separate_location):
+            if self._deadline_expired(deadline, category):
+                continue
+            if self.run_category(category, mode, dry_run, separate_location, deadline):
                 success_count += 1
 
         # 結果表示
@@ -284,7 +312,8 @@ class ScraperCLI:
         target: str = 'all',
         mode: str = 'standard',
         dry_run: bool = False,
-        separate_location: bool = True
+        separate_location: bool = True,
+        deadline_seconds: Optional[float] = None
     ) -> bool:
         """統合処理実行 - 非同期版 (Phase 2改善)"""
 
@@ -313,18 +342,22 @@ class ScraperCLI:
                 # 処理実行
                 success_count = 0
                 total_count = 0
+                deadline = self._create_deadline(deadline_seconds)
 
+                # data_files のキーはカテゴリ名（CategoryType）
                 if target == 'all':
-                    categories = list(self.data_files.keys())
+                    categories = cast(List[CategoryType], list(self.data_files.keys()))
                 else:
-                    categories = [target] if target in self.data_files else []
+                    categories = cast(List[CategoryType], [target] if target in self.data_files else [])
 
                 print(f"\n🚀 非同期処理開始 - {len(categories)}カテゴリを並列処理")
 
                 # 非同期カテゴリ処理
                 for category in categories:
                     total_count += 1
-                    if await self._run_category_async(category, mode, dry_run, separate_location):
+                    if self._deadline_expired(deadline, category):
+                        continue
+                    if await self._run_category_async(category, mode, dry_run, separate_location, deadline):
                         success_count += 1
 
                 # 統計情報表示
@@ -353,7 +386,8 @@ class ScraperCLI:
         category: CategoryType,
         mode: str,
         dry_run: bool = False,
-        separate_location: bool = True
+        separate_location: bool = True,
+        deadline: Optional[Deadline] = None
     ) -> bool:
         """カテゴリ別処理実行 - 非同期版"""
 
@@ -362,18 +396,25 @@ class ScraperCLI:
                 print(f"\n🔍 {category}データ処理開始（非同期モード）")
 
                 # ワークフローに非同期処理を有効化して実行
+                start_time = time.perf_counter()
                 result = await self._workflow.process_category_async(
                     category=category,
                     mode=mode,
                     dry_run=dry_run,
-                    separate_location=separate_location
+                    separate_location=separate_location,
+                    deadline=deadline
                 )
 
                 if result.success:
+                    if not dry_run:
+                        self._record_processing_run(category, mode, result.skipped_count,
+                                                    time.perf_counter() - start_time)
                     print(f"✅ {category}データ処理完了")
                     print(f"📊 処理件数: {result.processed_count}")
                     if result.error_count > 0:
                         print(f"⚠️ エラー件数: {result.error_count}")
+                    if result.skipped_count > 0:
+                        print(f"⏰ 実行期限により未処理: {result.skipped_count}件")
                     return True
                 else:
                     print(f"❌ {category}データ処理失敗")
@@ -392,6 +433,45 @@ class ScraperCLI:
                 print(f"❌ {category}データ処理エラー: {e}")
                 return False
 
+    def _record_processing_run(self, category: CategoryType, mode: str,
+                               skipped_count: int, duration: float) -> None:
+        """実行タイミングを記録（処理時間モデルがリスナーとして学習する）
+
+        件数は show_execution_plan の推定と同じ単位（ファイルのクエリ数）で、
+        実行期限により未処理となった分を除いた試行件数を記録する。
+        """
+        file_path = self.data_files.get(category)
+        if file_path is None:
+            return
+        attempted_count = self.count_queries(file_path) - skipped_count
+        if attempted_count <= 0:
+            return
+        self._performance_monitor.record_timing(
+            PROCESSING_RUN_OPERATION,
+            duration,
+            labels={
+                "category": category,
+                "mode": mode,
+                "workers": str(self._config.processing.max_workers),
+                "queries": str(attempted_count)
+            }
+        )
+
+    def _create_deadline(self, deadline_seconds: Optional[float]) -> Optional[Deadline]:
+        """実行期限を作成（確認プロンプト後から計測）"""
+        if not deadline_seconds:
+            return None
+        print(f"⏰ 実行期限: {deadline_seconds / ScraperConstants.SECONDS_TO_MINUTES:.1f}分")
+        return Deadline(deadline_seconds)
+
+    def _deadline_expired(self, deadline: Optional[Deadline], category: CategoryType) -> bool:
+        """期限切れならカテゴリをスキップ"""
+        if deadline is None or not deadline.expired:
+            return False
+        self._logger.warning("実行期限到達のためカテゴリをスキップ", category=category)
+        print(f"⏰ 実行期限到達のため{category}データをスキップしました")
+        return True
+
     def get_processing_statistics(self) -> dict:
         """処理統計を取得 - Phase 2改善"""
         return {
@@ -452,7 +532,8 @@ def run_async_main(args) -> bool:
                 target=args.target,
                 mode=args.mode,
                 dry_run=args.dry_run,
-                separate_location=not args.no_separate_location
+                separate_location=not args.no_separate,
+                deadline_seconds=args.deadline
             )
 
         except Exception as e:
@@ -588,6 +669,68 @@ def _handle_separate_only(args) -> None:
     sys.exit(0)
 
 
+def _extract_store_name_from_line(line: str) -> str:
+    """データファイルの1行から検索に使われる店舗名を取り出す"""
+    if 'maps.google.com/place?cid=' in line:
+        parts = line.split('#', 1)
+        return parts[1].strip() if len(parts) > 1 else ''
+    return line
+
+
+def _handle_list_unresolvable(args) -> None:
+    """解決不能クエリ（繰り返し検索結果なし）を一覧表示"""
+    from infrastructure.storage.negative_result_cache import NegativeResultCache
+
+    print("🔎 解決不能クエリ一覧")
+    print("=" * 60)
+
+    negative_cache = NegativeResultCache()
+    entries = negative_cache.get_unresolvable()
+
+    if not entries:
+        print("✅ 解決不能クエリはありません")
+        sys.exit(0)
+
+    by_query = {entry['normalized_query']: entry for entry in entries}
+    matched = set()
+
+    # データファイル内の該当行を特定
+    for category, file_path in DataFileConfig.get_file_mapping().items():
+        path = scraper_root / file_path
+        if not path.exists():
+            continue
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line_num, raw_line in enumerate(f, 1):
+                line = raw_line.strip()
+                if not line or line.startswith('#'):
+                    continue
+
+                for candidate in (_extract_store_name_from_line(line), line):
+                    key = NegativeResultCache.normalize_query(candidate)
+                    entry = by_query.get(key)
+                    if entry:
+                        matched.add(key)
+                        print(f"📄 {file_path}:{line_num} [{category}] {candidate}")
+                        print(f"   失敗回数: {entry['failure_count']}  "
+                              f"最終失敗: {entry.get('last_failed', '-')}  "
+                              f"ステータス: {entry.get('last_status', '-')}")
+                        break
+
+    unmatched = [entry for key, entry in by_query.items() if key not in matched]
+    if unmatched:
+        print("\n📋 データファイル外のクエリ（検索バリエーション等）:")
+        for entry in unmatched:
+            print(f"   - {entry['query']} (失敗回数: {entry['failure_count']})")
+
+    stats = negative_cache.get_statistics()
+    print(f"\n合計: {len(entries)}件 / キャッシュ: {stats['total_entries']}件 "
+          f"(有効 {stats['active_entries']}件)")
+    print("💡 店舗名の誤記・閉店を確認し、データファイルを修正してください")
+
+    sys.exit(0)
+
+
 def _create_argument_parser():
     """引数パーサーを作成"""
     parser = argparse.ArgumentParser(description='佐渡飲食店マップ - 新しいAPIクライアント統合処理 (Phase 2改善版)')
@@ -600,14 +743,26 @@ def _create_argument_parser():
     parser.add_argument('--separate-only', action='store_true', help='データ分離のみ実行')
     parser.add_argument('--config-check', action='store_true', help='環境変数設定の検証のみ実行')
     parser.add_argument('--test-connections', action='store_true', help='API接続テストを実行')
+    parser.add_argument('--list-unresolvable', action='store_true',
+                       help='繰り返し検索結果なしとなったクエリを一覧表示')
     parser.add_argument('--env-file', type=str, default=ScraperConstants.DEFAULT_ENV_FILE,
                        help='環境ファイルのパス（.env.production等）')
     # Phase 2改善: 非同期処理オプション
     parser.add_argument('--async-mode', action='store_true', help='非同期処理を有効化（Phase 2改善）')
     parser.add_argument('--sync', action='store_true', help='同期処理を強制（デバッグ用）')
+    parser.add_argument('--deadline', type=_parse_deadline, default=None,
+                       help='実行期限（例: 20m, 1h30m）。期限内に処理できた分を保存して終了')
     return parser
 
 
+def _parse_deadline(value: str) -> float:
+    """--deadline の値を秒数へ変換"""
+    try:
+        return parse_duration(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
 def _run_main_processing(args) -> None:
     """メイン処理の実行"""
     try:
@@ -682,7 +837,8 @@ def _execute_processing(cli, args, logger) -> None:
         target=args.target,
         mode=args.mode,
         dry_run=args.dry_run,
-        separate_location=not args.no_separate
+        separate_location=not args.no_separate,
+        deadline_seconds=args.deadline
     )
 
     if success:
@@ -733,6 +889,9 @@ def main():
     if args.separate_only:
         _handle_separate_only(args)
 
+    if args.list_unresolvable:
+        _handle_list_unresolvable(args)
+
     # ヘッダー表示
     _show_header()
 
@@ -26,7 +26,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from shared.api_integration import create_api_integration, APIIntegrationConfig
 from shared.cache_service import CacheService, CacheConfig
-from shared.distributed_tasks import BatchTaskConfig, process_places_batch
+from shared.distributed_tasks import BatchTaskConfig, iter_claim_checked_results, process_places_batch
 from shared.exceptions import APIError, ProcessingError
 
 
@@ -229,7 +229,7 @@ class Phase2RealDataTester:
             self.logger.info(f"   処理時間: {processing_time:.2f}秒")
 
             # 結果の詳細表示
-            results = result.get('results', [])
+            results = list(iter_claim_checked_results([result['results_ref']]))
             for i, place_result in enumerate(results[:2]):  # 最初の2件
                 self.logger.info(f"   結果{i+1}: {place_result.get('name', 'N/A')} (評価: {place_result.get('rating', 'N/A')})")
 
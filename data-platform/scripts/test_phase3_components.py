@@ -326,17 +326,18 @@ class Phase3ComponentTester:
                 validation = validate_data_batch.apply(args=[agg_result])
                 if validation.successful():
                     val_result = validation.result
-                    if val_result.get('validated_results'):
+                    if val_result.get('validated_count'):
                         test_result['data_validation'] = True
-                        logger.info(f"✅ データ検証: OK (検証済み={len(val_result.get('validated_results', []))}件)")
+                        logger.info(f"✅ データ検証: OK (検証済み={val_result.get('validated_count')}件)")
 
                 # 3. ML分析テスト
                 ml_analysis = ml_quality_analysis.apply(args=[val_result])
                 if ml_analysis.successful():
                     ml_result = ml_analysis.result
-                    if ml_result.get('high_quality_results'):
+                    if ml_result.get('high_quality_refs'):
                         test_result['ml_analysis'] = True
-                        logger.info(f"✅ ML分析: OK (高品質={len(ml_result.get('high_quality_results', []))}件)")
+                        high_quality_count = sum(ref['count'] for ref in ml_result['high_quality_refs'])
+                        logger.info(f"✅ ML分析: OK (高品質={high_quality_count}件)")
 
             finally:
                 celery_app.conf.task_always_eager = old_eager
@@ -19,6 +19,8 @@ import os
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
 import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
 from functools import lru_cache
 import weakref
 
@@ -37,6 +39,7 @@ from .cache_service import CacheService
 from .exceptions import APIError, ProcessingError, CacheError
 from .types.core_types import PlaceData, ProcessingResult, BatchCacheResult
 from .performance_monitor import PerformanceMonitor
+from .distributed_rate_limiter import DistributedRateLimiter
 
 
 @dataclass(slots=True)  # Memory optimization
@@ -60,17 +63,20 @@ class OptimizedPlacesAPIIntegration:
     __slots__ = (
         'config', 'cache_service', 'logger', 'api_adapter',
         '_session', '_semaphore', '_performance_monitor',
-        '_request_cache', '_connection_pool', '_background_tasks'
+        '_request_cache', '_connection_pool', '_background_tasks', '_fetch_counts',
+        '_rate_limiter'
     )
 
     def __init__(
         self,
         config: APIIntegrationConfig,
         cache_service: Optional[CacheService] = None,
-        performance_monitor: Optional[PerformanceMonitor] = None
+        performance_monitor: Optional[PerformanceMonitor] = None,
+        rate_limiter: Optional[DistributedRateLimiter] = None
     ):
         self.config = config
         self.cache_service = cache_service
+        self._rate_limiter = rate_limiter
         self.logger = logging.getLogger(__name__)
         self._performance_monitor = performance_monitor or PerformanceMonitor("api_integration")
 
@@ -80,15 +86,33 @@ class OptimizedPlacesAPIIntegration:
         # HTTPセッション（接続プール）
         self._session: Optional[aiohttp.ClientSession] = None
 
+        # 同期APIアダプター用HTTP接続プール（インスタンス存続中は接続を再利用）
+        self._connection_pool = self._create_connection_pool()
+
         # インメモリリクエストキャッシュ（短期間）
         self._request_cache: Dict[str, Tuple[PlaceData, datetime]] = {}
 
+        # 取得元ごとの件数
+        self._fetch_counts: Dict[str, int] = {
+            "memory_hits": 0, "cache_hits": 0, "api_calls": 0, "errors": 0
+        }
+
         # バックグラウンドタスク管理（GC防止）
         self._background_tasks: set = set()
 
         # Places API Adapterを初期化
         self._init_api_adapter()
 
+    def _create_connection_pool(self) -> requests.Session:
+        """requestsセッション作成（プールサイズは並行リクエスト数に合わせる）"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max(self.config.max_concurrent_requests, 1)
+        )
+        session.mount("https://", adapter)
+        return session
+
     def _init_api_adapter(self) -> None:
         """API Adapter初期化 - 最適化版"""
         if PlacesAPIAdapter is None:
@@ -100,7 +124,9 @@ class OptimizedPlacesAPIIntegration:
                     api_key=self.config.api_key,
                     delay=self.config.request_delay,
                     max_retries=self.config.max_retries,
-                    timeout=self.config.timeout
+                    timeout=self.config.timeout,
+                    session=self._connection_pool,
+                    rate_limiter=self._rate_limiter
                 )
             except Exception as e:
                 self.logger.warning(f"PlacesAPIAdapter初期化エラー: {e}、モックモードで動作します。")
@@ -137,31 +163,39 @@ class OptimizedPlacesAPIIntegration:
 
     async def fetch_place_details_with_cache(
         self,
-        place_id: str
+        place_id: str,
+        fetch_counts: Optional[Dict[str, int]] = None
     ) -> Optional[PlaceData]:
-        """キャッシュを使用したPlace詳細取得 - 最適化版"""
+        """キャッシュを使用したPlace詳細取得 - 最適化版
+
+        fetch_counts を渡すと、取得元ごとの件数をその呼び出し分だけ加算する
+        （同じ統合を並行して使うバッチ間で件数が混ざらない）。
+        """
 
         async with self._semaphore:  # 並行制御
             try:
                 # 1. インメモリキャッシュ確認（最高速）
                 if self._is_in_request_cache(place_id):
                     cached_data, _ = self._request_cache[place_id]
+                    self._count_fetch("memory_hits", fetch_counts)
                     self.logger.debug(f"インメモリキャッシュヒット: {place_id}")
                     return cached_data
 
                 # 2. 分散キャッシュ確認
                 if self.config.use_cache and self.cache_service:
-                    cached_data = await self._get_from_cache(place_id)
+                    cached_data = await self._get_from_cache(self._place_cache_key(place_id))
                     if cached_data:
+                        self._count_fetch("cache_hits", fetch_counts)
                         self.logger.debug(f"分散キャッシュヒット: {place_id}")
                         # インメモリキャッシュにも保存
                         self._save_to_request_cache(place_id, cached_data)
                         return cached_data
 
-                # 3. API呼び出し（パフォーマンス監視付き）
+                # 3. API呼び出し（同期アダプターはスレッドで実行しループを塞がない）
                 with self._performance_monitor.measure_time(f"api_fetch_{place_id}"):
                     self.logger.debug(f"API呼び出し: {place_id}")
-                    place_data = self._fetch_from_api_optimized(place_id)
+                    self._count_fetch("api_calls", fetch_counts)
+                    place_data = await asyncio.to_thread(self._fetch_from_api_optimized, place_id)
 
                 # 4. キャッシュに保存（非同期）
                 if place_data:
@@ -171,22 +205,35 @@ class OptimizedPlacesAPIIntegration:
                     # 分散キャッシュに非同期保存
                     if self.config.use_cache and self.cache_service:
                         # バックグラウンドタスクをGC防止のために管理
-                        task = asyncio.create_task(self._save_to_cache(place_id, place_data))
+                        task = asyncio.create_task(
+                            self._save_to_cache(self._place_cache_key(place_id), place_data)
+                        )
                         self._background_tasks.add(task)
                         task.add_done_callback(self._background_tasks.discard)
 
                 return place_data
 
             except Exception as e:
+                self._count_fetch("errors", fetch_counts)
                 self.logger.error(f"Place詳細取得エラー: {place_id}, {e}")
                 raise APIError(f"Failed to fetch place details: {e}")
 
+    def _count_fetch(self, key: str, fetch_counts: Optional[Dict[str, int]]) -> None:
+        """取得元ごとの件数を累計と呼び出し単位の両方に加算"""
+        self._fetch_counts[key] += 1
+        if fetch_counts is not None:
+            fetch_counts[key] = fetch_counts.get(key, 0) + 1
+
     async def batch_fetch_places_optimized(
         self,
         place_ids: List[str],
-        progress_callback: Optional[Callable[[int, int], None]] = None
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        fetch_counts: Optional[Dict[str, int]] = None
     ) -> AsyncGenerator[Tuple[str, Optional[PlaceData]], None]:
-        """最適化されたバッチPlace取得 - 型安全性確保"""
+        """最適化されたバッチPlace取得 - 型安全性確保
+
+        fetch_counts を渡すと、このバッチ分の取得元ごとの件数が加算される。
+        """
 
         total_count = len(place_ids)
         processed_count = 0
@@ -197,7 +244,7 @@ class OptimizedPlacesAPIIntegration:
 
             # バッチ内の並行処理
             tasks = [
-                self.fetch_place_details_with_cache(place_id)
+                self.fetch_place_details_with_cache(place_id, fetch_counts)
                 for place_id in batch
             ]
 
@@ -210,9 +257,9 @@ class OptimizedPlacesAPIIntegration:
                 if isinstance(result, Exception):
                     self.logger.error(f"バッチ処理エラー: {place_id}, {result}")
                     yield place_id, None
-                elif result is not None and hasattr(result, 'place_id'):
-                    # PlaceDataであることを安全に確認してキャスト
-                    place_data: PlaceData = result  # type: ignore[assignment]
+                elif isinstance(result, dict) and result:
+                    # PlaceData（TypedDict）であることを安全に確認
+                    place_data: PlaceData = result
                     yield place_id, place_data
                 else:
                     # 予期しない結果の場合はNoneを返す
@@ -249,9 +296,7 @@ class OptimizedPlacesAPIIntegration:
         self._request_cache[place_id] = (data, datetime.now())
 
     def _fetch_from_api_optimized(self, place_id: str) -> Optional[PlaceData]:
-        """最適化されたAPI呼び出し"""
-        self._ensure_session()
-
+        """最適化されたAPI呼び出し（同期・ワーカースレッドで実行される）"""
         if self.api_adapter is None:
             # モックデータを返す
             return self._create_mock_place_data(place_id)
@@ -300,12 +345,9 @@ class OptimizedPlacesAPIIntegration:
             if not self.cache_service:
                 return None
 
-            cached_result = await self.cache_service.get(key)
-            if cached_result and hasattr(cached_result, 'hit') and cached_result.hit and hasattr(cached_result, 'data') and cached_result.data:
-                # PlaceDataオブジェクトに変換
-                if isinstance(cached_result.data, dict):
-                    return PlaceData(**cached_result.data)
-                return cached_result.data
+            cached_data = await self.cache_service.get(key)
+            if isinstance(cached_data, dict) and cached_data:
+                return PlaceData(**cached_data)
 
             return None
 
@@ -320,7 +362,7 @@ class OptimizedPlacesAPIIntegration:
                 return
 
             # PlaceDataを辞書に変換
-            data_dict = data.__dict__ if hasattr(data, '__dict__') else {}
+            data_dict = dict(data) if isinstance(data, dict) else asdict(data)
 
             await self.cache_service.set(
                 key=key,
@@ -373,6 +415,11 @@ class OptimizedPlacesAPIIntegration:
             self.logger.error(f"CID API呼び出しエラー: {cid}, {e}")
             return None
 
+    @staticmethod
+    def _place_cache_key(place_id: str) -> str:
+        """Place詳細のキャッシュキー（CacheService / ウォームアップと共通）"""
+        return f"places:details:{place_id}"
+
     def _create_mock_place_data(self, place_id: str) -> PlaceData:
         """モックPlaceDataを作成"""
         return {
@@ -392,7 +439,8 @@ class OptimizedPlacesAPIIntegration:
             "cache_available": self.cache_service is not None,
             "api_adapter_available": self.api_adapter is not None,
             "api_adapter_status": "initialized" if self.api_adapter else "mock_mode",
-            "background_tasks_count": len(self._background_tasks)
+            "background_tasks_count": len(self._background_tasks),
+            "fetch_counts": dict(self._fetch_counts)
         }
 
     async def cleanup(self) -> None:
@@ -407,11 +455,14 @@ class OptimizedPlacesAPIIntegration:
             await self._session.close()
             self._session = None
 
+        self._connection_pool.close()
+
 
 # ファクトリ関数
 def create_api_integration(
     api_key: str,
     cache_service: Optional[CacheService] = None,
+    rate_limiter: Optional[DistributedRateLimiter] = None,
     **config_overrides
 ) -> OptimizedPlacesAPIIntegration:
     """API統合サービスのファクトリ関数"""
@@ -423,7 +474,8 @@ def create_api_integration(
 
     return OptimizedPlacesAPIIntegration(
         config=config,
-        cache_service=cache_service
+        cache_service=cache_service,
+        rate_limiter=rate_limiter
     )
 
 
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Async Instrumentation - 非同期処理の計装
+
+非同期モードが遅いときに、原因がイベントループ・スレッドプール・APIの
+どこにあるかを切り分けるための計装。結果はPerformanceMonitorへ記録する。
+
+- イベントループ遅延: 一定間隔のsleepが予定よりどれだけ遅れて起きたか
+- エグゼキューター: 投入から実行開始までの待ち時間と実行時間、待ち行列の深さ
+- 遅いコールバック: 遅延が閾値を超えたサンプル（任意でasyncioデバッグモードの
+  "Executing <Handle> took N seconds" を捕捉してコールバック名も記録）
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple
+
+from shared.logger import get_logger
+from shared.performance_monitor import PerformanceMonitor
+
+
+# PerformanceMonitorに記録する操作名
+LOOP_LAG_METRIC = "event_loop.lag"
+SLOW_CALLBACK_METRIC = "event_loop.slow_callback"
+EXECUTOR_QUEUE_WAIT_METRIC = "executor.queue_wait"
+EXECUTOR_RUN_METRIC = "executor.run"
+EXECUTOR_QUEUE_DEPTH_METRIC = "executor.queue_depth"
+
+
+@dataclass(slots=True)
+class InstrumentationConfig:
+    """計装設定"""
+    lag_interval: float = 0.5              # ループ遅延のサンプリング間隔（秒）
+    slow_callback_threshold: float = 0.1   # 遅いコールバックとみなす遅延（秒）
+    capture_slow_callbacks: bool = False   # asyncioデバッグモードでコールバック名を捕捉
+    executor_max_workers: Optional[int] = None  # Noneの場合はThreadPoolExecutorの既定値
+    recent_samples: int = 200              # パーセンタイル計算用に保持するサンプル数
+
+
+class InstrumentedThreadPoolExecutor(ThreadPoolExecutor):
+    """待ち時間・実行時間・待ち行列の深さを記録するThreadPoolExecutor"""
+
+    def __init__(
+        self,
+        monitor: PerformanceMonitor,
+        max_workers: Optional[int] = None,
+        thread_name_prefix: str = "InstrumentedExecutor",
+        recent_samples: int = 200
+    ):
+        super().__init__(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._monitor = monitor
+        self._stats_lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._max_pending = 0
+        self._completed = 0
+        self._recent_waits: Deque[float] = deque(maxlen=recent_samples)
+        self._recent_runs: Deque[float] = deque(maxlen=recent_samples)
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        """計測用のラッパーを挟んで投入"""
+        submitted_at = time.perf_counter()
+        started = False
+
+        with self._stats_lock:
+            self._pending += 1
+            self._max_pending = max(self._max_pending, self._pending)
+            depth = self._pending
+        self._monitor.record_metric(EXECUTOR_QUEUE_DEPTH_METRIC, depth)
+
+        def run() -> Any:
+            nonlocal started
+            started_at = time.perf_counter()
+            wait = started_at - submitted_at
+            with self._stats_lock:
+                started = True
+                self._pending -= 1
+                self._running += 1
+                self._recent_waits.append(wait)
+            self._monitor.record_timing(EXECUTOR_QUEUE_WAIT_METRIC, wait)
+
+            success = True
+            try:
+                return fn(*args, **kwargs)
+            except BaseException:
+                success = False
+                raise
+            finally:
+                duration = time.perf_counter() - started_at
+                with self._stats_lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._recent_runs.append(duration)
+                self._monitor.record_timing(EXECUTOR_RUN_METRIC, duration, success)
+
+        def on_done(future: Future) -> None:
+            # 開始前にキャンセルされた分は待ち行列から外す
+            with self._stats_lock:
+                if not started and future.cancelled():
+                    self._pending -= 1
+
+        future = super().submit(run)
+        future.add_done_callback(on_done)
+        return future
+
+    def get_stats(self) -> Dict[str, Any]:
+        """エグゼキューター統計を取得"""
+        with self._stats_lock:
+            waits = list(self._recent_waits)
+            runs = list(self._recent_runs)
+            return {
+                "max_workers": self._max_workers,
+                "queue_depth": self._pending,
+                "max_queue_depth": self._max_pending,
+                "running": self._running,
+                "completed": self._completed,
+                "queue_wait_avg": _mean(waits),
+                "queue_wait_p95": _percentile(waits, 95),
+                "run_time_avg": _mean(runs),
+                "run_time_p95": _percentile(runs, 95)
+            }
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """asyncioデバッグモードの遅いコールバック警告を捕捉するハンドラー"""
+
+    def __init__(self, instrumentation: 'AsyncInstrumentation'):
+        super().__init__(level=logging.WARNING)
+        self._instrumentation = instrumentation
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if not isinstance(record.msg, str) or not record.msg.startswith('Executing'):
+            return
+        if not isinstance(record.args, tuple) or len(record.args) != 2:
+            return
+        handle, duration = record.args
+        if not isinstance(duration, (int, float)):
+            return
+        self._instrumentation.record_slow_callback(float(duration), str(handle))
+
+
+class AsyncInstrumentation:
+    """イベントループとデフォルトエグゼキューターの計装"""
+
+    def __init__(
+        self,
+        monitor: PerformanceMonitor,
+        config: Optional[InstrumentationConfig] = None
+    ):
+        self._monitor = monitor
+        self._config = config or InstrumentationConfig()
+        self._logger = get_logger("AsyncInstrumentation")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sampler: Optional[asyncio.Task] = None
+        self._executor: Optional[InstrumentedThreadPoolExecutor] = None
+        self._previous_executor: Optional[ThreadPoolExecutor] = None
+        self._slow_callback_handler: Optional[_SlowCallbackHandler] = None
+        self._recent_lags: Deque[float] = deque(maxlen=self._config.recent_samples)
+        self._slow_callbacks: Deque[Tuple[float, float, Optional[str]]] = deque(maxlen=20)
+        self._slow_callback_count = 0
+
+    @property
+    def executor(self) -> Optional[InstrumentedThreadPoolExecutor]:
+        """ループに設定した計装付きエグゼキューター"""
+        return self._executor
+
+    @property
+    def running(self) -> bool:
+        """遅延サンプリング中かどうか"""
+        return self._sampler is not None and not self._sampler.done()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """計装を開始（実行中のイベントループ上で呼ぶ）"""
+        loop = loop or asyncio.get_running_loop()
+        if self.running and self._loop is loop:
+            return
+
+        self._loop = loop
+
+        # run_in_executor(None, ...) / asyncio.to_thread が使うデフォルトエグゼキューターを差し替え。
+        # 既に作成済みのもの（to_thread の初回呼び出し等）は stop() で戻す。
+        # 元が無い場合はループ終了時にasyncio.runがshutdown_default_executorで後始末する。
+        current = getattr(loop, '_default_executor', None)
+        if self._executor is None or current is not self._executor:
+            self._previous_executor = current
+            self._executor = InstrumentedThreadPoolExecutor(
+                self._monitor,
+                max_workers=self._config.executor_max_workers,
+                recent_samples=self._config.recent_samples
+            )
+            loop.set_default_executor(self._executor)
+
+        if self._config.capture_slow_callbacks and self._slow_callback_handler is None:
+            loop.slow_callback_duration = self._config.slow_callback_threshold
+            loop.set_debug(True)
+            self._slow_callback_handler = _SlowCallbackHandler(self)
+            logging.getLogger('asyncio').addHandler(self._slow_callback_handler)
+
+        self._sampler = loop.create_task(self._sample_loop_lag())
+        self._logger.debug("非同期計装開始",
+                          lag_interval=self._config.lag_interval,
+                          capture_slow_callbacks=self._config.capture_slow_callbacks)
+
+    async def stop(self) -> None:
+        """遅延サンプリングを停止
+
+        差し替え前のデフォルトエグゼキューターがあれば戻し、計装付きエグゼキューターは
+        実行中の処理を待たずに終了させる。元が無かった場合はループ終了まで計測を続ける。
+        """
+        if self._sampler is not None:
+            self._sampler.cancel()
+            try:
+                await self._sampler
+            except asyncio.CancelledError:
+                pass
+            self._sampler = None
+
+        if self._slow_callback_handler is not None:
+            logging.getLogger('asyncio').removeHandler(self._slow_callback_handler)
+            self._slow_callback_handler = None
+            if self._loop is not None:
+                self._loop.set_debug(False)
+
+        if (
+            self._previous_executor is not None
+            and self._loop is not None
+            and getattr(self._loop, '_default_executor', None) is self._executor
+        ):
+            self._loop.set_default_executor(self._previous_executor)
+            self._previous_executor = None
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+
+    async def _sample_loop_lag(self) -> None:
+        """sleepの予定時刻からの遅れをイベントループ遅延として記録"""
+        loop = asyncio.get_running_loop()
+        interval = self._config.lag_interval
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            self.record_lag(max(0.0, loop.time() - expected))
+
+    def record_lag(self, lag: float) -> None:
+        """ループ遅延サンプルを記録"""
+        threshold = self._config.slow_callback_threshold
+        self._recent_lags.append(lag)
+        self._monitor.record_timing(LOOP_LAG_METRIC, lag, lag < threshold)
+        if lag >= threshold and self._slow_callback_handler is None:
+            # デバッグモードでない場合は遅延からのみ検出（コールバック名は不明）
+            self.record_slow_callback(lag)
+
+    def record_slow_callback(self, duration: float, callback: Optional[str] = None) -> None:
+        """遅いコールバックを記録"""
+        self._slow_callback_count += 1
+        self._slow_callbacks.append((time.time(), duration, callback))
+        self._monitor.record_timing(SLOW_CALLBACK_METRIC, duration, False)
+        self._logger.warning("遅いイベントループコールバックを検出",
+                            duration=round(duration, 3), callback=callback)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """計装統計と、非同期処理の時間がどこで使われているかの診断"""
+        lags = list(self._recent_lags)
+        executor_stats = self._executor.get_stats() if self._executor else None
+
+        stats = {
+            "running": self.running,
+            "event_loop": {
+                "samples": len(lags),
+                "lag_avg": _mean(lags),
+                "lag_p95": _percentile(lags, 95),
+                "lag_max": max(lags) if lags else 0.0,
+                "slow_callbacks": self._slow_callback_count,
+                "recent_slow_callbacks": [
+                    {"timestamp": ts, "duration": duration, "callback": callback}
+                    for ts, duration, callback in self._slow_callbacks
+                ]
+            },
+            "executor": executor_stats
+        }
+        stats["bottleneck"] = self._diagnose(stats)
+        return stats
+
+    def _diagnose(self, stats: Dict[str, Any]) -> str:
+        """主なボトルネックを判定
+
+        - event_loop: ループ遅延のp95が閾値以上（ブロッキング処理がループ上にある）
+        - executor_queue: スレッド待ち時間が実行時間の半分以上（ワーカー不足）
+        - api: 上記以外で実行時間が支配的（API応答待ち）
+        """
+        loop_stats = stats["event_loop"]
+        executor_stats = stats["executor"]
+
+        if loop_stats["samples"] and loop_stats["lag_p95"] >= self._config.slow_callback_threshold:
+            return "event_loop"
+        if executor_stats and executor_stats["completed"]:
+            wait_floor = max(0.01, executor_stats["run_time_avg"] * 0.5)
+            if executor_stats["queue_wait_avg"] >= wait_floor:
+                return "executor_queue"
+            return "api"
+        return "unknown"
+
+
+def _mean(values: Sequence[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+
+def _percentile(values: Sequence[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = int((percentile / 100.0) * len(ordered))
+    return float(ordered[min(index, len(ordered) - 1)])
@@ -16,7 +16,11 @@ Performance optimizations:
 import asyncio
 import aiohttp
 import time
-from typing import List, Dict, Any, Optional, Callable, Tuple, AsyncGenerator, Type
+from typing import (
+    List, Dict, Any, Optional, Callable, Tuple, AsyncGenerator, AsyncIterable,
+    AsyncIterator, Iterable, Type, Union
+)
+from contextlib import aclosing
 from dataclasses import dataclass
 from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
@@ -27,7 +31,11 @@ import gc
 
 from shared.logger import get_logger
 from shared.error_handler import ErrorHandler
+from shared.async_instrumentation import AsyncInstrumentation, InstrumentationConfig
+from shared.deadline import Deadline, get_current_deadline
+from shared.exceptions import DeadlineExceededError, is_throttling_error
 from shared.performance_monitor import PerformanceMonitor
+from shared.retry_policy import RetryPolicyEngine, create_default_retry_engine
 
 
 class ProcessingState(Enum):
@@ -51,6 +59,17 @@ class OptimizedBatchConfig:
     connection_pool_size: int = 50    # 接続プール最適化
     adaptive_batch_size: bool = True  # 動的バッチサイズ調整
     circuit_breaker_threshold: int = 5  # サーキットブレーカー閾値
+    scheduling_mode: str = "batch"    # "batch": 固定バッチ / "continuous": ワーカーキュー
+    ordered_results: bool = True      # continuous時に入力順で結果を返すか
+    requests_per_second: float = 0.0  # continuous時のレート上限（0=無制限）
+    adaptive_concurrency: bool = False  # レイテンシ・429/5xxに応じた同時実行数の自動調整
+    min_concurrent: int = 1           # 自動調整時の下限
+    max_concurrent_limit: int = 0     # 自動調整時の上限（0=max_concurrentの2倍）
+    stream_buffer_size: int = 0       # ストリーミング時のキュー上限（0=同時実行上限の2倍）
+    retry_max_delay: float = 30.0     # バックオフ・Retry-After待機の上限（秒）
+    retry_budget_ratio: float = 0.2   # リクエストあたりに許すリトライ数（0=予算無し）
+    instrumentation: bool = False     # イベントループ遅延・エグゼキューター待ち時間の計測
+    slow_callback_threshold: float = 0.1  # 遅いコールバックとみなすループ遅延（秒）
 
 
 @dataclass(slots=True)  # Memory optimization
@@ -132,19 +151,203 @@ class CircuitBreaker:
         return False
 
 
+class AsyncRateLimiter:
+    """非同期レートリミッター（リクエスト開始間隔を均等化）"""
+
+    __slots__ = ('_interval', '_next_slot')
+
+    def __init__(self, requests_per_second: float = 0.0):
+        self._interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        """次の実行枠まで待機"""
+        if self._interval <= 0:
+            return
+
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self._interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class AdaptiveConcurrencyLimiter:
+    """適応的同時実行数リミッター（AIMD + レイテンシ勾配）
+
+    - 429/5xx: 同時実行数を乗算的に削減（backoff_factor倍）
+    - 平滑化レイテンシが基準レイテンシのlatency_tolerance倍を超過: 緩やかに削減
+    - 健全時: 現在の上限分の成功ごとに+1（加算的増加）
+
+    基準レイテンシは直近baseline_window件の下位パーセンタイル。
+    min_sample_latency 未満の完了（ネガティブキャッシュによるスキップ、空クエリ等の
+    APIを呼んでいない処理）は記録しない。
+    """
+
+    __slots__ = (
+        '_min_limit', '_max_limit', '_limit', '_in_flight', '_waiters',
+        '_latency_tolerance', '_backoff_factor', '_smoothing',
+        '_min_sample_latency', '_baseline_percentile', '_latencies',
+        '_ewma_latency', '_successes_since_increase',
+        '_throttle_count', '_decisions'
+    )
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        latency_tolerance: float = 2.0,
+        backoff_factor: float = 0.5,
+        smoothing: float = 0.2,
+        min_sample_latency: float = 0.005,
+        baseline_window: int = 50,
+        baseline_percentile: float = 0.1
+    ):
+        self._min_limit = max(1, min_limit)
+        self._max_limit = max(self._min_limit, max_limit)
+        self._limit = float(min(max(initial_limit, self._min_limit), self._max_limit))
+        self._in_flight = 0
+        self._waiters: deque = deque()
+        self._latency_tolerance = latency_tolerance
+        self._backoff_factor = backoff_factor
+        self._smoothing = smoothing
+        self._min_sample_latency = min_sample_latency
+        self._baseline_percentile = baseline_percentile
+        self._latencies: deque = deque(maxlen=baseline_window)
+        self._ewma_latency: Optional[float] = None
+        self._successes_since_increase = 0
+        self._throttle_count = 0
+        self._decisions: deque = deque(maxlen=20)
+
+    @property
+    def limit(self) -> int:
+        """現在の同時実行上限"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """実行中のリクエスト数"""
+        return self._in_flight
+
+    @property
+    def baseline_latency(self) -> Optional[float]:
+        """基準レイテンシ（直近ウィンドウの下位パーセンタイル）"""
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(self._baseline_percentile * (len(ordered) - 1))]
+
+    async def acquire(self) -> None:
+        """実行枠を取得（上限到達時は待機）"""
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            return
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        """実行枠を返却"""
+        self._in_flight = max(0, self._in_flight - 1)
+        self._wake_waiters()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+    def record(self, latency: float, throttled: bool = False) -> None:
+        """リクエスト結果を記録して上限を調整"""
+        if throttled:
+            self._throttle_count += 1
+            self._adjust(self._limit * self._backoff_factor, "throttled")
+            return
+
+        if latency < self._min_sample_latency:
+            # APIを呼んでいない即時完了は基準・平滑化・増加判定のいずれにも使わない
+            return
+
+        self._latencies.append(latency)
+        if self._ewma_latency is None:
+            self._ewma_latency = latency
+        else:
+            self._ewma_latency += (latency - self._ewma_latency) * self._smoothing
+
+        if self._ewma_latency > self.baseline_latency * self._latency_tolerance:
+            self._adjust(self._limit * 0.9, "latency_gradient")
+            return
+
+        self._successes_since_increase += 1
+        if self._successes_since_increase >= self.limit:
+            self._adjust(self._limit + 1, "healthy")
+
+    def _adjust(self, new_limit: float, reason: str) -> None:
+        """上限を更新し、変化があれば記録"""
+        new_limit = min(max(new_limit, self._min_limit), self._max_limit)
+        old_limit = self.limit
+        self._limit = new_limit
+        self._successes_since_increase = 0
+
+        if self.limit != old_limit:
+            self._decisions.append({
+                "timestamp": time.time(),
+                "reason": reason,
+                "from": old_limit,
+                "to": self.limit
+            })
+        self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        """空き枠の分だけ待機中のリクエストを再開"""
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """リミッター統計"""
+        return {
+            "mode": "adaptive",
+            "limit": self.limit,
+            "min_limit": self._min_limit,
+            "max_limit": self._max_limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "baseline_latency": self.baseline_latency,
+            "ewma_latency": self._ewma_latency,
+            "throttle_count": self._throttle_count,
+            "recent_decisions": list(self._decisions)
+        }
+
+
 class OptimizedAsyncProcessor:
     """非同期処理システム - 高性能最適化版"""
 
     __slots__ = (
         '_component_name', '_logger', '_config', '_error_handler',
         '_performance_monitor', '_session', '_executor', '_semaphore',
-        '_circuit_breaker', '_batch_performance_history', '_weak_refs'
+        '_circuit_breaker', '_batch_performance_history', '_weak_refs',
+        '_rate_limiter', '_concurrency_limiter', '_retry_engine', '_instrumentation'
     )
 
     def __init__(
         self,
         component_name: str = "OptimizedAsyncProcessor",
-        config: Optional[OptimizedBatchConfig] = None
+        config: Optional[OptimizedBatchConfig] = None,
+        retry_engine: Optional[RetryPolicyEngine] = None
     ):
         """OptimizedAsyncProcessor初期化"""
         self._component_name = component_name
@@ -155,6 +358,29 @@ class OptimizedAsyncProcessor:
 
         # 同時実行制御
         self._semaphore = asyncio.Semaphore(self._config.max_concurrent)
+        self._rate_limiter = AsyncRateLimiter(self._config.requests_per_second)
+        self._concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        if self._config.adaptive_concurrency:
+            self._concurrency_limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=self._config.max_concurrent,
+                min_limit=self._config.min_concurrent,
+                max_limit=self._max_concurrency()
+            )
+
+        # 例外クラス別リトライポリシー
+        self._retry_engine = retry_engine or create_default_retry_engine(
+            base_delay=self._config.retry_delay,
+            max_delay=self._config.retry_max_delay,
+            budget_ratio=self._config.retry_budget_ratio
+        )
+
+        # イベントループ・エグゼキューター計装（__aenter__で開始）
+        self._instrumentation: Optional[AsyncInstrumentation] = None
+        if self._config.instrumentation:
+            self._instrumentation = AsyncInstrumentation(
+                self._performance_monitor,
+                InstrumentationConfig(slow_callback_threshold=self._config.slow_callback_threshold)
+            )
 
         # セッション管理
         self._session: Optional[aiohttp.ClientSession] = None
@@ -174,13 +400,23 @@ class OptimizedAsyncProcessor:
         # 弱参照管理
         self._weak_refs: List[weakref.ref] = []
 
+    def _max_concurrency(self) -> int:
+        """同時実行数の上限（自動調整時は調整上限）"""
+        if not self._config.adaptive_concurrency:
+            return self._config.max_concurrent
+        return self._config.max_concurrent_limit or self._config.max_concurrent * 2
+
     async def __aenter__(self):
         """非同期コンテキストマネージャー開始"""
         self._create_session()
+        if self._instrumentation:
+            self._instrumentation.start()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """非同期コンテキストマネージャー終了"""
+        if self._instrumentation:
+            await self._instrumentation.stop()
         await self._close_session()
         self._executor.shutdown(wait=True)
 
@@ -265,11 +501,22 @@ class OptimizedAsyncProcessor:
         progress_callback: Optional[Callable[[int, int], None]]
     ) -> Tuple[List[Any], int]:
         """バッチ処理実行"""
+        if self._config.scheduling_mode == "continuous":
+            return await self._execute_continuous_processing(
+                items, processor_func, progress_callback
+            )
+
         results = []
         successful_count = 0
         total_items = len(items)
+        deadline = get_current_deadline()
 
         for i in range(0, total_items, batch_size):
+            if deadline is not None and deadline.expired:
+                # 期限切れ以降のアイテムは処理せずキャンセル扱い
+                results.extend(self._cancelled_result(deadline) for _ in items[i:])
+                break
+
             batch = items[i:i + batch_size]
             batch_results, batch_success = await self._process_single_batch(
                 batch, processor_func
@@ -288,6 +535,43 @@ class OptimizedAsyncProcessor:
 
         return results, successful_count
 
+    async def _execute_continuous_processing(
+        self,
+        items: List[Any],
+        processor_func: Callable,
+        progress_callback: Optional[Callable[[int, int], None]]
+    ) -> Tuple[List[Any], int]:
+        """ワーカーキューによる連続処理
+
+        ワーカーがキューから順次取り出して処理するため、遅いアイテムが
+        他の実行枠を塞がない。スループットはレートリミッターで制御する。
+        """
+        total_items = len(items)
+        if total_items == 0:
+            return [], 0
+
+        ordered = self._config.ordered_results
+        results: List[Any] = [None] * total_items if ordered else []
+        completed = 0
+        successful_count = 0
+
+        # キューは stream_buffer_size で頭打ち（入力リスト自体は呼び出し側が保持している）
+        stream = self.process_stream_optimized(items, processor_func)
+        async with aclosing(stream):
+            async for result in stream:
+                if ordered:
+                    results[result.metadata['index']] = result
+                else:
+                    results.append(result)
+
+                completed += 1
+                if result.success:
+                    successful_count += 1
+                if progress_callback:
+                    progress_callback(completed, total_items)
+
+        return results, successful_count
+
     async def _process_single_batch(
         self,
         batch: List[Any],
@@ -360,17 +644,22 @@ class OptimizedAsyncProcessor:
                 state=ProcessingState.FAILED
             )
 
-        async with self._semaphore:
+        async with self._concurrency_limiter or self._semaphore:
             start_time = time.perf_counter()
             retry_count = 0
             last_exception = None
+            deadline = get_current_deadline()
+            self._retry_engine.record_request()
 
             for attempt in range(self._config.retry_attempts):
+                attempt_start = time.perf_counter()
                 try:
                     with self._performance_monitor.measure_time(f"process_item_{type(item).__name__}"):
-                        result = await processor_func(item)
+                        result = await self._call_with_deadline(processor_func, item, deadline)
 
                     end_time = time.perf_counter()
+                    if self._concurrency_limiter:
+                        self._concurrency_limiter.record(end_time - attempt_start)
                     duration = end_time - start_time
 
                     return ProcessingResult(
@@ -384,12 +673,23 @@ class OptimizedAsyncProcessor:
                 except Exception as e:
                     last_exception = e
                     retry_count += 1
+                    if self._concurrency_limiter and is_throttling_error(e):
+                        self._concurrency_limiter.record(
+                            time.perf_counter() - attempt_start, throttled=True
+                        )
                     self._logger.warning(f"処理エラー (試行 {attempt + 1}/{self._config.retry_attempts}): {e}")
 
-                    if attempt < self._config.retry_attempts - 1:
-                        # 指数バックオフでリトライ
-                        delay = self._config.retry_delay * (2 ** attempt)
-                        await asyncio.sleep(delay)
+                    if attempt >= self._config.retry_attempts - 1:
+                        break
+
+                    # 例外クラス別ポリシーとリトライ予算で待機時間を決定
+                    delay = self._retry_engine.next_delay(e, attempt)
+                    if delay is None:
+                        break
+                    if deadline is not None and delay >= deadline.remaining():
+                        # 待機中に期限が切れるリトライは行わない
+                        break
+                    await asyncio.sleep(delay)
 
             # すべてのリトライが失敗
             end_time = time.perf_counter()
@@ -400,9 +700,39 @@ class OptimizedAsyncProcessor:
                 error=last_exception,
                 duration=duration,
                 retry_count=retry_count,
-                state=ProcessingState.FAILED
+                state=(
+                    ProcessingState.CANCELLED
+                    if isinstance(last_exception, DeadlineExceededError)
+                    else ProcessingState.FAILED
+                )
             )
 
+    @staticmethod
+    async def _call_with_deadline(
+        processor_func: Callable,
+        item: Any,
+        deadline: Optional[Deadline]
+    ) -> Any:
+        """実行期限がある場合は残り時間をタイムアウトとして呼び出す"""
+        if deadline is None:
+            return await processor_func(item)
+
+        try:
+            return await asyncio.wait_for(processor_func(item), timeout=deadline.timeout())
+        except asyncio.TimeoutError:
+            if deadline.expired:
+                raise DeadlineExceededError(deadline_seconds=deadline.total) from None
+            raise
+
+    @staticmethod
+    def _cancelled_result(deadline: Deadline) -> ProcessingResult:
+        """期限切れで処理しなかったアイテムの結果"""
+        return ProcessingResult(
+            success=False,
+            error=DeadlineExceededError(deadline_seconds=deadline.total),
+            state=ProcessingState.CANCELLED
+        )
+
     def _calculate_optimal_batch_size(self) -> int:
         """パフォーマンス履歴に基づく最適バッチサイズ計算"""
         if not self._config.adaptive_batch_size or not self._batch_performance_history:
@@ -440,49 +770,91 @@ class OptimizedAsyncProcessor:
 
     async def process_stream_optimized(
         self,
-        items: List[Any],
+        items: Union[Iterable[Any], AsyncIterable[Any]],
         processor_func: Callable,
-        batch_size: Optional[int] = None
+        buffer_size: Optional[int] = None
     ) -> AsyncGenerator[ProcessingResult, None]:
-        """ストリーミング処理 - メモリ効率最適化版"""
-
-        batch_size = batch_size or self._config.batch_size
-        semaphore = asyncio.Semaphore(self._config.max_concurrent)
-
-        for i in range(0, len(items), batch_size):
-            batch = items[i:i + batch_size]
-
-            async def process_item(item):
-                async with semaphore:
+        """ストリーミング処理 - 有界バッファによるバックプレッシャー付き
+
+        入力は同期/非同期イテラブルのどちらでもよく、全件をメモリに載せない。
+        入力→ワーカー→呼び出し側の各キューはbuffer_size（省略時はstream_buffer_size）
+        件で頭打ちになり、呼び出し側の消費が遅ければ入力の読み出しも止まる。
+        バッチ分割は行わないため、buffer_size はキューの上限件数のみを意味する。
+        結果は完了順に返し、metadata['index'] / metadata['item'] で入力と対応付ける。
+        """
+        buffer_size = max(
+            1, buffer_size or self._config.stream_buffer_size or self._max_concurrency() * 2
+        )
+        worker_count = self._max_concurrency()
+        input_queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        output_queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        done = object()
+        producer_errors: List[Exception] = []
+
+        async def produce() -> None:
+            try:
+                index = 0
+                async for item in self._iterate(items):
+                    await input_queue.put((index, item))
+                    index += 1
+            except Exception as e:
+                producer_errors.append(e)
+
+            for _ in range(worker_count):
+                await input_queue.put(done)
+
+        async def work() -> None:
+            while True:
+                entry = await input_queue.get()
+                if entry is done:
+                    break
+
+                index, item = entry
+                deadline = get_current_deadline()
+                if deadline is not None and deadline.expired:
+                    # 期限切れ後は残りを呼び出さずに流し切る
+                    result = self._cancelled_result(deadline)
+                else:
+                    await self._rate_limiter.acquire()
                     try:
-                        result = await processor_func(item)
-                        return ProcessingResult(
-                            success=True,
-                            data=result,
-                            state=ProcessingState.COMPLETED
-                        )
+                        result = await self._process_single_item_with_circuit_breaker(item, processor_func)
                     except Exception as e:
-                        return ProcessingResult(
-                            success=False,
-                            error=e,
-                            state=ProcessingState.FAILED
-                        )
-
-            # バッチ処理
-            tasks = [process_item(item) for item in batch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            for result in results:
-                if isinstance(result, ProcessingResult):
-                    yield result
-                else:
-                    # BaseException → Exception 型修正
-                    error = result if isinstance(result, Exception) else Exception(str(result))
-                    yield ProcessingResult(
-                        success=False,
-                        error=error,
-                        state=ProcessingState.FAILED
-                    )
+                        result = ProcessingResult(success=False, error=e, state=ProcessingState.FAILED)
+
+                result.metadata['index'] = index
+                result.metadata['item'] = item
+                await output_queue.put(result)
+
+            await output_queue.put(done)
+
+        tasks = [asyncio.create_task(produce())]
+        tasks.extend(asyncio.create_task(work()) for _ in range(worker_count))
+        try:
+            finished_workers = 0
+            while finished_workers < worker_count:
+                result = await output_queue.get()
+                if result is done:
+                    finished_workers += 1
+                    continue
+                yield result
+
+            if producer_errors:
+                raise producer_errors[0]
+        finally:
+            # 途中で消費をやめた場合も残タスクを確実に止める
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    async def _iterate(items: Union[Iterable[Any], AsyncIterable[Any]]) -> AsyncIterator[Any]:
+        """同期/非同期イテラブルを非同期イテレータとして走査"""
+        if hasattr(items, '__aiter__'):
+            async for item in items:
+                yield item
+        else:
+            for item in items:
+                yield item
 
     async def parallel_execute(
         self,
@@ -556,12 +928,20 @@ class OptimizedAsyncProcessor:
             "config": {
                 "batch_size": self._config.batch_size,
                 "max_concurrent": self._config.max_concurrent,
-                "adaptive_batch_size": self._config.adaptive_batch_size
+                "adaptive_batch_size": self._config.adaptive_batch_size,
+                "scheduling_mode": self._config.scheduling_mode,
+                "requests_per_second": self._config.requests_per_second
             },
             "circuit_breaker": {
                 "is_open": self._circuit_breaker.is_open,
                 "failure_count": self._circuit_breaker.failure_count
             },
+            "concurrency": (
+                self._concurrency_limiter.get_stats() if self._concurrency_limiter
+                else {"mode": "fixed", "limit": self._config.max_concurrent}
+            ),
+            "retry": self._retry_engine.get_stats(),
+            "instrumentation": self._instrumentation.get_stats() if self._instrumentation else None,
             "performance": {
                 "avg_throughput": avg_throughput,
                 "avg_success_rate": avg_success_rate,
@@ -600,6 +980,13 @@ class OptimizedAsyncProcessor:
         else:
             health_status["checks"]["executor"] = "active"
 
+        # 非同期計装（イベントループ遅延・スレッド待ち）
+        if self._instrumentation:
+            bottleneck = self._instrumentation.get_stats()["bottleneck"]
+            health_status["checks"]["async_bottleneck"] = bottleneck
+            if bottleneck in ("event_loop", "executor_queue") and health_status["status"] == "healthy":
+                health_status["status"] = "degraded"
+
         return health_status
 
 
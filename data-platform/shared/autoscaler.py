@@ -0,0 +1,481 @@
+"""
+Autoscaler - キュー滞留に基づくワーカープールの自動スケーリング
+
+ブローカーのキュー長、待ちタスクの最古経過時間（task-sent イベント）、
+Places APIレートリミッターの飽和度を定期的に観測し、キューごとの
+同時実行数を調整する。
+
+- 調整方法: 稼働中ワーカーへの pool_grow / pool_shrink ブロードキャスト
+  （prefork / gevent）、または単一ノードでのワーカープロセス数の増減。
+  実行中に変更できないプール（places_api の threads など）は pool モードでも
+  このノードで起動する追加ワーカープロセス数で調整する
+- ヒステリシス: 利用率が scale_up_threshold を超えたら増やし、
+  scale_down_threshold を連続して下回った場合だけ減らす
+- クールダウン: 増減それぞれ、前回の変更から一定時間は変更しない
+- 同時実行数が下限未満（ワーカー未起動を含む）のキューは下限以上へ拡大する
+- APIリミッターが飽和している間は places_api を増やさない（待つだけになるため）
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import os
+import signal
+import socket
+import subprocess
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .celery_config import QUEUE_POOLS, worker_command
+from .worker_telemetry import WorkerTelemetryStore
+
+
+# プール種別ごとの実行中サイズ変更可否（threads / solo は再起動が必要）
+RESIZABLE_POOLS = ('prefork', 'gevent')
+
+# places_api キューが消費するレート上限（PlacesAPIAdapter の Place Details SKU）
+PLACES_RATE_LIMIT_KEY = 'places:place_details'
+
+
+@dataclass(slots=True)
+class QueueScalingPolicy:
+    """キューごとの同時実行数の範囲"""
+    min_concurrency: int
+    max_concurrency: int
+    target_backlog_per_slot: float = 2.0    # 1スロットあたり許容する待ちタスク数
+    max_task_age: float = 60.0              # これより古い待ちタスクがあれば増やす（秒）
+
+
+def _default_policies() -> Dict[str, QueueScalingPolicy]:
+    return {
+        queue: QueueScalingPolicy(
+            min_concurrency=max(1, pool.concurrency // 2),
+            max_concurrency=pool.concurrency * 4
+        )
+        for queue, pool in QUEUE_POOLS.items()
+    }
+
+
+@dataclass
+class AutoscalerConfig:
+    """自動スケーリング設定"""
+    policies: Dict[str, QueueScalingPolicy] = field(default_factory=_default_policies)
+    interval: float = 15.0                  # 評価間隔（秒）
+    scale_up_threshold: float = 0.8         # 利用率がこれを超えたら増やす
+    scale_down_threshold: float = 0.3       # 利用率がこれを連続して下回ったら減らす
+    scale_down_stable_intervals: int = 4    # 縮小に必要な連続回数
+    scale_up_cooldown: float = 60.0         # 拡大後、次の変更までの時間（秒）
+    scale_down_cooldown: float = 300.0      # 縮小後、次の縮小までの時間（秒）
+    max_step: int = 16                      # 1回の変更量の上限
+    api_queues: Tuple[str, ...] = ('places_api',)
+    api_saturation_threshold: float = 0.9   # これ以上はAPI待ちのため増やさない
+    api_saturation_alpha: float = 0.3       # 飽和度EWMAの平滑化係数
+
+
+@dataclass(slots=True)
+class QueueSignals:
+    """キューの観測値"""
+    queue: str
+    depth: int                              # ブローカー上の待ちタスク数
+    in_flight: int                          # ワーカーが受信・実行中のタスク数
+    oldest_age: float                       # 最古の待ちタスクの経過時間（秒）
+    concurrency: int                        # 現在の同時実行数
+
+
+@dataclass(slots=True)
+class ScalingDecision:
+    """スケーリング判定"""
+    queue: str
+    current: int
+    target: int
+    reason: str
+    applied: bool = False
+
+
+class AutoscalingController:
+    """キュー滞留に基づくスケーリング判定と適用"""
+
+    def __init__(
+        self,
+        config: AutoscalerConfig,
+        scaler: Any,
+        signal_source: Any,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.config = config
+        self.scaler = scaler
+        self.signal_source = signal_source
+        self._clock = clock
+        self._last_change: Dict[str, float] = {}
+        self._last_scale_down: Dict[str, float] = {}
+        self._low_intervals: Dict[str, int] = defaultdict(int)
+        self.api_saturation = 0.0
+        self.history: List[ScalingDecision] = []
+        self._task: Optional[asyncio.Task] = None
+
+    # 判定
+
+    def evaluate(self, signals: Dict[str, QueueSignals], api_saturation: float = 0.0) -> List[ScalingDecision]:
+        """観測値からスケーリング判定（変更が必要なキューのみ返す）"""
+        config = self.config
+        self.api_saturation += config.api_saturation_alpha * (api_saturation - self.api_saturation)
+        now = self._clock()
+        decisions = []
+
+        for queue, observed in signals.items():
+            policy = config.policies.get(queue)
+            if policy is None:
+                continue
+
+            current = observed.concurrency
+            # 必要スロット数 = 実行中 + 許容滞留を超えた待ちタスク分
+            required = observed.in_flight + observed.depth / policy.target_backlog_per_slot
+            saturated = queue in config.api_queues and self.api_saturation >= config.api_saturation_threshold
+
+            if current < policy.min_concurrency:
+                # ワーカー未起動（local モードの初期状態）や停止で下限を割った場合は必ず拡大
+                if now - self._last_change.get(queue, -math.inf) >= config.scale_up_cooldown:
+                    target = policy.min_concurrency
+                    if not saturated:
+                        target = max(target, math.ceil(required / config.scale_up_threshold))
+                    decisions.append(
+                        ScalingDecision(queue, current, min(policy.max_concurrency, target), "below_min")
+                    )
+                continue
+
+            utilization = required / current
+            decision = None
+
+            if utilization > config.scale_up_threshold or observed.oldest_age > policy.max_task_age:
+                self._low_intervals[queue] = 0
+                if saturated:
+                    self.logger.debug(f"{queue}: APIリミッター飽和のため拡大を見送り")
+                elif now - self._last_change.get(queue, -math.inf) >= config.scale_up_cooldown:
+                    target = max(current + 1, math.ceil(required / config.scale_up_threshold))
+                    reason = "backlog" if utilization > config.scale_up_threshold else "task_age"
+                    decision = ScalingDecision(queue, current, min(target, current + config.max_step), reason)
+
+            elif utilization < config.scale_down_threshold:
+                self._low_intervals[queue] += 1
+                if (
+                    self._low_intervals[queue] >= config.scale_down_stable_intervals
+                    and now - self._last_change.get(queue, -math.inf) >= config.scale_up_cooldown
+                    and now - self._last_scale_down.get(queue, -math.inf) >= config.scale_down_cooldown
+                ):
+                    # 縮小後も拡大閾値を下回る大きさに留める（すぐに拡大し直さない）
+                    target = max(current - config.max_step, math.ceil(required / config.scale_up_threshold))
+                    decision = ScalingDecision(queue, current, target, "idle")
+            else:
+                self._low_intervals[queue] = 0
+
+            if decision is not None:
+                decision.target = max(policy.min_concurrency, min(policy.max_concurrency, decision.target))
+                if decision.target != current:
+                    decisions.append(decision)
+
+        return decisions
+
+    def _record(self, decision: ScalingDecision) -> None:
+        now = self._clock()
+        self._last_change[decision.queue] = now
+        if decision.target < decision.current:
+            self._last_scale_down[decision.queue] = now
+        self._low_intervals[decision.queue] = 0
+        self.history.append(decision)
+        del self.history[:-100]
+
+    # 実行
+
+    async def run_once(self) -> List[ScalingDecision]:
+        """観測・判定・適用を1回実行"""
+        signals, api_saturation = await asyncio.to_thread(self.signal_source.collect, self.scaler)
+        decisions = self.evaluate(signals, api_saturation)
+
+        for decision in decisions:
+            try:
+                decision.applied = await asyncio.to_thread(self.scaler.resize, decision.queue, decision.target)
+            except Exception as e:
+                self.logger.error(f"スケーリング適用エラー: {decision.queue}: {e}")
+                continue
+
+            if decision.applied:
+                self._record(decision)
+                self.logger.info(
+                    f"スケーリング: {decision.queue} {decision.current} -> {decision.target} ({decision.reason})"
+                )
+        return decisions
+
+    async def request_capacity(self, queue: str, additional: int) -> ScalingDecision:
+        """即時の拡大要求（クールダウンと上限は通常の判定と同じ）"""
+        policy = self.config.policies[queue]
+        current = await asyncio.to_thread(self.scaler.concurrency, queue)
+        decision = ScalingDecision(
+            queue, current, min(policy.max_concurrency, current + min(additional, self.config.max_step)), "requested"
+        )
+
+        recently_changed = self._clock() - self._last_change.get(queue, -math.inf) < self.config.scale_up_cooldown
+        if decision.target > current and not recently_changed:
+            decision.applied = await asyncio.to_thread(self.scaler.resize, queue, decision.target)
+            if decision.applied:
+                self._record(decision)
+        return decision
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """評価ループ開始（実行中のイベントループが必要）"""
+        if not self.running:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"自動スケーリング評価エラー: {e}")
+            await asyncio.sleep(self.config.interval)
+
+
+class BrokerSignalSource:
+    """ブローカー・イベント計測・レートリミッターからの観測"""
+
+    def __init__(
+        self,
+        app: Any,
+        telemetry: WorkerTelemetryStore,
+        queues: Optional[List[str]] = None,
+        rate_limiter: Optional[Any] = None,
+        rate_limit_key: str = PLACES_RATE_LIMIT_KEY
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.app = app
+        self.telemetry = telemetry
+        self.queues = queues or list(QUEUE_POOLS)
+        self.rate_limiter = rate_limiter
+        self.rate_limit_key = rate_limit_key
+
+    def collect(self, scaler: Any) -> Tuple[Dict[str, QueueSignals], float]:
+        depths = self.queue_depths()
+        backlog = self.telemetry.queue_backlog()
+
+        signals = {}
+        for queue in self.queues:
+            depth = depths.get(queue, 0)
+            if depth == 0:
+                # ブローカーが空なら取りこぼした送信イベントを破棄
+                self.telemetry.clear_pending(queue)
+            in_flight, oldest_age = backlog.get(queue, (0, 0.0))
+            signals[queue] = QueueSignals(
+                queue=queue,
+                depth=depth,
+                in_flight=in_flight,
+                oldest_age=oldest_age if depth else 0.0,
+                concurrency=scaler.concurrency(queue)
+            )
+
+        saturation = self.rate_limiter.saturation(self.rate_limit_key) if self.rate_limiter is not None else 0.0
+        return signals, saturation
+
+    def queue_depths(self) -> Dict[str, int]:
+        """キュー長（Redisでは優先度別キーの合計）"""
+        depths = {}
+        with self.app.connection_for_read() as connection:
+            channel = connection.default_channel
+            for queue in self.queues:
+                try:
+                    depths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+                except Exception as e:
+                    # 未作成のキュー（まだ一度も送信がない）
+                    self.logger.debug(f"キュー長取得エラー: {queue}: {e}")
+                    depths[queue] = 0
+        return depths
+
+
+class CeleryPoolScaler:
+    """稼働中ワーカーのプールを pool_grow / pool_shrink で調整
+
+    ワーカー名は worker_command と同じ `{queue}@host` を前提とし、
+    イベント計測でオンラインのワーカーに変更量を分配する。
+    pool_grow / pool_shrink に対応しないプールは process_scaler があれば
+    既存ワーカーに加えて起動する追加プロセス数で調整する。
+    """
+
+    def __init__(
+        self,
+        app: Any,
+        telemetry: WorkerTelemetryStore,
+        process_scaler: Optional["LocalProcessScaler"] = None
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.app = app
+        self.telemetry = telemetry
+        self.process_scaler = process_scaler
+        self._sizes: Dict[str, int] = {}  # ワーカー名 -> 同時実行数
+        self._unsupported: Set[str] = set()
+
+    def workers(self, queue: str) -> List[str]:
+        prefix = f"{queue}@"
+        return sorted(
+            hostname for hostname, worker in self.telemetry.snapshot().items()
+            if hostname.startswith(prefix) and worker.online
+        )
+
+    def concurrency(self, queue: str) -> int:
+        default = QUEUE_POOLS[queue].concurrency
+        if self._scales_by_process(queue):
+            return self._external_concurrency(queue) + self.process_scaler.concurrency(queue)
+        return sum(self._sizes.get(hostname, default) for hostname in self.workers(queue))
+
+    def resize(self, queue: str, target: int) -> bool:
+        if QUEUE_POOLS[queue].pool not in RESIZABLE_POOLS:
+            if self._scales_by_process(queue):
+                # 既存ワーカーで足りない分だけ追加プロセスを起動（不要になれば停止）
+                extra = max(0, target - self._external_concurrency(queue))
+                return self.process_scaler.resize(queue, extra, min_processes=0)
+            if queue not in self._unsupported:
+                self._unsupported.add(queue)
+                self.logger.warning(
+                    f"{queue}: {QUEUE_POOLS[queue].pool}プールは実行中に変更できません"
+                    f"（目標 {target}、AUTOSCALE_MODE=local でプロセス数を調整）"
+                )
+            return False
+
+        workers = self.workers(queue)
+        if not workers:
+            return False
+
+        default = QUEUE_POOLS[queue].concurrency
+        sizes = {hostname: self._sizes.get(hostname, default) for hostname in workers}
+        # 目標をワーカー間で均等に分配（各ワーカー最低1）
+        share, extra = divmod(max(target, len(workers)), len(workers))
+        for index, hostname in enumerate(workers):
+            desired = share + (1 if index < extra else 0)
+            delta = desired - sizes[hostname]
+            if delta > 0:
+                self.app.control.pool_grow(delta, destination=[hostname])
+            elif delta < 0:
+                self.app.control.pool_shrink(-delta, destination=[hostname])
+            self._sizes[hostname] = desired
+        return True
+
+    def _scales_by_process(self, queue: str) -> bool:
+        return self.process_scaler is not None and QUEUE_POOLS[queue].pool not in RESIZABLE_POOLS
+
+    def _external_concurrency(self, queue: str) -> int:
+        """process_scaler が起動したもの以外のワーカーの同時実行数"""
+        own = self.process_scaler.node_names(queue) if self.process_scaler is not None else set()
+        return QUEUE_POOLS[queue].concurrency * sum(1 for hostname in self.workers(queue) if hostname not in own)
+
+
+class LocalProcessScaler:
+    """単一ノードでキュー専用ワーカープロセスを起動・停止して調整"""
+
+    def __init__(
+        self,
+        app_path: str = 'shared.celery_config',
+        launcher: Callable[[List[str]], Any] = subprocess.Popen
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.app_path = app_path
+        self._launcher = launcher
+        self._processes: Dict[str, List[Tuple[Any, str]]] = defaultdict(list)  # キュー -> (プロセス, ワーカー名)
+        self._stopping: List[Tuple[Any, str]] = []  # warm shutdown 中（終了するまで自ノード扱い）
+        self._sequence = itertools.count(1)
+
+    def _alive(self, queue: str) -> List[Tuple[Any, str]]:
+        self._processes[queue] = [entry for entry in self._processes[queue] if entry[0].poll() is None]
+        return self._processes[queue]
+
+    def concurrency(self, queue: str) -> int:
+        return len(self._alive(queue)) * QUEUE_POOLS[queue].concurrency
+
+    def node_names(self, queue: str) -> Set[str]:
+        """起動したワーカーのノード名（イベント計測のhostnameと一致、停止処理中を含む）"""
+        self._stopping = [entry for entry in self._stopping if entry[0].poll() is None]
+        prefix = f"{queue}@"
+        return {name for _, name in self._alive(queue)} | {
+            name for _, name in self._stopping if name.startswith(prefix)
+        }
+
+    def resize(self, queue: str, target: int, min_processes: int = 1) -> bool:
+        processes = self._alive(queue)
+        desired = max(min_processes, math.ceil(target / QUEUE_POOLS[queue].concurrency))
+
+        while len(processes) < desired:
+            command = worker_command(queue, self.app_path)
+            # 同一ホストで名前が重複しないよう連番を付ける（`{queue}@` の接頭辞は維持）
+            name = f"{queue}@{socket.gethostname()}-{next(self._sequence)}"
+            command[command.index('-n') + 1] = name
+            processes.append((self._launcher(command), name))
+        while len(processes) > desired:
+            # 新しいものから warm shutdown（実行中タスクは完了させる）
+            process, name = processes.pop()
+            process.send_signal(signal.SIGTERM)
+            self._stopping.append((process, name))
+        return True
+
+    def shutdown(self) -> None:
+        for queue in list(self._processes):
+            for process, _ in self._alive(queue):
+                process.send_signal(signal.SIGTERM)
+            self._processes[queue] = []
+
+
+def create_autoscaler(
+    app: Any,
+    telemetry: WorkerTelemetryStore,
+    config: Optional[AutoscalerConfig] = None,
+    rate_limiter: Optional[Any] = None,
+    mode: Optional[str] = None
+) -> AutoscalingController:
+    """自動スケーラー作成（mode: 'pool'（既定）または 'local'、環境変数 AUTOSCALE_MODE）
+
+    rate_limiter 未指定時は RATE_LIMIT_REDIS_URL が設定されていれば
+    ワーカーと同じ分散レートリミッターのバケットを参照する。
+    """
+    config = config or AutoscalerConfig()
+    mode = mode or os.getenv('AUTOSCALE_MODE', 'pool')
+    if rate_limiter is None and os.getenv('RATE_LIMIT_REDIS_URL'):
+        from .distributed_rate_limiter import create_distributed_rate_limiter
+
+        rate_limiter = create_distributed_rate_limiter(
+            os.getenv('RATE_LIMIT_REDIS_URL'),
+            requests_per_second=float(os.getenv('RATE_LIMIT_PER_SECOND', '10.0'))
+        )
+    if mode == 'local':
+        scaler: Any = LocalProcessScaler()
+    else:
+        # threads プールの places_api などはこのノードの追加プロセスで調整
+        scaler = CeleryPoolScaler(app, telemetry, process_scaler=LocalProcessScaler())
+    source = BrokerSignalSource(app, telemetry, list(config.policies), rate_limiter)
+    return AutoscalingController(config, scaler, source)
+
+
+__all__ = [
+    'QueueScalingPolicy',
+    'AutoscalerConfig',
+    'QueueSignals',
+    'ScalingDecision',
+    'AutoscalingController',
+    'BrokerSignalSource',
+    'CeleryPoolScaler',
+    'LocalProcessScaler',
+    'create_autoscaler',
+]
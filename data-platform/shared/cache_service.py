@@ -5,12 +5,16 @@ High-performance distributed caching system for Google Places API data
 with intelligent TTL management and cache optimization.
 """
 
-from typing import Optional, Any, Dict, List
+from typing import Optional, Any, Dict, List, Set, Tuple
 import redis.asyncio as redis
+import asyncio
+import fnmatch
 import json
 import pickle
 import hashlib
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from .exceptions import CacheConnectionError
@@ -37,6 +41,8 @@ class CacheConfig:
     max_retries: int = 3
     retry_delay: float = 1.0
     compression_enabled: bool = True
+    max_connections: int = 50
+    invalidation_batch_size: int = 500  # タグ無効化時のUNLINKバッチサイズ
 
 
 class CacheService:
@@ -48,14 +54,18 @@ class CacheService:
     - データ圧縮・最適化
     - 統計・監視機能
     - 障害時自動リトライ
+    - タグベースのキャッシュ無効化
     """
 
+    TAG_PREFIX = "tag:"
+
     def __init__(self, config: CacheConfig):
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.cluster: Optional[redis.RedisCluster] = None
         self._connection_pool = None
         self._in_memory_cache = {}  # フォールバック用インメモリキャッシュ
+        self._in_memory_tags: Dict[str, set] = {}  # インメモリ時のタグ -> キー
         self._redis_available = False
 
     async def initialize(self) -> bool:
@@ -125,20 +135,35 @@ class CacheService:
             self.logger.error(f"Cache 取得エラー: {key}, {e}")
             return None
 
-    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """汎用キャッシュ保存"""
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None
+    ) -> bool:
+        """汎用キャッシュ保存
+
+        Args:
+            key: キャッシュキー
+            value: 保存する値
+            ttl: 有効期限（秒）
+            tags: 無効化用タグ（例: "category:restaurants", "place:<id>"）
+        """
         try:
             if self._redis_available and self.cluster:
                 ttl = ttl or self.config.default_ttl
                 serialized = self._serialize(value)
-                success = await self._set_with_retry(key, serialized, ttl)
+                success, written = await self._store_with_retry(key, serialized, ttl)
 
-                if success:
+                if written:
+                    await self._add_tags([key], tags, ttl)
                     self.logger.debug(f"Cache SET (Redis): {key}")
                 return success
             else:
                 # インメモリキャッシュを使用
                 self._in_memory_cache[key] = value
+                await self._add_tags([key], tags, ttl or self.config.default_ttl)
                 self.logger.debug(f"Cache SET (Memory): {key}")
                 return True
         except Exception as e:
@@ -168,17 +193,22 @@ class CacheService:
         self,
         place_id: str,
         data: PlaceData,
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        category: Optional[str] = None
     ) -> bool:
-        """Places API データキャッシュ保存"""
+        """Places API データキャッシュ保存（place / category タグ付き）"""
         cache_key = f"places:details:{place_id}"
         ttl = ttl or self.config.default_ttl
 
+        if category is None and isinstance(data, dict):
+            category = data.get('category')
+
         try:
             serialized = self._serialize(asdict(data) if hasattr(data, '__dict__') else data)
-            success = await self._set_with_retry(cache_key, serialized, ttl)
+            success, written = await self._store_with_retry(cache_key, serialized, ttl)
 
-            if success:
+            if written:
+                await self._add_tags([cache_key], self._build_tags([place_id], category), ttl)
                 self.logger.debug(f"Places data キャッシュ保存: {place_id}")
             return success
 
@@ -212,17 +242,27 @@ class CacheService:
         self,
         query: SearchQuery,
         results: List[Dict],
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        category: Optional[str] = None
     ) -> bool:
-        """検索結果キャッシュ保存"""
+        """検索結果キャッシュ保存
+
+        結果に含まれる各place_idとカテゴリをタグとして登録し、
+        店舗単位の修正時にこの検索結果も無効化されるようにする。
+        """
         cache_key = self._generate_search_key(query)
         ttl = ttl or self.config.search_ttl
 
         try:
             serialized = self._serialize(results)
-            success = await self._set_with_retry(cache_key, serialized, ttl)
-
-            if success:
+            success, written = await self._store_with_retry(cache_key, serialized, ttl)
+
+            if written:
+                place_ids = [
+                    result.get('place_id') or result.get('id')
+                    for result in results if isinstance(result, dict)
+                ]
+                await self._add_tags([cache_key], self._build_tags(place_ids, category), ttl)
                 self.logger.debug(f"Search results キャッシュ保存: {query.text[:20]}...")
             return success
 
@@ -252,24 +292,7 @@ class CacheService:
     async def clear_expired_cache(self) -> int:
         """期限切れキャッシュクリア"""
         try:
-            # 期限切れキーのパターン検索
-            patterns = [
-                "places:details:*",
-                "search:*",
-                "batch:*"
-            ]
-
-            cleared_count = 0
-            for pattern in patterns:
-                keys = await self.cluster.keys(pattern)
-                for key in keys:
-                    ttl = await self.cluster.ttl(key)
-                    if ttl == -1:  # TTL未設定
-                        await self.cluster.expire(key, self.config.default_ttl)
-                    elif ttl == -2:  # 既に期限切れ
-                        await self.cluster.delete(key)
-                        cleared_count += 1
-
+            cleared_count = await self._clear_expired_keys(self.cluster)
             self.logger.info(f"期限切れキャッシュクリア: {cleared_count}件")
             return cleared_count
 
@@ -277,6 +300,28 @@ class CacheService:
             self.logger.error(f"Cache clear エラー: {e}")
             return 0
 
+    async def _clear_expired_keys(self, client) -> int:
+        """期限切れキーの削除とTTL未設定キーへのTTL付与"""
+        # 期限切れキーのパターン検索
+        patterns = [
+            "places:details:*",
+            "search:*",
+            "batch:*"
+        ]
+
+        cleared_count = 0
+        for pattern in patterns:
+            keys = await client.keys(pattern)
+            for key in keys:
+                ttl = await client.ttl(key)
+                if ttl == -1:  # TTL未設定
+                    await client.expire(key, self.config.default_ttl)
+                elif ttl == -2:  # 既に期限切れ
+                    await client.delete(key)
+                    cleared_count += 1
+
+        return cleared_count
+
     # 高度なキャッシュ機能
     async def batch_get(self, keys: List[str]) -> Dict[str, Any]:
         """バッチ取得"""
@@ -301,19 +346,37 @@ class CacheService:
     async def batch_set(
         self,
         data: Dict[str, Any],
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+        key_tags: Optional[Dict[str, List[str]]] = None,
+        only_missing: bool = False
     ) -> int:
-        """バッチ保存"""
+        """バッチ保存
+
+        Args:
+            data: キー -> 値
+            ttl: 有効期限（秒）
+            tags: 全キー共通のタグ
+            key_tags: キー別のタグ
+            only_missing: Trueの場合は既存キーを上書きしない（SET NX）
+        """
         try:
             pipeline = self.cluster.pipeline()
             ttl = ttl or self.config.default_ttl
 
             for key, value in data.items():
                 serialized = self._serialize(value)
-                pipeline.setex(key, ttl, serialized)
+                if only_missing:
+                    pipeline.set(key, serialized, ex=ttl, nx=True)
+                else:
+                    pipeline.setex(key, ttl, serialized)
 
             results = await pipeline.execute()
             success_count = sum(1 for r in results if r)
+            written = [key for key, r in zip(data.keys(), results) if r]
+            await self._add_tag_members(
+                self._merge_tag_members(written, tags, key_tags), ttl
+            )
 
             self.logger.debug(f"Batch set: {success_count}/{len(data)} 成功")
             return success_count
@@ -336,6 +399,153 @@ class CacheService:
             self.logger.error(f"Pattern invalidation エラー: {e}")
             return 0
 
+    # タグベース無効化
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """タグに紐づくキャッシュを無効化
+
+        タグ集合のメンバーを読み出し、UNLINKをパイプラインでバッチ実行する。
+        KEYSによる全件スキャンを行わないため、コストはタグのサイズに比例する。
+
+        Args:
+            tags: 無効化するタグ（例: ["place:ChIJ...", "category:restaurants"]）
+
+        Returns:
+            削除したキー数
+        """
+        if not tags:
+            return 0
+
+        if not (self._redis_available and self.cluster):
+            return self._invalidate_tags_in_memory(tags)
+
+        try:
+            deleted = await self._unlink_tag_members(self.cluster, tags)
+            self.logger.info(f"Tag invalidation: {deleted}件削除 ({', '.join(tags)})")
+            return deleted
+
+        except Exception as e:
+            self.logger.error(f"Tag invalidation エラー: {e}")
+            return 0
+
+    async def invalidate_place(self, place_id: str) -> int:
+        """店舗単位の無効化（places:details と該当店舗を含む search: エントリ）"""
+        return await self.invalidate_tags([f"place:{place_id}"])
+
+    async def invalidate_category(self, category: str) -> int:
+        """カテゴリ単位の無効化"""
+        return await self.invalidate_tags([f"category:{category}"])
+
+    async def _unlink_tag_members(self, client, tags: List[str]) -> int:
+        """タグ集合のメンバーとタグ自身をバッチUNLINK"""
+        tag_keys = [self._tag_key(tag) for tag in tags]
+
+        pipeline = client.pipeline()
+        for tag_key in tag_keys:
+            pipeline.smembers(tag_key)
+        member_sets = await pipeline.execute()
+
+        keys = set()
+        for members in member_sets:
+            keys.update(members or ())
+        keys = list(keys)
+
+        batch_size = max(1, self.config.invalidation_batch_size)
+        deleted = 0
+        for start in range(0, len(keys), batch_size):
+            pipeline = client.pipeline()
+            for key in keys[start:start + batch_size]:
+                pipeline.unlink(key)
+            results = await pipeline.execute()
+            deleted += sum(1 for r in results if r)
+
+        # タグ集合自体も削除（メンバーは上で削除済み）
+        pipeline = client.pipeline()
+        for tag_key in tag_keys:
+            pipeline.unlink(tag_key)
+        await pipeline.execute()
+
+        self._on_keys_invalidated(keys)
+        return deleted
+
+    def _on_keys_invalidated(self, keys: List[Any]) -> int:
+        """無効化後フック（サブクラスのローカル層同期用）
+
+        Returns:
+            ローカル層から削除したキー数
+        """
+        return 0
+
+    def _invalidate_tags_in_memory(self, tags: List[str]) -> int:
+        """インメモリキャッシュのタグ無効化"""
+        keys = set()
+        for tag in tags:
+            keys.update(self._in_memory_tags.pop(self._tag_key(tag), set()))
+
+        deleted = sum(1 for key in keys if self._in_memory_cache.pop(key, None) is not None)
+        return deleted + self._on_keys_invalidated(list(keys))
+
+    async def _add_tags(self, keys: List[str], tags: Optional[List[str]], ttl: int):
+        """キーをタグ集合へ登録"""
+        if not keys or not tags:
+            return
+        await self._add_tag_members({tag: keys for tag in tags}, ttl)
+
+    async def _add_tag_members(self, tag_members: Dict[str, List[str]], ttl: int):
+        """タグ -> キー一覧 をまとめてタグ集合へ登録
+
+        タグ集合のTTLはエントリ以上に保つ（期限切れキーが残っても
+        UNLINKが空振りするだけなので無害）。
+        """
+        tag_members = {tag: keys for tag, keys in tag_members.items() if keys}
+        if not tag_members:
+            return
+
+        if not (self._redis_available and self.cluster):
+            for tag, keys in tag_members.items():
+                self._in_memory_tags.setdefault(self._tag_key(tag), set()).update(keys)
+            return
+
+        try:
+            await self._write_tag_members(self.cluster, tag_members, ttl)
+
+        except Exception as e:
+            self.logger.warning(f"タグ登録エラー: {list(tag_members)}, {e}")
+
+    async def _write_tag_members(self, client, tag_members: Dict[str, List[str]], ttl: int):
+        """タグ集合へのSADD/EXPIREをパイプラインで実行"""
+        tag_ttl = max(ttl, self.config.default_ttl)
+        pipeline = client.pipeline()
+        for tag, keys in tag_members.items():
+            tag_key = self._tag_key(tag)
+            pipeline.sadd(tag_key, *keys)
+            pipeline.expire(tag_key, tag_ttl)
+        await pipeline.execute()
+
+    @staticmethod
+    def _merge_tag_members(
+        keys: List[str],
+        tags: Optional[List[str]],
+        key_tags: Optional[Dict[str, List[str]]]
+    ) -> Dict[str, List[str]]:
+        """共通タグとキー別タグを タグ -> キー一覧 に統合"""
+        tag_members: Dict[str, List[str]] = {tag: list(keys) for tag in tags or ()}
+        for key, per_key_tags in (key_tags or {}).items():
+            for tag in per_key_tags:
+                tag_members.setdefault(tag, []).append(key)
+        return tag_members
+
+    def _tag_key(self, tag: str) -> str:
+        """タグ集合のキー名"""
+        return tag if tag.startswith(self.TAG_PREFIX) else f"{self.TAG_PREFIX}{tag}"
+
+    @staticmethod
+    def _build_tags(place_ids: List[Optional[str]], category: Optional[str]) -> List[str]:
+        """place / category タグを生成"""
+        tags = [f"place:{place_id}" for place_id in place_ids if place_id]
+        if category:
+            tags.append(f"category:{category}")
+        return tags
+
     # 内部ヘルパーメソッド
     async def _get_with_retry(self, key: str) -> Optional[bytes]:
         """リトライ付き取得"""
@@ -359,6 +569,14 @@ class CacheService:
                     raise
                 await self._wait_retry_delay(attempt)
 
+    async def _store_with_retry(self, key: str, value: bytes, ttl: int) -> Tuple[bool, bool]:
+        """保存して (保存できたか, Redisへ書き込んだか) を返す
+
+        タグ集合はRedisに書き込んだエントリに対してだけ登録する。
+        """
+        written = bool(await self._set_with_retry(key, value, ttl))
+        return written, written
+
     async def _wait_retry_delay(self, attempt: int):
         """リトライ待機"""
         import asyncio
@@ -438,11 +656,21 @@ class ProductionCacheConfig:
     retry_delay: float = 0.5
     circuit_breaker_threshold: int = 10
     circuit_breaker_timeout: int = 60
+    circuit_breaker_half_open_ratio: float = 0.1   # half-open開始時にRedisへ流す割合
+    circuit_breaker_half_open_successes: int = 5   # closedへ戻すのに必要な連続成功数
+
+    # L1(インメモリ)キャッシュ設定 - Redis障害時のフォールバック層
+    local_cache_max_entries: int = 10000
+    local_cache_max_ttl: int = 3600
 
 
 class ProductionCacheService(CacheService):
     """本番環境用高度キャッシュサービス"""
 
+    BREAKER_CLOSED = "closed"
+    BREAKER_OPEN = "open"
+    BREAKER_HALF_OPEN = "half_open"
+
     def __init__(self, config: ProductionCacheConfig):
         # 基底クラス初期化
         base_config = CacheConfig(
@@ -457,9 +685,32 @@ class ProductionCacheService(CacheService):
 
         self.prod_config = config
         self.health_status = {"status": "unknown", "last_check": None}
-        self.circuit_breaker_state = False
+        self.redis_cluster = None
+
+        # サーキットブレーカー (closed / open / half_open)
+        self._breaker_state = self.BREAKER_CLOSED
         self.circuit_breaker_failures = 0
-        self.circuit_breaker_last_failure = None
+        self.circuit_breaker_last_failure: Optional[float] = None
+        self._half_open_ratio = config.circuit_breaker_half_open_ratio
+        self._half_open_requests = 0
+        self._half_open_successes = 0
+        self._fast_fail_count = 0
+
+        # L1キャッシュ: key -> (有効期限(monotonic), 値) のLRU
+        self._local_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        # ブレーカー作動中にRedis側で実行できなかったタグ無効化（復旧後に再実行）
+        self._pending_tag_invalidations: Set[str] = set()
+
+    @property
+    def circuit_breaker_state(self) -> bool:
+        """サーキットブレーカーが作動中(open / half_open)か"""
+        return self._breaker_state != self.BREAKER_CLOSED
+
+    @property
+    def breaker_state(self) -> str:
+        """サーキットブレーカーの状態名"""
+        return self._breaker_state
 
     async def initialize_production(self):
         """本番環境初期化"""
@@ -498,6 +749,10 @@ class ProductionCacheService(CacheService):
                 **connection_kwargs
             )
 
+            # 基底クラスの汎用メソッドも同じ接続（ブレーカー経由）を使用
+            self.cluster = self.redis_cluster
+            self._redis_available = True
+
             # 初期ヘルスチェック
             await self._perform_health_check()
 
@@ -630,31 +885,401 @@ class ProductionCacheService(CacheService):
         while True:
             try:
                 await asyncio.sleep(self.prod_config.health_check_interval)
-                await self._perform_health_check()
 
-                # サーキットブレーカーリセット判定
-                if self.circuit_breaker_state:
+                # ブレーカー作動中は重いヘルスチェックを行わず、復旧判定のみ
+                if self._breaker_state == self.BREAKER_OPEN:
                     await self._check_circuit_breaker_reset()
+                else:
+                    await self._perform_health_check()
+                    await self._flush_pending_invalidations()
 
             except Exception as e:
                 self.logger.error(f"Health monitoring error: {e}")
 
     async def _check_circuit_breaker_reset(self):
-        """サーキットブレーカーリセット判定"""
-        if not self.circuit_breaker_last_failure:
+        """サーキットブレーカーリセット判定
+
+        タイムアウト経過後にpingが通れば即closedには戻さず、
+        half-openに移行して段階的にRedisトラフィックを戻す。
+        """
+        if self._breaker_state != self.BREAKER_OPEN or not self.circuit_breaker_last_failure:
             return
 
-        time_since_failure = time.time() - self.circuit_breaker_last_failure
+        time_since_failure = time.monotonic() - self.circuit_breaker_last_failure
         if time_since_failure > self.prod_config.circuit_breaker_timeout:
             try:
                 # 接続テスト
                 await self.redis_cluster.ping()
-                self.circuit_breaker_state = False
-                self.circuit_breaker_failures = 0
-                self.logger.info("Circuit breaker reset - service recovered")
+                self._enter_half_open()
             except Exception:
+                self.circuit_breaker_last_failure = time.monotonic()
                 self.logger.debug("Circuit breaker reset failed - service still unavailable")
 
+    # ------------------------------------------
+    # サーキットブレーカー制御
+    # ------------------------------------------
+
+    def _allow_redis_request(self) -> bool:
+        """Redisへリクエストを送ってよいか判定（ネットワーク待ちなし）"""
+        if self.redis_cluster is None:
+            return False
+
+        if self._breaker_state == self.BREAKER_CLOSED:
+            return True
+
+        if self._breaker_state == self.BREAKER_OPEN:
+            elapsed = time.monotonic() - (self.circuit_breaker_last_failure or 0.0)
+            if elapsed < self.prod_config.circuit_breaker_timeout:
+                self._fast_fail_count += 1
+                return False
+            self._enter_half_open()
+
+        # half-open: 一定割合のリクエストのみRedisへ流す
+        self._half_open_requests += 1
+        interval = max(1, round(1 / self._half_open_ratio))
+        if (self._half_open_requests - 1) % interval == 0:
+            return True
+
+        self._fast_fail_count += 1
+        return False
+
+    def _enter_half_open(self):
+        """half-open状態へ移行"""
+        self._breaker_state = self.BREAKER_HALF_OPEN
+        self._half_open_ratio = self.prod_config.circuit_breaker_half_open_ratio
+        self._half_open_requests = 0
+        self._half_open_successes = 0
+        self.logger.info(
+            f"Circuit breaker half-open - probing Redis with {self._half_open_ratio:.0%} of traffic"
+        )
+
+    def _open_breaker(self):
+        """ブレーカーを開く（以降はL1のみで応答）"""
+        self._breaker_state = self.BREAKER_OPEN
+        self.circuit_breaker_last_failure = time.monotonic()
+        self.logger.error(f"Circuit breaker activated after {self.circuit_breaker_failures} failures")
+
+    def _record_redis_success(self):
+        """Redis操作成功を記録"""
+        if self._breaker_state == self.BREAKER_HALF_OPEN:
+            self._half_open_successes += 1
+            if self._half_open_successes >= self.prod_config.circuit_breaker_half_open_successes:
+                self._breaker_state = self.BREAKER_CLOSED
+                self.circuit_breaker_failures = 0
+                self.logger.info("Circuit breaker reset - service recovered")
+            else:
+                # 成功ごとに流量を倍増
+                self._half_open_ratio = min(1.0, self._half_open_ratio * 2)
+        elif self._breaker_state == self.BREAKER_CLOSED:
+            self.circuit_breaker_failures = 0
+
+    def _record_redis_failure(self):
+        """Redis操作失敗を記録"""
+        self.circuit_breaker_failures += 1
+
+        if self._breaker_state == self.BREAKER_HALF_OPEN:
+            # half-open中の失敗は即座に再オープン
+            self._open_breaker()
+        elif (self._breaker_state == self.BREAKER_CLOSED and
+              self.circuit_breaker_failures >= self.prod_config.circuit_breaker_threshold):
+            self._open_breaker()
+        elif self._breaker_state == self.BREAKER_OPEN:
+            self.circuit_breaker_last_failure = time.monotonic()
+
+    # ------------------------------------------
+    # L1(インメモリ)キャッシュ
+    # ------------------------------------------
+
+    def _local_get(self, key: str) -> Optional[Any]:
+        """L1キャッシュ取得"""
+        entry = self._local_cache.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local_cache[key]
+            return None
+
+        self._local_cache.move_to_end(key)
+        return value
+
+    def _local_set(self, key: str, value: Any, ttl: int):
+        """L1キャッシュ保存（TTLはlocal_cache_max_ttlで上限）"""
+        ttl = min(ttl, self.prod_config.local_cache_max_ttl)
+        self._local_cache[key] = (time.monotonic() + ttl, value)
+        self._local_cache.move_to_end(key)
+
+        while len(self._local_cache) > self.prod_config.local_cache_max_entries:
+            self._local_cache.popitem(last=False)
+
+    def _local_delete_pattern(self, pattern: str) -> int:
+        """L1キャッシュからパターン一致キーを削除"""
+        keys = [key for key in self._local_cache if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            del self._local_cache[key]
+        return len(keys)
+
+    # ------------------------------------------
+    # ブレーカー経由のRedis操作
+    # ------------------------------------------
+
+    async def _get_with_retry(self, key: str) -> Optional[bytes]:
+        """ブレーカー・L1フォールバック付き取得"""
+        if not self._allow_redis_request():
+            return self._local_get(key)
+
+        # half-open中はプローブ1回のみ（リトライ待機しない）
+        attempts = 1 if self._breaker_state == self.BREAKER_HALF_OPEN else self.config.max_retries
+        for attempt in range(attempts):
+            try:
+                value = await self.redis_cluster.get(key)
+                self._record_redis_success()
+                if value is not None:
+                    self._local_set(key, value, self.prod_config.local_cache_max_ttl)
+                return value
+            except Exception as exc:
+                await self._handle_cache_error(exc, "get")
+                if self._breaker_state != self.BREAKER_CLOSED or attempt == attempts - 1:
+                    break
+                await self._wait_retry_delay(attempt)
+
+        return self._local_get(key)
+
+    async def _set_with_retry(self, key: str, value: bytes, ttl: int) -> bool:
+        """ブレーカー・L1ライトスルー付き保存（L1のみに保存した場合もTrue）"""
+        success, _ = await self._store_with_retry(key, value, ttl)
+        return success
+
+    async def _store_with_retry(self, key: str, value: bytes, ttl: int) -> Tuple[bool, bool]:
+        """ブレーカー・L1ライトスルー付き保存
+
+        Returns:
+            (保存できたか, Redisへ書き込んだか)。ブレーカーに拒否された場合は
+            L1のみに保存して (True, False)
+        """
+        self._local_set(key, value, ttl)
+
+        if not self._allow_redis_request():
+            return True, False  # L1には保存済み
+
+        attempts = 1 if self._breaker_state == self.BREAKER_HALF_OPEN else self.config.max_retries
+        for attempt in range(attempts):
+            try:
+                result = bool(await self.redis_cluster.setex(key, ttl, value))
+                self._record_redis_success()
+                return result, result
+            except Exception as exc:
+                await self._handle_cache_error(exc, "set")
+                if self._breaker_state != self.BREAKER_CLOSED or attempt == attempts - 1:
+                    break
+                await self._wait_retry_delay(attempt)
+
+        return False, False
+
+    async def batch_get(self, keys: List[str]) -> Dict[str, Any]:
+        """バッチ取得（ブレーカー作動中はL1のみ）"""
+        if self._allow_redis_request():
+            try:
+                pipeline = self.redis_cluster.pipeline()
+                for key in keys:
+                    pipeline.get(key)
+                results = await pipeline.execute()
+                self._record_redis_success()
+
+                batch_results = {}
+                for key, result in zip(keys, results):
+                    if result:
+                        self._local_set(key, result, self.prod_config.local_cache_max_ttl)
+                        batch_results[key] = self._deserialize(result)
+                return batch_results
+
+            except Exception as e:
+                await self._handle_cache_error(e, "batch_get")
+
+        batch_results = {}
+        for key in keys:
+            cached = self._local_get(key)
+            if cached is not None:
+                batch_results[key] = self._deserialize(cached)
+        return batch_results
+
+    async def batch_set(
+        self,
+        data: Dict[str, Any],
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+        key_tags: Optional[Dict[str, List[str]]] = None,
+        only_missing: bool = False
+    ) -> int:
+        """バッチ保存（L1ライトスルー、ブレーカー作動中はL1のみ）"""
+        ttl = ttl or self.config.default_ttl
+        serialized_items = {key: self._serialize(value) for key, value in data.items()}
+
+        # only_missing時はRedis上の新しい値を隠さないようL1へは書かない
+        if not only_missing:
+            for key, serialized in serialized_items.items():
+                self._local_set(key, serialized, ttl)
+
+        if not self._allow_redis_request():
+            return 0 if only_missing else len(serialized_items)
+
+        try:
+            pipeline = self.redis_cluster.pipeline()
+            for key, serialized in serialized_items.items():
+                if only_missing:
+                    pipeline.set(key, serialized, ex=ttl, nx=True)
+                else:
+                    pipeline.setex(key, ttl, serialized)
+
+            results = await pipeline.execute()
+            self._record_redis_success()
+            success_count = sum(1 for r in results if r)
+            written = [key for key, r in zip(serialized_items.keys(), results) if r]
+            await self._add_tag_members(
+                self._merge_tag_members(written, tags, key_tags), ttl
+            )
+
+            self.logger.debug(f"Batch set: {success_count}/{len(data)} 成功")
+            return success_count
+
+        except Exception as e:
+            await self._handle_cache_error(e, "batch_set")
+            return 0
+
+    async def _add_tag_members(self, tag_members: Dict[str, List[str]], ttl: int):
+        """タグ登録（ブレーカー経由）
+
+        データ本体をRedisへ書き込めたエントリに対してだけ呼ばれるため、
+        half-open中の流量制限は適用しない（タグが欠けると無効化漏れになる）。
+        失敗はブレーカーに数えるが、成功はhalf-openのプローブ成功には数えない
+        （データ書き込み側で計上済み）。
+        """
+        tag_members = {tag: keys for tag, keys in tag_members.items() if keys}
+        if not tag_members:
+            return
+
+        if self.redis_cluster is None:
+            await super()._add_tag_members(tag_members, ttl)
+            return
+
+        if self._breaker_state == self.BREAKER_OPEN:
+            return
+
+        try:
+            await self._write_tag_members(self.redis_cluster, tag_members, ttl)
+            if self._breaker_state == self.BREAKER_CLOSED:
+                self._record_redis_success()
+        except Exception as e:
+            await self._handle_cache_error(e, "add_tags")
+
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """タグベース無効化（ブレーカー経由）
+
+        Redisに到達できない間はタグ集合を読めないため、
+        古いデータを返さないようL1を全消去し、タグは復旧後に再実行する。
+        """
+        if not tags:
+            return 0
+
+        if self.redis_cluster is None:
+            return self._invalidate_tags_in_memory(tags)
+
+        if self._allow_redis_request():
+            # 保留中の無効化もまとめて実行
+            pending = sorted(self._pending_tag_invalidations.union(tags))
+            try:
+                deleted = await self._unlink_tag_members(self.redis_cluster, pending)
+                self._record_redis_success()
+                self._pending_tag_invalidations.difference_update(pending)
+                self.logger.info(f"Tag invalidation: {deleted}件削除 ({', '.join(pending)})")
+                return deleted
+
+            except Exception as e:
+                await self._handle_cache_error(e, "invalidate_tags")
+
+        self._pending_tag_invalidations.update(tags)
+        cleared = len(self._local_cache)
+        self._local_cache.clear()
+        self.logger.warning(
+            f"Redis側のタグ無効化を保留 - L1を全消去 ({', '.join(tags)}, "
+            f"保留中 {len(self._pending_tag_invalidations)}件)"
+        )
+        return cleared
+
+    async def _flush_pending_invalidations(self) -> int:
+        """ブレーカー作動中に保留したタグ無効化をRedisへ反映"""
+        if not self._pending_tag_invalidations or not self._allow_redis_request():
+            return 0
+
+        pending = sorted(self._pending_tag_invalidations)
+        try:
+            deleted = await self._unlink_tag_members(self.redis_cluster, pending)
+            self._record_redis_success()
+            self._pending_tag_invalidations.difference_update(pending)
+            self.logger.info(f"保留中のタグ無効化を実行: {deleted}件削除 ({', '.join(pending)})")
+            return deleted
+
+        except Exception as e:
+            await self._handle_cache_error(e, "flush_pending_invalidations")
+            return 0
+
+    async def clear_expired_cache(self) -> int:
+        """期限切れキャッシュクリア（ブレーカー経由、L1の期限切れも削除）"""
+        now = time.monotonic()
+        expired = [key for key, (expires_at, _) in self._local_cache.items() if expires_at < now]
+        for key in expired:
+            del self._local_cache[key]
+
+        if not self._allow_redis_request():
+            self.logger.warning("Circuit breaker open - Redis側の期限切れクリアをスキップ")
+            return len(expired)
+
+        try:
+            cleared_count = await self._clear_expired_keys(self.redis_cluster)
+            self._record_redis_success()
+            self.logger.info(f"期限切れキャッシュクリア: {cleared_count}件")
+            return cleared_count + len(expired)
+
+        except Exception as e:
+            await self._handle_cache_error(e, "clear_expired_cache")
+            return len(expired)
+
+    def _on_keys_invalidated(self, keys: List[Any]) -> int:
+        """無効化したキーをL1からも削除"""
+        removed = 0
+        for key in keys:
+            if isinstance(key, bytes):
+                key = key.decode('utf-8')
+            if self._local_cache.pop(key, None) is not None:
+                removed += 1
+        return removed
+
+    async def invalidate_pattern(self, pattern: str) -> int:
+        """パターンマッチでキャッシュ無効化（L1も対象）"""
+        local_deleted = self._local_delete_pattern(pattern)
+
+        if not self._allow_redis_request():
+            self.logger.warning(f"Circuit breaker open - Redis側の無効化をスキップ ({pattern})")
+            return local_deleted
+
+        try:
+            keys = await self.redis_cluster.keys(pattern)
+            deleted = await self.redis_cluster.delete(*keys) if keys else 0
+            self._record_redis_success()
+            self.logger.info(f"Pattern invalidation: {deleted}件削除 ({pattern})")
+            return max(deleted, local_deleted)
+
+        except Exception as e:
+            await self._handle_cache_error(e, "invalidate_pattern")
+            return local_deleted
+
+    async def get_cache_stats(self) -> CacheStats:
+        """キャッシュ統計取得（ブレーカー作動中はRedisへ問い合わせない）"""
+        if self.circuit_breaker_state:
+            return CacheStats(0.0, "Unknown", 0, 0, 0, 0)
+        return await super().get_cache_stats()
+
     async def set_with_intelligent_ttl(
         self,
         key: str,
@@ -686,12 +1311,10 @@ class ProductionCacheService(CacheService):
                     serialized_data.encode('utf-8'),
                     compresslevel=self.prod_config.compression_level
                 )
-                await self.redis_cluster.setex(f"{key}:compressed", ttl, compressed_data)
-                return True
+                return await self._set_with_retry(f"{key}:compressed", compressed_data, ttl)
             else:
                 # 通常保存
-                await self.redis_cluster.setex(key, ttl, serialized_data)
-                return True
+                return await self._set_with_retry(key, serialized_data, ttl)
 
         except Exception as e:
             await self._handle_cache_error(e, "set_with_intelligent_ttl")
@@ -701,14 +1324,14 @@ class ProductionCacheService(CacheService):
         """圧縮対応取得"""
         try:
             # 圧縮版チェック
-            compressed_data = await self.redis_cluster.get(f"{key}:compressed")
+            compressed_data = await self._get_with_retry(f"{key}:compressed")
             if compressed_data:
                 import gzip
                 decompressed_data = gzip.decompress(compressed_data)
                 return json.loads(decompressed_data.decode('utf-8'))
 
             # 通常版取得
-            data = await self.redis_cluster.get(key)
+            data = await self._get_with_retry(key)
             if data:
                 return json.loads(data)
 
@@ -720,20 +1343,17 @@ class ProductionCacheService(CacheService):
 
     async def _handle_cache_error(self, error: Exception, operation: str):
         """キャッシュエラーハンドリング"""
-        # 非同期処理を追加
-        await asyncio.sleep(0.001)  # Make function truly async
-
-        self.circuit_breaker_failures += 1
-
-        if self.circuit_breaker_failures >= self.prod_config.circuit_breaker_threshold:
-            self.circuit_breaker_state = True
-            self.circuit_breaker_last_failure = time.time()
-            self.logger.error(f"Circuit breaker activated after {self.circuit_breaker_failures} failures")
-
+        self._record_redis_failure()
         self.logger.error(f"Cache operation '{operation}' failed: {error}")
 
     async def get_production_metrics(self) -> Dict[str, Any]:
         """本番環境メトリクス取得"""
+        if self.circuit_breaker_state:
+            return {
+                "health_status": self.health_status,
+                "circuit_breaker": self._get_circuit_breaker_metrics()
+            }
+
         try:
             base_stats = await self.get_cache_stats()
             health = await self._perform_health_check()
@@ -755,10 +1375,7 @@ class ProductionCacheService(CacheService):
                     "known_nodes": cluster_info.get("cluster_known_nodes"),
                     "size": cluster_info.get("cluster_size")
                 },
-                "circuit_breaker": {
-                    "active": self.circuit_breaker_state,
-                    "failures": self.circuit_breaker_failures
-                },
+                "circuit_breaker": self._get_circuit_breaker_metrics(),
                 "performance": {
                     "compression_enabled": self.prod_config.compression_enabled,
                     "connection_pool_size": self.prod_config.connection_pool_size
@@ -769,6 +1386,18 @@ class ProductionCacheService(CacheService):
             self.logger.error(f"Failed to get production metrics: {e}")
             return {"error": str(e)}
 
+    def _get_circuit_breaker_metrics(self) -> Dict[str, Any]:
+        """サーキットブレーカー状態のメトリクス"""
+        return {
+            "active": self.circuit_breaker_state,
+            "state": self._breaker_state,
+            "failures": self.circuit_breaker_failures,
+            "half_open_ratio": self._half_open_ratio,
+            "fast_fail_count": self._fast_fail_count,
+            "local_cache_entries": len(self._local_cache),
+            "pending_tag_invalidations": len(self._pending_tag_invalidations)
+        }
+
 
 # ファクトリー関数（拡張版）
 def create_cache_service(redis_nodes: List[str], production: bool = False) -> CacheService:
@@ -858,9 +1487,6 @@ async def test_production_cache_service():
 
 
 if __name__ == "__main__":
-    import asyncio
-    import time
-
     print("=== CacheService テスト ===")
     asyncio.run(test_cache_service())
 
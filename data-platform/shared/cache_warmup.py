@@ -0,0 +1,275 @@
+"""
+Cache Warmup Engine
+
+Bulk-loads places:details:* entries from the Place ID cache and the
+latest stored worksheet records so that cold workers start warm.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cache_service import CacheService
+
+
+# ワークシートのカテゴリ別名称カラム
+NAME_HEADERS = {
+    'restaurants': '店舗名',
+    'parkings': '駐車場名',
+    'toilets': '施設名'
+}
+
+PLACE_ID_HEADERS = ('Place ID', 'プレイスID', 'place_id')
+
+
+@dataclass
+class WarmupConfig:
+    """ウォームアップ設定"""
+    batch_size: int = 200                 # 1パイプラインあたりの件数
+    time_budget: float = 60.0             # 全体の時間予算（秒）
+    ttl: Optional[int] = None             # Noneの場合はキャッシュのdefault_ttl
+    categories: Tuple[str, ...] = ('restaurants', 'parkings', 'toilets')
+    overwrite: bool = False               # Trueの場合は既存エントリも上書き
+
+
+@dataclass
+class WarmupCandidate:
+    """ウォームアップ対象"""
+    place_id: str
+    category: str
+    payload: Dict[str, Any]
+    popularity_rank: int
+    review_count: int
+    refresh_due: str
+
+
+@dataclass
+class WarmupResult:
+    """ウォームアップ結果"""
+    status: str
+    loaded: int
+    candidates: int
+    batches: int
+    missing_records: int
+    remaining: int
+    elapsed: float
+    budget_exhausted: bool
+
+
+class CacheWarmupEngine:
+    """キャッシュウォームアップエンジン
+
+    優先順位:
+    1. 明示的に指定された人気Place ID（指定順）
+    2. レビュー数の多い順（問い合わせの多さの代理指標）
+    3. Place IDキャッシュのrefresh_dueが近い順
+    """
+
+    def __init__(
+        self,
+        cache_service: CacheService,
+        place_id_cache: Optional[Any] = None,
+        records_loader: Optional[Callable[[str], List[Dict[str, Any]]]] = None,
+        config: Optional[WarmupConfig] = None
+    ):
+        """
+        Args:
+            cache_service: ロード先のキャッシュサービス
+            place_id_cache: PlaceIdCache互換オブジェクト（export_for_backup()を持つ）
+            records_loader: カテゴリ名 -> ワークシートレコード一覧（例: SheetsStorageAdapter.get_all_data）
+            config: ウォームアップ設定
+        """
+        self.cache_service = cache_service
+        self.place_id_cache = place_id_cache
+        self.records_loader = records_loader
+        self.config = config or WarmupConfig()
+        self.logger = logging.getLogger(__name__)
+
+    def build_plan(
+        self,
+        popular_place_ids: Optional[List[str]] = None
+    ) -> Tuple[List[WarmupCandidate], int]:
+        """優先順位付きのロード計画を作成
+
+        Returns:
+            (優先順のロード対象, ワークシートレコードが無くロードできないPlace ID数)
+        """
+        popular_place_ids = popular_place_ids or []
+        popularity = {place_id: rank for rank, place_id in enumerate(popular_place_ids)}
+        refresh_due = self._load_refresh_due()
+
+        candidates: Dict[str, WarmupCandidate] = {}
+        for category in self.config.categories:
+            for record in self._load_records(category):
+                place_id = self._extract_place_id(record)
+                if not place_id or place_id in candidates:
+                    continue
+
+                candidates[place_id] = WarmupCandidate(
+                    place_id=place_id,
+                    category=category,
+                    payload=self._record_to_place_data(record, place_id, category),
+                    popularity_rank=popularity.get(place_id, len(popular_place_ids)),
+                    review_count=self._to_int(record.get('レビュー数')),
+                    refresh_due=refresh_due.get(place_id, '9999-12-31')
+                )
+
+        # 詳細データが無いPlace IDは部分データでキャッシュを汚さないようロードしない
+        known_ids = set(popular_place_ids) | set(refresh_due)
+        missing_records = len(known_ids - set(candidates))
+
+        plan = sorted(
+            candidates.values(),
+            key=lambda c: (c.popularity_rank, -c.review_count, c.refresh_due)
+        )
+        return plan, missing_records
+
+    async def warmup(self, popular_place_ids: Optional[List[str]] = None) -> WarmupResult:
+        """時間予算内で優先順にキャッシュへロード"""
+        start_time = time.monotonic()
+        plan, missing_records = self.build_plan(popular_place_ids)
+
+        loaded = 0
+        batches = 0
+        processed = 0
+        budget_exhausted = False
+        batch_size = max(1, self.config.batch_size)
+
+        for start in range(0, len(plan), batch_size):
+            if time.monotonic() - start_time >= self.config.time_budget:
+                budget_exhausted = True
+                break
+
+            batch = plan[start:start + batch_size]
+            data = {f"places:details:{c.place_id}": c.payload for c in batch}
+            key_tags = {
+                f"places:details:{c.place_id}": [f"place:{c.place_id}", f"category:{c.category}"]
+                for c in batch
+            }
+
+            loaded += await self.cache_service.batch_set(
+                data,
+                ttl=self.config.ttl,
+                key_tags=key_tags,
+                only_missing=not self.config.overwrite
+            )
+            batches += 1
+            processed += len(batch)
+
+            # 他タスクへ制御を譲る
+            await asyncio.sleep(0)
+
+        elapsed = time.monotonic() - start_time
+        result = WarmupResult(
+            status="partial" if budget_exhausted else "success",
+            loaded=loaded,
+            candidates=len(plan),
+            batches=batches,
+            missing_records=missing_records,
+            remaining=len(plan) - processed,
+            elapsed=elapsed,
+            budget_exhausted=budget_exhausted
+        )
+
+        self.logger.info(
+            f"キャッシュウォームアップ完了: {loaded}/{len(plan)}件ロード, "
+            f"{batches}バッチ, {elapsed:.2f}秒"
+            + (f", 時間予算超過で{result.remaining}件未処理" if budget_exhausted else "")
+        )
+        return result
+
+    def _load_refresh_due(self) -> Dict[str, str]:
+        """Place IDキャッシュから place_id -> refresh_due を取得"""
+        if self.place_id_cache is None:
+            return {}
+
+        try:
+            entries = self.place_id_cache.export_for_backup().get('cid_to_place_id', {})
+        except Exception as e:
+            self.logger.warning(f"Place IDキャッシュ読み込みエラー: {e}")
+            return {}
+
+        refresh_due: Dict[str, str] = {}
+        for entry in entries.values():
+            if not isinstance(entry, dict) or not entry.get('place_id'):
+                continue
+            due = entry.get('refresh_due') or '9999-12-31'
+            place_id = entry['place_id']
+            refresh_due[place_id] = min(due, refresh_due.get(place_id, due))
+        return refresh_due
+
+    def _load_records(self, category: str) -> List[Dict[str, Any]]:
+        """カテゴリのワークシートレコードを取得"""
+        if self.records_loader is None:
+            return []
+
+        try:
+            return self.records_loader(category) or []
+        except Exception as e:
+            self.logger.warning(f"ワークシートレコード取得エラー: {category}, {e}")
+            return []
+
+    @staticmethod
+    def _extract_place_id(record: Dict[str, Any]) -> Optional[str]:
+        """レコードからPlace IDを取得"""
+        for header in PLACE_ID_HEADERS:
+            value = record.get(header)
+            if value:
+                return str(value).strip()
+        return None
+
+    @classmethod
+    def _record_to_place_data(
+        cls,
+        record: Dict[str, Any],
+        place_id: str,
+        category: str
+    ) -> Dict[str, Any]:
+        """ワークシートレコードをPlaceData形式へ変換"""
+        name = record.get(NAME_HEADERS.get(category, ''), '') or record.get('name', '')
+        address = record.get('所在地', '')
+        place_data: Dict[str, Any] = {
+            "id": place_id,
+            "place_id": place_id,
+            "name": name,
+            "displayName": {"text": name},
+            "formattedAddress": address,
+            "formatted_address": address,
+            "category": category,
+            "source": "sheets",
+            "last_updated": record.get('最終更新日時', '')
+        }
+
+        latitude = cls._to_float(record.get('緯度'))
+        longitude = cls._to_float(record.get('経度'))
+        if latitude is not None and longitude is not None:
+            place_data["location"] = {"latitude": latitude, "longitude": longitude}
+
+        rating = cls._to_float(record.get('評価', record.get('施設評価')))
+        if rating is not None:
+            place_data["rating"] = rating
+        place_data["userRatingCount"] = cls._to_int(record.get('レビュー数'))
+
+        maps_url = record.get('GoogleマップURL')
+        if maps_url:
+            place_data["googleMapsUri"] = maps_url
+
+        return place_data
+
+    @staticmethod
+    def _to_float(value: Any) -> Optional[float]:
+        """数値変換（空欄・不正値はNone）"""
+        try:
+            return float(value) if value not in (None, '') else None
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _to_int(value: Any) -> int:
+        """整数変換（空欄・不正値は0）"""
+        try:
+            return int(float(value)) if value not in (None, '') else 0
+        except (TypeError, ValueError):
+            return 0
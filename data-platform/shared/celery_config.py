@@ -9,6 +9,7 @@ from celery import Celery
 from kombu import Queue, Exchange
 import os
 import logging
+from dataclasses import dataclass
 from typing import Dict, Any, List, Optional
 from datetime import timedelta
 
@@ -20,6 +21,141 @@ celery_app = Celery('sado_scraper')
 logging.getLogger('celery').setLevel(logging.INFO)
 
 
+# タスク登録モジュール（タスク名は "<モジュール>.<関数名>" で登録される）
+TASK_MODULE = 'shared.distributed_tasks'
+
+# 優先度（0-9、大きいほど優先）。Redisブローカーでは0が最優先のため変換して使う
+MAX_PRIORITY = 9
+
+
+@dataclass(frozen=True)
+class QueuePool:
+    """キュー専用ワーカープールの設定"""
+    queue: str
+    pool: str                     # threads / gevent（I/O待ち中心） / prefork（CPU中心） / solo
+    concurrency: int
+    prefetch_multiplier: int = 1
+    description: str = ""
+
+
+_CPU_COUNT = os.cpu_count() or 2
+
+# キューごとに独立したワーカーを起動し、遅いML分析がPlace取得を塞がないようにする
+QUEUE_POOLS: Dict[str, QueuePool] = {
+    'places_api': QueuePool('places_api', 'threads', 16, 4, "Places API呼び出し（I/O待ち中心）"),
+    'validation': QueuePool('validation', 'prefork', _CPU_COUNT, 1, "集約・データ検証（CPU）"),
+    'ml_processing': QueuePool('ml_processing', 'prefork', max(1, _CPU_COUNT // 2), 1, "ML品質分析（CPU・低速）"),
+    'background': QueuePool('background', 'threads', 4, 1, "キャッシュウォームアップ・メトリクス収集"),
+    'maintenance': QueuePool('maintenance', 'solo', 1, 1, "定期メンテナンス"),
+}
+
+# タスク -> (キュー, 優先度)
+TASK_ROUTING: Dict[str, tuple] = {
+    'process_single_place': ('places_api', 9),
+    'process_places_batch': ('places_api', 8),
+    'aggregate_batch_results': ('validation', 6),
+    'validate_data_batch': ('validation', 6),
+    'ml_quality_analysis': ('ml_processing', 3),
+    'cache_warmup': ('background', 2),
+    'collect_performance_metrics': ('background', 1),
+    'cleanup_expired_cache': ('maintenance', 0),
+}
+
+DEFAULT_QUEUE = 'background'
+
+
+def task_name(name: str) -> str:
+    """関数名から登録タスク名を取得"""
+    return f"{TASK_MODULE}.{name}"
+
+
+def broker_priority(priority: int, broker_url: Optional[str]) -> int:
+    """優先度をブローカーの表現に変換（Redisは0が最優先、AMQPは大きいほど優先）"""
+    priority = max(0, min(MAX_PRIORITY, priority))
+    if broker_url and broker_url.startswith(('redis://', 'rediss://')):
+        return MAX_PRIORITY - priority
+    return priority
+
+
+def build_task_routes(broker_url: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """登録タスク名に対するルーティング設定"""
+    return {
+        task_name(name): {
+            'queue': queue,
+            'routing_key': queue,
+            'priority': broker_priority(priority, broker_url)
+        }
+        for name, (queue, priority) in TASK_ROUTING.items()
+    }
+
+
+def build_task_queues() -> tuple:
+    """キュー定義（x-max-priorityはAMQP用、Redisはpriority_stepsで優先度を実現）"""
+    return tuple(
+        Queue(name,
+              Exchange(name, type='direct'),
+              routing_key=name,
+              queue_arguments={'x-max-priority': MAX_PRIORITY + 1})
+        for name in QUEUE_POOLS
+    )
+
+
+def build_beat_schedule() -> Dict[str, Dict[str, Any]]:
+    """定期タスク（登録タスク名で指定）"""
+    schedules = {
+        'cleanup-expired-cache': ('cleanup_expired_cache', timedelta(minutes=30)),
+        'cache-warmup': ('cache_warmup', timedelta(hours=2)),
+        'performance-metrics': ('collect_performance_metrics', timedelta(minutes=5)),
+    }
+    return {
+        entry: {
+            'task': task_name(name),
+            'schedule': schedule,
+            'options': {'queue': TASK_ROUTING[name][0]}
+        }
+        for entry, (name, schedule) in schedules.items()
+    }
+
+
+def apply_queue_topology(app: Celery, broker_url: Optional[str]) -> Celery:
+    """ルーティング・キュー・優先度・定期タスクを設定"""
+    app.conf.update(
+        task_routes=build_task_routes(broker_url),
+        task_queues=build_task_queues(),
+        task_default_queue=DEFAULT_QUEUE,
+        task_default_priority=broker_priority(5, broker_url),
+        task_queue_max_priority=MAX_PRIORITY + 1,
+        beat_schedule=build_beat_schedule(),
+    )
+
+    if broker_url and broker_url.startswith(('redis://', 'rediss://')):
+        # Redisはキューを優先度ごとのリストに分割して優先度を実現する
+        transport_options = dict(app.conf.broker_transport_options or {})
+        transport_options.update({
+            'priority_steps': list(range(MAX_PRIORITY + 1)),
+            'sep': ':',
+            'queue_order_strategy': 'priority',
+            # acks_late時の再配信までの時間（タスクのハードタイムアウトより長く）
+            'visibility_timeout': max(3600, int(app.conf.task_time_limit or 0) * 2),
+        })
+        app.conf.broker_transport_options = transport_options
+
+    return app
+
+
+def worker_command(queue: str, app_path: str = 'shared.celery_config') -> List[str]:
+    """キュー専用ワーカーの起動コマンド"""
+    pool = QUEUE_POOLS[queue]
+    return [
+        'celery', '-A', app_path, 'worker',
+        '-Q', queue,
+        '-P', pool.pool,
+        '-c', str(pool.concurrency),
+        '--prefetch-multiplier', str(pool.prefetch_multiplier),
+        '-n', f'{queue}@%h',
+    ]
+
+
 def configure_celery(
     redis_url: str = "redis://localhost:6379/0",
     result_backend: Optional[str] = None
@@ -53,44 +189,6 @@ def configure_celery(
         worker_send_task_events=True,
         task_send_sent_event=True,
 
-        # タスクルーティング設定
-        task_routes={
-            'scraper.tasks.process_places_batch': {'queue': 'high_priority'},
-            'scraper.tasks.process_single_place': {'queue': 'normal'},
-            'scraper.tasks.validate_data_batch': {'queue': 'validation'},
-            'scraper.tasks.ml_quality_analysis': {'queue': 'ml_processing'},
-            'scraper.tasks.cache_warmup': {'queue': 'background'},
-            'scraper.tasks.cleanup_expired_cache': {'queue': 'maintenance'},
-        },
-
-        # キュー定義
-        task_queues=(
-            Queue('high_priority',
-                  Exchange('high_priority', type='direct'),
-                  routing_key='high_priority',
-                  queue_arguments={'x-max-priority': 10}),
-            Queue('normal',
-                  Exchange('normal', type='direct'),
-                  routing_key='normal',
-                  queue_arguments={'x-max-priority': 5}),
-            Queue('validation',
-                  Exchange('validation', type='direct'),
-                  routing_key='validation',
-                  queue_arguments={'x-max-priority': 7}),
-            Queue('ml_processing',
-                  Exchange('ml_processing', type='direct'),
-                  routing_key='ml_processing',
-                  queue_arguments={'x-max-priority': 3}),
-            Queue('background',
-                  Exchange('background', type='direct'),
-                  routing_key='background',
-                  queue_arguments={'x-max-priority': 1}),
-            Queue('maintenance',
-                  Exchange('maintenance', type='direct'),
-                  routing_key='maintenance',
-                  queue_arguments={'x-max-priority': 1}),
-        ),
-
         # リトライ設定
         task_retry_backoff=True,
         task_retry_backoff_max=600,  # 10分
@@ -99,28 +197,9 @@ def configure_celery(
         # 実行時制限
         task_time_limit=1800,      # 30分でハードタイムアウト
         task_soft_time_limit=1500,  # 25分でソフトタイムアウト
-
-        # ビート設定（定期タスク）
-        beat_schedule={
-            'cleanup-expired-cache': {
-                'task': 'scraper.tasks.cleanup_expired_cache',
-                'schedule': timedelta(minutes=30),
-                'options': {'queue': 'maintenance'}
-            },
-            'cache-warmup': {
-                'task': 'scraper.tasks.cache_warmup',
-                'schedule': timedelta(hours=2),
-                'options': {'queue': 'background'}
-            },
-            'performance-metrics': {
-                'task': 'scraper.tasks.collect_performance_metrics',
-                'schedule': timedelta(minutes=5),
-                'options': {'queue': 'background'}
-            },
-        },
     )
 
-    return celery_app
+    return apply_queue_topology(celery_app, redis_url)
 
 
 # デバッグ用設定
@@ -132,7 +211,7 @@ def configure_celery_debug() -> Celery:
         broker_url='memory://',
         result_backend='cache+memory://',
     )
-    return celery_app
+    return apply_queue_topology(celery_app, 'memory://')
 
 
 # プロダクション用設定
@@ -184,7 +263,7 @@ def configure_celery_production(
         accept_content=['pickle'],
     )
 
-    return celery_app
+    return apply_queue_topology(celery_app, primary_redis)
 
 
 # 環境変数からの自動設定
@@ -307,6 +386,12 @@ def get_queue_stats() -> Dict[str, Any]:
 # インポート用エクスポート
 __all__ = [
     'celery_app',
+    'QueuePool',
+    'QUEUE_POOLS',
+    'TASK_ROUTING',
+    'apply_queue_topology',
+    'broker_priority',
+    'worker_command',
     'configure_celery',
     'configure_celery_debug',
     'configure_celery_production',
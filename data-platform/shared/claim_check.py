@@ -0,0 +1,277 @@
+"""
+Claim Check - 大きなタスクペイロードの参照渡し
+
+Celeryワークフローの各ステップ間で結果リストを結果バックエンド経由で
+コピーせず、内容アドレス（SHA-256）のキーでRedisまたはローカルファイルに
+保存し、件数付きの参照（claim check）だけを受け渡す。
+受け取り側は参照を1件ずつ読み出すため、ワーカーのメモリ使用量は
+バッチ数ではなく1バッチ分の大きさで決まる。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+import zlib
+from abc import ABC, abstractmethod
+from multiprocessing import shared_memory
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from .exceptions import ProcessingError
+
+
+CLAIM_CHECK_KEY = "claim_check"
+DIGEST_PREFIX = "sha256:"
+DEFAULT_TTL = 3600  # 結果バックエンドのresult_expiresと同じ1時間
+DEFAULT_LOCAL_DIRECTORY = os.path.join(tempfile.gettempdir(), "sado_claim_check")
+
+
+def is_claim_check(value: Any) -> bool:
+    """claim check参照かどうか"""
+    return isinstance(value, dict) and isinstance(value.get(CLAIM_CHECK_KEY), str)
+
+
+class ClaimCheckStore(ABC):
+    """claim checkストア基底クラス
+
+    値はJSON + zlib圧縮で保存し、同じ内容は同じキーになる（重複保存しない）。
+    """
+
+    def __init__(self, ttl: int = DEFAULT_TTL):
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+
+    def put_items(self, items: List[Any]) -> Dict[str, Any]:
+        """リストを保存して参照を返す"""
+        payload = zlib.compress(
+            json.dumps(items, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+        )
+        digest = hashlib.sha256(payload).hexdigest()
+        self._put(digest, payload)
+
+        return {
+            CLAIM_CHECK_KEY: f"{DIGEST_PREFIX}{digest}",
+            "count": len(items),
+            "size": len(payload)
+        }
+
+    def get_items(self, ref: Dict[str, Any]) -> List[Any]:
+        """参照からリストを読み出す"""
+        digest = self._digest(ref)
+        payload = self._get(digest)
+        if payload is None:
+            raise ProcessingError(f"Claim check not found or expired: {ref[CLAIM_CHECK_KEY]}")
+
+        items: List[Any] = json.loads(zlib.decompress(payload).decode('utf-8'))
+        return items
+
+    def iter_items(self, refs: Iterable[Dict[str, Any]]) -> Iterator[Any]:
+        """複数の参照を順に読み出して要素を1件ずつ返す（同時に保持するのは1参照分）"""
+        for ref in refs:
+            yield from self.get_items(ref)
+
+    def delete(self, ref: Dict[str, Any]) -> None:
+        """参照先を削除"""
+        self._delete(self._digest(ref))
+
+    def copy_to(self, ref: Dict[str, Any], target: 'ClaimCheckStore') -> None:
+        """参照先を別のストアへ複製（内容アドレスのため参照はそのまま使える）"""
+        digest = self._digest(ref)
+        payload = self._get(digest)
+        if payload is None:
+            raise ProcessingError(f"Claim check not found or expired: {ref[CLAIM_CHECK_KEY]}")
+        target._put(digest, payload)
+
+    def purge_expired(self) -> int:
+        """期限切れエントリの削除（TTLを持たないストア用、削除件数を返す）"""
+        return 0
+
+    @staticmethod
+    def _digest(ref: Dict[str, Any]) -> str:
+        if not is_claim_check(ref) or not ref[CLAIM_CHECK_KEY].startswith(DIGEST_PREFIX):
+            raise ProcessingError(f"Invalid claim check: {ref!r}")
+        return str(ref[CLAIM_CHECK_KEY][len(DIGEST_PREFIX):])
+
+    @abstractmethod
+    def _put(self, digest: str, payload: bytes) -> None:
+        """ペイロード保存"""
+
+    @abstractmethod
+    def _get(self, digest: str) -> Optional[bytes]:
+        """ペイロード取得（存在しない場合はNone）"""
+
+    @abstractmethod
+    def _delete(self, digest: str) -> None:
+        """ペイロード削除"""
+
+
+class RedisClaimCheckStore(ClaimCheckStore):
+    """Redisに保存するclaim checkストア（TTLで自動失効）"""
+
+    def __init__(self, client: Any, ttl: int = DEFAULT_TTL, prefix: str = "claimcheck:"):
+        super().__init__(ttl)
+        self._client = client
+        self._prefix = prefix
+
+    def _put(self, digest: str, payload: bytes) -> None:
+        key = self._prefix + digest
+        # 同一内容が既にあれば書き込まず有効期限だけ延長
+        if not self._client.set(key, payload, ex=self.ttl, nx=True):
+            self._client.expire(key, self.ttl)
+
+    def _get(self, digest: str) -> Optional[bytes]:
+        payload: Optional[bytes] = self._client.get(self._prefix + digest)
+        return payload
+
+    def _delete(self, digest: str) -> None:
+        self._client.delete(self._prefix + digest)
+
+
+class LocalClaimCheckStore(ClaimCheckStore):
+    """ローカルファイルに保存するclaim checkストア（単一ホスト・開発用）"""
+
+    def __init__(self, directory: str = DEFAULT_LOCAL_DIRECTORY, ttl: int = DEFAULT_TTL):
+        super().__init__(ttl)
+        self.directory = directory
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def _put(self, digest: str, payload: bytes) -> None:
+        path = self._path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _get(self, digest: str) -> Optional[bytes]:
+        path = self._path(digest)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _delete(self, digest: str) -> None:
+        try:
+            os.remove(self._path(digest))
+        except FileNotFoundError:
+            pass
+
+    def purge_expired(self) -> int:
+        """TTLを過ぎたファイルを削除"""
+        if not os.path.isdir(self.directory):
+            return 0
+
+        cutoff = time.time() - self.ttl
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+        return removed
+
+
+class SharedMemoryClaimCheckStore(ClaimCheckStore):
+    """共有メモリに保存するclaim checkストア（同一ホストのプロセス間受け渡し用）
+
+    セグメントは作成したプロセスの終了後も残るため、利用側がdelete()で解放する。
+    先頭8バイトにペイロード長を書き込む（セグメントはページ単位に切り上げられるため）。
+    """
+
+    _HEADER_SIZE = 8
+
+    def __init__(self, prefix: str = "sado_cc_", ttl: int = DEFAULT_TTL):
+        super().__init__(ttl)
+        self._prefix = prefix
+
+    def _name(self, digest: str) -> str:
+        # macOSのPOSIX共有メモリ名の上限（31文字）に収める
+        return self._prefix + digest[:20]
+
+    def _put(self, digest: str, payload: bytes) -> None:
+        try:
+            segment = shared_memory.SharedMemory(
+                name=self._name(digest), create=True, size=len(payload) + self._HEADER_SIZE
+            )
+        except FileExistsError:
+            return  # 同一内容が既に存在
+
+        try:
+            buf = segment.buf
+            if buf is None:
+                raise ProcessingError(f"Shared memory segment is closed: {segment.name}")
+            buf[:self._HEADER_SIZE] = len(payload).to_bytes(self._HEADER_SIZE, 'little')
+            buf[self._HEADER_SIZE:self._HEADER_SIZE + len(payload)] = payload
+        finally:
+            segment.close()
+
+    def _get(self, digest: str) -> Optional[bytes]:
+        try:
+            segment = shared_memory.SharedMemory(name=self._name(digest))
+        except FileNotFoundError:
+            return None
+
+        try:
+            buf = segment.buf
+            if buf is None:
+                return None
+            size = int.from_bytes(buf[:self._HEADER_SIZE], 'little')
+            return bytes(buf[self._HEADER_SIZE:self._HEADER_SIZE + size])
+        finally:
+            segment.close()
+
+    def _delete(self, digest: str) -> None:
+        try:
+            segment = shared_memory.SharedMemory(name=self._name(digest))
+        except FileNotFoundError:
+            return
+        segment.close()
+        segment.unlink()
+
+
+def create_claim_check_store(url: Optional[str] = None, ttl: int = DEFAULT_TTL) -> ClaimCheckStore:
+    """URLからclaim checkストアを作成
+
+    - redis:// / rediss:// : RedisClaimCheckStore
+    - file:///path         : 指定ディレクトリのLocalClaimCheckStore
+    - その他・未指定       : 一時ディレクトリのLocalClaimCheckStore
+    """
+    if url and url.startswith(('redis://', 'rediss://')):
+        import redis
+
+        return RedisClaimCheckStore(redis.Redis.from_url(url), ttl=ttl)
+
+    if url and url.startswith('file://'):
+        return LocalClaimCheckStore(url[len('file://'):], ttl=ttl)
+
+    return LocalClaimCheckStore(ttl=ttl)
+
+
+__all__ = [
+    'ClaimCheckStore',
+    'RedisClaimCheckStore',
+    'LocalClaimCheckStore',
+    'SharedMemoryClaimCheckStore',
+    'create_claim_check_store',
+    'is_claim_check',
+]
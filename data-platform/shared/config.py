@@ -52,6 +52,10 @@ class ProcessingConfig:
     timeout: int = 30
     batch_size: int = 50
     rate_limit_per_second: float = 10.0
+    rate_limit_redis_url: Optional[str] = None  # 設定時はワーカー間でレート上限を共有
+    scheduling_mode: str = "batch"              # 非同期処理のスケジューリング（batch / continuous）
+    adaptive_concurrency: bool = False          # レイテンシ・スロットリングに応じた同時実行数の自動調整
+    async_instrumentation: bool = False         # イベントループ遅延・エグゼキューター待ち時間の計測
 
     def validate(self) -> List[str]:
         """Validate processing configuration."""
@@ -71,6 +75,8 @@ class ProcessingConfig:
             errors.append("batch_size must be at least 1")
         if self.rate_limit_per_second <= 0:
             errors.append("rate_limit_per_second must be positive")
+        if self.scheduling_mode not in ('batch', 'continuous'):
+            errors.append("scheduling_mode must be 'batch' or 'continuous'")
 
         return errors
 
@@ -132,7 +138,11 @@ class ScraperConfig:
             max_retries=int(os.getenv('MAX_RETRIES', '3')),
             timeout=int(os.getenv('TIMEOUT', '30')),
             batch_size=int(os.getenv('BATCH_SIZE', '50')),
-            rate_limit_per_second=float(os.getenv('RATE_LIMIT_PER_SECOND', '10.0'))
+            rate_limit_per_second=float(os.getenv('RATE_LIMIT_PER_SECOND', '10.0')),
+            rate_limit_redis_url=os.getenv('RATE_LIMIT_REDIS_URL'),
+            scheduling_mode=os.getenv('SCHEDULING_MODE', 'batch').lower(),
+            adaptive_concurrency=os.getenv('ADAPTIVE_CONCURRENCY', 'false').lower() in ('true', '1', 'yes', 'on'),
+            async_instrumentation=os.getenv('ASYNC_INSTRUMENTATION', 'false').lower() in ('true', '1', 'yes', 'on')
         )
 
         # Logging configuration
@@ -240,7 +250,11 @@ class ScraperConfig:
                 'max_retries': self.processing.max_retries,
                 'timeout': self.processing.timeout,
                 'batch_size': self.processing.batch_size,
-                'rate_limit_per_second': self.processing.rate_limit_per_second
+                'rate_limit_per_second': self.processing.rate_limit_per_second,
+                'rate_limit_redis_url': self.processing.rate_limit_redis_url,
+                'scheduling_mode': self.processing.scheduling_mode,
+                'adaptive_concurrency': self.processing.adaptive_concurrency,
+                'async_instrumentation': self.processing.async_instrumentation
             },
             'logging': {
                 'level': self.logging.level,
@@ -268,7 +282,11 @@ class ScraperConfig:
                 'max_retries': self.processing.max_retries,
                 'timeout': self.processing.timeout,
                 'batch_size': self.processing.batch_size,
-                'rate_limit_per_second': self.processing.rate_limit_per_second
+                'rate_limit_per_second': self.processing.rate_limit_per_second,
+                'distributed_rate_limit': bool(self.processing.rate_limit_redis_url),
+                'scheduling_mode': self.processing.scheduling_mode,
+                'adaptive_concurrency': self.processing.adaptive_concurrency,
+                'async_instrumentation': self.processing.async_instrumentation
             },
             'logging': {
                 'level': self.logging.level,
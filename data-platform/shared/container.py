@@ -190,6 +190,8 @@ def create_container(config) -> DIContainer:
     from infrastructure.auth.google_auth_service import GoogleAuthService
     from infrastructure.external.places_api_adapter import PlacesAPIAdapter
     from infrastructure.storage.sheets_storage_adapter import SheetsStorageAdapter
+    from infrastructure.storage.negative_result_cache import NegativeResultCache
+    from shared.distributed_rate_limiter import DistributedRateLimiter, create_distributed_rate_limiter
     from core.domain.place_validator import PlaceDataValidator
     from core.domain.location_service import LocationService
     from core.processors.data_processor import DataProcessor
@@ -206,13 +208,31 @@ def create_container(config) -> DIContainer:
         lambda: GoogleAuthService(config.google_api.service_account_path)
     )
 
+    container.register_factory(
+        NegativeResultCache,
+        lambda: NegativeResultCache(getattr(config, 'negative_cache_path', None))
+    )
+
+    # ワーカー間で共有するレートリミッター（RATE_LIMIT_REDIS_URL設定時のみ）
+    rate_limit_redis_url = getattr(config.processing, 'rate_limit_redis_url', None)
+    if rate_limit_redis_url:
+        container.register_factory(
+            DistributedRateLimiter,
+            lambda: create_distributed_rate_limiter(
+                rate_limit_redis_url,
+                requests_per_second=config.processing.rate_limit_per_second
+            )
+        )
+
     container.register_factory(
         PlacesAPIAdapter,
         lambda: PlacesAPIAdapter(
             api_key=config.google_api.places_api_key,
             delay=config.processing.api_delay,
             max_retries=config.processing.max_retries,
-            timeout=config.processing.timeout
+            timeout=config.processing.timeout,
+            negative_cache=container.get(NegativeResultCache),
+            rate_limiter=container.get(DistributedRateLimiter) if rate_limit_redis_url else None
         )
     )
 
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Deadline - 実行期限の伝播
+
+CLIの --deadline から DataProcessor・非同期プロセッサ・各API呼び出しの
+タイムアウトまで、ContextVar経由で残り時間を伝える。
+asyncioタスクとasyncio.to_threadはコンテキストを引き継ぐため、
+スレッドで実行される同期API呼び出しにも同じ期限が適用される。
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from shared.exceptions import DeadlineExceededError
+
+
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*([hms]?)')
+_DURATION_UNITS = {'h': 3600.0, 'm': 60.0, 's': 1.0, '': 1.0}
+
+
+class Deadline:
+    """単調時計基準の実行期限"""
+
+    __slots__ = ('total', '_expires_at')
+
+    def __init__(self, seconds: float):
+        self.total = seconds
+        self._expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """残り秒数（期限切れなら0）"""
+        return max(0.0, self._expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """期限切れかどうか"""
+        return time.monotonic() >= self._expires_at
+
+    def check(self) -> None:
+        """期限切れならDeadlineExceededErrorを送出"""
+        if self.expired:
+            raise DeadlineExceededError(deadline_seconds=self.total)
+
+    def timeout(self, default: Optional[float] = None) -> float:
+        """defaultを残り時間で切り詰めたタイムアウト値"""
+        self.check()
+        remaining = self.remaining()
+        return remaining if default is None else min(default, remaining)
+
+    def with_reserve(self, seconds: float) -> 'Deadline':
+        """seconds秒早く切れる子期限（後処理用の時間を確保する）"""
+        child = Deadline.__new__(Deadline)
+        child.total = max(0.0, self.total - seconds)
+        child._expires_at = self._expires_at - seconds
+        return child
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar('current_deadline', default=None)
+
+
+def get_current_deadline() -> Optional[Deadline]:
+    """現在のコンテキストの期限を取得"""
+    return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    """期限をコンテキストに設定（Noneの場合は何もしない）"""
+    if deadline is None:
+        yield None
+        return
+
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining_timeout(default: Optional[float] = None) -> Optional[float]:
+    """現在の期限で切り詰めたタイムアウト値（期限が無ければdefault）"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    return deadline.timeout(default)
+
+
+def parse_duration(value: str) -> float:
+    """'20m', '90s', '1h30m', '300' 形式の期間を秒数へ変換"""
+    text = value.strip().lower()
+    if not text:
+        raise ValueError(f"期間が空です: {value!r}")
+
+    position = 0
+    total = 0.0
+    for match in _DURATION_PATTERN.finditer(text):
+        if match.start() != position:
+            break
+        total += float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+        position = match.end()
+
+    if position != len(text) or total <= 0:
+        raise ValueError(f"不正な期間指定です: {value!r}（例: 20m, 90s, 1h30m）")
+    return total
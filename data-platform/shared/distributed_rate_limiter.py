@@ -0,0 +1,279 @@
+"""
+Distributed Rate Limiter - Redis共有トークンバケット
+
+複数のCeleryワーカー・ローカル非同期パイプラインが同じAPI（SKU）の
+レート上限を共有するためのレートリミッター。
+
+- トークンバケットはRedis上のLuaスクリプトで原子的に更新する（時刻はRedis TIME）
+- Redis往復を減らすため、許可をまとめて取得してローカルに保持する
+  （保持期限 permit_ttl を過ぎた許可は破棄し、古い許可でのバーストを防ぐ）
+- Redisに接続できない場合はプロセス内のトークンバケットで継続し、
+  一定間隔ごとにRedisへの再接続を試みる
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+
+# KEYS[1]: バケットキー / ARGV: rate, burst, requested
+# 戻り値: {許可数, 許可0件の場合の待機ミリ秒}
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = burst
+    ts = now
+end
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local granted = math.min(requested, math.floor(tokens))
+tokens = tokens - granted
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+
+local wait_ms = 0
+if granted == 0 then
+    wait_ms = math.ceil((1 - tokens) / rate * 1000)
+end
+return {granted, wait_ms}
+"""
+
+
+@dataclass(slots=True)
+class RateLimit:
+    """API（SKU）ごとのレート設定"""
+    requests_per_second: float
+    burst: int = 1          # バケット容量（クラスタ全体で同時に使える許可数）
+    permit_batch: int = 5   # Redisから一度に取得する許可数の上限
+    permit_ttl: float = 1.0  # ローカルに保持した許可の有効期間（秒）
+
+    def batch_size(self) -> int:
+        """保持期限内に使い切れる数までに制限した一括取得数"""
+        usable = max(1, math.floor(self.requests_per_second * self.permit_ttl))
+        return max(1, min(self.permit_batch, self.burst, usable))
+
+
+@dataclass(slots=True)
+class _PermitPool:
+    """ローカルに保持している許可"""
+    permits: int = 0
+    expires_at: float = 0.0
+
+
+@dataclass(slots=True)
+class _LocalBucket:
+    """Redis不通時のプロセス内トークンバケット"""
+    tokens: float
+    updated_at: float = field(default_factory=time.monotonic)
+
+
+class DistributedRateLimiter:
+    """Redisトークンバケットによるクラスタ全体のレートリミッター"""
+
+    def __init__(
+        self,
+        client: Optional[Any],
+        default_limit: RateLimit,
+        limits: Optional[Dict[str, RateLimit]] = None,
+        key_prefix: str = "ratelimit:",
+        redis_retry_interval: float = 5.0
+    ):
+        self.logger = logging.getLogger(__name__)
+        self._default_limit = default_limit
+        self._limits = dict(limits or {})
+        self._key_prefix = key_prefix
+        self._client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT) if client is not None else None
+        self._lock = threading.Lock()
+        self._pools: Dict[str, _PermitPool] = {}
+        self._local_buckets: Dict[str, _LocalBucket] = {}
+        self._redis_failed = False
+        self._redis_retry_interval = redis_retry_interval
+        self._redis_retry_at = 0.0
+        self._stats = {
+            "acquired": 0, "local_hits": 0, "redis_calls": 0,
+            "expired_permits": 0, "waits": 0, "fallbacks": 0
+        }
+
+    def limit_for(self, key: str) -> RateLimit:
+        """キーのレート設定"""
+        return self._limits.get(key, self._default_limit)
+
+    def try_acquire(self, key: str = "default") -> float:
+        """許可を1件取得（取得できた場合0、できない場合は待機秒数）"""
+        limit = self.limit_for(key)
+        with self._lock:
+            if self._take_local_permit(key):
+                self._stats["local_hits"] += 1
+                self._stats["acquired"] += 1
+                return 0.0
+
+        granted, wait = self._request_permits(key, limit)
+
+        with self._lock:
+            if granted > 0:
+                # 1件はこの呼び出しで使い、残りはローカルに保持
+                pool = self._pools.setdefault(key, _PermitPool())
+                self._discard_expired(pool)
+                pool.permits += granted - 1
+                pool.expires_at = time.monotonic() + limit.permit_ttl
+                self._stats["acquired"] += 1
+                return 0.0
+
+            self._stats["waits"] += 1
+            return max(wait, 0.001)
+
+    def acquire(self, key: str = "default") -> None:
+        """許可が得られるまで待機（同期）"""
+        while True:
+            wait = self.try_acquire(key)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, key: str = "default") -> None:
+        """許可が得られるまで待機（非同期、Redis呼び出しはスレッドで実行）"""
+        while True:
+            with self._lock:
+                if self._take_local_permit(key):
+                    self._stats["local_hits"] += 1
+                    self._stats["acquired"] += 1
+                    return
+
+            wait = await asyncio.to_thread(self.try_acquire, key)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def _take_local_permit(self, key: str) -> bool:
+        pool = self._pools.get(key)
+        if pool is None:
+            return False
+
+        self._discard_expired(pool)
+        if pool.permits > 0:
+            pool.permits -= 1
+            return True
+        return False
+
+    def _discard_expired(self, pool: _PermitPool) -> None:
+        if pool.permits and time.monotonic() >= pool.expires_at:
+            self._stats["expired_permits"] += pool.permits
+            pool.permits = 0
+
+    def _request_permits(self, key: str, limit: RateLimit) -> Tuple[int, float]:
+        """Redis（不通時はローカルバケット）から許可をまとめて取得"""
+        requested = limit.batch_size()
+
+        if self._script is not None and time.monotonic() >= self._redis_retry_at:
+            try:
+                granted, wait_ms = self._script(
+                    keys=[self._key_prefix + key],
+                    args=[limit.requests_per_second, max(limit.burst, 1), requested]
+                )
+                with self._lock:
+                    self._stats["redis_calls"] += 1
+                    if self._redis_failed:
+                        self._redis_failed = False
+                        self.logger.info("分散レートリミッター: Redis接続回復")
+                return int(granted), int(wait_ms) / 1000.0
+
+            except Exception as e:
+                with self._lock:
+                    self._stats["fallbacks"] += 1
+                    self._redis_retry_at = time.monotonic() + self._redis_retry_interval
+                    if not self._redis_failed:
+                        self._redis_failed = True
+                        self.logger.warning(f"分散レートリミッター: Redis不通のためローカル制限で継続: {e}")
+
+        with self._lock:
+            return self._take_from_local_bucket(key, limit, requested)
+
+    def _take_from_local_bucket(self, key: str, limit: RateLimit, requested: int) -> Tuple[int, float]:
+        burst = max(limit.burst, 1)
+        bucket = self._local_buckets.setdefault(key, _LocalBucket(tokens=float(burst)))
+        now = time.monotonic()
+        bucket.tokens = min(burst, bucket.tokens + (now - bucket.updated_at) * limit.requests_per_second)
+        bucket.updated_at = now
+
+        granted = min(requested, math.floor(bucket.tokens))
+        bucket.tokens -= granted
+        if granted:
+            return granted, 0.0
+        return 0, (1 - bucket.tokens) / limit.requests_per_second
+
+    def saturation(self, key: str = "default") -> float:
+        """バケットの使用率（0.0: 満タン、1.0: 枯渇）
+
+        Redis上の残トークンを補充込みで読み取る（取得はしない）。
+        Redis不通時はプロセス内のバケットで代用する。
+        """
+        limit = self.limit_for(key)
+        burst = max(limit.burst, 1)
+
+        if self._client is not None and not self._redis_failed:
+            try:
+                tokens, ts = self._client.hmget(self._key_prefix + key, 'tokens', 'ts')
+                if tokens is None or ts is None:
+                    return 0.0
+                seconds, microseconds = self._client.time()
+                elapsed = max(0.0, seconds + microseconds / 1_000_000 - float(ts))
+                return 1.0 - min(burst, float(tokens) + elapsed * limit.requests_per_second) / burst
+            except Exception as e:
+                self.logger.debug(f"分散レートリミッター: 使用率取得エラー: {e}")
+
+        with self._lock:
+            bucket = self._local_buckets.get(key)
+            if bucket is None:
+                return 0.0
+            elapsed = time.monotonic() - bucket.updated_at
+            return 1.0 - min(burst, bucket.tokens + elapsed * limit.requests_per_second) / burst
+
+    def get_stats(self) -> Dict[str, Any]:
+        """統計情報"""
+        with self._lock:
+            return {
+                **self._stats,
+                "backend": "local" if self._script is None or self._redis_failed else "redis",
+                "held_permits": {key: pool.permits for key, pool in self._pools.items()}
+            }
+
+
+def create_distributed_rate_limiter(
+    redis_url: Optional[str],
+    requests_per_second: float,
+    limits: Optional[Dict[str, RateLimit]] = None,
+    burst: Optional[int] = None
+) -> DistributedRateLimiter:
+    """Redis URLから分散レートリミッターを作成（URL未指定時はプロセス内のみ）"""
+    client = None
+    if redis_url and redis_url.startswith(('redis://', 'rediss://')):
+        import redis
+
+        client = redis.Redis.from_url(redis_url, socket_timeout=1.0, socket_connect_timeout=1.0)
+
+    default_limit = RateLimit(
+        requests_per_second=requests_per_second,
+        burst=burst if burst is not None else max(1, math.ceil(requests_per_second))
+    )
+    return DistributedRateLimiter(client, default_limit, limits)
+
+
+__all__ = [
+    'RateLimit',
+    'DistributedRateLimiter',
+    'create_distributed_rate_limiter',
+]
@@ -6,14 +6,20 @@ batching, retry strategies, and cache integration.
 """
 
 from celery import group, chain, chord, signature
-from typing import List, Dict, Any, Optional, Union
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from typing import List, Dict, Any, Optional, Tuple, Union
 import asyncio
 import logging
+import os
+import threading
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 
+from . import get_ml_engine
 from .celery_config import celery_app
 from .cache_service import CacheService
+from .claim_check import DEFAULT_TTL, ClaimCheckStore, create_claim_check_store
+from .task_dedup import TaskLeaseManager, create_task_lease_manager
 from .exceptions import ProcessingError, APIError, CacheError
 from .types.core_types import PlaceData, ValidatedPlaceData, ProcessingResult, BatchCacheResult
 
@@ -40,6 +46,15 @@ class BatchTaskConfig:
     use_cache: bool = True
     cache_ttl: int = 86400  # 24時間
     use_real_api: bool = False  # 実際のAPI使用フラグ
+    # 実行バックエンド: celery（Redis + Celeryワーカー） / process_pool（単一ノードの全コア）
+    backend: str = field(default_factory=lambda: os.getenv('DISTRIBUTED_BACKEND', 'celery'))
+    # ワーカー間の重複取得排除（Redisブローカー時のみ有効）
+    deduplicate: bool = True
+    data_version: str = "1"  # 取得フィールド等を変えたら上げる（共有結果の世代）
+
+
+# 重複排除リースのタスク種別
+PLACE_DETAILS_TASK_KIND = 'place_details'
 
 
 class DistributedTaskProcessor:
@@ -57,29 +72,24 @@ class DistributedTaskProcessor:
         """Places APIバッチ処理ワークフロー"""
 
         try:
-            # バッチ分割
-            batches = self._create_batches(place_ids, config.batch_size)
+            # 重複排除と公開済み結果の再利用、バッチ分割
+            dispatch_ids, precomputed = _plan_dispatch(place_ids, config)
+            batches = self._create_batches(dispatch_ids, config.batch_size)
 
-            # 並列バッチ処理タスク作成
-            batch_tasks = group(
-                process_places_batch.s(batch, asdict(config))
-                for batch in batches
-            )
+            if config.backend == 'process_pool':
+                return await self._run_process_pool_workflow(place_ids, batches, config, precomputed)
+            if config.backend != 'celery':
+                raise ValueError(f"Unknown backend: {config.backend}")
 
             # データ検証・ML分析チェーン
-            workflow = chain(
-                batch_tasks,
-                aggregate_batch_results.s(),
-                validate_data_batch.s(),
-                ml_quality_analysis.s()
-            )
+            workflow = _build_workflow(batches, config, precomputed)
 
             # ワークフロー実行
             self.logger.info(f"開始: Places バッチ処理 - {len(place_ids)}件, {len(batches)}バッチ")
             result = workflow.apply_async()
 
             # 結果待機
-            final_result = result.get(timeout=config.timeout * len(batches))
+            final_result = result.get(timeout=config.timeout * max(len(batches), 1))
 
             self.logger.info(f"完了: Places バッチ処理 - 成功率 {final_result.get('success_rate', 0):.1f}%")
             return final_result
@@ -88,6 +98,27 @@ class DistributedTaskProcessor:
             self.logger.error(f"バッチ処理ワークフローエラー: {e}")
             raise ProcessingError(f"Batch workflow failed: {e}")
 
+    async def _run_process_pool_workflow(
+        self,
+        place_ids: List[str],
+        batches: List[List[str]],
+        config: BatchTaskConfig,
+        precomputed: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """同じワークフローをローカルのプロセスプールで実行"""
+        from .local_workflow import run_process_pool_workflow
+
+        self.logger.info(
+            f"開始: Places バッチ処理（プロセスプール） - {len(place_ids)}件, {len(batches)}バッチ"
+        )
+        final_result = await asyncio.to_thread(
+            run_process_pool_workflow, batches, asdict(config), config.max_workers,
+            precomputed=precomputed
+        )
+
+        self.logger.info(f"完了: Places バッチ処理 - 成功率 {final_result.get('success_rate', 0):.1f}%")
+        return final_result
+
     def _create_batches(self, items: List[str], batch_size: int) -> List[List[str]]:
         """リストをバッチに分割"""
         return [
@@ -96,9 +127,329 @@ class DistributedTaskProcessor:
         ]
 
 
+# ワーカープロセス単位の実行環境
+class _WorkerRuntime:
+    """ワーカープロセスで共有するPlaces API実行環境
+
+    専用スレッドで動く永続イベントループ、API統合（HTTP接続プール・
+    インメモリキャッシュ）、キャッシュ接続、ワーカー間共有のレートリミッターを
+    プロセスにつき一度だけ作成し、バッチ間で再利用する。
+
+    places_api キューの threads プールでは、同じ実行環境を複数のタスクスレッドが
+    並行して使う（コルーチンは同じループ上で実行される）。
+    """
+
+    def __init__(self, api_key: str):
+        from .api_integration import create_api_integration
+        from .distributed_rate_limiter import create_distributed_rate_limiter
+
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="places-worker-loop", daemon=True
+        )
+        self._thread.start()
+
+        try:
+            self.cache_service = _create_worker_cache_service()
+            # Redis未接続時はインメモリキャッシュで継続
+            self.run(self.cache_service.initialize())
+            # 全ワーカーで同じRedisバケットを使いSKUごとのレート上限を共有
+            self.rate_limiter = create_distributed_rate_limiter(
+                os.getenv('RATE_LIMIT_REDIS_URL') or os.getenv('CELERY_BROKER_URL'),
+                requests_per_second=float(os.getenv('RATE_LIMIT_PER_SECOND', '10.0'))
+            )
+            self.api_integration = create_api_integration(
+                api_key=api_key,
+                cache_service=self.cache_service,
+                rate_limiter=self.rate_limiter
+            )
+        except Exception:
+            self._stop_loop()
+            raise
+
+    def run(self, coro, timeout: Optional[float] = None) -> Any:
+        """永続ループ上でコルーチンを実行して結果を待つ"""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def fetch_batch(
+        self,
+        place_ids: List[str],
+        timeout: Optional[float] = None
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str], Dict[str, int]]:
+        """バッチ取得（要求Place ID別の結果・失敗Place ID・取得元ごとの件数）"""
+        return self.run(self._fetch_batch(place_ids), timeout)
+
+    async def _fetch_batch(
+        self,
+        place_ids: List[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str], Dict[str, int]]:
+        # threadsプールでは複数バッチが同じ統合を並行利用するため、累計の差分ではなく
+        # このバッチ分の件数を数える
+        counts = {"memory_hits": 0, "cache_hits": 0, "api_calls": 0, "errors": 0}
+        results: Dict[str, Dict[str, Any]] = {}
+        errors: List[str] = []
+
+        async for place_id, place_data in self.api_integration.batch_fetch_places_optimized(
+            place_ids, fetch_counts=counts
+        ):
+            if place_data:
+                results[place_id] = _compact_place_data(place_id, place_data)
+            else:
+                errors.append(place_id)
+
+        return results, errors, counts
+
+    def close(self) -> None:
+        """API統合・キャッシュ接続・イベントループを閉じる"""
+        try:
+            self.run(self._aclose(), timeout=30)
+        finally:
+            self._stop_loop()
+
+    async def _aclose(self) -> None:
+        await self.api_integration.cleanup()
+        await self.cache_service.close()
+
+    def _stop_loop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self.loop.close()
+
+
+_worker_runtime: Optional[_WorkerRuntime] = None
+_worker_runtime_lock = threading.Lock()
+
+
+def _get_worker_runtime() -> Optional[_WorkerRuntime]:
+    """プロセスの実行環境を取得（PLACES_API_KEY未設定時はNone）"""
+    global _worker_runtime
+
+    api_key = os.getenv('PLACES_API_KEY')
+    if not api_key:
+        return None
+
+    with _worker_runtime_lock:
+        # fork前に作成された環境はループスレッドが引き継がれないため作り直す
+        if _worker_runtime is None or _worker_runtime.pid != os.getpid():
+            _worker_runtime = _WorkerRuntime(api_key)
+            logging.getLogger(__name__).info(f"ワーカー実行環境を初期化: pid={_worker_runtime.pid}")
+        return _worker_runtime
+
+
+def _close_worker_runtime() -> None:
+    """プロセスの実行環境を破棄"""
+    global _worker_runtime
+
+    with _worker_runtime_lock:
+        runtime, _worker_runtime = _worker_runtime, None
+
+    if runtime is not None and runtime.pid == os.getpid():
+        try:
+            runtime.close()
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"ワーカー実行環境の終了エラー: {e}")
+
+
+@worker_process_init.connect
+def _init_worker_runtime(**kwargs) -> None:
+    """ワーカープロセス起動時に実行環境を作成（失敗時は初回タスクで再試行）
+
+    worker_process_init は prefork の子プロセスでのみ発火する。threads / gevent
+    プールでは初回タスクの _get_worker_runtime() がロック下で遅延作成する。
+    """
+    try:
+        _get_worker_runtime()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"ワーカー実行環境の初期化エラー: {e}")
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def _shutdown_worker_runtime(**kwargs) -> None:
+    """ワーカープロセス終了時に接続を閉じる（threads / gevent プールは worker_shutdown）"""
+    _close_worker_runtime()
+
+
+def _compact_place_data(place_id: str, place_data: PlaceData) -> Dict[str, Any]:
+    """タスク結果用にPlaceDataを必要な項目だけに縮約"""
+    display_name = place_data.get('displayName')
+    name = display_name.get('text', '') if isinstance(display_name, dict) else place_data.get('name', '')
+
+    return {
+        "place_id": place_data.get('id') or place_data.get('place_id') or place_id,
+        "name": name,
+        "rating": place_data.get('rating'),
+        "address": place_data.get('formattedAddress', ''),
+        "types": place_data.get('types', [])
+    }
+
+
+# ワーカー間の重複排除
+_lease_manager: Optional[TaskLeaseManager] = None
+_lease_manager_loaded = False
+
+
+def _get_lease_manager() -> Optional[TaskLeaseManager]:
+    """プロセスのリースマネージャー（DEDUP_REDIS_URL / CELERY_BROKER_URL がRedisの場合のみ）"""
+    global _lease_manager, _lease_manager_loaded
+
+    if not _lease_manager_loaded:
+        _lease_manager = create_task_lease_manager(
+            os.getenv('DEDUP_REDIS_URL') or os.getenv('CELERY_BROKER_URL')
+        )
+        _lease_manager_loaded = True
+    return _lease_manager
+
+
+def _lease_errors() -> Tuple[type, ...]:
+    """重複排除レイヤーの障害として扱う例外（Redis未導入時は該当なし）"""
+    try:
+        from redis.exceptions import RedisError
+    except ImportError:
+        return ()
+    return (RedisError,)
+
+
+def _fetch_batch_deduplicated(
+    runtime: _WorkerRuntime,
+    leases: TaskLeaseManager,
+    place_ids: List[str],
+    data_version: str,
+    timeout: Optional[float] = None
+) -> Tuple[Dict[str, Dict[str, Any]], List[str], Dict[str, int]]:
+    """リースを取れたPlace IDだけ取得し、他ワーカーが取得中のものは結果を待って共有
+
+    重複排除は任意のレイヤーのため、リース操作のRedisエラーでは
+    重複排除なしの取得に切り替える（取得自体のエラーはそのまま送出）。
+    """
+    logger = logging.getLogger(__name__)
+    lease_errors = _lease_errors()
+    kind = PLACE_DETAILS_TASK_KIND
+    owner = leases.new_owner()
+    results: Dict[str, Dict[str, Any]] = {}
+    errors: List[str] = []
+    counts = {"memory_hits": 0, "cache_hits": 0, "api_calls": 0, "errors": 0, "deduplicated": 0}
+
+    def fetch(ids: List[str]) -> None:
+        if not ids:
+            return
+        try:
+            fetched, failed, fetch_counts = runtime.fetch_batch(ids, timeout)
+        except BaseException:
+            try:
+                leases.release(kind, data_version, ids, owner)
+            except lease_errors as e:
+                logger.warning(f"重複排除リースの解放エラー: {e}")
+            raise
+
+        # 成功分は公開、失敗分はリースを解放して待機側に引き継ぐ
+        try:
+            leases.publish(kind, data_version, fetched, owner)
+            leases.release(kind, data_version, failed, owner)
+        except lease_errors as e:
+            # 待機側はリース期限切れ後に自分で取得する
+            logger.warning(f"重複排除の結果公開エラー: {e}")
+        results.update(fetched)
+        errors.extend(failed)
+        for key, value in fetch_counts.items():
+            counts[key] = counts.get(key, 0) + value
+
+    try:
+        plan = leases.claim(kind, data_version, place_ids, owner)
+    except lease_errors as e:
+        logger.warning(f"重複排除リースの取得エラー、重複排除なしで取得します: {e}")
+        fetch_plain = runtime.fetch_batch(place_ids, timeout)
+        return fetch_plain[0], fetch_plain[1], {**fetch_plain[2], "deduplicated": 0}
+
+    results.update(plan.shared)
+    counts["deduplicated"] += len(plan.shared)
+    fetch(plan.owned)
+
+    if plan.pending:
+        try:
+            waited = leases.wait_for_results(kind, data_version, plan.pending, owner, timeout)
+        except lease_errors as e:
+            logger.warning(f"重複排除の結果待機エラー、自分で取得します: {e}")
+            fetch(plan.pending)
+        else:
+            results.update(waited.shared)
+            counts["deduplicated"] += len(waited.shared)
+            # 勝者が消えた分と、待機がタイムアウトした分は自分で取得
+            fetch(waited.owned + waited.pending)
+
+    return results, errors, counts
+
+
+def _plan_dispatch(
+    place_ids: List[str],
+    config: BatchTaskConfig
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """ディスパッチ前の重複排除
+
+    同じPlace IDは1回だけ投入し、他のワークフローが公開済みの結果は
+    取得済みバッチ（claim check参照）として集約に直接渡す。
+    """
+    unique_ids = list(dict.fromkeys(place_ids))
+    leases = _get_lease_manager() if config.deduplicate and config.use_real_api else None
+    if leases is None:
+        return unique_ids, []
+
+    try:
+        shared = leases.get_results(PLACE_DETAILS_TASK_KIND, config.data_version, unique_ids)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"重複排除の確認エラー: {e}")
+        return unique_ids, []
+
+    if not shared:
+        return unique_ids, []
+
+    precomputed = _check_in({
+        "status": "success",
+        "processed": len(shared),
+        "total_requested": len(shared),
+        "cache_hits": len(shared),
+        "api_calls": 0,
+        "deduplicated": len(shared),
+        "results": list(shared.values()),
+        "api_mode": "deduplicated"
+    }, 'results')
+    return [place_id for place_id in unique_ids if place_id not in shared], [precomputed]
+
+
+def _build_workflow(
+    batches: List[List[str]],
+    config: BatchTaskConfig,
+    precomputed: Optional[List[Dict[str, Any]]] = None
+):
+    """group → 集約 → 検証 → ML分析 のチェーンを構築"""
+    if batches:
+        head = [
+            group(process_places_batch.s(batch, asdict(config)) for batch in batches),
+            aggregate_batch_results.s(precomputed=precomputed)
+        ]
+    else:
+        # 全件が公開済み結果で賄える場合は集約から開始
+        head = [aggregate_batch_results.s([], precomputed=precomputed)]
+
+    return chain(*head, validate_data_batch.s(), ml_quality_analysis.s())
+
+
 # Celery タスク定義
 # ヘルパー関数（タスク外で定義）
-def _process_places_batch_sync(place_ids: List[str], task_id: str, use_real_api: bool = False) -> Dict[str, Any]:
+def _process_places_batch_sync(
+    place_ids: List[str],
+    task_id: str,
+    use_real_api: bool = False,
+    timeout: Optional[float] = None,
+    deduplicate: bool = True,
+    data_version: str = "1"
+) -> Dict[str, Any]:
     """Places API バッチ処理（同期実装）"""
     logger = logging.getLogger(__name__)
 
@@ -106,57 +457,28 @@ def _process_places_batch_sync(place_ids: List[str], task_id: str, use_real_api:
         results = []
         cache_hits = 0
         api_calls = 0
+        deduplicated = 0
         errors = []
 
         if use_real_api:
-            # 実際のAPI統合を使用
-            try:
-                from .api_integration import create_api_integration
-                from .cache_service import CacheService
-                import os
-
-                # API統合サービスを作成
-                api_key = os.getenv('PLACES_API_KEY')
-                if not api_key:
-                    logger.warning("PLACES_API_KEY環境変数が設定されていません。モックデータを使用します。")
-                    use_real_api = False
+            # ワーカープロセスの永続ループ・API統合を再利用
+            # 取得・初期化の失敗はモックに置き換えず送出し、タスクのリトライに任せる
+            runtime = _get_worker_runtime()
+            if runtime is None:
+                logger.warning("PLACES_API_KEY環境変数が設定されていません。モックデータを使用します。")
+                use_real_api = False
+            else:
+                leases = _get_lease_manager() if deduplicate else None
+                if leases is None:
+                    fetched, errors, counts = runtime.fetch_batch(place_ids, timeout)
                 else:
-                    cache_service = CacheService()
-                    api_integration = create_api_integration(
-                        api_key=api_key,
-                        cache_service=cache_service
+                    fetched, errors, counts = _fetch_batch_deduplicated(
+                        runtime, leases, place_ids, data_version, timeout
                     )
-
-                    # 非同期処理を同期実行
-                    import asyncio
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-
-                    try:
-                        place_results, place_errors, stats = loop.run_until_complete(
-                            api_integration.batch_fetch_places(place_ids)
-                        )
-
-                        # 結果をdict形式に変換
-                        for place_data in place_results:
-                            results.append({
-                                "place_id": place_data.place_id,
-                                "name": place_data.display_name,
-                                "rating": getattr(place_data, 'rating', None),
-                                "address": getattr(place_data, 'formatted_address', ''),
-                                "types": getattr(place_data, 'types', [])
-                            })
-
-                        errors = place_errors
-                        cache_hits = stats.get('cache_hits', 0)
-                        api_calls = stats.get('api_calls', 0)
-
-                    finally:
-                        loop.close()
-
-            except Exception as e:
-                logger.error(f"API統合エラー: {e}、モックデータを使用します")
-                use_real_api = False
+                results = [fetched[place_id] for place_id in dict.fromkeys(place_ids) if place_id in fetched]
+                deduplicated = counts.get("deduplicated", 0)
+                cache_hits = counts["memory_hits"] + counts["cache_hits"] + deduplicated
+                api_calls = counts["api_calls"]
 
         if not use_real_api:
             # モックデータを使用（開発・テスト用）
@@ -199,6 +521,7 @@ def _process_places_batch_sync(place_ids: List[str], task_id: str, use_real_api:
             "api_calls": api_calls,
             "errors": len(errors),
             "error_place_ids": errors,
+            "deduplicated": deduplicated,
             "results": results,
             "api_mode": "real" if use_real_api else "mock"
         }
@@ -213,11 +536,16 @@ def process_places_batch(self, place_ids: List[str], config: Dict) -> Dict[str,
         # 設定からAPI使用モードを取得
         use_real_api = config.get('use_real_api', False)
 
-        # 同期処理を実行
-        return _process_places_batch_sync(place_ids, self.request.id, use_real_api)
+        # 同期処理を実行（結果リストはclaim checkで参照渡し）
+        return _check_in(_process_places_batch_sync(
+            place_ids, self.request.id, use_real_api,
+            timeout=config.get('timeout'),
+            deduplicate=config.get('deduplicate', True),
+            data_version=config.get('data_version', "1")
+        ), 'results')
 
     except Exception as exc:
-        self.logger.error(f"バッチ処理エラー: {exc}")
+        logging.getLogger(__name__).error(f"バッチ処理エラー: {exc}")
         # 自動リトライ
         raise self.retry(countdown=60 * (self.request.retries + 1), exc=exc)
 
@@ -263,24 +591,75 @@ def process_single_place(self, place_id: str, config: Dict) -> Dict[str, Any]:
         raise self.retry(countdown=30 * (self.request.retries + 1), exc=exc)
 
 
+# Claim check（ワークフロー間の結果リストは参照で受け渡す）
+_claim_check_store: Optional[ClaimCheckStore] = None
+
+
+def _get_claim_check_store() -> ClaimCheckStore:
+    """プロセスのclaim checkストアを取得
+
+    CLAIM_CHECK_URL、未設定時はCeleryの結果バックエンドを保存先に使い、
+    有効期限はresult_expiresに合わせる。
+    """
+    global _claim_check_store
+
+    if _claim_check_store is None:
+        expires = celery_app.conf.result_expires
+        if isinstance(expires, timedelta):
+            ttl = int(expires.total_seconds())
+        else:
+            ttl = int(expires or DEFAULT_TTL)
+
+        url = os.getenv('CLAIM_CHECK_URL') or celery_app.conf.result_backend
+        _claim_check_store = create_claim_check_store(url, ttl=ttl)
+    return _claim_check_store
+
+
+def _check_in(payload: Dict[str, Any], key: str) -> Dict[str, Any]:
+    """payload[key] のリストをclaim check参照（<key>_ref）に置き換える"""
+    payload = dict(payload)
+    payload[f"{key}_ref"] = _get_claim_check_store().put_items(payload.pop(key, []))
+    return payload
+
+
+def iter_claim_checked_results(refs: List[Dict[str, Any]]):
+    """ワークフロー結果の参照リスト（results_refs 等）から要素を順に読み出す"""
+    return _get_claim_check_store().iter_items(refs)
+
+
 @celery_app.task
-def aggregate_batch_results(batch_results: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """バッチ結果集約タスク"""
+def aggregate_batch_results(
+    batch_results: List[Dict[str, Any]],
+    precomputed: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """バッチ結果集約タスク
+
+    結果本体は読み込まず、各バッチの参照と件数だけを集約する。
+    precomputed はディスパッチ前に公開済み結果から作った取得済みバッチ。
+    """
 
     try:
-        aggregated_results = []
+        results_refs = []
         total_processed = 0
         total_requested = 0
         total_cache_hits = 0
         total_api_calls = 0
+        total_deduplicated = 0
 
-        for batch_result in batch_results:
+        for batch_result in [*batch_results, *(precomputed or [])]:
             if batch_result.get('status') == 'success':
-                aggregated_results.extend(batch_result.get('results', []))
+                ref = batch_result.get('results_ref')
+                if ref is None and batch_result.get('results'):
+                    # インライン結果（参照化前の形式）はここで預ける
+                    ref = _get_claim_check_store().put_items(batch_result['results'])
+                if ref is not None and ref.get('count'):
+                    results_refs.append(ref)
+
                 total_processed += batch_result.get('processed', 0)
                 total_requested += batch_result.get('total_requested', 0)
                 total_cache_hits += batch_result.get('cache_hits', 0)
                 total_api_calls += batch_result.get('api_calls', 0)
+                total_deduplicated += batch_result.get('deduplicated', 0)
 
         success_rate = (total_processed / total_requested * 100) if total_requested > 0 else 0
         cache_hit_rate = (total_cache_hits / (total_cache_hits + total_api_calls) * 100) if (total_cache_hits + total_api_calls) > 0 else 0
@@ -293,50 +672,74 @@ def aggregate_batch_results(batch_results: List[Dict[str, Any]]) -> Dict[str, An
             "cache_hit_rate": cache_hit_rate,
             "cache_hits": total_cache_hits,
             "api_calls": total_api_calls,
-            "results": aggregated_results
+            "deduplicated": total_deduplicated,
+            "results_refs": results_refs
         }
 
     except Exception as e:
         return {
             "status": "failed",
             "error": str(e),
-            "results": []
+            "results_refs": []
         }
 
 
 @celery_app.task
 def validate_data_batch(aggregated_data: Dict[str, Any]) -> Dict[str, Any]:
-    """データ検証バッチ処理タスク"""
+    """データ検証バッチ処理タスク
+
+    参照を1件ずつ読み出して検証し、検証済みデータ・エラーも参照で返す。
+    """
 
     try:
-        # プレースホルダー実装（実際のvalidatorは後で統合）
-        raw_results = aggregated_data.get('results', [])
+        store = _get_claim_check_store()
+        validated_refs = []
+        validation_error_refs = []
+        raw_count = 0
+        validated_count = 0
+        error_count = 0
 
-        validated_data = []
-        validation_errors = []
+        for ref in aggregated_data.get('results_refs', []):
+            raw_results = store.get_items(ref)
 
-        for item in raw_results:
-            try:
-                # 基本的な検証のみ実装
-                if item.get('place_id') and item.get('name'):
-                    validated_data.append(item)
-                else:
+            # プレースホルダー実装（実際のvalidatorは後で統合）
+            validated_data = []
+            validation_errors = []
+
+            for item in raw_results:
+                try:
+                    # 基本的な検証のみ実装
+                    if item.get('place_id') and item.get('name'):
+                        validated_data.append(item)
+                    else:
+                        validation_errors.append({
+                            "item": item.get('place_id', 'unknown'),
+                            "error": "Missing required fields"
+                        })
+                except Exception as e:
                     validation_errors.append({
                         "item": item.get('place_id', 'unknown'),
-                        "error": "Missing required fields"
+                        "error": str(e)
                     })
-            except Exception as e:
-                validation_errors.append({
-                    "item": item.get('place_id', 'unknown'),
-                    "error": str(e)
-                })
 
-        # 元のデータに検証結果を追加
+            raw_count += len(raw_results)
+            validated_count += len(validated_data)
+            error_count += len(validation_errors)
+
+            # 全件合格の場合は内容が同じため元の参照と同じキーになる
+            if validated_data:
+                validated_refs.append(store.put_items(validated_data))
+            if validation_errors:
+                validation_error_refs.append(store.put_items(validation_errors))
+
+        # 元のデータ（件数と参照のみ）に検証結果を追加
         result = aggregated_data.copy()
         result.update({
-            "validated_results": validated_data,
-            "validation_errors": validation_errors,
-            "validation_success_rate": len(validated_data) / len(raw_results) * 100 if raw_results else 0
+            "validated_refs": validated_refs,
+            "validation_error_refs": validation_error_refs,
+            "validated_count": validated_count,
+            "validation_error_count": error_count,
+            "validation_success_rate": validated_count / raw_count * 100 if raw_count else 0
         })
 
         return result
@@ -345,51 +748,82 @@ def validate_data_batch(aggregated_data: Dict[str, Any]) -> Dict[str, Any]:
         return {
             "status": "failed",
             "error": f"Validation failed: {e}",
-            "validated_results": []
+            "validated_refs": []
         }
 
 
 @celery_app.task
 def ml_quality_analysis(validated_data: Dict[str, Any]) -> Dict[str, Any]:
-    """機械学習による品質分析タスク"""
+    """機械学習による品質分析タスク
 
-    try:
-        # プレースホルダー実装（MLエンジンは後で統合）
-        validated_results = validated_data.get('validated_results', [])
+    検証済みデータの参照を1件ずつ読み出してMLEngineで品質スコアと異常を判定し、
+    高品質・低品質の結果を参照で返す（MLEngineの呼び出しは参照ごとに各1回）。
+    """
 
-        if not validated_results:
-            return validated_data
+    validated_refs = validated_data.get('validated_refs', [])
+    if not validated_refs:
+        return validated_data
 
-        # 基本的な品質スコア算出
-        quality_scores = [0.8 for _ in validated_results]  # デフォルトスコア
-        anomalies = [False for _ in validated_results]     # 異常なし
-        recommendations = ["品質良好" for _ in validated_results]
+    try:
+        store = _get_claim_check_store()
+        engine = get_ml_engine()
+        high_quality_refs = []
+        low_quality_refs = []
+        score_total = 0.0
+        scored_count = 0
+        anomaly_count = 0
+        recommendation_counts: Dict[str, int] = {}
+
+        for ref in validated_refs:
+            validated_results = store.get_items(ref)
+
+            quality_metrics = engine.analyze_data_quality(validated_results)
+            anomaly_reports = engine.detect_anomalies(validated_results)
+
+            quality_scores = [metrics.overall_score for metrics in quality_metrics]
+            anomalies = [report.anomaly_type not in ('normal', 'error') for report in anomaly_reports]
+            recommendations = [
+                (report.suggested_actions[0] if report.suggested_actions else report.explanation)
+                if is_anomaly else engine._generate_basic_recommendation(score)
+                for score, report, is_anomaly in zip(quality_scores, anomaly_reports, anomalies)
+            ]
+
+            # 品質フィルタリング
+            high_quality_items = []
+            low_quality_items = []
+
+            for i, (item, score, is_anomaly) in enumerate(
+                zip(validated_results, quality_scores, anomalies)
+            ):
+                if score >= 0.7 and not is_anomaly:
+                    high_quality_items.append(item)
+                else:
+                    low_quality_items.append({
+                        "data": item,
+                        "quality_score": score,
+                        "is_anomaly": is_anomaly,
+                        "recommendation": recommendations[i]
+                    })
 
-        # 品質フィルタリング
-        high_quality_items = []
-        low_quality_items = []
+            if high_quality_items:
+                high_quality_refs.append(store.put_items(high_quality_items))
+            if low_quality_items:
+                low_quality_refs.append(store.put_items(low_quality_items))
 
-        for i, (item, score, is_anomaly) in enumerate(
-            zip(validated_results, quality_scores, anomalies)
-        ):
-            if score >= 0.7 and not is_anomaly:
-                high_quality_items.append(item)
-            else:
-                low_quality_items.append({
-                    "data": item,
-                    "quality_score": score,
-                    "is_anomaly": is_anomaly,
-                    "recommendation": recommendations[i]
-                })
+            score_total += sum(quality_scores)
+            scored_count += len(quality_scores)
+            anomaly_count += sum(anomalies)
+            for recommendation in recommendations:
+                recommendation_counts[recommendation] = recommendation_counts.get(recommendation, 0) + 1
 
         # 最終結果
         result = validated_data.copy()
         result.update({
-            "high_quality_results": high_quality_items,
-            "low_quality_results": low_quality_items,
-            "overall_quality_score": sum(quality_scores) / len(quality_scores) if quality_scores else 0,
-            "anomaly_count": sum(anomalies),
-            "quality_recommendations": recommendations
+            "high_quality_refs": high_quality_refs,
+            "low_quality_refs": low_quality_refs,
+            "overall_quality_score": score_total / scored_count if scored_count else 0,
+            "anomaly_count": anomaly_count,
+            "quality_recommendations": recommendation_counts
         })
 
         return result
@@ -399,40 +833,95 @@ def ml_quality_analysis(validated_data: Dict[str, Any]) -> Dict[str, Any]:
         result = validated_data.copy()
         result.update({
             "ml_analysis_error": str(e),
-            "high_quality_results": validated_data.get('validated_results', [])
+            "high_quality_refs": validated_refs
         })
         return result
 
 
 # バックグラウンドタスク
-@celery_app.task(queue='background')
-def cache_warmup(popular_place_ids: List[str]) -> Dict[str, Any]:
+@celery_app.task
+def cache_warmup(
+    popular_place_ids: Optional[List[str]] = None,
+    time_budget: Optional[float] = None
+) -> Dict[str, Any]:
     """キャッシュウォームアップタスク"""
 
     try:
-        return _cache_warmup_async(popular_place_ids)
+        return _cache_warmup_sync(popular_place_ids or [], time_budget)
 
     except Exception as e:
         return {"status": "failed", "error": str(e)}
 
 
-def _cache_warmup_async(popular_place_ids: List[str]) -> Dict[str, Any]:
-    """キャッシュウォームアップ（実装）"""
+def _create_worker_cache_service() -> CacheService:
+    """ワーカー用CacheService作成（REDIS_CLUSTER_NODES から接続先を取得）"""
+    import os
+    from .cache_service import CacheConfig
+
+    nodes = os.getenv('REDIS_CLUSTER_NODES', 'localhost:6379')
+    return CacheService(CacheConfig(redis_nodes=[n.strip() for n in nodes.split(',') if n.strip()]))
+
+
+def _load_worksheet_records_loader():
+    """最新のワークシートレコード取得関数（Sheets未設定時はNone）"""
+    import os
+
+    if not os.getenv('SPREADSHEET_ID'):
+        return None
+
     try:
-        # プレースホルダー実装
-        preloaded_count = len(popular_place_ids)  # 全て成功と仮定
+        from . import get_container
+        from infrastructure.storage.sheets_storage_adapter import SheetsStorageAdapter
 
-        return {
-            "status": "success",
-            "preloaded_count": preloaded_count,
-            "total_requested": len(popular_place_ids)
-        }
+        return get_container().get(SheetsStorageAdapter).get_all_data
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"ワークシート接続エラー: {e}")
+        return None
+
+
+def _cache_warmup_sync(
+    popular_place_ids: List[str],
+    time_budget: Optional[float] = None
+) -> Dict[str, Any]:
+    """キャッシュウォームアップ（実装）
+
+    PlaceIdCache と最新のワークシートレコードから places:details:* を
+    優先順に一括ロードする。
+    """
+    from .cache_warmup import CacheWarmupEngine, WarmupConfig
+    from infrastructure.storage.place_id_cache import PlaceIdCache
+
+    async def _run() -> Dict[str, Any]:
+        cache_service = _create_worker_cache_service()
+        if not await cache_service.initialize():
+            return {"status": "failed", "error": "Redis unavailable"}
+
+        try:
+            config = WarmupConfig()
+            if time_budget is not None:
+                config.time_budget = time_budget
+
+            engine = CacheWarmupEngine(
+                cache_service,
+                place_id_cache=PlaceIdCache(),
+                records_loader=_load_worksheet_records_loader(),
+                config=config
+            )
+            result = await engine.warmup(popular_place_ids)
+            return asdict(result)
+        finally:
+            await cache_service.close()
+
+    try:
+        result = asyncio.run(_run())
+        result["total_requested"] = len(popular_place_ids)
+        return result
 
     except Exception as e:
         return {"status": "failed", "error": str(e)}
 
 
-@celery_app.task(queue='maintenance')
+@celery_app.task
 def cleanup_expired_cache() -> Dict[str, Any]:
     """期限切れキャッシュクリーンアップタスク"""
 
@@ -446,8 +935,8 @@ def cleanup_expired_cache() -> Dict[str, Any]:
 def _cleanup_expired_cache_sync() -> Dict[str, Any]:
     """期限切れキャッシュクリーンアップ（実装）"""
     try:
-        # プレースホルダー実装
-        cleared_count = 0  # 実際の実装で更新
+        # 期限切れclaim check（Redisの場合はTTLで自動失効するため0件）
+        cleared_count = _get_claim_check_store().purge_expired()
 
         return {
             "status": "success",
@@ -459,7 +948,7 @@ def _cleanup_expired_cache_sync() -> Dict[str, Any]:
         return {"status": "failed", "error": str(e)}
 
 
-@celery_app.task(queue='background')
+@celery_app.task
 def collect_performance_metrics() -> Dict[str, Any]:
     """パフォーマンスメトリクス収集タスク"""
 
@@ -504,28 +993,16 @@ def create_processing_workflow(
 ) -> signature:
     """分散処理ワークフロー作成"""
 
-    # バッチ分割
+    # 重複排除とバッチ分割
+    dispatch_ids, precomputed = _plan_dispatch(place_ids, config)
     batch_size = config.batch_size
     batches = [
-        place_ids[i:i + batch_size]
-        for i in range(0, len(place_ids), batch_size)
+        dispatch_ids[i:i + batch_size]
+        for i in range(0, len(dispatch_ids), batch_size)
     ]
 
-    # 並列バッチ処理
-    batch_tasks = group(
-        process_places_batch.s(batch, asdict(config))
-        for batch in batches
-    )
-
     # 処理チェーン
-    workflow = chain(
-        batch_tasks,
-        aggregate_batch_results.s(),
-        validate_data_batch.s(),
-        ml_quality_analysis.s()
-    )
-
-    return workflow
+    return _build_workflow(batches, config, precomputed)
 
 
 def submit_async_processing(
@@ -551,6 +1028,7 @@ __all__ = [
     'aggregate_batch_results',
     'validate_data_batch',
     'ml_quality_analysis',
+    'iter_claim_checked_results',
     'cache_warmup',
     'cleanup_expired_cache',
     'collect_performance_metrics',
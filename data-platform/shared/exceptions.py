@@ -175,6 +175,21 @@ class ProcessingError(ScraperError):
             self.details['failed_items'] = failed_items
 
 
+class DeadlineExceededError(ScraperError):
+    """Exception raised when the run deadline has passed."""
+
+    def __init__(
+        self,
+        message: str = "Deadline exceeded",
+        deadline_seconds: Optional[float] = None
+    ):
+        super().__init__(message)
+        self.deadline_seconds = deadline_seconds
+
+        if deadline_seconds is not None:
+            self.details['deadline_seconds'] = deadline_seconds
+
+
 class RateLimitError(ScraperError):
     """Exception raised when rate limits are exceeded."""
 
@@ -382,6 +397,7 @@ def get_error_category(exception: Exception) -> str:
         StorageError: ErrorCategory.STORAGE,
         NetworkError: ErrorCategory.NETWORK,
         ProcessingError: ErrorCategory.PROCESSING,
+        DeadlineExceededError: ErrorCategory.PROCESSING,
         RateLimitError: ErrorCategory.RATE_LIMIT,
         DependencyError: ErrorCategory.DEPENDENCY,
         CacheError: "cache",
@@ -419,3 +435,12 @@ def get_error_severity(exception: Exception) -> str:
         return ErrorSeverity.WARNING
     else:
         return ErrorSeverity.ERROR
+
+
+def is_throttling_error(exception: Exception) -> bool:
+    """Check whether an exception signals API throttling or overload (429 / 5xx)."""
+    if isinstance(exception, (RateLimitError, APIQuotaExceededError)):
+        return True
+    if isinstance(exception, APIError) and exception.status_code:
+        return exception.status_code == 429 or exception.status_code >= 500
+    return False
@@ -0,0 +1,200 @@
+"""
+Execution History - 処理履歴のバケット索引付き永続ストア
+
+PredictiveOptimizer の実行履歴を、データ特性（サイズ区分・複雑度・
+クエリタイプ比率）で量子化したバケットごとに保持する。
+類似パターンの検索は履歴全体の走査ではなく、近傍バケットの読み出しと
+許容差（複雑度 ±0.3、クエリタイプ比率の平均差 0.2 未満）による絞り込みになる。
+
+- バケットごとに件数上限があり、古い記録から捨てる
+- JSONファイルへ原子的に書き出し、再起動後も履歴を引き継ぐ
+"""
+
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# 量子化の刻み（複雑度はCID 0.2 / URL 0.5 / テキスト 0.8 の加重平均）
+COMPLEXITY_STEP = 0.1
+RATIO_STEP = 0.25
+
+# 類似と見なす許容差
+COMPLEXITY_TOLERANCE = 0.3
+TYPE_RATIO_TOLERANCE = 0.2
+
+# 許容差を覆う近傍バケットの範囲（量子化後の刻み数）
+COMPLEXITY_NEIGHBOURS = math.ceil(COMPLEXITY_TOLERANCE / COMPLEXITY_STEP)
+# 比率の個別差は最大 TYPE_RATIO_TOLERANCE * 3 / 2 まであり得る
+RATIO_NEIGHBOURS = math.ceil(TYPE_RATIO_TOLERANCE * 1.5 / RATIO_STEP)
+
+# 記録に保持する特性（近傍バケットの絞り込みに使用）
+SIMILARITY_FIELDS = ("complexity_score", "cid_ratio", "url_ratio", "text_ratio")
+
+HISTORY_FORMAT_VERSION = 1
+
+
+def _default_history_path() -> str:
+    # デフォルトパス: data-platform/data/execution_history.json
+    return str(Path(__file__).parent.parent / "data" / "execution_history.json")
+
+
+def _bucket_parts(characteristics: Dict[str, Any]) -> Tuple[str, int, int, int]:
+    return (
+        str(characteristics.get("size_category", "unknown")),
+        round(characteristics.get("complexity_score", 0.5) / COMPLEXITY_STEP),
+        round(characteristics.get("cid_ratio", 0.0) / RATIO_STEP),
+        round(characteristics.get("url_ratio", 0.0) / RATIO_STEP),
+    )
+
+
+def bucket_key(characteristics: Dict[str, Any]) -> str:
+    """データ特性のバケットキー（size_category|複雑度|CID比率|URL比率）"""
+    # テキスト比率は 1 - CID - URL なのでキーに含めない
+    return "|".join(str(part) for part in _bucket_parts(characteristics))
+
+
+def neighbour_keys(characteristics: Dict[str, Any]) -> List[str]:
+    """許容差内の記録が入り得るバケットキー（同じサイズ区分のみ）"""
+    size_category, complexity, cid, url = _bucket_parts(characteristics)
+    return [
+        f"{size_category}|{complexity + dc}|{cid + dcid}|{url + durl}"
+        for dc, dcid, durl in itertools.product(
+            range(-COMPLEXITY_NEIGHBOURS, COMPLEXITY_NEIGHBOURS + 1),
+            range(-RATIO_NEIGHBOURS, RATIO_NEIGHBOURS + 1),
+            range(-RATIO_NEIGHBOURS, RATIO_NEIGHBOURS + 1),
+        )
+    ]
+
+
+def is_similar(record: Dict[str, Any], characteristics: Dict[str, Any]) -> bool:
+    """複雑度・クエリタイプ比率が許容差内か（サイズ区分はバケットで一致済み）"""
+    complexity_diff = abs(record["complexity_score"] - characteristics.get("complexity_score", 0.5))
+    if complexity_diff > COMPLEXITY_TOLERANCE:
+        return False
+
+    type_difference = sum(
+        abs(record[field] - characteristics.get(field, 0.0))
+        for field in ("cid_ratio", "url_ratio", "text_ratio")
+    ) / 3
+    return type_difference < TYPE_RATIO_TOLERANCE
+
+
+class ExecutionHistoryStore:
+    """バケット単位で件数を制限した処理履歴ストア"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_records_per_bucket: int = 50,
+        max_buckets: int = 500
+    ):
+        """
+        初期化
+
+        Args:
+            path: 保存先JSONファイル（空文字の場合は永続化しない）
+            max_records_per_bucket: バケットごとの保持件数
+            max_buckets: 保持するバケット数（超えたら最も古く更新されたものから削除）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = _default_history_path() if path is None else path
+        self.max_records_per_bucket = max_records_per_bucket
+        self.max_buckets = max_buckets
+        self._buckets: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(records) for records in self._buckets.values())
+
+    def record(self, characteristics: Dict[str, Any], execution_time: float, success: bool) -> None:
+        """実行結果を記録して保存"""
+        total_queries = characteristics.get("total_queries", 0)
+        if total_queries <= 0:
+            return
+
+        key = bucket_key(characteristics)
+        entry = {
+            "timestamp": time.time(),
+            "total_queries": total_queries,
+            "execution_time": execution_time,
+            "time_per_query": execution_time / total_queries,
+            "success": success,
+            **{field: characteristics.get(field, 0.0) for field in SIMILARITY_FIELDS},
+        }
+        with self._lock:
+            records = self._buckets.pop(key, None) or deque(maxlen=self.max_records_per_bucket)
+            records.append(entry)
+            # 挿入順 = 更新順として保持（先頭が最も古く更新されたバケット）
+            self._buckets[key] = records
+            while len(self._buckets) > self.max_buckets:
+                del self._buckets[next(iter(self._buckets))]
+            self._save()
+
+    def similar(self, characteristics: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """許容差内の記録（近傍バケットを読み出して絞り込み、古い順）"""
+        own_key = bucket_key(characteristics)
+        matches = []
+        with self._lock:
+            for key in neighbour_keys(characteristics):
+                for record in self._buckets.get(key, ()):
+                    if "complexity_score" in record:
+                        if is_similar(record, characteristics):
+                            matches.append(record)
+                    elif key == own_key:
+                        # 特性を持たない旧形式の記録は同一バケットのみ
+                        matches.append(record)
+        matches.sort(key=lambda record: record["timestamp"])
+        return matches
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != HISTORY_FORMAT_VERSION or not isinstance(data.get("buckets"), dict):
+                self.logger.warning("処理履歴の形式が不正です。空の履歴で開始します")
+                return
+            for key, records in data["buckets"].items():
+                self._buckets[key] = deque(records, maxlen=self.max_records_per_bucket)
+            while len(self._buckets) > self.max_buckets:
+                del self._buckets[next(iter(self._buckets))]
+        except Exception as e:
+            self.logger.error(f"処理履歴読み込みエラー: {e}")
+
+    def _save(self) -> None:
+        """一時ファイルに書いてから置き換える（ロック取得済みで呼び出すこと）"""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(
+                    {
+                        "version": HISTORY_FORMAT_VERSION,
+                        "buckets": {key: list(records) for key, records in self._buckets.items()}
+                    },
+                    f,
+                    ensure_ascii=False
+                )
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            self.logger.error(f"処理履歴保存エラー: {e}")
+
+
+__all__ = [
+    'ExecutionHistoryStore',
+    'bucket_key',
+    'is_similar',
+    'neighbour_keys',
+]
@@ -0,0 +1,191 @@
+"""
+Local Workflow Backend - 単一ノードのプロセスプール実行
+
+Redis・Celeryワーカーなしで、Celeryワークフローと同じタスク関数
+（process_places_batch → aggregate_batch_results → validate_data_batch →
+ml_quality_analysis）をProcessPoolExecutor上で実行する。
+
+- タスク間の結果は共有メモリのclaim checkで受け渡す（パイプでのコピーなし）
+- 検証・ML分析は参照単位に分割して全コアで並列実行し、結果を集約する
+- 最終結果の参照は通常のclaim checkストアへ移し、共有メモリは解放する
+"""
+
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import resource_tracker
+from typing import Any, Dict, Iterable, List, Optional
+
+from . import distributed_tasks
+from .claim_check import ClaimCheckStore, SharedMemoryClaimCheckStore
+
+
+# ワークフロー結果のうちclaim check参照を保持するキー
+REF_LIST_KEYS = (
+    'results_refs', 'validated_refs', 'validation_error_refs',
+    'high_quality_refs', 'low_quality_refs'
+)
+
+
+def _init_worker() -> None:
+    """プロセスプールのワーカー初期化（claim checkを共有メモリに切り替え）"""
+    distributed_tasks._claim_check_store = SharedMemoryClaimCheckStore()
+
+
+def _run_task(task_name: str, *args: Any) -> Dict[str, Any]:
+    """Celeryタスクをワーカープロセス内で同期実行"""
+    result: Dict[str, Any] = getattr(distributed_tasks, task_name)(*args)
+    return result
+
+
+def run_process_pool_workflow(
+    batches: List[List[str]],
+    config: Dict[str, Any],
+    max_workers: Optional[int] = None,
+    result_store: Optional[ClaimCheckStore] = None,
+    precomputed: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """プロセスプールでPlacesバッチ処理ワークフローを実行
+
+    Args:
+        batches: Place IDのバッチ
+        config: BatchTaskConfigの辞書
+        max_workers: ワーカープロセス数（Noneの場合はCPU数）
+        result_store: 最終結果の保存先（Noneの場合は既定のclaim checkストア）
+        precomputed: 公開済み結果から作った取得済みバッチ（既定のストアの参照）
+    """
+    logger = logging.getLogger(__name__)
+    result_store = result_store or distributed_tasks._get_claim_check_store()
+    shm_store = SharedMemoryClaimCheckStore()
+    created_refs: Dict[str, Dict[str, Any]] = {}
+
+    # 作成（ワーカー）と解放（親）を同じリソーストラッカーで管理する
+    resource_tracker.ensure_running()
+
+    # イベントループ等のスレッドを持つ親プロセスをforkしないようspawnで起動
+    with ProcessPoolExecutor(
+        max_workers=max_workers or os.cpu_count(),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker
+    ) as pool:
+        try:
+            # 取得済みバッチはワーカーが読めるよう共有メモリへ複製
+            for batch_result in precomputed or []:
+                result_store.copy_to(batch_result['results_ref'], shm_store)
+                _track(created_refs, [batch_result['results_ref']])
+
+            # group: バッチを並列取得
+            batch_results = list(pool.map(
+                _run_task, repeat('process_places_batch'), batches, repeat(config)
+            ))
+            _track(created_refs, (r.get('results_ref') for r in batch_results))
+
+            aggregated = pool.submit(
+                _run_task, 'aggregate_batch_results', batch_results, precomputed
+            ).result()
+            _track(created_refs, aggregated.get('results_refs', []))
+            if aggregated.get('status') != 'success':
+                return aggregated
+
+            # 検証: 参照単位に分割して並列実行
+            validation_parts = _fan_out(pool, 'validate_data_batch', aggregated, 'results_refs')
+            for part in validation_parts:
+                _track(created_refs, part.get('validated_refs', []))
+                _track(created_refs, part.get('validation_error_refs', []))
+            validated = _merge_validation(aggregated, validation_parts)
+            if validated.get('status') == 'failed':
+                return validated
+
+            # ML分析: 同様に分割して並列実行
+            analysis_parts = _fan_out(pool, 'ml_quality_analysis', validated, 'validated_refs')
+            for part in analysis_parts:
+                _track(created_refs, part.get('high_quality_refs', []))
+                _track(created_refs, part.get('low_quality_refs', []))
+            result = _merge_analysis(validated, analysis_parts)
+
+            # 最終結果の参照を既定のストアへ移す（参照はそのまま有効）
+            for key in REF_LIST_KEYS:
+                for ref in result.get(key, []):
+                    shm_store.copy_to(ref, result_store)
+
+            result['backend'] = 'process_pool'
+            return result
+
+        finally:
+            for ref in created_refs.values():
+                try:
+                    shm_store.delete(ref)
+                except Exception as e:
+                    logger.warning(f"共有メモリ解放エラー: {e}")
+
+
+def _track(created_refs: Dict[str, Dict[str, Any]], refs: Iterable[Optional[Dict[str, Any]]]) -> None:
+    for ref in refs:
+        if ref:
+            created_refs[ref['claim_check']] = ref
+
+
+def _fan_out(
+    pool: ProcessPoolExecutor,
+    task_name: str,
+    payload: Dict[str, Any],
+    refs_key: str
+) -> List[Dict[str, Any]]:
+    """参照リストを1件ずつに分けて同じタスクを並列実行"""
+    parts = [{**payload, refs_key: [ref]} for ref in payload.get(refs_key, [])]
+    return list(pool.map(_run_task, repeat(task_name), parts))
+
+
+def _merge_validation(aggregated: Dict[str, Any], parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """分割実行したvalidate_data_batchの結果を集約"""
+    for part in parts:
+        if part.get('status') == 'failed':
+            return part
+
+    raw_count = sum(ref['count'] for ref in aggregated.get('results_refs', []))
+    validated_count = sum(part.get('validated_count', 0) for part in parts)
+
+    result = aggregated.copy()
+    result.update({
+        "validated_refs": [ref for part in parts for ref in part.get('validated_refs', [])],
+        "validation_error_refs": [ref for part in parts for ref in part.get('validation_error_refs', [])],
+        "validated_count": validated_count,
+        "validation_error_count": sum(part.get('validation_error_count', 0) for part in parts),
+        "validation_success_rate": validated_count / raw_count * 100 if raw_count else 0
+    })
+    return result
+
+
+def _merge_analysis(validated: Dict[str, Any], parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """分割実行したml_quality_analysisの結果を集約（品質スコアは件数で加重平均）"""
+    result = validated.copy()
+    if not parts:
+        return result
+
+    scored_count = 0
+    score_total = 0.0
+    recommendations: Dict[str, int] = {}
+    for part in parts:
+        count = sum(ref['count'] for ref in part.get('validated_refs', []))
+        scored_count += count
+        score_total += part.get('overall_quality_score', 0) * count
+        for recommendation, n in part.get('quality_recommendations', {}).items():
+            recommendations[recommendation] = recommendations.get(recommendation, 0) + n
+
+    result.update({
+        "high_quality_refs": [ref for part in parts for ref in part.get('high_quality_refs', [])],
+        "low_quality_refs": [ref for part in parts for ref in part.get('low_quality_refs', [])],
+        "overall_quality_score": score_total / scored_count if scored_count else 0,
+        "anomaly_count": sum(part.get('anomaly_count', 0) for part in parts),
+        "quality_recommendations": recommendations
+    })
+
+    errors = [part['ml_analysis_error'] for part in parts if part.get('ml_analysis_error')]
+    if errors:
+        result["ml_analysis_error"] = errors[0]
+    return result
+
+
+__all__ = ['run_process_pool_workflow']
@@ -5,11 +5,11 @@ Advanced ML implementation for data quality analysis,
 anomaly detection, and processing optimization.
 """
 
+import importlib.util
 import logging
 import os
-import pickle
+import threading
 import numpy as np
-import pandas as pd
 from typing import List, Dict, Any, Tuple, Optional
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -17,23 +17,27 @@ import json
 import re
 from pathlib import Path
 
-# Scikit-learn imports
-try:
-    from sklearn.ensemble import IsolationForest, RandomForestClassifier, GradientBoostingRegressor
-    from sklearn.preprocessing import StandardScaler, LabelEncoder
-    from sklearn.model_selection import train_test_split
-    from sklearn.metrics import classification_report, mean_squared_error
-    from sklearn.cluster import DBSCAN
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    SKLEARN_AVAILABLE = True
-except ImportError:
+from .ml_models import ModelArtifactStore
+from .processing_time_model import OnlineProcessingTimeModel
+
+# Scikit-learn は学習・推論時に遅延 import する（モジュール読み込みを軽くするため）
+SKLEARN_AVAILABLE = importlib.util.find_spec("sklearn") is not None
+if not SKLEARN_AVAILABLE:
     logging.warning("scikit-learn not available. Fallback to basic implementation.")
-    SKLEARN_AVAILABLE = False
 
 # 定数定義（ファイルレベル）
 UTC_TIMEZONE_SUFFIX = '+00:00'
 DATA_SOURCE_CHECK_ACTION = 'データソースの確認'
 
+# 品質評価の対象フィールド・パターン
+QUALITY_REQUIRED_FIELDS = ('place_id', 'name', 'formatted_address')
+QUALITY_OPTIONAL_FIELDS = ('rating', 'user_ratings_total', 'price_level',
+                           'phone_number', 'website', 'opening_hours')
+SADO_ADDRESS_KEYWORDS = ('佐渡', 'sado', '両津', '相川', '新潟')
+LOCATION_CHECK_KEYWORDS = ('佐渡', 'sado', '新潟')
+PHONE_NUMBER_PATTERN = re.compile(r'^[\+\d\-\(\)\s]+$')  # 日本の電話番号パターン（簡易版）
+WEBSITE_URL_PATTERN = re.compile(r'^https?://')
+
 
 @dataclass
 class QualityMetrics:
@@ -79,29 +83,64 @@ class AnomalyReport:
     confidence: float
 
 
+class _LazyModel:
+    """初回アクセス時に学習済みモデルを読み込むMLEngine属性"""
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, engine, owner=None):
+        if engine is None:
+            return self
+        engine._ensure_models()
+        return engine._models.get(self.name)
+
+    def __set__(self, engine, value):
+        engine._models[self.name] = value
+
+
 class MLEngine:
     """機械学習統合エンジン（本格実装）"""
 
-    def __init__(self, model_dir: str = "models"):
+    # 機械学習モデル・前処理器（初回利用時に成果物から読み込む）
+    quality_classifier = _LazyModel()
+    anomaly_detector = _LazyModel()
+    processing_time_predictor = _LazyModel()
+    scaler = _LazyModel()
+
+    MODEL_NAMES = ('quality_classifier', 'anomaly_detector', 'processing_time_predictor', 'scaler')
+
+    def __init__(
+        self,
+        model_dir: str = "models",
+        auto_train: bool = True,
+        processing_time_model: Optional[OnlineProcessingTimeModel] = None
+    ):
+        """
+        初期化（モデルの読み込み・学習は初回利用時まで行わない）
+
+        Args:
+            model_dir: モデル成果物ディレクトリ
+            auto_train: 成果物がない場合にプロセス内で合成データ学習するか
+            processing_time_model: 実測タイミングで学習する処理時間予測器
+        """
         self.logger = logging.getLogger(__name__)
         self.model_dir = Path(model_dir)
-        self.model_dir.mkdir(exist_ok=True)
+        self.artifact_store = ModelArtifactStore(model_dir)
+        self.auto_train = auto_train
 
         # モデル状態
         self.models_loaded = False
+        self.model_version: Optional[str] = None
         self.default_quality_score = 0.8
         self.anomaly_threshold = 0.3
 
-        # 機械学習モデル
-        self.quality_classifier = None
-        self.anomaly_detector = None
-        self.processing_time_predictor = None
+        self._models: Dict[str, Any] = {}
+        self._models_ready = False
+        self._models_loading = False
+        self._models_lock = threading.RLock()
         self.pattern_analyzer = None
-
-        # 前処理器
-        self.scaler = StandardScaler() if SKLEARN_AVAILABLE else None
-        self.text_vectorizer = TfidfVectorizer(max_features=100) if SKLEARN_AVAILABLE else None
-        self.label_encoder = LabelEncoder() if SKLEARN_AVAILABLE else None
+        self.processing_time_model = processing_time_model or OnlineProcessingTimeModel()
 
         # 統計データ
         self.quality_history = []
@@ -109,14 +148,33 @@ class MLEngine:
         self.feature_importances = {}
 
         self.logger.info("MLEngine初期化（本格実装版）")
-        self._initialize_models()
+
+    def _ensure_models(self):
+        """モデルを初回だけ読み込む（成果物がなければ学習して保存）"""
+        if self._models_ready:
+            return
+
+        with self._models_lock:
+            # 読み込み中の同一スレッドからの再入もここで抜ける
+            if self._models_ready or self._models_loading:
+                return
+            self._models_loading = True
+            try:
+                self._initialize_models()
+            finally:
+                self._models_loading = False
+                self._models_ready = True
 
     def _initialize_models(self):
         """モデル初期化"""
         try:
             if SKLEARN_AVAILABLE:
                 self._load_models()
-                if not self.models_loaded:
+                if not self.models_loaded and self.auto_train:
+                    self.logger.warning(
+                        f"学習済みモデルがありません。プロセス内で学習します"
+                        f"（事前学習: python -m shared.ml_models train --model-dir {self.model_dir}）"
+                    )
                     self._create_models()
                     self._train_initial_models()
             else:
@@ -125,33 +183,32 @@ class MLEngine:
         except Exception as e:
             self.logger.error(f"モデル初期化エラー: {e}")
 
-    def _load_models(self):
-        """事前学習済みモデル読み込み"""
-        try:
-            model_files = {
-                'quality_classifier': 'quality_classifier.pkl',
-                'anomaly_detector': 'anomaly_detector.pkl',
-                'processing_time_predictor': 'processing_time_predictor.pkl',
-                'scaler': 'scaler.pkl',
-                'text_vectorizer': 'text_vectorizer.pkl'
-            }
+    def train_models(self) -> Optional[str]:
+        """合成データでモデルを学習して新しいバージョンとして保存（保存したバージョンを返す）"""
+        if not SKLEARN_AVAILABLE:
+            return None
 
-            loaded_models = {}
-            for model_name, filename in model_files.items():
-                filepath = self.model_dir / filename
-                if filepath.exists():
-                    with open(filepath, 'rb') as f:
-                        loaded_models[model_name] = pickle.load(f)
+        with self._models_lock:
+            self._models_loading = True
+            try:
+                self.model_version = None
+                self._create_models()
+                self._train_initial_models()
+            finally:
+                self._models_loading = False
+                self._models_ready = True
+        return self.model_version
 
+    def _load_models(self):
+        """事前学習済みモデル読み込み（チェックサム検証・mmap共有）"""
+        try:
+            loaded_models = self.artifact_store.load()
             if loaded_models:
-                self.quality_classifier = loaded_models.get('quality_classifier')
-                self.anomaly_detector = loaded_models.get('anomaly_detector')
-                self.processing_time_predictor = loaded_models.get('processing_time_predictor')
-                self.scaler = loaded_models.get('scaler', self.scaler)
-                self.text_vectorizer = loaded_models.get('text_vectorizer', self.text_vectorizer)
+                for model_name in self.MODEL_NAMES:
+                    self._models[model_name] = loaded_models.get(model_name)
 
                 self.models_loaded = True
-                self.logger.info(f"モデル読み込み完了: {len(loaded_models)}個")
+                self.model_version = self.artifact_store.manifest()["version"]
 
         except Exception as e:
             self.logger.warning(f"モデル読み込み失敗: {e}")
@@ -162,6 +219,9 @@ class MLEngine:
             return
 
         try:
+            from sklearn.ensemble import IsolationForest, RandomForestClassifier, GradientBoostingRegressor
+            from sklearn.preprocessing import StandardScaler
+
             # データ品質分類器
             self.quality_classifier = RandomForestClassifier(
                 n_estimators=100,
@@ -187,6 +247,8 @@ class MLEngine:
                 random_state=42
             )
 
+            self.scaler = StandardScaler()
+
             self.logger.info("新規モデル作成完了")
 
         except Exception as e:
@@ -194,10 +256,14 @@ class MLEngine:
 
     def _train_initial_models(self):
         """初期モデル学習（サンプルデータを使用）"""
-        if not SKLEARN_AVAILABLE or not all([self.quality_classifier, self.anomaly_detector]):
+        # アンサンブルモデルの真偽値評価は未学習時に例外になるため None で判定
+        if not SKLEARN_AVAILABLE or self.quality_classifier is None or self.anomaly_detector is None:
             return
 
         try:
+            from sklearn.model_selection import train_test_split
+            from sklearn.metrics import classification_report, mean_squared_error
+
             # サンプルデータ生成
             sample_data = self._generate_sample_training_data()
 
@@ -241,23 +307,12 @@ class MLEngine:
             self.logger.error(f"初期学習エラー: {e}")
 
     def _save_models(self):
-        """モデル保存"""
+        """モデル保存（新しいバージョンの成果物として書き出す）"""
         try:
-            models_to_save = {
-                'quality_classifier': self.quality_classifier,
-                'anomaly_detector': self.anomaly_detector,
-                'processing_time_predictor': self.processing_time_predictor,
-                'scaler': self.scaler,
-                'text_vectorizer': self.text_vectorizer
-            }
-
-            for model_name, model in models_to_save.items():
-                if model is not None:
-                    filepath = self.model_dir / f"{model_name}.pkl"
-                    with open(filepath, 'wb') as f:
-                        pickle.dump(model, f)
-
-            self.logger.info("モデル保存完了")
+            self.model_version = self.artifact_store.save(
+                {model_name: self._models.get(model_name) for model_name in self.MODEL_NAMES}
+            )
+            self.models_loaded = True
 
         except Exception as e:
             self.logger.error(f"モデル保存エラー: {e}")
@@ -328,74 +383,84 @@ class MLEngine:
             return {}
 
     def analyze_data_quality(self, data_batch: List[Dict]) -> List[QualityMetrics]:
-        """データ品質スコア算出（本格実装）"""
+        """データ品質スコア算出（バッチ全体を1つの特徴量行列で一括評価）"""
+        if not data_batch:
+            return []
+
         try:
-            quality_metrics = []
+            columns = self._extract_quality_columns(data_batch)
+            scores = self._score_quality_columns(data_batch, columns)
 
-            for item in data_batch:
-                # 基本品質メトリクス計算
-                completeness = self._calculate_completeness(item)
-                accuracy = self._calculate_accuracy(item)
-                consistency = self._calculate_consistency(item)
-                timeliness = self._calculate_timeliness(item)
+            # ML予測（利用可能な場合、バッチ全体で transform / predict_proba / decision_function 各1回）
+            if SKLEARN_AVAILABLE and self.quality_classifier is not None and self.scaler is not None:
+                features_scaled = self.scaler.transform(scores['features'])
 
-                # ML予測（利用可能な場合）
-                if SKLEARN_AVAILABLE and self.quality_classifier is not None and self.scaler is not None:
-                    features = self._extract_quality_features(item)
-                    features_scaled = self.scaler.transform([features])
+                # 品質予測
+                quality_proba = self.quality_classifier.predict_proba(features_scaled)
+                ml_scores = quality_proba[:, 1]  # 高品質の確率
+                confidences = quality_proba.max(axis=1)
 
-                    # 品質予測
-                    quality_proba = self.quality_classifier.predict_proba(features_scaled)[0]
-                    ml_score = quality_proba[1]  # 高品質の確率
-                    confidence = max(quality_proba)
+                # 異常スコア
+                decisions = self.anomaly_detector.decision_function(features_scaled)
+                anomaly_scores = np.clip((decisions + 0.5) * 2, 0, 1)  # 正規化
 
-                    # 異常スコア
-                    anomaly_score = self.anomaly_detector.decision_function([features_scaled[0]])[0]
-                    anomaly_score = max(0, min(1, (anomaly_score + 0.5) * 2))  # 正規化
+            else:
+                # フォールバック実装
+                ml_scores = np.array([self._calculate_basic_quality_score(item) for item in data_batch])
+                confidences = np.full(len(data_batch), 0.7)
+                anomaly_scores = np.array([
+                    0.1 if not self._detect_basic_anomaly(item) else 0.8 for item in data_batch
+                ])
+
+            # 総合スコア計算
+            overall_scores = (
+                scores['completeness'] * 0.25 +
+                scores['accuracy'] * 0.25 +
+                scores['consistency'] * 0.20 +
+                scores['timeliness'] * 0.15 +
+                ml_scores * 0.15
+            )
 
-                else:
-                    # フォールバック実装
-                    ml_score = self._calculate_basic_quality_score(item)
-                    confidence = 0.7
-                    anomaly_score = 0.1 if not self._detect_basic_anomaly(item) else 0.8
-
-                # 総合スコア計算
-                overall_score = (
-                    completeness * 0.25 +
-                    accuracy * 0.25 +
-                    consistency * 0.20 +
-                    timeliness * 0.15 +
-                    ml_score * 0.15
-                )
+            quality_metrics = []
+            for i, item in enumerate(data_batch):
+                completeness = float(scores['completeness'][i])
+                accuracy = float(scores['accuracy'][i])
+                consistency = float(scores['consistency'][i])
+                timeliness = float(scores['timeliness'][i])
 
                 # 詳細情報
                 details = {
-                    'ml_prediction': ml_score,
+                    'ml_prediction': float(ml_scores[i]),
                     'feature_scores': {
                         'completeness': completeness,
                         'accuracy': accuracy,
                         'consistency': consistency,
                         'timeliness': timeliness
                     },
-                    'validation_checks': self._run_validation_checks(item)
+                    'validation_checks': (
+                        self._run_validation_checks(item) if columns['irregular'][i] else {
+                            'has_place_id': bool(columns['required'][i, 0]),
+                            'has_name': bool(columns['required'][i, 1]),
+                            'has_address': bool(columns['required'][i, 2]),
+                            'valid_rating': not (columns['rating_error'][i] or columns['rating_out_of_range'][i]),
+                            'location_consistent': bool(columns['location_consistent'][i])
+                        }
+                    )
                 }
 
-                metrics = QualityMetrics(
-                    overall_score=overall_score,
+                quality_metrics.append(QualityMetrics(
+                    overall_score=float(overall_scores[i]),
                     completeness=completeness,
                     accuracy=accuracy,
                     consistency=consistency,
                     timeliness=timeliness,
-                    anomaly_score=anomaly_score,
-                    confidence=confidence,
+                    anomaly_score=float(anomaly_scores[i]),
+                    confidence=float(confidences[i]),
                     details=details
-                )
-
-                quality_metrics.append(metrics)
+                ))
 
             # 統計情報ログ
-            avg_score = sum(m.overall_score for m in quality_metrics) / len(quality_metrics)
-            self.logger.debug(f"品質分析完了: {len(data_batch)}件, 平均スコア={avg_score:.3f}")
+            self.logger.debug(f"品質分析完了: {len(data_batch)}件, 平均スコア={overall_scores.mean():.3f}")
 
             # 履歴に追加
             self.quality_history.extend(quality_metrics)
@@ -417,18 +482,158 @@ class MLEngine:
                 confidence=0.5
             ) for _ in data_batch]
 
+    def _extract_quality_columns(self, data_batch: List[Dict]) -> Dict[str, np.ndarray]:
+        """品質評価に使う値をバッチ全体から列（NumPy配列）として1回で抽出
+
+        名前・住所・更新日時が文字列でない項目は irregular とし、
+        スコアは項目単位の計算（_calculate_* / _extract_quality_features）で求める。
+        """
+        size = len(data_batch)
+        now = datetime.now()
+        columns = {
+            'required': np.zeros((size, len(QUALITY_REQUIRED_FIELDS)), dtype=bool),
+            'optional': np.zeros((size, len(QUALITY_OPTIONAL_FIELDS)), dtype=bool),
+            'non_empty_fields': np.zeros(size),
+            'name_length': np.zeros(size),
+            'address_length': np.zeros(size),
+            'rating': np.zeros(size),
+            'has_rating': np.zeros(size, dtype=bool),
+            'rating_error': np.zeros(size, dtype=bool),
+            'invalid_phone': np.zeros(size, dtype=bool),
+            'invalid_website': np.zeros(size, dtype=bool),
+            'outside_sado': np.zeros(size, dtype=bool),
+            'location_consistent': np.zeros(size, dtype=bool),
+            'rating_pair': np.zeros(size, dtype=bool),       # 評価値・評価数とも数値として読める
+            'ratings_total': np.zeros(size),
+            'rating_count_error': np.zeros(size, dtype=bool),
+            'hours_since_update': np.full(size, np.nan),  # NaN: 更新日時なし（既定の新鮮度）
+            'irregular': np.zeros(size, dtype=bool),
+        }
+
+        for i, item in enumerate(data_batch):
+            name = item.get('name', '')
+            address = item.get('formatted_address', '')
+            updated_at = item.get('updated_at', '')
+            if not (isinstance(name, str) and isinstance(address, str) and isinstance(updated_at, str)):
+                columns['irregular'][i] = True
+                continue
+
+            columns['required'][i] = [bool(item.get(field)) for field in QUALITY_REQUIRED_FIELDS]
+            columns['optional'][i] = [bool(item.get(field)) for field in QUALITY_OPTIONAL_FIELDS]
+            columns['non_empty_fields'][i] = sum(1 for v in item.values() if v)
+            columns['name_length'][i] = len(name)
+            columns['address_length'][i] = len(address)
+
+            if 'rating' in item:
+                columns['has_rating'][i] = True
+                try:
+                    columns['rating'][i] = float(item['rating'])
+                except (ValueError, TypeError):
+                    columns['rating_error'][i] = True
+
+            if 'phone_number' in item:
+                columns['invalid_phone'][i] = not PHONE_NUMBER_PATTERN.match(str(item['phone_number']))
+            if 'website' in item:
+                columns['invalid_website'][i] = not WEBSITE_URL_PATTERN.match(str(item['website']))
+
+            address = address.lower()
+            columns['outside_sado'][i] = bool(address) and not any(k in address for k in SADO_ADDRESS_KEYWORDS)
+            columns['location_consistent'][i] = any(k in address for k in LOCATION_CHECK_KEYWORDS)
+
+            # 評価数と評価値の一貫性
+            rating = item.get('rating')
+            total_ratings = item.get('user_ratings_total')
+            if rating and total_ratings:
+                try:
+                    float(rating)
+                    columns['ratings_total'][i] = int(total_ratings)
+                    columns['rating_pair'][i] = True
+                except (ValueError, TypeError):
+                    columns['rating_count_error'][i] = True
+
+            if 'updated_at' in item:
+                try:
+                    updated_time = datetime.fromisoformat(updated_at.replace('Z', UTC_TIMEZONE_SUFFIX))
+                    columns['hours_since_update'][i] = (now - updated_time).total_seconds() / 3600
+                except (ValueError, TypeError):
+                    pass
+
+        rating = columns['rating']
+        columns['rating_out_of_range'] = (
+            columns['has_rating'] & ~columns['rating_error'] & ~((rating >= 1.0) & (rating <= 5.0))
+        )
+        return columns
+
+    def _score_quality_columns(
+        self,
+        data_batch: List[Dict],
+        columns: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """抽出列から完全性・正確性・一貫性・新鮮度と特徴量行列をベクトル演算で算出"""
+        required_score = columns['required'].mean(axis=1)
+        name_length = columns['name_length']
+
+        completeness = np.minimum(1.0, required_score * 0.7 + columns['optional'].mean(axis=1) * 0.3)
+
+        # 減点は項目単位の計算と同じ順序で適用（浮動小数点の結果を揃える）
+        accuracy = np.ones(len(name_length))
+        accuracy -= np.where(columns['rating_error'], 0.3, np.where(columns['rating_out_of_range'], 0.2, 0.0))
+        accuracy -= np.where(columns['invalid_phone'], 0.2, 0.0)
+        accuracy -= np.where(columns['invalid_website'], 0.2, 0.0)
+        accuracy -= np.where((name_length < 2) | (name_length > 200), 0.3, 0.0)
+        accuracy = np.maximum(0.0, accuracy)
+
+        consistency = np.ones(len(name_length))
+        consistency -= np.where(columns['outside_sado'], 0.3, 0.0)
+        sparse_ratings = columns['rating_pair'] & (columns['rating'] > 4.5) & (columns['ratings_total'] < 5)
+        consistency -= np.where(columns['rating_count_error'], 0.2, np.where(sparse_ratings, 0.1, 0.0))
+        consistency = np.maximum(0.0, consistency)
+
+        # 24時間以内は1.0、その後指数的に減少
+        hours = columns['hours_since_update']
+        with np.errstate(invalid='ignore'):
+            timeliness = np.where(np.isnan(hours), 0.7, np.maximum(0.0, np.exp(-hours / 24)))
+
+        features = np.column_stack([
+            required_score,
+            np.minimum(1.0, columns['non_empty_fields'] / 10),
+            np.minimum(1.0, name_length / 50),
+            np.minimum(1.0, columns['address_length'] / 100),
+            np.where(columns['has_rating'] & ~columns['rating_error'], columns['rating'] / 5.0, 0.0),
+            timeliness
+        ])
+
+        scores = {
+            'completeness': completeness,
+            'accuracy': accuracy,
+            'consistency': consistency,
+            'timeliness': timeliness,
+            'features': features,
+        }
+
+        # 文字列以外の値を含む項目は項目単位で計算
+        for i in np.flatnonzero(columns['irregular']):
+            item = data_batch[i]
+            completeness[i] = self._calculate_completeness(item)
+            accuracy[i] = self._calculate_accuracy(item)
+            consistency[i] = self._calculate_consistency(item)
+            timeliness[i] = self._calculate_timeliness(item)
+            features[i] = self._extract_quality_features(item)
+
+        return scores
+
     def _calculate_completeness(self, item: Dict) -> float:
         """データ完全性スコア計算"""
         try:
-            required_fields = ['place_id', 'name', 'formatted_address']
-            optional_fields = ['rating', 'user_ratings_total', 'price_level',
-                             'phone_number', 'website', 'opening_hours']
-
             # 必須フィールドスコア
-            required_score = sum(1 for field in required_fields if item.get(field)) / len(required_fields)
+            required_score = (
+                sum(1 for field in QUALITY_REQUIRED_FIELDS if item.get(field)) / len(QUALITY_REQUIRED_FIELDS)
+            )
 
             # オプショナルフィールドスコア
-            optional_score = sum(1 for field in optional_fields if item.get(field)) / len(optional_fields)
+            optional_score = (
+                sum(1 for field in QUALITY_OPTIONAL_FIELDS if item.get(field)) / len(QUALITY_OPTIONAL_FIELDS)
+            )
 
             # 重み付き平均
             completeness = required_score * 0.7 + optional_score * 0.3
@@ -455,14 +660,13 @@ class MLEngine:
             # 電話番号の形式
             if 'phone_number' in item:
                 phone = str(item['phone_number'])
-                # 日本の電話番号パターン（簡易版）
-                if not re.match(r'^[\+\d\-\(\)\s]+$', phone):
+                if not PHONE_NUMBER_PATTERN.match(phone):
                     accuracy_score -= 0.2
 
             # ウェブサイトURL
             if 'website' in item:
                 website = str(item['website'])
-                if not re.match(r'^https?://', website):
+                if not WEBSITE_URL_PATTERN.match(website):
                     accuracy_score -= 0.2
 
             # 名前の妥当性
@@ -484,8 +688,7 @@ class MLEngine:
             address = item.get('formatted_address', '').lower()
 
             # 佐渡島関連チェック
-            sado_keywords = ['佐渡', 'sado', '両津', '相川', '新潟']
-            if address and not any(keyword in address for keyword in sado_keywords):
+            if address and not any(keyword in address for keyword in SADO_ADDRESS_KEYWORDS):
                 consistency_score -= 0.3
 
             # 評価数と評価値の一貫性
@@ -541,8 +744,9 @@ class MLEngine:
             features = []
 
             # 基本完全性
-            required_fields = ['place_id', 'name', 'formatted_address']
-            completeness = sum(1 for field in required_fields if item.get(field)) / len(required_fields)
+            completeness = (
+                sum(1 for field in QUALITY_REQUIRED_FIELDS if item.get(field)) / len(QUALITY_REQUIRED_FIELDS)
+            )
             features.append(completeness)
 
             # フィールド数
@@ -599,7 +803,7 @@ class MLEngine:
             # 地理的チェック
             address = item.get('formatted_address', '').lower()
             checks['location_consistent'] = any(
-                keyword in address for keyword in ['佐渡', 'sado', '新潟']
+                keyword in address for keyword in LOCATION_CHECK_KEYWORDS
             )
 
             return checks
@@ -608,53 +812,98 @@ class MLEngine:
             return {}
 
     def detect_anomalies(self, data_batch: List[Dict]) -> List[AnomalyReport]:
-        """高度な異常データ検知"""
+        """高度な異常データ検知（バッチ全体をモデル1回・列単位のルール判定で評価）
+
+        ルールに該当しない項目はその場でレポートを作成し、該当する項目
+        （と文字列以外の値を含む項目）だけ項目単位の検知で詳細を作る。
+        """
+        if not data_batch:
+            return []
+
         try:
+            columns = self._extract_quality_columns(data_batch)
+            ml_scores = self._batch_ml_anomaly_scores(data_batch, columns)
+            flagged = self._flag_anomaly_rules(columns) | columns['irregular']
+
             anomaly_reports = []
-            for item in data_batch:
-                report = self._detect_single_item_anomaly(item)
-                anomaly_reports.append(report)
+            for i, item in enumerate(data_batch):
+                if flagged[i]:
+                    anomaly_reports.append(self._detect_single_item_anomaly(item, float(ml_scores[i])))
+                else:
+                    anomaly_reports.append(self._build_anomaly_report(item, float(ml_scores[i]), []))
             return anomaly_reports
         except Exception as e:
             self.logger.error(f"異常検知エラー: {e}")
             return []
 
-    def _detect_single_item_anomaly(self, item: Dict) -> AnomalyReport:
-        """単一アイテムの異常検知"""
+    def _batch_ml_anomaly_scores(self, data_batch: List[Dict], columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """バッチ全体のML異常スコア（scaler / IsolationForest 各1回）"""
+        if not SKLEARN_AVAILABLE or self.anomaly_detector is None or self.scaler is None:
+            return np.zeros(len(data_batch))
+
+        features = self._score_quality_columns(data_batch, columns)['features']
+        try:
+            decisions = self.anomaly_detector.decision_function(self.scaler.transform(features))
+            return np.clip((1 - decisions) / 2, 0.0, 1.0)
+        except Exception:
+            # 特徴量に不正値（NaN等）を含む場合は項目単位（該当項目だけ0.0になる）
+            return np.array([self._calculate_ml_anomaly_score(item) for item in data_batch])
+
+    def _flag_anomaly_rules(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """基本・統計ルールのいずれかに該当する項目のマスク（_detect_basic_anomalies /
+        _detect_statistical_anomalies と同じ条件を列単位で評価）"""
+        required = columns['required']
+        optional = columns['optional']
+        rating = columns['rating']
+        name_length = columns['name_length']
+        valid_rating = ~columns['rating_error'] & ~columns['rating_out_of_range']
+
+        # 基本ルール: 必須フィールド欠損・評価値の異常・店舗名の長さ
+        flagged = (
+            ~required[:, 0] | ~required[:, 1] |
+            columns['has_rating'] & ~valid_rating |
+            (name_length < 2) | (name_length > 200)
+        )
+
+        # 評価関連: 高評価なのに評価数が少ない / 評価数が異常に多い
+        ratings_total = columns['ratings_total']
+        flagged |= columns['rating_pair'] & (((rating > 4.5) & (ratings_total < 3)) | (ratings_total > 10000))
+
+        # 品質スコア外れ値（_calculate_basic_quality_score と同じ計算）
+        if len(self.quality_history) > 10:
+            quality_scores = [m.overall_score for m in self.quality_history[-100:]]
+            mean_quality = np.mean(quality_scores)
+            std_quality = np.std(quality_scores)
+
+            rating_present = optional[:, QUALITY_OPTIONAL_FIELDS.index('rating')]
+            field_score = required[:, :2].sum(axis=1) / 2
+            optional_score = (
+                required[:, 2].astype(int) + rating_present +
+                optional[:, QUALITY_OPTIONAL_FIELDS.index('phone_number')] +
+                optional[:, QUALITY_OPTIONAL_FIELDS.index('website')]
+            ) / 4
+            validity_score = np.where(rating_present & valid_rating, 0.4, 0.3)
+            current_quality = np.minimum(0.0 + field_score * 0.4 + optional_score * 0.3 + validity_score, 1.0)
+
+            z_scores = np.abs(current_quality - mean_quality) / (std_quality + 1e-8)
+            flagged |= z_scores > 2.5
+
+        return flagged
+
+    def _detect_single_item_anomaly(self, item: Dict, ml_score: Optional[float] = None) -> AnomalyReport:
+        """単一アイテムの異常検知（ml_score 指定時はML異常スコアの計算を省略）"""
         try:
             # 基本異常チェック
             basic_anomalies = self._detect_basic_anomalies(item)
 
             # ML異常スコア計算
-            ml_score = self._calculate_ml_anomaly_score(item)
+            if ml_score is None:
+                ml_score = self._calculate_ml_anomaly_score(item)
 
             # 統計的異常
             statistical_anomalies = self._detect_statistical_anomalies(item)
 
-            # 最も重要な異常を選択
-            all_anomalies = basic_anomalies + statistical_anomalies
-
-            if all_anomalies:
-                primary = max(all_anomalies, key=lambda x: x.get('severity_score', 0))
-                return AnomalyReport(
-                    data_id=item.get('place_id', 'unknown'),
-                    anomaly_score=max(ml_score, primary.get('severity_score', 0)),
-                    anomaly_type=primary.get('type', 'unknown'),
-                    severity=primary.get('severity', 'medium'),
-                    explanation=primary.get('explanation', '異常検知'),
-                    suggested_actions=primary.get('actions', ['確認が必要']),
-                    confidence=primary.get('confidence', 0.5)
-                )
-            else:
-                return AnomalyReport(
-                    data_id=item.get('place_id', 'unknown'),
-                    anomaly_score=ml_score,
-                    anomaly_type="normal",
-                    severity="none",
-                    explanation="異常なし",
-                    suggested_actions=[],
-                    confidence=1.0 - ml_score
-                )
+            return self._build_anomaly_report(item, ml_score, basic_anomalies + statistical_anomalies)
         except Exception as e:
             self.logger.warning(f"アイテム異常検知エラー: {e}")
             return AnomalyReport(
@@ -667,9 +916,32 @@ class MLEngine:
                 confidence=0.0
             )
 
+    def _build_anomaly_report(self, item: Dict, ml_score: float, all_anomalies: List[Dict[str, Any]]) -> AnomalyReport:
+        """検知結果からレポート作成（最も重要な異常を選択）"""
+        if all_anomalies:
+            primary = max(all_anomalies, key=lambda x: x.get('severity_score', 0))
+            return AnomalyReport(
+                data_id=item.get('place_id', 'unknown'),
+                anomaly_score=max(ml_score, primary.get('severity_score', 0)),
+                anomaly_type=primary.get('type', 'unknown'),
+                severity=primary.get('severity', 'medium'),
+                explanation=primary.get('explanation', '異常検知'),
+                suggested_actions=primary.get('actions', ['確認が必要']),
+                confidence=primary.get('confidence', 0.5)
+            )
+        return AnomalyReport(
+            data_id=item.get('place_id', 'unknown'),
+            anomaly_score=ml_score,
+            anomaly_type="normal",
+            severity="none",
+            explanation="異常なし",
+            suggested_actions=[],
+            confidence=1.0 - ml_score
+        )
+
     def _calculate_ml_anomaly_score(self, item: Dict) -> float:
         """ML異常スコア計算"""
-        if not (SKLEARN_AVAILABLE and self.anomaly_detector and self.scaler):
+        if not SKLEARN_AVAILABLE or self.anomaly_detector is None or self.scaler is None:
             return 0.0
         try:
             features = self._extract_quality_features(item)
@@ -948,10 +1220,28 @@ class MLEngine:
         self,
         query_count: int,
         data_complexity: float,
-        worker_count: int = 1
+        worker_count: int = 1,
+        category: Optional[str] = None,
+        mode: Optional[str] = None
     ) -> MLPrediction:
-        """高度な処理時間予測"""
+        """高度な処理時間予測（実測の学習が十分な場合はそれを優先）"""
         try:
+            online_time = self.processing_time_model.estimate(query_count, category, mode, worker_count)
+            if online_time is not None:
+                # 実測タイミングからのオンライン予測（履歴調整は不要）
+                return MLPrediction(
+                    prediction=online_time,
+                    confidence=self.processing_time_model.confidence(),
+                    explanation=(
+                        f"実測オンライン予測: {query_count}件, {category or '全カテゴリ'}, "
+                        f"{mode or '全モード'}, {worker_count}ワーカー "
+                        f"(学習数: {self.processing_time_model.samples})"
+                    ),
+                    timestamp=datetime.now(),
+                    model_version="online",
+                    features_used=['category', 'mode', 'worker_count', 'query_count']
+                )
+
             # ML予測（利用可能な場合）
             if SKLEARN_AVAILABLE and self.processing_time_predictor is not None:
                 features = np.array([[query_count, data_complexity, worker_count]])
@@ -1006,7 +1296,9 @@ class MLEngine:
         self,
         total_queries: int,
         available_workers: int,
-        target_duration: float = 300.0  # 5分
+        target_duration: float = 300.0,  # 5分
+        category: Optional[str] = None,
+        mode: Optional[str] = None
     ) -> Dict[str, Any]:
         """高度なバッチサイズ最適化"""
         try:
@@ -1043,9 +1335,17 @@ class MLEngine:
 
             # 推定値計算
             estimated_batches = (total_queries + optimal_size - 1) // optimal_size
-            estimated_total_time = self.predict_processing_time(
-                total_queries, 0.5, available_workers
-            ).prediction
+            time_prediction = self.predict_processing_time(
+                total_queries, 0.5, available_workers, category, mode
+            )
+            estimated_total_time = time_prediction.prediction
+
+            # 実測の1件あたり時間から、1バッチが目標時間内に収まるサイズに制限
+            if time_prediction.model_version == "online" and total_queries > 0:
+                per_batch_limit = int(target_duration * total_queries / max(estimated_total_time, 1e-9))
+                if per_batch_limit < optimal_size:
+                    optimal_size = max(1, per_batch_limit)
+                    estimated_batches = (total_queries + optimal_size - 1) // optimal_size
 
             # 効率性評価
             efficiency_score = self._calculate_batch_efficiency(
@@ -1057,7 +1357,10 @@ class MLEngine:
                 "estimated_batches": estimated_batches,
                 "estimated_total_time": estimated_total_time,
                 "efficiency_score": efficiency_score,
-                "confidence": 0.8 if self.processing_history else 0.6,
+                "confidence": (
+                    time_prediction.confidence if time_prediction.model_version == "online"
+                    else 0.8 if self.processing_history else 0.6
+                ),
                 "reasoning": self._generate_batch_size_reasoning(
                     optimal_size, available_workers, total_queries
                 )
@@ -1162,11 +1465,13 @@ class MLEngine:
     def get_comprehensive_status(self) -> Dict[str, Any]:
         """包括的ステータス取得"""
         try:
+            self._ensure_models()
             status = {
                 "engine_info": {
                     "version": "v2.0_advanced",
                     "sklearn_available": SKLEARN_AVAILABLE,
                     "models_loaded": self.models_loaded,
+                    "model_version": self.model_version,
                     "last_updated": datetime.now().isoformat()
                 },
                 "model_status": {
@@ -0,0 +1,194 @@
+"""
+ML Models - バージョン付きモデル成果物の保存・読み込み
+
+MLEngine の学習済みモデルを joblib 形式（非圧縮）でバージョンごとの
+ディレクトリに保存し、manifest.json で現在のバージョンとチェックサムを管理する。
+
+- 読み込みは mmap_mode で行い、モデル内部の配列をページキャッシュ経由で
+  複数のワーカープロセス間で共有する
+- manifest の差し替えは原子的に行い、学習中の読み込みが壊れた成果物を見ない
+- 学習はオフラインで `python -m shared.ml_models train` を実行する
+
+scikit-learn / joblib は読み込み・保存時にだけ importする（モジュール読み込みは軽量）。
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MODEL_FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelArtifactStore:
+    """モデルディレクトリ内のバージョン付き成果物"""
+
+    def __init__(self, model_dir: str = "models", mmap_mode: Optional[str] = 'r', keep_versions: int = 3):
+        """
+        初期化
+
+        Args:
+            model_dir: 成果物ディレクトリ
+            mmap_mode: joblib.load の mmap_mode（Noneでメモリに読み込む）
+            keep_versions: 保持する過去バージョン数（現在のバージョンを含む）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.model_dir = Path(model_dir)
+        self.mmap_mode = mmap_mode
+        self.keep_versions = keep_versions
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.model_dir / MANIFEST_FILE
+
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        """現在のmanifest（未学習・形式不一致の場合None）"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest: Dict[str, Any] = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            self.logger.warning(f"モデルmanifest読み込みエラー: {e}")
+            return None
+
+        if manifest.get("format") != MODEL_FORMAT_VERSION:
+            self.logger.warning(f"モデル形式が異なります: {manifest.get('format')}")
+            return None
+        return manifest
+
+    def load(self, verify: bool = True) -> Optional[Dict[str, Any]]:
+        """現在のバージョンのモデルを読み込む（チェックサム不一致・欠損時はNone）"""
+        manifest = self.manifest()
+        if manifest is None:
+            return None
+
+        import joblib
+        import sklearn
+
+        if manifest.get("sklearn_version") != sklearn.__version__:
+            self.logger.warning(
+                f"モデル学習時とscikit-learnのバージョンが異なります: "
+                f"{manifest.get('sklearn_version')} -> {sklearn.__version__}"
+            )
+
+        version_dir = self.model_dir / manifest["version"]
+        models = {}
+        for name, artifact in manifest["artifacts"].items():
+            path = version_dir / artifact["file"]
+            try:
+                if verify and _sha256(path) != artifact["sha256"]:
+                    self.logger.error(f"モデルのチェックサム不一致: {path}")
+                    return None
+                models[name] = joblib.load(path, mmap_mode=self.mmap_mode)
+            except Exception as e:
+                self.logger.error(f"モデル読み込みエラー: {path}: {e}")
+                return None
+
+        self.logger.info(f"モデル読み込み完了: {manifest['version']} ({len(models)}個)")
+        return models
+
+    def save(self, models: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> str:
+        """新しいバージョンとして保存し、manifest を差し替える（バージョン名を返す）"""
+        import joblib
+        import sklearn
+
+        version = datetime.now().strftime("v%Y%m%d%H%M%S%f")
+        version_dir = self.model_dir / version
+        version_dir.mkdir(parents=True, exist_ok=True)
+
+        artifacts = {}
+        for name, model in models.items():
+            if model is None:
+                continue
+            path = version_dir / f"{name}.joblib"
+            # mmap で読めるよう非圧縮で保存
+            joblib.dump(model, path, compress=0)
+            artifacts[name] = {"file": path.name, "sha256": _sha256(path)}
+
+        manifest = {
+            "format": MODEL_FORMAT_VERSION,
+            "version": version,
+            "created_at": datetime.now().isoformat(),
+            "sklearn_version": sklearn.__version__,
+            "artifacts": artifacts,
+            **(metadata or {}),
+        }
+        temp_path = self.manifest_path.with_suffix(".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+        self._prune(version)
+        self.logger.info(f"モデル保存完了: {version}")
+        return version
+
+    def versions(self) -> List[str]:
+        """保存済みバージョン（古い順）"""
+        if not self.model_dir.exists():
+            return []
+        return sorted(
+            path.name for path in self.model_dir.iterdir()
+            if path.is_dir() and path.name.startswith("v") and path.name[1:].isdigit()
+        )
+
+    def _prune(self, current: str) -> None:
+        # 読み込み中のプロセスがあり得るため直前のバージョンは残す
+        for version in self.versions()[:-self.keep_versions]:
+            if version != current:
+                shutil.rmtree(self.model_dir / version, ignore_errors=True)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="MLEngine モデル成果物の管理")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = subparsers.add_parser("train", help="合成データでモデルを学習して保存")
+    train_parser.add_argument("--model-dir", default="models", help="成果物ディレクトリ")
+
+    show_parser = subparsers.add_parser("show", help="現在のバージョンとチェックサムを表示")
+    show_parser.add_argument("--model-dir", default="models", help="成果物ディレクトリ")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    if args.command == "train":
+        from .ml_engine import MLEngine
+
+        start = time.perf_counter()
+        version = MLEngine(args.model_dir, auto_train=False).train_models()
+        if version is None:
+            raise SystemExit("モデル学習に失敗しました")
+        print(f"{version} ({time.perf_counter() - start:.1f}s)")
+
+    elif args.command == "show":
+        manifest = ModelArtifactStore(args.model_dir).manifest()
+        if manifest is None:
+            raise SystemExit(f"学習済みモデルがありません: {args.model_dir}")
+        print(json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+__all__ = [
+    'ModelArtifactStore',
+    'MODEL_FORMAT_VERSION',
+    'main',
+]
+
+
+if __name__ == "__main__":
+    main()
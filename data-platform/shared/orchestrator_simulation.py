@@ -0,0 +1,524 @@
+"""
+Orchestrator Simulation - 負荷分散・フェイルオーバー戦略の離散イベントシミュレーター
+
+実クラスタなしで SmartOrchestrator の戦略を比較するため、仮想時刻上で
+N台のワーカー（レイテンシ分布・同時実行数・エラー率）、障害（停止期間）、
+Places APIのレート制限を模擬し、本物の選択・フェイルオーバーのコードを動かす。
+
+- ワーカー選択: SmartOrchestrator.get_optimal_worker（各アルゴリズム）
+- 計測: WorkerTelemetryStore へ Celery と同じ形式のイベントを送る
+- 障害処理: handle_worker_failure / サーキットブレーカー / 復旧（待機のみ仮想時刻）
+
+乱数はシード固定のため結果は決定的で、CIでも実行できる。
+
+    python -m shared.orchestrator_simulation --workers 8 --slow-workers 2 --outage
+"""
+
+import argparse
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import random
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from .cache_service import CacheConfig, CacheService
+from .logger import LoggingConfig, get_logger
+from .performance_monitor import PerformanceMonitor
+from .smart_orchestrator import FailoverConfig, LoadBalancingConfig, SmartOrchestrator
+from .worker_telemetry import WorkerTelemetryStore
+
+
+ALGORITHMS = ("weighted_round_robin", "least_connections", "health_based", "round_robin", "p2c")
+
+# 障害ごとのオーケストレーターのログ（CLIでは抑制する）
+ORCHESTRATOR_LOGGER = f"{__name__}.orchestrator"
+
+
+@dataclass
+class SimulatedWorker:
+    """模擬ワーカー設定"""
+    worker_id: str
+    latency_ms: float = 100.0       # 処理時間の中央値
+    latency_sigma: float = 0.5      # 対数正規分布のばらつき
+    concurrency: int = 4            # 同時実行数
+    error_rate: float = 0.0         # 正常時のタスク失敗率
+
+
+@dataclass
+class Outage:
+    """ワーカー停止（停止中のタスクはタイムアウトで失敗し、ハートビートも止まる）"""
+    worker_id: str
+    start: float
+    duration: float
+
+
+@dataclass
+class SimulationScenario:
+    """シミュレーション条件"""
+    workers: List[SimulatedWorker]
+    duration: float = 300.0                     # タスクを投入する時間（秒）
+    arrival_rate: float = 50.0                  # タスク到着率（件/秒、ポアソン到着）
+    api_rate_limit: Optional[float] = None      # Places APIの全体上限（件/秒）
+    outages: List[Outage] = field(default_factory=list)
+    failure_timeout: float = 5.0                # 停止ワーカーのタスクが失敗と判明するまで
+    max_retries: int = 2                        # 別ワーカーへの再投入回数
+    no_worker_retry_delay: float = 1.0          # 選択可能なワーカーがない場合の再試行間隔
+    task_type: str = "api_call"
+    heartbeat_interval: float = 2.0
+    monitor_interval: float = 10.0              # 監視ループ（停止判定）の間隔
+    seed: int = 0
+
+
+@dataclass
+class StrategyReport:
+    """戦略ごとの結果"""
+    algorithm: str
+    completed: int
+    failed: int
+    retries: int
+    throughput: float                           # 完了件数/秒
+    p50_latency_ms: float
+    p99_latency_ms: float
+    mean_detection_time: Optional[float]        # 停止から選択対象外になるまで（秒）
+    mean_recovery_time: Optional[float]         # 復帰から再び選択対象になるまで（秒）
+    unrecovered_outages: int                    # シミュレーション終了までに復旧しなかった停止
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class _Task:
+    task_id: str
+    arrival: float
+    attempt: int = 0
+    worker_id: Optional[str] = None
+    started: float = 0.0
+    cancelled: bool = False
+
+
+@dataclass
+class _OutageState:
+    outage: Outage
+    detected_at: Optional[float] = None
+    recovered_at: Optional[float] = None
+
+
+class _SimulatedOrchestrator(SmartOrchestrator):
+    """復旧の待機と健康チェックをシミュレーターに委ねる SmartOrchestrator
+
+    キャッシュは未接続（インメモリ）の CacheService、計測は仮想時刻の
+    WorkerTelemetryStore を使う。
+    """
+
+    def __init__(
+        self,
+        load_config: LoadBalancingConfig,
+        failover_config: Optional[FailoverConfig],
+        telemetry: WorkerTelemetryStore,
+        recovery_hook: Callable[[str], Awaitable[None]],
+        health_check: Callable[[str], Awaitable[bool]]
+    ):
+        super().__init__(
+            CacheService(CacheConfig(redis_nodes=[])),
+            PerformanceMonitor("simulation"),
+            load_config,
+            failover_config
+        )
+        self.logger = get_logger(ORCHESTRATOR_LOGGER)
+        self.telemetry = telemetry
+        self._recovery_hook = recovery_hook
+        self._health_check = health_check
+
+    async def _attempt_worker_recovery(self, worker_id: str) -> None:
+        await self._recovery_hook(worker_id)
+
+    async def _check_worker_health(self, worker_id: str) -> bool:
+        return await self._health_check(worker_id)
+
+
+class OrchestratorSimulation:
+    """1つの戦略についてのシミュレーション"""
+
+    def __init__(
+        self,
+        scenario: SimulationScenario,
+        load_config: Optional[LoadBalancingConfig] = None,
+        failover_config: Optional[FailoverConfig] = None
+    ):
+        self.scenario = scenario
+        self.now = 0.0
+        self._rng = random.Random(scenario.seed)
+        self._events: List[Tuple[float, int, Callable[..., None], Tuple[Any, ...]]] = []
+        self._sequence = itertools.count()
+        self._loop = asyncio.new_event_loop()
+
+        load_config = load_config or LoadBalancingConfig()
+        load_config.event_telemetry = False
+        if load_config.random_seed is None:
+            load_config.random_seed = scenario.seed
+
+        # 復旧の待機は仮想時刻で行い、健康チェックは模擬ワーカーの状態を返す
+        self.orchestrator = _SimulatedOrchestrator(
+            load_config,
+            failover_config,
+            WorkerTelemetryStore(load_config.latency_ewma_alpha, clock=lambda: self.now),
+            recovery_hook=self._schedule_recovery,
+            health_check=self._check_worker_health
+        )
+
+        self._workers = {worker.worker_id: worker for worker in scenario.workers}
+        self._down: Dict[str, bool] = {worker_id: False for worker_id in self._workers}
+        self._running: Dict[str, List[_Task]] = {worker_id: [] for worker_id in self._workers}
+        self._queued: Dict[str, Deque[_Task]] = {worker_id: deque() for worker_id in self._workers}
+        self._outages = [_OutageState(outage) for outage in scenario.outages]
+        self._api_next_permit = 0.0
+        self._outstanding = 0
+
+        self.latencies: List[float] = []
+        self.failed = 0
+        self.retries = 0
+        self._last_completion = 0.0
+
+    # イベントキュー
+
+    def _schedule(self, at: float, callback: Callable[..., None], *args: Any) -> None:
+        heapq.heappush(self._events, (at, next(self._sequence), callback, args))
+
+    def _call(self, coroutine: Awaitable[Any]) -> Any:
+        return self._loop.run_until_complete(coroutine)
+
+    def run(self) -> StrategyReport:
+        """シミュレーションを最後まで実行"""
+        try:
+            for worker_id in self._workers:
+                self._heartbeat(worker_id)
+            self._schedule(0.0, self._monitor)
+            self._schedule(self._rng.expovariate(self.scenario.arrival_rate), self._arrive, 0)
+            for state in self._outages:
+                self._schedule(state.outage.start, self._outage_start, state.outage.worker_id)
+                self._schedule(state.outage.start + state.outage.duration, self._outage_end, state.outage.worker_id)
+
+            while self._events:
+                self.now, _, callback, args = heapq.heappop(self._events)
+                callback(*args)
+                self._observe_outages()
+
+            return self._report()
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+            self._loop.close()
+
+    def _active(self) -> bool:
+        """投入期間中、または未完了タスクがある間は周期イベントを続ける"""
+        return self.now < self.scenario.duration or self._outstanding > 0
+
+    # タスク到着・割り当て
+
+    def _arrive(self, index: int) -> None:
+        self._outstanding += 1
+        self._dispatch(_Task(task_id=f"t{index}", arrival=self.now))
+
+        next_arrival = self.now + self._rng.expovariate(self.scenario.arrival_rate)
+        if next_arrival < self.scenario.duration:
+            self._schedule(next_arrival, self._arrive, index + 1)
+
+    def _dispatch(self, task: _Task) -> None:
+        worker_id = self._call(self.orchestrator.get_optimal_worker(self.scenario.task_type))
+        if worker_id is None:
+            # managed_task_execution と同様に失敗扱い（再試行回数を消費）
+            if task.attempt < self.scenario.max_retries:
+                task.attempt += 1
+                self.retries += 1
+                self._schedule(self.now + self.scenario.no_worker_retry_delay, self._dispatch, task)
+            else:
+                self.failed += 1
+                self._outstanding -= 1
+            return
+
+        task.worker_id = worker_id
+        task.cancelled = False
+        self.orchestrator.telemetry.on_task_started(
+            {"uuid": self._uuid(task), "hostname": worker_id, "timestamp": self.now}
+        )
+
+        if self._down[worker_id]:
+            self._schedule(self.now + self.scenario.failure_timeout, self._fail, task, True)
+        elif len(self._running[worker_id]) < self._workers[worker_id].concurrency:
+            self._start(task)
+        else:
+            self._queued[worker_id].append(task)
+
+    def _start(self, task: _Task) -> None:
+        worker = self._workers[self._assigned(task)]
+        self._running[worker.worker_id].append(task)
+        task.started = self.now
+
+        # 全ワーカー共有のAPIレート制限（許可待ちの間もスロットを占有）
+        begin = self.now
+        if self.scenario.api_rate_limit:
+            begin = max(self.now, self._api_next_permit)
+            self._api_next_permit = begin + 1.0 / self.scenario.api_rate_limit
+
+        service = self._rng.lognormvariate(math.log(worker.latency_ms / 1000), worker.latency_sigma)
+        if self._rng.random() < worker.error_rate:
+            self._schedule(begin + service, self._fail, task, False)
+        else:
+            self._schedule(begin + service, self._succeed, task)
+
+    def _succeed(self, task: _Task) -> None:
+        if task.cancelled:
+            return
+
+        # runtime は Celery と同じくワーカーでの実行開始からの時間（レート制限待ちを含む）
+        self.orchestrator.telemetry.on_task_succeeded({
+            "uuid": self._uuid(task), "hostname": task.worker_id,
+            "timestamp": self.now, "runtime": self.now - task.started
+        })
+        self.latencies.append((self.now - task.arrival) * 1000)
+        self._last_completion = self.now
+        self._outstanding -= 1
+        self._release_slot(task)
+
+    def _fail(self, task: _Task, worker_down: bool) -> None:
+        if task.cancelled:
+            return
+
+        worker_id = self._assigned(task)
+        event: Dict[str, Any] = {"uuid": self._uuid(task), "hostname": worker_id, "timestamp": self.now}
+        if not worker_down:
+            event["runtime"] = self.now - task.started
+        self.orchestrator.telemetry.on_task_failed(event)
+        self._call(self.orchestrator.handle_worker_failure(worker_id, RuntimeError("simulated failure")))
+        self._drain_orchestrator_tasks()
+        if not worker_down:
+            self._release_slot(task)
+
+        if task.attempt < self.scenario.max_retries:
+            task.attempt += 1
+            self.retries += 1
+            self._dispatch(task)
+        else:
+            self.failed += 1
+            self._outstanding -= 1
+
+    def _release_slot(self, task: _Task) -> None:
+        worker_id = self._assigned(task)
+        running = self._running[worker_id]
+        if task in running:
+            running.remove(task)
+        queued = self._queued[worker_id]
+        if queued and not self._down[worker_id]:
+            self._start(queued.popleft())
+
+    @staticmethod
+    def _assigned(task: _Task) -> str:
+        if task.worker_id is None:
+            raise ValueError(f"ワーカー未割り当てのタスク: {task.task_id}")
+        return task.worker_id
+
+    @staticmethod
+    def _uuid(task: _Task) -> str:
+        return f"{task.task_id}-{task.attempt}"
+
+    # ワーカー障害
+
+    def _outage_start(self, worker_id: str) -> None:
+        self._down[worker_id] = True
+        # 実行中・待機中のタスクはタイムアウトで失敗する
+        stranded = self._running[worker_id] + list(self._queued[worker_id])
+        self._running[worker_id] = []
+        self._queued[worker_id].clear()
+        for task in stranded:
+            task.cancelled = True
+            retry = _Task(task.task_id, task.arrival, task.attempt, worker_id)
+            self._schedule(self.now + self.scenario.failure_timeout, self._fail, retry, True)
+
+    def _outage_end(self, worker_id: str) -> None:
+        # 周期ハートビートは停止中も続いているため、復帰を知らせる1回だけ送る
+        self._down[worker_id] = False
+        self._send_heartbeat(worker_id)
+
+    def _heartbeat(self, worker_id: str) -> None:
+        if not self._down[worker_id]:
+            self._send_heartbeat(worker_id)
+        if self._active():
+            self._schedule(self.now + self.scenario.heartbeat_interval, self._heartbeat, worker_id)
+
+    def _send_heartbeat(self, worker_id: str) -> None:
+        self.orchestrator.telemetry.on_worker_heartbeat({
+            "hostname": worker_id,
+            "freq": self.scenario.heartbeat_interval,
+            "active": len(self._running[worker_id]) + len(self._queued[worker_id])
+        })
+
+    def _monitor(self) -> None:
+        """監視ループ相当（イベント計測時の _update_worker_metrics と同じ処理）"""
+        self.orchestrator.telemetry.expire_stale()
+        self.orchestrator._sync_worker_telemetry()
+        if self._active():
+            self._schedule(self.now + self.scenario.monitor_interval, self._monitor)
+
+    async def _schedule_recovery(self, worker_id: str) -> None:
+        delay = self.orchestrator._next_recovery_delay(worker_id)
+        self._schedule(self.now + delay, self._recover, worker_id)
+
+    def _recover(self, worker_id: str) -> None:
+        self._call(self.orchestrator._complete_worker_recovery(worker_id))
+
+    async def _check_worker_health(self, worker_id: str) -> bool:
+        return not self._down[worker_id]
+
+    def _drain_orchestrator_tasks(self) -> None:
+        """_mark_worker_failed が作成した復旧タスクを実行"""
+        tasks = list(getattr(self.orchestrator, '_recovery_tasks', ()))
+        if tasks:
+            self._call(asyncio.gather(*tasks))
+
+    # 計測
+
+    def _selectable(self, worker_id: str) -> bool:
+        orchestrator = self.orchestrator
+        orchestrator._sync_worker_telemetry()
+        return orchestrator._is_selectable(worker_id)
+
+    def _observe_outages(self) -> None:
+        for state in self._outages:
+            outage = state.outage
+            if state.detected_at is None and self.now >= outage.start:
+                if not self._selectable(outage.worker_id):
+                    state.detected_at = self.now
+            end = outage.start + outage.duration
+            if state.recovered_at is None and state.detected_at is not None and self.now >= end:
+                if self._selectable(outage.worker_id):
+                    state.recovered_at = self.now
+
+    def _report(self) -> StrategyReport:
+        latencies = sorted(self.latencies)
+        detections = [s.detected_at - s.outage.start for s in self._outages if s.detected_at is not None]
+        recoveries = [
+            s.recovered_at - (s.outage.start + s.outage.duration)
+            for s in self._outages if s.recovered_at is not None
+        ]
+
+        return StrategyReport(
+            algorithm=self.orchestrator.load_config.algorithm,
+            completed=len(latencies),
+            failed=self.failed,
+            retries=self.retries,
+            throughput=len(latencies) / self._last_completion if self._last_completion else 0.0,
+            p50_latency_ms=_percentile(latencies, 0.50),
+            p99_latency_ms=_percentile(latencies, 0.99),
+            mean_detection_time=sum(detections) / len(detections) if detections else None,
+            mean_recovery_time=sum(recoveries) / len(recoveries) if recoveries else None,
+            unrecovered_outages=sum(1 for s in self._outages if s.recovered_at is None)
+        )
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """最近順位法によるパーセンタイル"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def compare_strategies(
+    scenario: SimulationScenario,
+    algorithms: Tuple[str, ...] = ALGORITHMS,
+    load_config: Optional[LoadBalancingConfig] = None,
+    failover_config: Optional[FailoverConfig] = None
+) -> Dict[str, StrategyReport]:
+    """同じシナリオ（同じ乱数シード）で各アルゴリズムを実行"""
+    reports = {}
+    for algorithm in algorithms:
+        config = LoadBalancingConfig(**{**asdict(load_config or LoadBalancingConfig()), "algorithm": algorithm})
+        failover = FailoverConfig(**asdict(failover_config)) if failover_config else None
+        reports[algorithm] = OrchestratorSimulation(scenario, config, failover).run()
+    return reports
+
+
+def build_scenario(
+    workers: int = 8,
+    slow_workers: int = 2,
+    slow_factor: float = 5.0,
+    latency_ms: float = 100.0,
+    outage: bool = False,
+    **kwargs: Any
+) -> SimulationScenario:
+    """速度の偏ったワーカー構成のシナリオを作成（outage=Trueで1台を途中停止）"""
+    simulated = [
+        SimulatedWorker(
+            worker_id=f"worker{i}@sim",
+            latency_ms=latency_ms * (slow_factor if i < slow_workers else 1.0)
+        )
+        for i in range(workers)
+    ]
+    scenario = SimulationScenario(workers=simulated, **kwargs)
+    if outage:
+        scenario.outages.append(Outage(simulated[-1].worker_id, scenario.duration / 3, scenario.duration / 6))
+    return scenario
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="SmartOrchestrator 戦略シミュレーション")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--slow-workers", type=int, default=2)
+    parser.add_argument("--slow-factor", type=float, default=5.0)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--arrival-rate", type=float, default=50.0)
+    parser.add_argument("--duration", type=float, default=300.0)
+    parser.add_argument("--api-rate-limit", type=float, default=None)
+    parser.add_argument("--outage", action="store_true", help="1台を途中で停止させる")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--algorithms", nargs="+", default=list(ALGORITHMS), choices=ALGORITHMS)
+    args = parser.parse_args(argv)
+
+    # 障害ごとのオーケストレーターのログは抑制
+    # （ContextualLogger はレベルを見ずに handle() へ渡すため、ロガーごと無効化する）
+    get_logger(ORCHESTRATOR_LOGGER, LoggingConfig(level="CRITICAL", console_output=False))
+    logging.getLogger(ORCHESTRATOR_LOGGER).disabled = True
+
+    scenario = build_scenario(
+        workers=args.workers,
+        slow_workers=args.slow_workers,
+        slow_factor=args.slow_factor,
+        latency_ms=args.latency_ms,
+        outage=args.outage,
+        arrival_rate=args.arrival_rate,
+        duration=args.duration,
+        api_rate_limit=args.api_rate_limit,
+        seed=args.seed
+    )
+
+    print(f"{'algorithm':<22}{'done':>8}{'failed':>8}{'tput/s':>9}{'p50ms':>9}{'p99ms':>10}{'detect':>8}{'recover':>9}")
+    for name, report in compare_strategies(scenario, tuple(args.algorithms)).items():
+        detect = f"{report.mean_detection_time:.1f}" if report.mean_detection_time is not None else "-"
+        recover = f"{report.mean_recovery_time:.1f}" if report.mean_recovery_time is not None else "-"
+        if report.unrecovered_outages:
+            recover = f"{recover}*{report.unrecovered_outages}"
+        print(
+            f"{name:<22}{report.completed:>8}{report.failed:>8}{report.throughput:>9.1f}"
+            f"{report.p50_latency_ms:>9.0f}{report.p99_latency_ms:>10.0f}{detect:>8}{recover:>9}"
+        )
+
+
+
+__all__ = [
+    'ALGORITHMS',
+    'SimulatedWorker',
+    'Outage',
+    'SimulationScenario',
+    'StrategyReport',
+    'OrchestratorSimulation',
+    'compare_strategies',
+    'build_scenario',
+]
+
+
+if __name__ == "__main__":
+    main()
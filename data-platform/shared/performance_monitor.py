@@ -154,7 +154,7 @@ class PerformanceMonitor:
     __slots__ = (
         '_component_name', '_logger', '_lock', '_metrics',
         '_performance_stats', '_api_metrics', '_max_history',
-        '_cleanup_interval', '_last_cleanup'
+        '_cleanup_interval', '_last_cleanup', '_listeners'
     )
 
     def __init__(self, component_name: str = "unknown"):
@@ -173,6 +173,14 @@ class PerformanceMonitor:
         self._cleanup_interval = 1800  # クリーンアップ間隔を短縮 (3600 -> 1800)
         self._last_cleanup = time.time()
 
+        # 測定結果の購読者（オンライン学習など）
+        self._listeners: List[Callable[[str, float, bool, Optional[Dict[str, str]]], None]] = []
+
+    def add_listener(self, listener: Callable[[str, float, bool, Optional[Dict[str, str]]], None]) -> None:
+        """測定結果のリスナーを登録（operation_name, duration, success, labels で呼ばれる）"""
+        with self._lock:
+            self._listeners.append(listener)
+
     @contextmanager
     def measure_time(self, operation_name: str, labels: Optional[Dict[str, str]] = None):
         """実行時間を測定するコンテキストマネージャー - 最適化版"""
@@ -211,6 +219,15 @@ class PerformanceMonitor:
                 self._cleanup_old_metrics()
                 self._last_cleanup = current_time
 
+            listeners = tuple(self._listeners)
+
+        # リスナーはロックの外で呼び出す
+        for listener in listeners:
+            try:
+                listener(operation_name, duration, success, labels)
+            except Exception as e:
+                self._logger.warning("Performance listener failed", operation=operation_name, error=str(e))
+
     def _cleanup_old_metrics(self) -> None:
         """古いメトリクスのクリーンアップ - メモリリーク防止"""
         for operation_name, metrics_deque in self._metrics.items():
@@ -0,0 +1,229 @@
+"""
+Processing Time Model - 実測タイミングからの処理時間オンライン学習
+
+PerformanceMonitor に記録された実行タイミング（カテゴリ・モード・ワーカー数・
+処理件数）を SGDRegressor.partial_fit で逐次学習し、1件あたりの処理時間を予測する。
+
+- 目的変数は log(秒/件)。カテゴリ・モード・並列度の影響を乗法的に扱う
+- Huber損失で、スロットリング等による外れ値の影響を抑える
+- 観測ごとにファイルへ原子的に書き出し、次回実行に引き継ぐ
+- 十分な観測が集まるまでは予測を返さない（呼び出し側のヒューリスティックを使う）
+
+scikit-learn は学習・読み込み時にだけ import する。
+"""
+
+import logging
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# PerformanceMonitor に記録する実行タイミングの操作名
+PROCESSING_RUN_OPERATION = "processing_run"
+
+CATEGORIES = ('restaurants', 'parkings', 'toilets')
+MODES = ('quick', 'standard', 'comprehensive')
+
+MODEL_FORMAT_VERSION = 1
+
+
+def _default_model_path() -> str:
+    # デフォルトパス: data-platform/data/processing_time_model.joblib
+    return str(Path(__file__).parent.parent / "data" / "processing_time_model.joblib")
+
+
+def _features(category: Optional[str], mode: Optional[str], worker_count: int) -> list:
+    """特徴量（カテゴリ・モードのone-hot + log(ワーカー数)）"""
+    return (
+        [1.0 if category == name else 0.0 for name in CATEGORIES]
+        + [1.0 if mode == name else 0.0 for name in MODES]
+        + [math.log(max(1, worker_count))]
+    )
+
+
+class OnlineProcessingTimeModel:
+    """実測タイミングで逐次更新する処理時間予測器"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        min_samples: int = 5,
+        learning_rate: float = 0.1,
+        residual_alpha: float = 0.2
+    ):
+        """
+        初期化（モデルファイルは初回利用時に読み込む）
+
+        Args:
+            path: 保存先ファイル（空文字の場合は永続化しない）
+            min_samples: 予測を返すまでに必要な観測数
+            learning_rate: SGDの学習率（定数。処理時間の変化に追従させる）
+            residual_alpha: 予測誤差（対数）の指数移動平均係数
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = _default_model_path() if path is None else path
+        self.min_samples = min_samples
+        self.learning_rate = learning_rate
+        self.residual_alpha = residual_alpha
+
+        self._regressor: Optional[Any] = None
+        self._samples = 0
+        self._residual = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def samples(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return self._samples
+
+    @property
+    def ready(self) -> bool:
+        """予測に十分な観測があるか"""
+        return self.samples >= self.min_samples
+
+    def observe(
+        self,
+        category: Optional[str],
+        mode: Optional[str],
+        worker_count: int,
+        query_count: int,
+        duration: float
+    ) -> bool:
+        """実行結果を1件学習して保存（学習した場合True）"""
+        if query_count <= 0 or duration <= 0:
+            return False
+
+        try:
+            import numpy as np
+            from sklearn.linear_model import SGDRegressor
+        except ImportError:
+            return False
+
+        target = math.log(duration / query_count)
+        x = np.array([_features(category, mode, worker_count)])
+
+        with self._lock:
+            self._ensure_loaded()
+            if self._regressor is None:
+                self._regressor = SGDRegressor(
+                    loss='huber',
+                    epsilon=1.0,
+                    alpha=1e-4,
+                    learning_rate='constant',
+                    eta0=self.learning_rate,
+                    random_state=42
+                )
+            else:
+                residual = abs(target - float(self._regressor.predict(x)[0]))
+                self._residual += self.residual_alpha * (residual - self._residual)
+
+            self._regressor.partial_fit(x, [target])
+            self._samples += 1
+            self._save()
+        return True
+
+    def observe_measurement(
+        self,
+        operation_name: str,
+        duration: float,
+        success: bool,
+        labels: Optional[Dict[str, str]] = None
+    ) -> None:
+        """PerformanceMonitor のリスナー（成功した実行タイミングのみ学習）"""
+        if operation_name != PROCESSING_RUN_OPERATION or not success or not labels:
+            return
+        try:
+            self.observe(
+                labels.get("category"),
+                labels.get("mode"),
+                int(labels.get("workers", 1)),
+                int(labels.get("queries", 0)),
+                duration
+            )
+        except Exception as e:
+            self.logger.warning(f"処理時間モデル学習エラー: {e}")
+
+    def seconds_per_query(
+        self,
+        category: Optional[str] = None,
+        mode: Optional[str] = None,
+        worker_count: int = 1
+    ) -> Optional[float]:
+        """1件あたりの予測処理時間（観測不足の場合None）"""
+        with self._lock:
+            self._ensure_loaded()
+            if self._regressor is None or self._samples < self.min_samples:
+                return None
+            import numpy as np
+
+            x = np.array([_features(category, mode, worker_count)])
+            return math.exp(float(self._regressor.predict(x)[0]))
+
+    def estimate(
+        self,
+        query_count: int,
+        category: Optional[str] = None,
+        mode: Optional[str] = None,
+        worker_count: int = 1
+    ) -> Optional[float]:
+        """処理全体の予測時間（秒、観測不足の場合None）"""
+        per_query = self.seconds_per_query(category, mode, worker_count)
+        return None if per_query is None else per_query * query_count
+
+    def confidence(self) -> float:
+        """観測数と直近の予測誤差に基づく信頼度"""
+        with self._lock:
+            self._ensure_loaded()
+            coverage = min(1.0, self._samples / (self.min_samples * 4))
+            return round(min(0.95, (0.5 + 0.45 * coverage) / (1.0 + self._residual)), 3)
+
+    def _ensure_loaded(self) -> None:
+        """保存済みモデルを初回だけ読み込む（ロック取得済みで呼び出すこと）"""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            import joblib
+
+            state: Dict[str, Any] = joblib.load(self.path)
+            if state.get("version") != MODEL_FORMAT_VERSION:
+                self.logger.warning("処理時間モデルの形式が不正です。未学習で開始します")
+                return
+            self._regressor = state["regressor"]
+            self._samples = state["samples"]
+            self._residual = state["residual"]
+        except Exception as e:
+            self.logger.error(f"処理時間モデル読み込みエラー: {e}")
+
+    def _save(self) -> None:
+        """一時ファイルに書いてから置き換える（ロック取得済みで呼び出すこと）"""
+        if not self.path:
+            return
+        try:
+            import joblib
+
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            joblib.dump(
+                {
+                    "version": MODEL_FORMAT_VERSION,
+                    "regressor": self._regressor,
+                    "samples": self._samples,
+                    "residual": self._residual,
+                },
+                temp_path
+            )
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            self.logger.error(f"処理時間モデル保存エラー: {e}")
+
+
+__all__ = [
+    'OnlineProcessingTimeModel',
+    'PROCESSING_RUN_OPERATION',
+]
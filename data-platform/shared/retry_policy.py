@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retry Policy Engine - リトライポリシー
+
+例外クラスごとのリトライ方針と、全体のリトライ予算を管理する。
+
+- 成功し得ない例外（ValidationError, APIAuthenticationError, 期限切れ等）はリトライしない
+- レート制限系はRetry-Afterを尊重する
+- それ以外はフルジッター付き指数バックオフ
+- リトライ予算により、障害時にリトライが負荷を増幅しないようにする
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from shared.exceptions import (
+    APIAuthenticationError,
+    APIError,
+    APIQuotaExceededError,
+    ConfigurationError,
+    DataIntegrityError,
+    DeadlineExceededError,
+    RateLimitError,
+    ValidationError,
+    is_throttling_error,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """リトライポリシー"""
+    name: str
+    retryable: bool = True
+    max_attempts: Optional[int] = None        # Noneの場合は呼び出し側の試行回数に従う
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: bool = True                       # フルジッター（0〜計算値の一様乱数）
+    honor_retry_after: bool = False
+    max_retry_after: float = 60.0             # これを超えるRetry-Afterは待たずに諦める
+    retry_if: Optional[Callable[[Exception], bool]] = None  # 追加の判定条件
+
+
+NO_RETRY = RetryPolicy(name="no_retry", retryable=False)
+
+
+class RetryBudget:
+    """リトライ予算（トークンバケット）
+
+    通常リクエストごとにratio分のトークンを積み、リトライごとに1消費する。
+    障害時でもリトライ数は「初期トークン + リクエスト数 × ratio」に抑えられる。
+    """
+
+    __slots__ = ('_ratio', '_max_tokens', '_tokens', 'granted', 'denied')
+
+    def __init__(self, ratio: float = 0.2, initial_tokens: float = 10.0, max_tokens: float = 100.0):
+        self._ratio = ratio
+        self._max_tokens = max(max_tokens, initial_tokens)
+        self._tokens = initial_tokens
+        self.granted = 0
+        self.denied = 0
+
+    @property
+    def tokens(self) -> float:
+        """現在の残トークン"""
+        return self._tokens
+
+    def record_request(self) -> None:
+        """通常リクエストを記録してトークンを積む"""
+        self._tokens = min(self._max_tokens, self._tokens + self._ratio)
+
+    def try_acquire(self) -> bool:
+        """リトライ1回分のトークンを取得"""
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self.granted += 1
+            return True
+        self.denied += 1
+        return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """予算統計を取得"""
+        return {
+            "ratio": self._ratio,
+            "tokens": round(self._tokens, 2),
+            "granted": self.granted,
+            "denied": self.denied
+        }
+
+
+class RetryPolicyEngine:
+    """例外クラスをキーとしたリトライポリシーエンジン"""
+
+    def __init__(
+        self,
+        policies: Optional[Dict[Type[BaseException], RetryPolicy]] = None,
+        default_policy: Optional[RetryPolicy] = None,
+        budget: Optional[RetryBudget] = None,
+        rng: Optional[random.Random] = None
+    ):
+        self._policies: Dict[Type[BaseException], RetryPolicy] = dict(policies or {})
+        self._default_policy = default_policy or RetryPolicy(name="exponential")
+        self._budget = budget
+        self._rng = rng or random.Random()
+        self._decisions: Dict[str, int] = {}
+
+    def register(self, exception_class: Type[BaseException], policy: RetryPolicy) -> None:
+        """例外クラスのポリシーを登録（既存は上書き）"""
+        self._policies[exception_class] = policy
+
+    def policy_for(self, exception: BaseException) -> RetryPolicy:
+        """例外に適用するポリシーを取得（MROで最も近いクラスを優先）"""
+        for cls in type(exception).__mro__:
+            policy = self._policies.get(cls)
+            if policy is not None:
+                return policy
+        return self._default_policy
+
+    def record_request(self) -> None:
+        """通常リクエストを記録（リトライ予算の積み立て）"""
+        if self._budget is not None:
+            self._budget.record_request()
+
+    def next_delay(self, exception: BaseException, attempt: int) -> Optional[float]:
+        """次のリトライまでの待機秒数を取得
+
+        Args:
+            exception: 直前の試行で発生した例外
+            attempt: 失敗した試行番号（0始まり）
+
+        Returns:
+            待機秒数。リトライしない場合はNone
+        """
+        policy = self.policy_for(exception)
+        delay = self._compute_delay(policy, exception, attempt)
+        if delay is None:
+            self._count(f"{policy.name}:give_up")
+            return None
+
+        if self._budget is not None and not self._budget.try_acquire():
+            self._count(f"{policy.name}:budget_exhausted")
+            return None
+
+        self._count(f"{policy.name}:retry")
+        return delay
+
+    def _compute_delay(
+        self,
+        policy: RetryPolicy,
+        exception: BaseException,
+        attempt: int
+    ) -> Optional[float]:
+        """ポリシーに基づく待機秒数（リトライ不可ならNone）"""
+        if not policy.retryable:
+            return None
+        if policy.max_attempts is not None and attempt + 1 >= policy.max_attempts:
+            return None
+        # 追加の判定条件は Exception のみを対象とする（キャンセル等はリトライしない）
+        if policy.retry_if is not None and not (
+            isinstance(exception, Exception) and policy.retry_if(exception)
+        ):
+            return None
+
+        retry_after = getattr(exception, 'retry_after', None)
+        if policy.honor_retry_after and retry_after:
+            if retry_after > policy.max_retry_after:
+                return None
+            return float(retry_after)
+
+        delay = min(policy.max_delay, policy.base_delay * (policy.multiplier ** attempt))
+        if policy.jitter:
+            delay = self._rng.uniform(0.0, delay)
+        return delay
+
+    def _count(self, decision: str) -> None:
+        self._decisions[decision] = self._decisions.get(decision, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """リトライ判定の統計を取得"""
+        return {
+            "decisions": dict(self._decisions),
+            "budget": self._budget.get_stats() if self._budget is not None else None
+        }
+
+
+def _is_retryable_api_error(exception: Exception) -> bool:
+    """ステータス不明またはスロットリング/5xxのAPIエラーのみリトライ"""
+    status_code = getattr(exception, 'status_code', None)
+    return status_code is None or is_throttling_error(exception)
+
+
+def create_default_retry_engine(
+    base_delay: float = 0.5,
+    max_delay: float = 30.0,
+    budget_ratio: float = 0.2
+) -> RetryPolicyEngine:
+    """既定のポリシーを登録したリトライエンジンを生成"""
+    exponential = RetryPolicy(name="exponential", base_delay=base_delay, max_delay=max_delay)
+    retry_after = RetryPolicy(
+        name="retry_after",
+        base_delay=base_delay,
+        max_delay=max_delay,
+        honor_retry_after=True,
+        max_retry_after=max_delay
+    )
+
+    policies: List[Tuple[Type[BaseException], RetryPolicy]] = [
+        (ValidationError, NO_RETRY),
+        (DataIntegrityError, NO_RETRY),
+        (ConfigurationError, NO_RETRY),
+        (APIAuthenticationError, NO_RETRY),
+        (DeadlineExceededError, NO_RETRY),
+        (APIQuotaExceededError, retry_after),
+        (RateLimitError, retry_after),
+        (APIError, RetryPolicy(
+            name="api_error",
+            base_delay=base_delay,
+            max_delay=max_delay,
+            honor_retry_after=True,
+            max_retry_after=max_delay,
+            retry_if=_is_retryable_api_error
+        )),
+    ]
+
+    budget = RetryBudget(ratio=budget_ratio) if budget_ratio > 0 else None
+    return RetryPolicyEngine(dict(policies), default_policy=exponential, budget=budget)
@@ -11,11 +11,13 @@ Phase 3-Full分散処理の中核制御システム
 """
 
 import asyncio
+import os
+import random
 import time
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple
 from enum import Enum
 from contextlib import asynccontextmanager
 
@@ -24,6 +26,15 @@ from .celery_config import celery_app
 from .performance_monitor import PerformanceMonitor, MetricType
 from .exceptions import OrchestrationError, HealthCheckError
 from .logger import get_logger
+from .execution_history import ExecutionHistoryStore
+from .autoscaler import AutoscalerConfig, AutoscalingController, create_autoscaler
+from .worker_telemetry import CeleryEventConsumer, WorkerTelemetry, WorkerTelemetryStore
+
+
+# P2C選択: 利用不可ワーカーを引いた場合の再抽選回数（超えたら全件走査）
+P2C_MAX_DRAWS = 3
+# レイテンシ未計測ワーカーの仮定値（ms）
+P2C_UNKNOWN_LATENCY_MS = 100.0
 
 
 class SystemState(Enum):
@@ -67,21 +78,28 @@ class WorkerMetrics:
     failed_tasks: int
     last_activity: datetime
     response_time: float
-    memory_usage: float
-    cpu_usage: float
+    memory_usage: float          # プールのメモリ使用量（inspect().stats() 計測時のみ。イベント計測では更新しない）
+    cpu_usage: float             # CPU負荷（イベント計測時はハートビートの1分ロードアベレージ）
+    error_rate: float = 0.0      # 失敗率のEWMA（イベント計測時）
 
 
 @dataclass
 class LoadBalancingConfig:
     """負荷分散設定"""
-    algorithm: str = "weighted_round_robin"  # weighted_round_robin, least_connections, health_based
+    algorithm: str = "weighted_round_robin"  # weighted_round_robin, least_connections, health_based, p2c
     health_threshold: float = 0.7            # 健康閾値
     max_tasks_per_worker: int = 100          # ワーカー毎最大タスク数
-    auto_scale: bool = True                  # 自動スケーリング
+    auto_scale: bool = True                  # 自動スケーリング（スケール判定・推奨）
+    autoscale_pools: bool = field(           # start() 時にワーカープールを実際に増減する（AUTOSCALE_ENABLED）
+        default_factory=lambda: os.getenv('AUTOSCALE_ENABLED', 'false').lower() in ('true', '1', 'yes', 'on')
+    )
     scale_up_threshold: float = 0.8          # スケールアップ閾値
     scale_down_threshold: float = 0.3        # スケールダウン閾値
     min_workers: int = 2                     # 最小ワーカー数
     max_workers: int = 10                    # 最大ワーカー数
+    event_telemetry: bool = True             # Celeryイベントでワーカーを計測（Falseでinspectポーリング）
+    latency_ewma_alpha: float = 0.2          # レイテンシ・エラー率EWMAの平滑化係数
+    random_seed: Optional[int] = None        # ワーカー選択の乱数シード（再現用）
 
 
 @dataclass
@@ -123,6 +141,9 @@ class SmartOrchestrator:
 
         # 負荷分散管理
         self.current_worker_index = 0
+        self._rng = random.Random(self.load_config.random_seed)
+        self._worker_ids: Tuple[str, ...] = ()
+        self._worker_ids_source: Optional[Dict[str, WorkerMetrics]] = None
         self.worker_loads: Dict[str, float] = defaultdict(float)
         self.task_distribution: Dict[str, int] = defaultdict(int)
 
@@ -130,6 +151,15 @@ class SmartOrchestrator:
         self.circuit_breaker_state: Dict[str, bool] = defaultdict(bool)
         self.failure_counts: Dict[str, int] = defaultdict(int)
 
+        # イベントストリーム計測
+        self.telemetry = WorkerTelemetryStore(alpha=self.load_config.latency_ewma_alpha)
+        self._event_consumer: Optional[CeleryEventConsumer] = None
+        self._telemetry_version = 0
+
+        # キュー滞留に基づく自動スケーリング
+        # （autoscale_pools 有効時の start() または enable_auto_scaling() で開始）
+        self.autoscaler: Optional[AutoscalingController] = None
+
         # 制御フラグ
         self._running = False
         self._health_check_task: Optional[asyncio.Task] = None
@@ -144,6 +174,11 @@ class SmartOrchestrator:
         self.logger.info("Smart Orchestrator starting...")
 
         try:
+            # イベント購読開始（ワーカー計測をinspectポーリングから置き換え）
+            if self.load_config.event_telemetry:
+                self._event_consumer = CeleryEventConsumer(celery_app, self.telemetry)
+                self._event_consumer.start()
+
             # 初期化
             await self._initialize_system()
 
@@ -151,11 +186,14 @@ class SmartOrchestrator:
             self._running = True
             self._health_check_task = asyncio.create_task(self._health_check_loop())
             self._monitoring_task = asyncio.create_task(self._monitoring_loop())
+            if self.load_config.auto_scale and self.load_config.autoscale_pools:
+                self._start_autoscaler()
 
             self.logger.info("Smart Orchestrator started successfully")
 
         except Exception as e:
             self.logger.error(f"Failed to start Smart Orchestrator: {e}")
+            await self._stop_event_consumer()
             raise OrchestrationError(f"Startup failed: {e}")
 
     async def stop(self) -> None:
@@ -176,8 +214,33 @@ class SmartOrchestrator:
             self._monitoring_task.cancel()
             await self._monitoring_task
 
+        if self.autoscaler is not None:
+            await self.autoscaler.stop()
+
+        await self._stop_event_consumer()
+
         self.logger.info("Smart Orchestrator stopped")
 
+    def _start_autoscaler(self) -> AutoscalingController:
+        """自動スケーリング開始（負荷分散設定の閾値を利用率の上下限に使う）"""
+        if self.autoscaler is None:
+            self.autoscaler = create_autoscaler(
+                celery_app,
+                self.telemetry,
+                AutoscalerConfig(
+                    scale_up_threshold=self.load_config.scale_up_threshold,
+                    scale_down_threshold=self.load_config.scale_down_threshold
+                )
+            )
+        self.autoscaler.start()
+        return self.autoscaler
+
+    async def _stop_event_consumer(self) -> None:
+        """イベント購読停止"""
+        if self._event_consumer is not None:
+            await asyncio.to_thread(self._event_consumer.stop)
+            self._event_consumer = None
+
     async def _initialize_system(self) -> None:
         """システム初期化"""
         # キャッシュ接続確認
@@ -236,7 +299,17 @@ class SmartOrchestrator:
         Returns:
             選択されたワーカーID
         """
+        if self.load_config.algorithm == "p2c":
+            # ロックなしのO(1)選択（イベントループ上で await を挟まずに読む）
+            self._sync_worker_telemetry()
+            worker_id = self._power_of_two_choices(task_type)
+            if worker_id is None:
+                self.logger.warning(f"No available workers for task_type: {task_type}")
+            return worker_id
+
         async with self._lock:
+            # イベントで更新された最新の計測値を反映（変更がなければ何もしない）
+            self._sync_worker_telemetry()
             available_workers = await self._get_available_workers(task_type)
 
             if not available_workers:
@@ -267,6 +340,10 @@ class SmartOrchestrator:
             if worker_id in self.failed_workers:
                 continue
 
+            # ハートビートが途絶えたワーカー除外
+            if metrics.state == WorkerState.OFFLINE:
+                continue
+
             # サーキットブレーカーチェック
             if self.circuit_breaker_state.get(worker_id, False):
                 continue
@@ -301,8 +378,10 @@ class SmartOrchestrator:
         if worker_id not in self.worker_metrics:
             return False
 
-        # タスクタイプ別の基本的な適合性判定
-        worker_metrics = self.worker_metrics[worker_id]
+        return self._worker_suits_task(self.worker_metrics[worker_id], task_type)
+
+    def _worker_suits_task(self, worker_metrics: WorkerMetrics, task_type: str) -> bool:
+        """タスクタイプ別の基本的な適合性判定"""
 
         # 高負荷のワーカーは重いタスクを避ける
         if task_type in ["batch_processing", "data_processing"] and worker_metrics.load > 0.7:
@@ -342,8 +421,7 @@ class SmartOrchestrator:
         if total_weight == 0:
             return workers[0]
 
-        import random
-        r = random.uniform(0, total_weight)
+        r = self._rng.uniform(0, total_weight)
         upto = 0
 
         for worker_id, weight in weights.items():
@@ -362,7 +440,7 @@ class SmartOrchestrator:
         await asyncio.sleep(0)  # 非同期関数として維持
 
         # ワーカー固有の性能履歴を考慮した親和性計算
-        worker_stats = self.worker_states.get(worker_id)
+        worker_stats = self.worker_metrics.get(worker_id)
         if not worker_stats:
             return 1.0
 
@@ -376,9 +454,11 @@ class SmartOrchestrator:
 
         base_affinity = affinity_map.get(task_type, 1.0)
 
-        # ワーカーの応答時間と成功率を考慮した調整
-        response_time_factor = max(0.5, min(1.5, 1.0 / (worker_stats.avg_response_time + 0.1)))
-        success_rate_factor = max(0.5, min(1.5, worker_stats.success_rate))
+        # ワーカーの応答時間（秒）と成功率を考慮した調整
+        total_tasks = worker_stats.completed_tasks + worker_stats.failed_tasks
+        success_rate = worker_stats.completed_tasks / total_tasks if total_tasks else 1.0
+        response_time_factor = max(0.5, min(1.5, 1.0 / (worker_stats.response_time / 1000 + 0.1)))
+        success_rate_factor = max(0.5, min(1.5, success_rate))
 
         # 最終的な親和性係数を計算
         return base_affinity * response_time_factor * success_rate_factor
@@ -421,6 +501,58 @@ class SmartOrchestrator:
 
         return selected_worker
 
+    def _power_of_two_choices(self, task_type: Optional[str] = None) -> Optional[str]:
+        """P2C（power of two random choices）選択
+
+        ランダムに選んだ2台のうち、EWMAレイテンシ×(実行中タスク数+1) が小さい方を返す。
+        全ワーカーを走査しないため、台数に関係なくO(1)で選択できる。
+        """
+        worker_ids = self._get_worker_ids()
+        count = len(worker_ids)
+        if count == 0:
+            return None
+
+        for _ in range(P2C_MAX_DRAWS):
+            first = self._rng.randrange(count)
+            second = self._rng.randrange(count - 1) if count > 1 else 0
+            if count > 1 and second >= first:
+                second += 1
+
+            candidates = [
+                worker_id for worker_id in (worker_ids[first], worker_ids[second])
+                if self._is_selectable(worker_id, task_type)
+            ]
+            if candidates:
+                return min(candidates, key=self._p2c_score)
+
+        # 利用不可ワーカーが多い場合は全件から選ぶ
+        candidates = [worker_id for worker_id in worker_ids if self._is_selectable(worker_id, task_type)]
+        return min(candidates, key=self._p2c_score) if candidates else None
+
+    def _get_worker_ids(self) -> Tuple[str, ...]:
+        """ワーカーIDのタプル（ワーカー構成が変わったときだけ作り直す）"""
+        if self._worker_ids_source is not self.worker_metrics or len(self._worker_ids) != len(self.worker_metrics):
+            self._worker_ids = tuple(self.worker_metrics)
+            self._worker_ids_source = self.worker_metrics
+        return self._worker_ids
+
+    def _is_selectable(self, worker_id: str, task_type: Optional[str] = None) -> bool:
+        """_get_available_workers と同じ条件を1台分だけ判定"""
+        metrics = self.worker_metrics.get(worker_id)
+        if metrics is None or worker_id in self.failed_workers:
+            return False
+        if self.circuit_breaker_state.get(worker_id, False) or metrics.state == WorkerState.OFFLINE:
+            return False
+        if task_type and not self._worker_suits_task(metrics, task_type):
+            return False
+        return metrics.load < 0.9
+
+    def _p2c_score(self, worker_id: str) -> float:
+        """P2Cスコア（小さいほど良い）: 期待待ち時間 = レイテンシ × (実行中 + 1)"""
+        metrics = self.worker_metrics[worker_id]
+        latency = metrics.response_time if metrics.response_time > 0 else P2C_UNKNOWN_LATENCY_MS
+        return latency * (metrics.active_tasks + 1)
+
     async def _round_robin(self, workers: List[str]) -> str:
         """シンプルラウンドロビン"""
         await asyncio.sleep(0)  # 非同期関数として維持
@@ -476,14 +608,20 @@ class SmartOrchestrator:
 
     async def _attempt_worker_recovery(self, worker_id: str) -> None:
         """ワーカー復旧試行"""
-        self.recovery_attempts[worker_id] += 1
-        recovery_delay = min(300, 30 * self.recovery_attempts[worker_id])  # 最大5分
+        recovery_delay = self._next_recovery_delay(worker_id)
 
         self.logger.info(f"Attempting recovery for worker {worker_id} in {recovery_delay}s")
 
         await asyncio.sleep(recovery_delay)
+        await self._complete_worker_recovery(worker_id)
+
+    def _next_recovery_delay(self, worker_id: str) -> float:
+        """復旧試行回数を進めて待機時間を返す（最大5分）"""
+        self.recovery_attempts[worker_id] += 1
+        return min(300, 30 * self.recovery_attempts[worker_id])
 
-        # 健康チェック
+    async def _complete_worker_recovery(self, worker_id: str) -> None:
+        """待機後の健康チェックと復旧"""
         if await self._check_worker_health(worker_id):
             await self._restore_worker(worker_id)
 
@@ -763,6 +901,12 @@ class SmartOrchestrator:
 
     async def _update_worker_metrics(self) -> None:
         """ワーカーメトリクス更新"""
+        if self._event_consumer is not None and self._event_consumer.running:
+            # イベント購読中はブロードキャストせず、途絶えたワーカーの判定だけ行う
+            self.telemetry.expire_stale()
+            self._sync_worker_telemetry()
+            return
+
         try:
             # 非同期実行
             loop = asyncio.get_event_loop()
@@ -796,6 +940,51 @@ class SmartOrchestrator:
         except Exception as e:
             self.logger.debug(f"Worker metrics update failed: {e}")
 
+    def _sync_worker_telemetry(self) -> None:
+        """イベント計測値をWorkerMetricsへ反映"""
+        version = self.telemetry.version
+        if version == self._telemetry_version:
+            return
+        self._telemetry_version = version
+
+        # 変更のあったワーカーだけ反映
+        for worker_id, telemetry in self.telemetry.pop_changes().items():
+            metrics = self.worker_metrics.get(worker_id)
+            if metrics is None:
+                metrics = self.worker_metrics[worker_id] = WorkerMetrics(
+                    worker_id=worker_id,
+                    state=WorkerState.ACTIVE,
+                    load=0.0,
+                    active_tasks=0,
+                    completed_tasks=0,
+                    failed_tasks=0,
+                    last_activity=datetime.now(),
+                    response_time=0.0,
+                    memory_usage=0.0,
+                    cpu_usage=0.0
+                )
+            self._apply_telemetry(metrics, telemetry)
+
+    def _apply_telemetry(self, metrics: WorkerMetrics, telemetry: WorkerTelemetry) -> None:
+        """イベント計測値の反映
+
+        ハートビートにはメモリ使用量が含まれないため memory_usage は変更しない。
+        cpu_usage には使用率ではなく1分ロードアベレージ（コア数で正規化しない値）が入る。
+        """
+        metrics.active_tasks = telemetry.in_flight
+        metrics.load = min(1.0, telemetry.in_flight / self.load_config.max_tasks_per_worker)
+        metrics.completed_tasks = telemetry.completed
+        metrics.failed_tasks = telemetry.failed
+        metrics.response_time = telemetry.latency * 1000  # ms
+        metrics.error_rate = telemetry.error_rate
+        metrics.cpu_usage = telemetry.loadavg
+        metrics.last_activity = datetime.fromtimestamp(telemetry.last_seen)
+
+        if not telemetry.online:
+            metrics.state = WorkerState.OFFLINE
+        elif metrics.state != WorkerState.FAILED:
+            metrics.state = WorkerState.ACTIVE if telemetry.in_flight else WorkerState.IDLE
+
     async def _optimize_if_needed(self) -> None:
         """必要に応じて最適化実行"""
         await asyncio.sleep(0)  # 非同期関数として維持
@@ -835,6 +1024,7 @@ class SmartOrchestrator:
                     'completed_tasks': metrics.completed_tasks,
                     'failed_tasks': metrics.failed_tasks,
                     'response_time': metrics.response_time,
+                    'error_rate': metrics.error_rate,
                     'last_activity': metrics.last_activity.isoformat()
                 }
                 for worker_id, metrics in self.worker_metrics.items()
@@ -918,10 +1108,10 @@ class SmartOrchestrator:
 class PredictiveOptimizer:
     """予測最適化エンジン"""
 
-    def __init__(self, orchestrator: 'SmartOrchestrator'):
+    def __init__(self, orchestrator: 'SmartOrchestrator', history: Optional[ExecutionHistoryStore] = None):
         self.orchestrator = orchestrator
         self.logger = get_logger(__name__)
-        self.history = deque(maxlen=1000)  # 過去の処理履歴
+        self.history = history if history is not None else ExecutionHistoryStore()  # 過去の処理履歴（永続）
 
     async def predict_optimal_strategy(self, query_data: List[Dict]) -> Dict[str, Any]:
         """最適処理戦略予測"""
@@ -930,10 +1120,10 @@ class PredictiveOptimizer:
             data_characteristics = self._analyze_data_characteristics(query_data)
 
             # 履歴ベース予測
-            historical_performance = await self._analyze_historical_performance_async(data_characteristics)
+            historical_performance = self._analyze_historical_performance(data_characteristics)
 
             # システム状態考慮
-            current_state = await self.orchestrator.get_system_status_async()
+            current_state = self.orchestrator.get_system_status()
 
             # 最適戦略算出
             strategy = self._calculate_optimal_strategy(
@@ -988,19 +1178,15 @@ class PredictiveOptimizer:
         if not self.history:
             return {"confidence": 0.0, "predicted_time": 0.0}
 
-        # 類似パターンの検索
-        similar_patterns = []
-        for record in self.history:
-            if self._is_similar_pattern(record["characteristics"], characteristics):
-                similar_patterns.append(record)
+        # 類似パターン = 同じサイズ区分で複雑度・タイプ比率が許容差内の記録（近傍バケットを参照）
+        similar_patterns = self.history.similar(characteristics)
 
         if not similar_patterns:
             return {"confidence": 0.3, "predicted_time": characteristics["total_queries"] * 1.5}
 
         # 性能予測
         avg_time_per_query = sum(
-            record["execution_time"] / record["characteristics"]["total_queries"]
-            for record in similar_patterns
+            record["time_per_query"] for record in similar_patterns
         ) / len(similar_patterns)
 
         predicted_time = avg_time_per_query * characteristics["total_queries"]
@@ -1013,26 +1199,6 @@ class PredictiveOptimizer:
             "avg_time_per_query": avg_time_per_query
         }
 
-    def _is_similar_pattern(self, hist_char: Dict, curr_char: Dict, threshold: float = 0.8) -> bool:
-        """パターン類似度判定"""
-        # サイズカテゴリが同じ
-        if hist_char.get("size_category") != curr_char.get("size_category"):
-            return False
-
-        # 複雑度スコアが近い
-        complexity_diff = abs(hist_char.get("complexity_score", 0.5) - curr_char.get("complexity_score", 0.5))
-        if complexity_diff > 0.3:
-            return False
-
-        # クエリタイプ比率が類似
-        type_similarity = (
-            abs(hist_char.get("cid_ratio", 0) - curr_char.get("cid_ratio", 0)) +
-            abs(hist_char.get("url_ratio", 0) - curr_char.get("url_ratio", 0)) +
-            abs(hist_char.get("text_ratio", 0) - curr_char.get("text_ratio", 0))
-        ) / 3
-
-        return type_similarity < (1 - threshold)
-
     def _calculate_optimal_strategy(
         self,
         characteristics: Dict[str, Any],
@@ -1111,13 +1277,7 @@ class PredictiveOptimizer:
 
     def record_execution(self, characteristics: Dict[str, Any], execution_time: float, success: bool):
         """実行結果記録"""
-        record = {
-            "timestamp": datetime.now(),
-            "characteristics": characteristics,
-            "execution_time": execution_time,
-            "success": success
-        }
-        self.history.append(record)
+        self.history.record(characteristics, execution_time, success)
 
 
 class AutoRecoveryManager:
@@ -1424,14 +1584,16 @@ async def _process_batch_with_semaphore_impl(
             return []
 
 
-async def _attempt_scale_up_impl(self, additional_workers: int) -> bool:
-    """スケールアップ試行"""
+async def _attempt_scale_up_impl(self, additional_workers: int = 1, queue: str = "places_api") -> bool:
+    """スケールアップ試行（自動スケーラー経由、クールダウン中・上限到達時はFalse）"""
+    if self.autoscaler is None:
+        self.logger.info(f"Scale up by {additional_workers} requested but auto scaling is not running")
+        return False
+
     try:
-        self.logger.info(f"Attempting to scale up by {additional_workers} workers")
-        # 非同期処理を追加
-        await asyncio.sleep(0.001)
-        # 実際の実装では、Kubernetes/Docker Swarm等でワーカーを追加
-        return True
+        self.logger.info(f"Attempting to scale up {queue} by {additional_workers}")
+        decision = await self.autoscaler.request_capacity(queue, additional_workers)
+        return decision.applied
     except Exception as e:
         self.logger.error(f"Scale up failed: {e}")
         return False
@@ -1697,7 +1859,7 @@ class AIPredictiveOptimizer:
         results = {}
 
         if strategy['scale_workers']:
-            results['worker_scaling'] = await self.orchestrator._attempt_scale_up()
+            results['worker_scaling'] = await self._scale_workers_predictively()
 
         if strategy['optimize_cache']:
             results['cache_optimization'] = self._optimize_cache_predictively()
@@ -1710,6 +1872,21 @@ class AIPredictiveOptimizer:
 
         return results
 
+    async def _scale_workers_predictively(self) -> Dict[str, Any]:
+        """自動スケーラーの評価を前倒しで実行（実測のキュー滞留に基づいて判断）"""
+        autoscaler = self.orchestrator.autoscaler
+        if autoscaler is None:
+            return {'scaled': False, 'decisions': []}
+
+        decisions = await autoscaler.run_once()
+        return {
+            'scaled': any(decision.applied for decision in decisions),
+            'decisions': [
+                {'queue': d.queue, 'current': d.current, 'target': d.target, 'reason': d.reason, 'applied': d.applied}
+                for d in decisions
+            ]
+        }
+
     def _optimize_cache_predictively(self) -> Dict[str, Any]:
         """予測的キャッシュ最適化"""
         # 予測に基づくキャッシュの事前最適化
@@ -1778,9 +1955,11 @@ def _extend_smart_orchestrator():
 
 
 # 新機能の実装
-def _enable_auto_scaling(self):
+async def _enable_auto_scaling(self):
     """自動スケーリング有効化"""
     self.load_config.auto_scale = True
+    self.load_config.autoscale_pools = True
+    self._start_autoscaler()
     self.logger.info("自動スケーリングが有効化されました")
 
 
@@ -0,0 +1,162 @@
+"""
+Task Deduplication - Celeryワーカー間の冪等化
+
+同じPlace IDが複数バッチに入った場合や、リトライが元のタスクと重なった場合に
+Place Detailsを二重に取得しないよう、(タスク種別, データバージョン, place_id)
+ごとにRedisの SET NX リースを取る。
+
+- リースを取れたワーカー（勝者）だけが取得し、結果を共有キーに公開する
+- リースを取れなかったワーカーは勝者の結果を待って再利用する
+- 勝者が結果を公開せずに消えた場合（失敗・リース期限切れ）は待機側が引き継ぐ
+"""
+
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+
+# KEYS[1]: リースキー / ARGV[1]: 所有者 -> 所有者が一致する場合のみ削除
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(slots=True)
+class LeasePlan:
+    """リース取得結果"""
+    owned: List[str] = field(default_factory=list)                 # 自分が取得する
+    shared: Dict[str, Any] = field(default_factory=dict)           # 公開済みの結果を再利用
+    pending: List[str] = field(default_factory=list)               # 他ワーカーが取得中
+
+
+class TaskLeaseManager:
+    """SET NXリースによるタスク重複排除"""
+
+    def __init__(
+        self,
+        client: Any,
+        lease_ttl: float = 120.0,
+        result_ttl: int = 3600,
+        poll_interval: float = 0.2,
+        key_prefix: str = "dedup:"
+    ):
+        self.logger = logging.getLogger(__name__)
+        self._client = client
+        self._lease_ttl_ms = int(lease_ttl * 1000)
+        self._lease_ttl = lease_ttl
+        self._result_ttl = result_ttl
+        self._poll_interval = poll_interval
+        self._key_prefix = key_prefix
+        self._release = client.register_script(RELEASE_SCRIPT)
+
+    @staticmethod
+    def new_owner() -> str:
+        """実行ごとの所有者ID（同じタスクIDのリトライとも区別する）"""
+        return uuid.uuid4().hex
+
+    def _key(self, kind: str, version: str, item_id: str, suffix: str) -> str:
+        return f"{self._key_prefix}{kind}:{version}:{item_id}:{suffix}"
+
+    def get_results(self, kind: str, version: str, item_ids: Sequence[str]) -> Dict[str, Any]:
+        """公開済みの結果を取得（ディスパッチ前の確認用）"""
+        if not item_ids:
+            return {}
+
+        values = self._client.mget([self._key(kind, version, i, 'result') for i in item_ids])
+        return {
+            item_id: json.loads(value)
+            for item_id, value in zip(item_ids, values)
+            if value is not None
+        }
+
+    def claim(self, kind: str, version: str, item_ids: Sequence[str], owner: str) -> LeasePlan:
+        """公開済み結果の確認とリース取得（実行前の確認用）"""
+        plan = LeasePlan()
+        unique_ids = list(dict.fromkeys(item_ids))
+        plan.shared = self.get_results(kind, version, unique_ids)
+        candidates = [i for i in unique_ids if i not in plan.shared]
+        if not candidates:
+            return plan
+
+        pipe = self._client.pipeline(transaction=False)
+        for item_id in candidates:
+            pipe.set(self._key(kind, version, item_id, 'lease'), owner, nx=True, px=self._lease_ttl_ms)
+        for item_id, acquired in zip(candidates, pipe.execute()):
+            (plan.owned if acquired else plan.pending).append(item_id)
+
+        return plan
+
+    def publish(self, kind: str, version: str, results: Dict[str, Any], owner: str) -> None:
+        """勝者の結果を公開してリースを解放"""
+        if not results:
+            return
+
+        pipe = self._client.pipeline(transaction=False)
+        for item_id, result in results.items():
+            pipe.set(
+                self._key(kind, version, item_id, 'result'),
+                json.dumps(result, ensure_ascii=False, default=str),
+                ex=self._result_ttl
+            )
+        pipe.execute()
+        self.release(kind, version, list(results), owner)
+
+    def release(self, kind: str, version: str, item_ids: Sequence[str], owner: str) -> None:
+        """自分が所有するリースを解放（失敗時は待機側が引き継げるようにする）"""
+        for item_id in item_ids:
+            self._release(keys=[self._key(kind, version, item_id, 'lease')], args=[owner])
+
+    def wait_for_results(
+        self,
+        kind: str,
+        version: str,
+        item_ids: Sequence[str],
+        owner: str,
+        timeout: Optional[float] = None
+    ) -> LeasePlan:
+        """他ワーカーの結果を待機
+
+        Returns:
+            shared: 公開された結果 / owned: 勝者が消えたため引き継いだID /
+            pending: タイムアウトまでに解決しなかったID
+        """
+        plan = LeasePlan()
+        waiting = list(dict.fromkeys(item_ids))
+        deadline = time.monotonic() + (timeout if timeout is not None else self._lease_ttl)
+
+        while waiting:
+            retry = self.claim(kind, version, waiting, owner)
+            plan.shared.update(retry.shared)
+            plan.owned.extend(retry.owned)
+            waiting = retry.pending
+
+            if not waiting or time.monotonic() >= deadline:
+                break
+            time.sleep(min(self._poll_interval, max(0.0, deadline - time.monotonic())))
+
+        plan.pending = waiting
+        return plan
+
+
+def create_task_lease_manager(redis_url: Optional[str], **kwargs: Any) -> Optional[TaskLeaseManager]:
+    """Redis URLからリースマネージャーを作成（Redis以外・未指定時はNone＝重複排除なし）"""
+    if not redis_url or not redis_url.startswith(('redis://', 'rediss://')):
+        return None
+
+    import redis
+
+    client = redis.Redis.from_url(redis_url, socket_timeout=2.0, socket_connect_timeout=2.0)
+    return TaskLeaseManager(client, **kwargs)
+
+
+__all__ = [
+    'LeasePlan',
+    'TaskLeaseManager',
+    'create_task_lease_manager',
+]
@@ -45,6 +45,7 @@ class ProcessingResult:
     duration: float
     errors: List[str]
     data: Optional[List[Dict[str, Any]]] = None  # Processed data if successful
+    skipped_count: int = 0  # Queries left unprocessed because the deadline passed
 
     @property
     def total_count(self) -> int:
@@ -0,0 +1,327 @@
+"""
+Worker Telemetry - Celeryイベントストリームによるワーカー計測
+
+`celery_app.control.inspect()` のブロードキャスト往復（数秒）でポーリングせず、
+ワーカーが送信するイベント（task-started / task-succeeded / task-failed /
+worker-heartbeat）をバックグラウンドスレッドで購読し、ワーカーごとの
+EWMAレイテンシ・実行中タスク数・エラー率をメモリ上で更新し続ける。
+
+ワーカー側は worker_send_task_events=True（celery_config で設定済み）か
+`-E` オプションでイベント送信を有効にしておく必要がある。
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+# ハートビート間隔（freq）の何倍途絶えたらオフラインとみなすか（Celeryの既定と同じ2倍）
+HEARTBEAT_EXPIRE_FACTOR = 2.0
+DEFAULT_HEARTBEAT_FREQ = 2.0
+
+
+@dataclass(slots=True)
+class WorkerTelemetry:
+    """ワーカー1台分の計測値"""
+    hostname: str
+    latency: float = 0.0            # タスク実行時間のEWMA（秒）
+    error_rate: float = 0.0         # 失敗率のEWMA（0.0-1.0）
+    in_flight: int = 0              # 実行中タスク数
+    completed: int = 0
+    failed: int = 0
+    loadavg: float = 0.0            # 1分ロードアベレージ（ハートビート）
+    heartbeat_freq: float = DEFAULT_HEARTBEAT_FREQ
+    last_seen: float = field(default_factory=time.time)
+    online: bool = True
+
+    def is_alive(self, now: Optional[float] = None) -> bool:
+        """ハートビートが期限内か"""
+        now = time.time() if now is None else now
+        return self.online and now - self.last_seen <= self.heartbeat_freq * HEARTBEAT_EXPIRE_FACTOR
+
+
+class WorkerTelemetryStore:
+    """イベントからワーカー計測値を更新するストア
+
+    書き込みはイベント受信スレッド、読み込みはオーケストレーターのループから
+    行われるためロックで保護する。更新のたびに version を進めるので、
+    読み手は version が変わったときだけ pop_changes() で変更分を取り込めばよい。
+    """
+
+    def __init__(self, alpha: float = 0.2, clock: Callable[[], float] = time.time):
+        self.alpha = alpha
+        self.version = 0
+        self._clock = clock
+        self._workers: Dict[str, WorkerTelemetry] = {}
+        self._tasks: Dict[str, Tuple[str, float]] = {}  # task uuid -> (hostname, 開始時刻)
+        self._pending: Dict[str, Tuple[str, float]] = {}  # task uuid -> (キュー, 送信時刻)
+        self._changed: Set[str] = set()
+        self._lock = threading.Lock()
+
+    # イベントハンドラー（event は Celery イベントの辞書）
+
+    def on_task_sent(self, event: Dict[str, Any]) -> None:
+        """送信（task_send_sent_event）: ワーカーが受信するまで待ちタスクとして数える"""
+        queue = event.get('queue')
+        if not queue or not event.get('uuid'):
+            return
+
+        with self._lock:
+            self._pending[event['uuid']] = (queue, event.get('timestamp') or self._clock())
+
+    def on_task_started(self, event: Dict[str, Any]) -> None:
+        hostname = event.get('hostname')
+        task_id = event.get('uuid')
+        if not hostname or not task_id:
+            return
+
+        with self._lock:
+            self._pending.pop(task_id, None)
+            worker = self._touch(hostname)
+            if task_id not in self._tasks:
+                worker.in_flight += 1
+            self._tasks[task_id] = (hostname, event.get('timestamp') or self._clock())
+            self.version += 1
+
+    def on_task_succeeded(self, event: Dict[str, Any]) -> None:
+        self._finish_task(event, failed=False)
+
+    def on_task_failed(self, event: Dict[str, Any]) -> None:
+        self._finish_task(event, failed=True)
+
+    def on_task_revoked(self, event: Dict[str, Any]) -> None:
+        """取り消し（成功・失敗のどちらにも数えず実行中から外す）"""
+        task_id = event.get('uuid')
+        if not task_id:
+            return
+
+        with self._lock:
+            started = self._tasks.pop(task_id, None)
+            if started and started[0] in self._workers:
+                worker = self._workers[started[0]]
+                worker.in_flight = max(0, worker.in_flight - 1)
+                self._changed.add(started[0])
+                self.version += 1
+
+    def on_worker_heartbeat(self, event: Dict[str, Any]) -> None:
+        hostname = event.get('hostname')
+        if not hostname:
+            return
+
+        with self._lock:
+            worker = self._touch(hostname)
+            worker.heartbeat_freq = float(event.get('freq') or DEFAULT_HEARTBEAT_FREQ)
+            loadavg = event.get('loadavg') or ()
+            if loadavg:
+                worker.loadavg = float(loadavg[0])
+
+            # 取りこぼした終了イベントの分はワーカー自身の実行中数に合わせる。
+            # active には受信直後・プリフェッチ中でまだ数えられていないタスクや、
+            # 開始イベントより先に届いたハートビートの分が反映されていないことがあるため、
+            # ハートビート1周期以上前に開始したタスクだけを突き合わせる
+            active = event.get('active')
+            if active is not None:
+                settled_before = (event.get('timestamp') or self._clock()) - worker.heartbeat_freq
+                settled = self._tasks_of(hostname, started_before=settled_before)
+                if len(settled) > active:
+                    dropped = self._drop_newest_tasks(settled, len(settled) - active)
+                    worker.in_flight = max(0, worker.in_flight - dropped)
+            self.version += 1
+
+    def on_worker_offline(self, event: Dict[str, Any]) -> None:
+        hostname = event.get('hostname')
+        if not hostname:
+            return
+
+        with self._lock:
+            worker = self._workers.get(hostname)
+            if worker is not None:
+                worker.online = False
+                self._drop_newest_tasks(self._tasks_of(hostname), worker.in_flight)
+                worker.in_flight = 0
+                self._changed.add(hostname)
+                self.version += 1
+
+    def handlers(self) -> Dict[str, Callable[[Dict[str, Any]], None]]:
+        """EventReceiver用のハンドラー表"""
+        return {
+            # 受信（プリフェッチ）時点から実行中として数える
+            'task-sent': self.on_task_sent,
+            'task-received': self.on_task_started,
+            'task-started': self.on_task_started,
+            'task-succeeded': self.on_task_succeeded,
+            'task-failed': self.on_task_failed,
+            'task-retried': self.on_task_failed,
+            'task-revoked': self.on_task_revoked,
+            'worker-online': self.on_worker_heartbeat,
+            'worker-heartbeat': self.on_worker_heartbeat,
+            'worker-offline': self.on_worker_offline,
+        }
+
+    # 読み込み
+
+    def snapshot(self) -> Dict[str, WorkerTelemetry]:
+        """全ワーカーの計測値のコピー"""
+        with self._lock:
+            return {hostname: replace(worker) for hostname, worker in self._workers.items()}
+
+    def pop_changes(self) -> Dict[str, WorkerTelemetry]:
+        """前回呼び出し以降に変更されたワーカーの計測値のコピー"""
+        with self._lock:
+            changed = {hostname: replace(self._workers[hostname]) for hostname in self._changed}
+            self._changed.clear()
+            return changed
+
+    def queue_backlog(self, now: Optional[float] = None) -> Dict[str, Tuple[int, float]]:
+        """キューごとの (実行中タスク数, 最古の待ちタスクの経過秒数)
+
+        実行中数はワーカー名 `{queue}@host`（worker_command の命名）から集計する。
+        """
+        now = self._clock() if now is None else now
+        backlog: Dict[str, Tuple[int, float]] = {}
+        with self._lock:
+            for queue, sent_at in self._pending.values():
+                in_flight, oldest = backlog.get(queue, (0, 0.0))
+                backlog[queue] = (in_flight, max(oldest, now - sent_at))
+            for hostname, worker in self._workers.items():
+                if worker.online and '@' in hostname:
+                    queue = hostname.split('@', 1)[0]
+                    in_flight, oldest = backlog.get(queue, (0, 0.0))
+                    backlog[queue] = (in_flight + worker.in_flight, oldest)
+        return backlog
+
+    def clear_pending(self, queue: str) -> None:
+        """キューの待ちタスクを破棄（ブローカーが空のとき、受信イベントの取りこぼし分）"""
+        with self._lock:
+            self._pending = {
+                task_id: entry for task_id, entry in self._pending.items() if entry[0] != queue
+            }
+
+    def expire_stale(self, now: Optional[float] = None) -> int:
+        """ハートビートが途絶えたワーカーをオフラインにする（件数を返す）"""
+        now = self._clock() if now is None else now
+        expired = 0
+        with self._lock:
+            for hostname, worker in self._workers.items():
+                if worker.online and not worker.is_alive(now):
+                    worker.online = False
+                    self._drop_newest_tasks(self._tasks_of(hostname), worker.in_flight)
+                    worker.in_flight = 0
+                    self._changed.add(hostname)
+                    expired += 1
+            if expired:
+                self.version += 1
+        return expired
+
+    # 内部処理（ロック保持中に呼ぶ）
+
+    def _touch(self, hostname: str) -> WorkerTelemetry:
+        worker = self._workers.get(hostname)
+        if worker is None:
+            worker = self._workers[hostname] = WorkerTelemetry(hostname, last_seen=self._clock())
+        worker.last_seen = self._clock()
+        worker.online = True
+        self._changed.add(hostname)
+        return worker
+
+    def _finish_task(self, event: Dict[str, Any], failed: bool) -> None:
+        task_id = event.get('uuid')
+        if not task_id:
+            return
+
+        with self._lock:
+            started = self._tasks.pop(task_id, None)
+            hostname = event.get('hostname') or (started[0] if started else None)
+            if not hostname:
+                return
+
+            worker = self._touch(hostname)
+            if started:
+                worker.in_flight = max(0, worker.in_flight - 1)
+
+            runtime = event.get('runtime')
+            if runtime is None and started and event.get('timestamp'):
+                runtime = max(0.0, event['timestamp'] - started[1])
+            if runtime is not None:
+                worker.latency = self._ewma(worker.latency, float(runtime), worker.completed + worker.failed)
+
+            worker.error_rate = self._ewma(worker.error_rate, 1.0 if failed else 0.0, worker.completed + worker.failed)
+            if failed:
+                worker.failed += 1
+            else:
+                worker.completed += 1
+            self.version += 1
+
+    def _ewma(self, current: float, value: float, samples: int) -> float:
+        # 最初のサンプルはそのまま採用（0からの立ち上がりで過小評価しない）
+        return value if samples == 0 else current + self.alpha * (value - current)
+
+    def _tasks_of(self, hostname: str, started_before: Optional[float] = None) -> List[Tuple[float, str]]:
+        """ワーカーの実行中タスク（開始時刻順）"""
+        return sorted(
+            (started_at, task_id) for task_id, (host, started_at) in self._tasks.items()
+            if host == hostname and (started_before is None or started_at <= started_before)
+        )
+
+    def _drop_newest_tasks(self, tasks: List[Tuple[float, str]], count: int) -> int:
+        # 長時間実行中のタスクを残すため、終了イベントの取りこぼしは新しい側から外す
+        if count <= 0:
+            return 0
+        for _, task_id in tasks[-count:]:
+            del self._tasks[task_id]
+        return min(count, len(tasks))
+
+
+class CeleryEventConsumer:
+    """Celeryイベントをバックグラウンドスレッドで購読してストアを更新"""
+
+    def __init__(self, app: Any, store: WorkerTelemetryStore, reconnect_interval: float = 5.0):
+        self.logger = logging.getLogger(__name__)
+        self.app = app
+        self.store = store
+        self.reconnect_interval = reconnect_interval
+        self._receiver: Optional[Any] = None
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="celery-event-consumer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop_event.set()
+        if self._receiver is not None:
+            self._receiver.should_stop = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                with self.app.connection_for_read() as connection:
+                    self._receiver = self.app.events.Receiver(connection, handlers=self.store.handlers())
+                    if self._stop_event.is_set():
+                        break
+                    # 購読開始時にワーカーへハートビートを要求（wakeup）
+                    self._receiver.capture(limit=None, timeout=None, wakeup=True)
+            except Exception as e:
+                self.logger.warning(f"イベント購読エラー: {e}、{self.reconnect_interval}秒後に再接続します")
+                self._stop_event.wait(self.reconnect_interval)
+            finally:
+                self._receiver = None
+
+
+__all__ = [
+    'WorkerTelemetry',
+    'WorkerTelemetryStore',
+    'CeleryEventConsumer',
+]
@@ -4,6 +4,7 @@ Test configuration and fixtures for scraper tests.
 import pytest
 import os
 import sys
+import time
 from typing import Dict, Any
 from unittest.mock import Mock, MagicMock
 
@@ -271,3 +272,78 @@ def cache_service():
     service.health_check = Mock(return_value={"status": "healthy"})
 
     return service
+
+
+class FakeRedis:
+    """In-memory synchronous Redis supporting the commands used by the claim-check store and TaskLeaseManager."""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}  # key -> monotonic deadline
+        self.ttls = {}     # key -> last TTL requested in seconds
+
+    def _alive(self, key):
+        if key in self.expires and time.monotonic() >= self.expires[key]:
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def _set_ttl(self, key, seconds):
+        self.expires[key] = time.monotonic() + seconds
+        self.ttls[key] = seconds
+
+    def set(self, key, value, nx=False, px=None, ex=None):
+        if nx and self._alive(key):
+            return None
+        self.data[key] = value
+        self.expires.pop(key, None)
+        if px is not None:
+            self._set_ttl(key, px / 1000)
+        if ex is not None:
+            self._set_ttl(key, ex)
+        return True
+
+    def get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def expire(self, key, ttl):
+        if self._alive(key):
+            self._set_ttl(key, ttl)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+        self.expires.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def register_script(self, script):
+        def release(keys, args):
+            if self.get(keys[0]) == args[0]:
+                self.delete(keys[0])
+                return 1
+            return 0
+        return release
+
+
+class FakePipeline:
+    """Pipeline for FakeRedis that buffers SET commands."""
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def set(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+
+    def execute(self):
+        return [self.client.set(*args, **kwargs) for args, kwargs in self.commands]
+
+
+@pytest.fixture
+def fake_redis():
+    """In-memory synchronous Redis client."""
+    return FakeRedis()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for AsyncInstrumentation
+
+Tests event-loop lag sampling, executor queue-wait tracking and the
+bottleneck diagnosis reported through OptimizedAsyncProcessor.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from shared.async_instrumentation import (
+    EXECUTOR_QUEUE_WAIT_METRIC,
+    LOOP_LAG_METRIC,
+    AsyncInstrumentation,
+    InstrumentationConfig,
+)
+from shared.async_processor import OptimizedAsyncProcessor, OptimizedBatchConfig
+from shared.performance_monitor import PerformanceMonitor
+
+
+class TestAsyncInstrumentation:
+    """Test loop lag and executor instrumentation."""
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_detected_as_loop_lag(self):
+        """Test that blocking the loop shows up as lag and a slow callback."""
+        monitor = PerformanceMonitor("InstrumentationTest")
+        instrumentation = AsyncInstrumentation(
+            monitor, InstrumentationConfig(lag_interval=0.01, slow_callback_threshold=0.05)
+        )
+        instrumentation.start()
+
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # blocks the event loop
+        await asyncio.sleep(0.03)
+        await instrumentation.stop()
+
+        stats = instrumentation.get_stats()
+        assert stats["event_loop"]["lag_max"] >= 0.05
+        assert stats["event_loop"]["slow_callbacks"] >= 1
+        assert stats["bottleneck"] == "event_loop"
+        assert monitor.get_performance_stats(LOOP_LAG_METRIC)[LOOP_LAG_METRIC].count > 0
+
+    @pytest.mark.asyncio
+    async def test_executor_queue_wait_versus_run_time(self):
+        """Test that an undersized default executor is diagnosed as the bottleneck."""
+        monitor = PerformanceMonitor("InstrumentationTest")
+        instrumentation = AsyncInstrumentation(
+            monitor, InstrumentationConfig(lag_interval=1.0, executor_max_workers=1)
+        )
+        instrumentation.start()
+
+        await asyncio.gather(*(asyncio.to_thread(time.sleep, 0.05) for _ in range(4)))
+        await instrumentation.stop()
+
+        executor = instrumentation.get_stats()["executor"]
+        assert executor["completed"] == 4
+        assert executor["max_queue_depth"] >= 3
+        assert executor["queue_wait_avg"] > executor["run_time_avg"] * 0.5
+        assert instrumentation.get_stats()["bottleneck"] == "executor_queue"
+        assert monitor.get_performance_stats(EXECUTOR_QUEUE_WAIT_METRIC)[EXECUTOR_QUEUE_WAIT_METRIC].count == 4
+
+    @pytest.mark.asyncio
+    async def test_existing_default_executor_is_restored(self):
+        """Test that stop() puts back the executor asyncio.to_thread had already created."""
+        loop = asyncio.get_running_loop()
+        await asyncio.to_thread(time.sleep, 0)
+        previous = loop._default_executor
+        instrumentation = AsyncInstrumentation(PerformanceMonitor("InstrumentationTest"))
+
+        instrumentation.start()
+        await asyncio.to_thread(time.sleep, 0)
+        await instrumentation.stop()
+
+        assert loop._default_executor is previous
+        assert instrumentation.executor._shutdown
+        assert instrumentation.get_stats()["executor"]["completed"] == 1
+        await asyncio.to_thread(time.sleep, 0)
+
+    @pytest.mark.asyncio
+    async def test_processor_reports_instrumentation(self):
+        """Test that processor stats and health expose the instrumentation."""
+        processor = OptimizedAsyncProcessor(
+            "InstrumentedProcessor",
+            OptimizedBatchConfig(instrumentation=True, adaptive_batch_size=False)
+        )
+
+        async with processor:
+            await asyncio.to_thread(time.sleep, 0.01)
+            stats = processor.get_processing_stats()["instrumentation"]
+            health = processor.health_check()
+
+        assert stats["executor"]["completed"] == 1
+        assert stats["bottleneck"] == "api"
+        assert health["checks"]["async_bottleneck"] == "api"
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for OptimizedAsyncProcessor
+
+Tests continuous (work-queue) scheduling including:
+- Slow items not stalling other slots
+- Ordered and unordered result delivery
+- Rate limiting of request starts
+- Adaptive concurrency limiting
+- Streaming with bounded backpressure
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from shared.async_processor import (
+    AdaptiveConcurrencyLimiter,
+    AsyncRateLimiter,
+    OptimizedAsyncProcessor,
+    OptimizedBatchConfig,
+)
+from core.processors.data_processor import DataProcessor
+from infrastructure.external.places_api_adapter import PlacesAPIAdapter
+from shared.exceptions import APIError, APIQuotaExceededError, is_throttling_error
+
+
+def make_processor(**overrides):
+    """Processor in continuous mode with no artificial delays."""
+    settings = dict(
+        batch_size=4,
+        max_concurrent=2,
+        retry_attempts=1,
+        rate_limit_delay=0.0,
+        adaptive_batch_size=False,
+        scheduling_mode="continuous",
+    )
+    settings.update(overrides)
+    config = OptimizedBatchConfig(**settings)
+    return OptimizedAsyncProcessor("TestProcessor", config)
+
+
+async def sleepy(item):
+    """Sleep for the item's duration and echo its name."""
+    name, delay = item
+    await asyncio.sleep(delay)
+    return name
+
+
+class TestContinuousScheduling:
+    """Test the sliding-window work queue."""
+
+    @pytest.mark.asyncio
+    async def test_slow_item_does_not_stall_other_slots(self):
+        """Test that fast items keep flowing while one slot is busy."""
+        processor = make_processor()
+        items = [("slow", 0.3)] + [(f"fast{i}", 0.02) for i in range(8)]
+
+        start = time.perf_counter()
+        result = await processor.process_batch_optimized(items, sleepy)
+        elapsed = time.perf_counter() - start
+
+        assert result.successful_items == 9
+        # fixed batches of 4 would take at least 0.3 + 2 * 0.04
+        assert elapsed < 0.35
+
+    @pytest.mark.asyncio
+    async def test_ordered_results(self):
+        """Test that ordered mode returns results in input order."""
+        processor = make_processor()
+        items = [("a", 0.05), ("b", 0.0), ("c", 0.01)]
+
+        result = await processor.process_batch_optimized(items, sleepy)
+
+        assert [r.data for r in result.results] == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_unordered_results(self):
+        """Test that unordered mode returns results in completion order."""
+        processor = make_processor(ordered_results=False)
+        items = [("a", 0.05), ("b", 0.0), ("c", 0.01)]
+
+        result = await processor.process_batch_optimized(items, sleepy)
+
+        assert [r.data for r in result.results] == ["b", "c", "a"]
+        assert sorted(r.metadata["index"] for r in result.results) == [0, 1, 2]
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_spaces_request_starts(self):
+        """Test that the limiter spaces acquisitions by 1/rate."""
+        limiter = AsyncRateLimiter(requests_per_second=50)
+
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire()
+
+        assert time.monotonic() - start >= 0.06
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Test AIMD / latency-gradient concurrency control."""
+
+    def test_throttling_backs_off_multiplicatively(self):
+        """Test that a 429 halves the limit."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16)
+
+        limiter.record(0.1, throttled=True)
+
+        assert limiter.limit == 4
+        assert limiter.get_stats()["recent_decisions"][-1]["reason"] == "throttled"
+
+    def test_healthy_traffic_increases_additively(self):
+        """Test that one window of healthy responses raises the limit by one."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=16)
+
+        for _ in range(2):
+            limiter.record(0.1)
+
+        assert limiter.limit == 3
+
+    def test_latency_gradient_backs_off(self):
+        """Test that rising latency reduces the limit before any 429."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=10, max_limit=16, smoothing=1.0)
+
+        limiter.record(0.1)
+        limiter.record(0.5)
+
+        assert limiter.limit == 9
+
+    def test_instant_completions_do_not_set_baseline(self):
+        """Test that cache skips do not make normal API latency look congested."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8, max_limit=16)
+
+        for i in range(60):
+            limiter.record(0.0003)  # ネガティブキャッシュによるスキップ
+            limiter.record(0.3 + 0.02 * (i % 3))
+
+        assert limiter.limit >= 8
+        assert limiter.baseline_latency == pytest.approx(0.3)
+
+    def test_baseline_follows_sustained_latency_shift(self):
+        """Test that the windowed baseline adapts to a permanent latency change."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=16, baseline_window=10)
+
+        for _ in range(10):
+            limiter.record(0.05)
+        for _ in range(20):
+            limiter.record(0.3)
+
+        assert limiter.baseline_latency == pytest.approx(0.3)
+
+    @pytest.mark.asyncio
+    async def test_waiters_respect_limit(self):
+        """Test that acquisitions beyond the limit wait for a release."""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1)
+        await limiter.acquire()
+
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        limiter.release()
+        await waiter
+        assert limiter.in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_processor_reports_throttling(self):
+        """Test that throttled calls shrink the limit visible in stats."""
+        processor = make_processor(adaptive_concurrency=True, max_concurrent=4)
+
+        async def throttled(_item):
+            raise APIQuotaExceededError()
+
+        await processor.process_batch_optimized([1, 2], throttled)
+        stats = processor.get_processing_stats()["concurrency"]
+
+        assert stats["mode"] == "adaptive"
+        assert stats["limit"] == 1
+        assert stats["throttle_count"] == 2
+
+
+def http_response(status_code, payload=None):
+    """Mock HTTP response whose raise_for_status behaves like requests."""
+    response = Mock(status_code=status_code, headers={})
+    response.json.return_value = payload or {}
+    response.text = ""
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+    else:
+        response.raise_for_status.return_value = None
+    return response
+
+
+class TestCidPathThrottling:
+    """Test that 429/5xx on the CID path reach the concurrency limiter."""
+
+    @pytest.fixture
+    def session(self):
+        return Mock()
+
+    @pytest.fixture
+    def processor(self, tmp_path, session):
+        config = SimpleNamespace(
+            processing=SimpleNamespace(batch_size=10, max_workers=1, api_delay=0.0),
+            place_id_cache_path=str(tmp_path / "place_id_cache.json")
+        )
+        adapter = PlacesAPIAdapter(api_key="test-key", delay=0, session=session)
+        return DataProcessor(adapter, Mock(), Mock(), config, logger=Mock())
+
+    def test_id_only_search_429_is_raised(self, processor, session):
+        """Test that a 429 from Text Search (ID only) is not reported as a miss."""
+        session.post.return_value = http_response(429)
+
+        with pytest.raises(APIQuotaExceededError):
+            processor.process_cid_url({"type": "cid_url", "cid": "123", "store_name": "佐渡食堂"})
+
+    def test_place_details_5xx_is_raised(self, processor, session):
+        """Test that a 5xx from Place Details keeps its throttling status."""
+        session.post.return_value = http_response(200, {"places": [{"id": "p1"}]})
+        session.get.return_value = http_response(503)
+
+        with pytest.raises(APIError) as excinfo:
+            processor.process_cid_url({"type": "cid_url", "cid": "123", "store_name": "佐渡食堂"})
+
+        assert is_throttling_error(excinfo.value)
+
+    @pytest.mark.asyncio
+    async def test_limiter_backs_off_on_cid_path_429(self, processor, session):
+        """Test that throttling on the CID path shrinks the adaptive limit."""
+        session.post.return_value = http_response(429)
+        async_processor = make_processor(adaptive_concurrency=True, max_concurrent=4)
+        queries = [{"type": "cid_url", "cid": str(i), "store_name": f"店{i}"} for i in range(2)]
+
+        async def process(query):
+            return await asyncio.to_thread(processor.process_cid_url, query)
+
+        await async_processor.process_batch_optimized(queries, process)
+
+        assert async_processor.get_processing_stats()["concurrency"]["throttle_count"] == 2
+
+
+class TestStreamProcessing:
+    """Test process_stream_optimized over sync and async iterables."""
+
+    @pytest.mark.asyncio
+    async def test_async_iterable_yields_in_completion_order(self):
+        """Test that results stream out as soon as they complete."""
+        processor = make_processor()
+
+        async def source():
+            for item in [("slow", 0.05), ("fast", 0.0)]:
+                yield item
+
+        names = [r.data async for r in processor.process_stream_optimized(source(), sleepy)]
+
+        assert names == ["fast", "slow"]
+
+    @pytest.mark.asyncio
+    async def test_generator_input_with_item_metadata(self):
+        """Test that a lazy generator is consumed and results map back to inputs."""
+        processor = make_processor()
+        items = ((f"q{i}", 0.0) for i in range(5))
+
+        results = [r async for r in processor.process_stream_optimized(items, sleepy)]
+
+        assert sorted(r.metadata["index"] for r in results) == list(range(5))
+        assert all(r.metadata["item"][0] == r.data for r in results)
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_throttles_producer(self):
+        """Test that the producer stops reading when the buffers are full."""
+        processor = make_processor(max_concurrent=1)
+        pulled = []
+
+        def source():
+            for i in range(100):
+                pulled.append(i)
+                yield (i, 0.0)
+
+        stream = processor.process_stream_optimized(source(), sleepy, buffer_size=2)
+        await stream.__anext__()
+        await asyncio.sleep(0.05)
+
+        # input queue + output queue + one in-flight item, never the whole source
+        assert len(pulled) < 10
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_producer_error_is_raised_after_drain(self):
+        """Test that a failing source surfaces its error to the consumer."""
+        processor = make_processor()
+
+        def source():
+            yield ("ok", 0.0)
+            raise ValueError("broken source")
+
+        results = []
+        with pytest.raises(ValueError):
+            async for result in processor.process_stream_optimized(source(), sleepy):
+                results.append(result)
+
+        assert [r.data for r in results] == ["ok"]
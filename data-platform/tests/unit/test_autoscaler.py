@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the queue-depth driven autoscaler
+
+Tests scaling decisions (hysteresis, cooldowns, API saturation hold),
+pool_grow/pool_shrink broadcasts and local worker process management.
+"""
+
+import asyncio
+import math
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from shared.autoscaler import (
+    AutoscalerConfig,
+    AutoscalingController,
+    CeleryPoolScaler,
+    LocalProcessScaler,
+    QueueScalingPolicy,
+    QueueSignals,
+)
+from shared.celery_config import QUEUE_POOLS
+from shared.smart_orchestrator import LoadBalancingConfig, SmartOrchestrator
+from shared.worker_telemetry import WorkerTelemetryStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def signals(depth, in_flight=0, concurrency=4, oldest_age=0.0, queue="validation"):
+    return {queue: QueueSignals(queue, depth, in_flight, oldest_age, concurrency)}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def controller(clock):
+    config = AutoscalerConfig(
+        policies={
+            "validation": QueueScalingPolicy(min_concurrency=2, max_concurrency=16),
+            "places_api": QueueScalingPolicy(min_concurrency=2, max_concurrency=16),
+        },
+        scale_up_cooldown=60.0,
+        scale_down_cooldown=300.0,
+        scale_down_stable_intervals=3,
+        api_saturation_alpha=1.0,
+    )
+    return AutoscalingController(config, MagicMock(), MagicMock(), clock=clock)
+
+
+class TestAutoscalingController:
+    """Test AutoscalingController.evaluate and its hysteresis state."""
+
+    def test_scales_up_on_backlog(self, controller):
+        """Test that a backlog raises concurrency to bring utilisation under the threshold."""
+        decisions = controller.evaluate(signals(depth=12, in_flight=4))
+
+        # required = 4 + 12 / 2 = 10 slots, 10 / 0.8 -> 13
+        assert [(d.current, d.target, d.reason) for d in decisions] == [(4, 13, "backlog")]
+
+    def test_scales_up_on_task_age(self, controller):
+        """Test that an old waiting task scales up even at moderate utilisation."""
+        decisions = controller.evaluate(signals(depth=1, in_flight=2, oldest_age=120.0))
+
+        assert [(d.target, d.reason) for d in decisions] == [(5, "task_age")]
+
+    def test_respects_policy_bounds(self, controller):
+        """Test that targets are clamped to the queue policy."""
+        assert controller.evaluate(signals(depth=500, in_flight=4))[0].target == 16
+
+    def test_scale_up_cooldown(self, controller, clock):
+        """Test that a queue is not resized again until the cooldown passes."""
+        decision = controller.evaluate(signals(depth=12, in_flight=4))[0]
+        controller._record(decision)
+
+        clock.now += 30
+        assert controller.evaluate(signals(depth=40, in_flight=13, concurrency=13)) == []
+
+        clock.now += 31
+        assert controller.evaluate(signals(depth=40, in_flight=13, concurrency=13))[0].target == 16
+
+    def test_holds_api_queue_while_limiter_saturated(self, controller):
+        """Test that places_api is not grown while the API rate limit is exhausted."""
+        backlog = {**signals(depth=20, in_flight=4), **signals(depth=20, in_flight=4, queue="places_api")}
+
+        decisions = controller.evaluate(backlog, api_saturation=0.95)
+
+        assert [d.queue for d in decisions] == ["validation"]
+
+    def test_scales_down_only_after_stable_idle_intervals(self, controller):
+        """Test that a single quiet reading does not shrink the pool."""
+        idle = signals(depth=0, in_flight=1, concurrency=12)
+
+        assert controller.evaluate(idle) == []
+        assert controller.evaluate(idle) == []
+        # A busy reading in between resets the streak
+        assert controller.evaluate(signals(depth=4, in_flight=6, concurrency=12)) == []
+        assert controller.evaluate(idle) == []
+        assert controller.evaluate(idle) == []
+
+        decisions = controller.evaluate(idle)
+        assert [(d.target, d.reason) for d in decisions] == [(2, "idle")]
+
+    def test_no_scale_down_right_after_scale_up(self, controller, clock):
+        """Test that the pool is not shrunk right after growing."""
+        controller._record(controller.evaluate(signals(depth=12, in_flight=4))[0])
+        idle = signals(depth=0, in_flight=0, concurrency=13)
+
+        for _ in range(5):
+            clock.now += 10
+            assert controller.evaluate(idle) == []
+
+        clock.now += 60
+        assert controller.evaluate(idle)[0].target == 2
+
+    @pytest.mark.asyncio
+    async def test_run_once_applies_and_records(self, controller):
+        """Test that applied decisions go to the scaler and start the cooldown."""
+        controller.signal_source.collect.return_value = (signals(depth=12, in_flight=4), 0.0)
+        controller.scaler.resize.return_value = True
+
+        decisions = await controller.run_once()
+
+        controller.scaler.resize.assert_called_once_with("validation", 13)
+        assert decisions[0].applied
+        assert controller.history == decisions
+        assert await controller.run_once() == []
+
+
+    def test_below_minimum_scales_up_from_zero(self, controller):
+        """Test that a queue without workers is brought up to at least the minimum."""
+        assert [(d.current, d.target, d.reason) for d in controller.evaluate(signals(depth=0, concurrency=0))] == [
+            (0, 2, "below_min")
+        ]
+        # required = 20 / 2 = 10 slots, 10 / 0.8 -> 13
+        assert controller.evaluate(signals(depth=20, concurrency=0))[0].target == 13
+
+    @pytest.mark.asyncio
+    async def test_local_scaler_launches_first_workers(self, clock):
+        """Test that local mode starts workers when none are running yet."""
+        launched = []
+
+        def launcher(command):
+            process = MagicMock()
+            process.poll.return_value = None
+            launched.append(process)
+            return process
+
+        scaler = LocalProcessScaler(launcher=launcher)
+        source = MagicMock()
+        source.collect.side_effect = lambda s: (
+            signals(depth=500, oldest_age=120.0, concurrency=s.concurrency("validation")), 0.0
+        )
+        config = AutoscalerConfig(policies={"validation": QueueScalingPolicy(min_concurrency=2, max_concurrency=16)})
+        controller = AutoscalingController(config, scaler, source, clock=clock)
+
+        decisions = await controller.run_once()
+
+        assert [(d.current, d.target, d.applied) for d in decisions] == [(0, 16, True)]
+        assert len(launched) == math.ceil(16 / QUEUE_POOLS["validation"].concurrency)
+        assert scaler.concurrency("validation") >= 16
+
+
+class TestCeleryPoolScaler:
+    """Test pool_grow/pool_shrink broadcasts."""
+
+    def make_scaler(self, hostnames):
+        store = WorkerTelemetryStore()
+        for hostname in hostnames:
+            store.on_worker_heartbeat({"hostname": hostname, "freq": 2.0})
+        app = MagicMock()
+        return CeleryPoolScaler(app, store), app
+
+    def test_grow_and_shrink_are_split_across_workers(self):
+        """Test that the target is distributed over the queue's workers."""
+        scaler, app = self.make_scaler(["validation@a", "validation@b", "background@a"])
+
+        assert scaler.concurrency("validation") == 2 * QUEUE_POOLS["validation"].concurrency
+        assert scaler.resize("validation", 8)
+        assert scaler.concurrency("validation") == 8
+        app.control.reset_mock()
+
+        assert scaler.resize("validation", 11)
+        app.control.pool_grow.assert_any_call(2, destination=["validation@a"])
+        app.control.pool_grow.assert_any_call(1, destination=["validation@b"])
+        assert scaler.concurrency("validation") == 11
+
+        assert scaler.resize("validation", 4)
+        app.control.pool_shrink.assert_any_call(4, destination=["validation@a"])
+        app.control.pool_shrink.assert_any_call(3, destination=["validation@b"])
+
+    def test_threads_pool_is_not_resized(self):
+        """Test that pools without grow/shrink support are left alone."""
+        scaler, app = self.make_scaler(["places_api@a"])
+
+        assert not scaler.resize("places_api", 32)
+        app.control.pool_grow.assert_not_called()
+
+    def test_threads_pool_is_scaled_by_process_count(self):
+        """Test that a non-resizable pool gets extra local worker processes."""
+        store = WorkerTelemetryStore()
+        store.on_worker_heartbeat({"hostname": "places_api@a", "freq": 2.0})
+        processes = []
+
+        def launcher(command):
+            process = MagicMock()
+            process.poll.return_value = None
+            processes.append(process)
+            return process
+
+        local = LocalProcessScaler(launcher=launcher)
+        scaler = CeleryPoolScaler(MagicMock(), store, process_scaler=local)
+        per_worker = QUEUE_POOLS["places_api"].concurrency
+
+        assert scaler.resize("places_api", per_worker * 3)
+        assert len(processes) == 2
+        assert scaler.concurrency("places_api") == per_worker * 3
+
+        # launched workers show up in telemetry under their own names and are not counted twice
+        for name in local.node_names("places_api"):
+            store.on_worker_heartbeat({"hostname": name, "freq": 2.0})
+        assert scaler.concurrency("places_api") == per_worker * 3
+
+        assert scaler.resize("places_api", per_worker)
+        assert all(p.send_signal.called for p in processes)
+        assert scaler.concurrency("places_api") == per_worker
+
+
+class TestLocalProcessScaler:
+    """Test local worker process management."""
+
+    def test_starts_and_stops_queue_workers(self):
+        """Test that processes are added per pool size and the newest are stopped first."""
+        processes = []
+
+        def launcher(command):
+            process = MagicMock()
+            process.poll.return_value = None
+            process.command = command
+            processes.append(process)
+            return process
+
+        scaler = LocalProcessScaler(launcher=launcher)
+
+        assert scaler.resize("places_api", 40)
+        assert len(processes) == 3
+        assert scaler.concurrency("places_api") == 48
+        names = [p.command[p.command.index("-n") + 1] for p in processes]
+        assert len(set(names)) == 3 and all(name.startswith("places_api@") for name in names)
+
+        assert scaler.resize("places_api", 16)
+        processes[2].send_signal.assert_called_once()
+        processes[1].send_signal.assert_called_once()
+        processes[0].send_signal.assert_not_called()
+
+
+class TestQueueBacklog:
+    """Test queue backlog tracking in WorkerTelemetryStore."""
+
+    def test_pending_tasks_and_in_flight_per_queue(self):
+        """Test that sent tasks age until received and workers count per queue."""
+        clock = FakeClock()
+        store = WorkerTelemetryStore(clock=clock)
+        store.on_task_sent({"uuid": "t1", "queue": "validation", "timestamp": 990.0})
+        store.on_task_sent({"uuid": "t2", "queue": "validation", "timestamp": 995.0})
+        store.on_task_started({"uuid": "t1", "hostname": "validation@a", "timestamp": 999.0})
+
+        assert store.queue_backlog() == {"validation": (1, 5.0)}
+
+        store.clear_pending("validation")
+        assert store.queue_backlog() == {"validation": (1, 0.0)}
+
+
+class TestOrchestratorAutoscaleOptIn:
+    """Test that SmartOrchestrator resizes pools only when enabled."""
+
+    @pytest.mark.asyncio
+    async def test_start_does_not_resize_pools_by_default(self, monkeypatch):
+        """Test that start() leaves worker pools alone unless AUTOSCALE_ENABLED is set."""
+        monkeypatch.delenv("AUTOSCALE_ENABLED", raising=False)
+        orchestrator = SmartOrchestrator(MagicMock(), MagicMock(), LoadBalancingConfig(event_telemetry=False))
+        orchestrator._initialize_system = AsyncMock()
+        orchestrator._health_check_loop = AsyncMock()
+        orchestrator._monitoring_loop = AsyncMock()
+
+        with patch("shared.smart_orchestrator.create_autoscaler") as create:
+            await orchestrator.start()
+            await asyncio.sleep(0)
+            await orchestrator.stop()
+
+        create.assert_not_called()
+        assert orchestrator.autoscaler is None
+
+    @pytest.mark.asyncio
+    async def test_env_switch_starts_autoscaler(self, monkeypatch):
+        """Test that AUTOSCALE_ENABLED=true starts the autoscaler with the orchestrator."""
+        monkeypatch.setenv("AUTOSCALE_ENABLED", "true")
+        orchestrator = SmartOrchestrator(MagicMock(), MagicMock(), LoadBalancingConfig(event_telemetry=False))
+        orchestrator._initialize_system = AsyncMock()
+        orchestrator._health_check_loop = AsyncMock()
+        orchestrator._monitoring_loop = AsyncMock()
+        controller = MagicMock(stop=AsyncMock())
+
+        with patch("shared.smart_orchestrator.create_autoscaler", return_value=controller):
+            await orchestrator.start()
+            await asyncio.sleep(0)
+            await orchestrator.stop()
+
+        controller.start.assert_called_once()
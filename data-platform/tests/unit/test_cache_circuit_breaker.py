@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for ProductionCacheService circuit breaker
+
+Tests fast-fail behaviour during Redis outages including:
+- Breaker opening after consecutive failures
+- L1 fallback without network calls while open
+- Gradual half-open recovery
+- Deferred tag invalidation and maintenance calls behind the breaker
+"""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from shared.cache_service import ProductionCacheConfig, ProductionCacheService
+
+
+@pytest.fixture
+def config():
+    """Production config with a small breaker threshold and no retry delay."""
+    return ProductionCacheConfig(
+        redis_nodes=["localhost:6379"],
+        max_retries=3,
+        retry_delay=0,
+        circuit_breaker_threshold=3,
+        circuit_breaker_timeout=60,
+        circuit_breaker_half_open_ratio=0.5,
+        circuit_breaker_half_open_successes=2
+    )
+
+
+@pytest.fixture
+def service(config):
+    """ProductionCacheService with a mocked Redis cluster."""
+    service = ProductionCacheService(config)
+    service.redis_cluster = AsyncMock()
+    service.redis_cluster.pipeline = MagicMock()
+    service.redis_cluster.pipeline.return_value.execute = AsyncMock(return_value=[])
+    service.cluster = service.redis_cluster
+    service._redis_available = True
+    return service
+
+
+class TestProductionCacheCircuitBreaker:
+    """Test circuit breaker wiring in ProductionCacheService."""
+
+    @pytest.mark.asyncio
+    async def test_breaker_opens_and_stops_retries(self, service):
+        """Test that failures open the breaker and abort the retry loop."""
+        service.redis_cluster.get.side_effect = ConnectionError("down")
+
+        assert await service.get("key") is None
+
+        assert service.breaker_state == ProductionCacheService.BREAKER_OPEN
+        assert service.redis_cluster.get.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_open_breaker_serves_l1_without_network(self, service):
+        """Test that an open breaker answers from L1 with no Redis calls."""
+        await service.set("key", {"name": "テスト店舗"})
+        service.redis_cluster.reset_mock()
+        service._open_breaker()
+
+        assert await service.get("key") == {"name": "テスト店舗"}
+        assert await service.set("other", 1) is True
+        assert await service.batch_get(["key", "other"]) == {"key": {"name": "テスト店舗"}, "other": 1}
+
+        service.redis_cluster.get.assert_not_awaited()
+        service.redis_cluster.setex.assert_not_awaited()
+        service.redis_cluster.pipeline.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_half_open_restores_traffic_gradually(self, service):
+        """Test that half-open admits a fraction of requests and then closes."""
+        service._open_breaker()
+        service.redis_cluster.get.return_value = None
+
+        with patch("shared.cache_service.time.monotonic",
+                   return_value=service.circuit_breaker_last_failure + 61):
+            await service.get("a")  # probe 1 -> ratio 0.5 doubles to 1.0
+            assert service.breaker_state == ProductionCacheService.BREAKER_HALF_OPEN
+            await service.get("b")  # probe 2 -> closed
+
+        assert service.breaker_state == ProductionCacheService.BREAKER_CLOSED
+        assert service.redis_cluster.get.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_half_open_failure_reopens(self, service):
+        """Test that a failed probe reopens the breaker without retrying."""
+        service._enter_half_open()
+        service.redis_cluster.setex.side_effect = ConnectionError("down")
+
+        assert await service.set_places_data("p1", {"name": "x"}) is False
+
+        assert service.breaker_state == ProductionCacheService.BREAKER_OPEN
+        assert service.redis_cluster.setex.await_count == 1
+
+    def test_l1_is_bounded(self, config):
+        """Test that the L1 tier evicts least recently used entries."""
+        config.local_cache_max_entries = 2
+        service = ProductionCacheService(config)
+
+        for key in ("a", "b", "c"):
+            service._local_set(key, key, 60)
+
+        assert service._local_get("a") is None
+        assert service._local_get("c") == "c"
+
+    @pytest.mark.asyncio
+    async def test_metrics_expose_breaker_state(self, service):
+        """Test that production metrics report breaker state without Redis calls."""
+        service._open_breaker()
+
+        metrics = await service.get_production_metrics()
+
+        assert metrics["circuit_breaker"]["state"] == "open"
+        assert metrics["circuit_breaker"]["active"] is True
+        service.redis_cluster.info.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_tag_invalidation_while_open_clears_l1(self, service):
+        """Test that tag invalidation with an open breaker never serves stale L1 data."""
+        await service.set_places_data("p1", {"name": "x"})
+        service.redis_cluster.reset_mock()
+        service._open_breaker()
+
+        await service.invalidate_place("p1")
+
+        assert await service.get_places_data("p1") is None
+        service.redis_cluster.pipeline.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_skipped_tag_invalidation_is_replayed(self, service):
+        """Test that invalidations skipped while open run once Redis recovers."""
+        service._open_breaker()
+        await service.invalidate_place("p1")
+        service._breaker_state = ProductionCacheService.BREAKER_CLOSED
+
+        await service.invalidate_category("restaurants")
+
+        smembers = service.redis_cluster.pipeline.return_value.smembers
+        assert [c.args[0] for c in smembers.call_args_list] == ["tag:category:restaurants", "tag:place:p1"]
+        assert service._get_circuit_breaker_metrics()["pending_tag_invalidations"] == 0
+
+    @pytest.mark.asyncio
+    async def test_tag_registration_failure_counts_towards_breaker(self, service):
+        """Test that failed tag writes are recorded by the breaker."""
+        service.redis_cluster.pipeline.return_value.execute.side_effect = ConnectionError("down")
+
+        for _ in range(3):
+            await service._add_tag_members({"place:p1": ["places:details:p1"]}, 60)
+
+        assert service.breaker_state == ProductionCacheService.BREAKER_OPEN
+
+    @pytest.mark.asyncio
+    async def test_clear_expired_cache_respects_open_breaker(self, service):
+        """Test that expired-key maintenance does not touch Redis while open."""
+        service._local_set("old", b"x", 60)
+        service._open_breaker()
+
+        with patch("shared.cache_service.time.monotonic",
+                   return_value=service.circuit_breaker_last_failure + 30):
+            assert await service.clear_expired_cache() == 0
+
+        service.redis_cluster.keys.assert_not_awaited()
+        service.redis_cluster.keys.side_effect = ConnectionError("down")
+        service._breaker_state = ProductionCacheService.BREAKER_CLOSED
+
+        assert await service.clear_expired_cache() == 0
+        assert service.circuit_breaker_failures == 1
+
+    @pytest.mark.asyncio
+    async def test_rejected_half_open_set_writes_no_tags(self, service):
+        """Test that a set kept in L1 by half-open admission skips tags and probes."""
+        service._enter_half_open()
+        service._half_open_requests = 1  # the next request is not admitted
+
+        assert await service.set("key", 1, tags=["category:restaurants"]) is True
+
+        service.redis_cluster.setex.assert_not_awaited()
+        service.redis_cluster.pipeline.assert_not_called()
+        assert service._half_open_successes == 0
+
+    @pytest.mark.asyncio
+    async def test_tag_writes_are_not_half_open_probes(self, service):
+        """Test that only the data write counts towards closing the breaker."""
+        service._enter_half_open()
+        service.redis_cluster.setex.return_value = True
+
+        await service.set_places_data("p1", {"name": "x"}, category="restaurants")
+
+        service.redis_cluster.pipeline.return_value.sadd.assert_called()
+        assert service._half_open_successes == 1
+        assert service.breaker_state == ProductionCacheService.BREAKER_HALF_OPEN
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for tag-based cache invalidation
+
+Tests that tag sets are maintained at set time and that invalidation
+removes exactly the tagged entries without pattern scans.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from shared.cache_service import CacheConfig, CacheService
+from shared.types.core_types import SearchQuery
+
+
+class FakeRedis:
+    """Minimal in-process Redis supporting the commands used by CacheService."""
+
+    def __init__(self):
+        self.data = {}
+        self.keys = AsyncMock(side_effect=AssertionError("KEYS must not be used"))
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    """Buffered pipeline executing against FakeRedis."""
+
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    def __getattr__(self, name):
+        def queue(*args):
+            self._commands.append((name, args))
+        return queue
+
+    async def execute(self):
+        data = self._redis.data
+        results = []
+        for name, args in self._commands:
+            if name == "setex":
+                data[args[0]] = args[2]
+                results.append(True)
+            elif name == "get":
+                results.append(data.get(args[0]))
+            elif name == "sadd":
+                data.setdefault(args[0], set()).update(args[1:])
+                results.append(len(args) - 1)
+            elif name == "expire":
+                results.append(True)
+            elif name == "smembers":
+                results.append(set(data.get(args[0], set())))
+            elif name == "unlink":
+                results.append(1 if data.pop(args[0], None) is not None else 0)
+        return results
+
+
+@pytest.fixture
+def service():
+    """CacheService backed by FakeRedis with a tiny UNLINK batch size."""
+    service = CacheService(CacheConfig(redis_nodes=["localhost:6379"], invalidation_batch_size=2))
+    service.cluster = FakeRedis()
+    service._redis_available = True
+    return service
+
+
+class TestTagInvalidation:
+    """Test tag maintenance and invalidation."""
+
+    @pytest.mark.asyncio
+    async def test_place_invalidation_clears_details_and_searches(self, service):
+        """Test that a place tag covers its details and searches containing it."""
+        query = SearchQuery(text="佐渡 寿司")
+        await service.set_places_data("p1", {"name": "寿司A"}, category="restaurants")
+        await service.set_places_data("p2", {"name": "寿司B"}, category="restaurants")
+        await service.set_search_results(query, [{"place_id": "p1"}], category="restaurants")
+
+        deleted = await service.invalidate_place("p1")
+
+        assert deleted == 2
+        assert await service.get_places_data("p1") is None
+        assert await service.get_search_results(query) is None
+        assert await service.get_places_data("p2") == {"name": "寿司B"}
+        service.cluster.keys.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_category_invalidation_in_batches(self, service):
+        """Test that category invalidation unlinks every member across batches."""
+        for i in range(5):
+            await service.set(f"k{i}", i, tags=["category:parkings"])
+        await service.set("other", 1, tags=["category:toilets"])
+
+        assert await service.invalidate_category("parkings") == 5
+        assert "tag:category:parkings" not in service.cluster.data
+        assert await service.get("other") == 1
+
+    @pytest.mark.asyncio
+    async def test_in_memory_fallback(self):
+        """Test tag invalidation when Redis is not configured."""
+        service = CacheService(CacheConfig(redis_nodes=[]))
+        await service.set("a", 1, tags=["place:p1"])
+        await service.set("b", 2, tags=["place:p2"])
+
+        assert await service.invalidate_tags(["place:p1"]) == 1
+        assert await service.get("a") is None
+        assert await service.get("b") == 2
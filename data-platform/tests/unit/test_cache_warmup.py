@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for CacheWarmupEngine
+
+Tests priority ordering, pipelined batch loading and the time budget.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from shared.cache_warmup import CacheWarmupEngine, WarmupConfig
+
+
+RECORDS = {
+    'restaurants': [
+        {'Place ID': 'p_low', '店舗名': '少ない店', 'レビュー数': 3, '緯度': '38.0', '経度': '138.4'},
+        {'Place ID': 'p_high', '店舗名': '人気店', 'レビュー数': 120, '評価': '4.5'},
+    ],
+    'parkings': [
+        {'Place ID': 'p_park', '駐車場名': '両津駐車場', 'レビュー数': 10},
+    ],
+}
+
+
+@pytest.fixture
+def place_id_cache():
+    """PlaceIdCache stand-in with one entry lacking a worksheet record."""
+    cache = Mock()
+    cache.export_for_backup.return_value = {
+        'cid_to_place_id': {
+            '1': {'place_id': 'p_low', 'refresh_due': '2026-01-01T00:00:00'},
+            '2': {'place_id': 'p_unknown', 'refresh_due': '2026-01-01T00:00:00'},
+        }
+    }
+    return cache
+
+
+@pytest.fixture
+def cache_service():
+    """Cache service whose batch_set reports every key as written."""
+    service = Mock()
+    service.batch_set = AsyncMock(side_effect=lambda data, **kwargs: len(data))
+    return service
+
+
+def make_engine(cache_service, place_id_cache, **config):
+    return CacheWarmupEngine(
+        cache_service,
+        place_id_cache=place_id_cache,
+        records_loader=lambda category: RECORDS.get(category, []),
+        config=WarmupConfig(**config)
+    )
+
+
+class TestCacheWarmupEngine:
+    """Test CacheWarmupEngine planning and loading."""
+
+    def test_plan_priority_order(self, cache_service, place_id_cache):
+        """Test that popular IDs come first, then review count."""
+        engine = make_engine(cache_service, place_id_cache)
+
+        plan, missing = engine.build_plan(popular_place_ids=['p_park'])
+
+        assert [c.place_id for c in plan] == ['p_park', 'p_high', 'p_low']
+        assert missing == 1  # p_unknown has no worksheet record
+
+    def test_record_conversion(self, cache_service, place_id_cache):
+        """Test worksheet records are converted to PlaceData-like payloads."""
+        engine = make_engine(cache_service, place_id_cache)
+
+        plan, _ = engine.build_plan()
+        payload = {c.place_id: c.payload for c in plan}['p_low']
+
+        assert payload['name'] == '少ない店'
+        assert payload['location'] == {'latitude': 38.0, 'longitude': 138.4}
+        assert payload['category'] == 'restaurants'
+
+    @pytest.mark.asyncio
+    async def test_warmup_uses_batched_set_without_overwrite(self, cache_service, place_id_cache):
+        """Test pipelined batches with place/category tags and SET NX semantics."""
+        engine = make_engine(cache_service, place_id_cache, batch_size=2)
+
+        result = await engine.warmup()
+
+        assert result.loaded == 3
+        assert result.batches == 2
+        first_call = cache_service.batch_set.await_args_list[0]
+        assert list(first_call.args[0]) == ['places:details:p_high', 'places:details:p_park']
+        assert first_call.kwargs['only_missing'] is True
+        assert first_call.kwargs['key_tags']['places:details:p_high'] == [
+            'place:p_high', 'category:restaurants'
+        ]
+
+    @pytest.mark.asyncio
+    async def test_time_budget_stops_loading(self, cache_service, place_id_cache):
+        """Test that loading stops once the time budget is exhausted."""
+        engine = make_engine(cache_service, place_id_cache, batch_size=1, time_budget=0.0)
+
+        result = await engine.warmup()
+
+        assert result.status == "partial"
+        assert result.loaded == 0
+        assert result.remaining == 3
+        cache_service.batch_set.assert_not_awaited()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the Celery queue topology
+
+Tests that routes match the registered task names, that CPU and I/O work
+land on separate queues, and that priorities suit the broker.
+"""
+
+import pytest
+
+import shared.distributed_tasks  # noqa: F401  (registers the tasks)
+from shared.celery_config import (
+    QUEUE_POOLS,
+    TASK_MODULE,
+    apply_queue_topology,
+    broker_priority,
+    celery_app,
+    worker_command,
+)
+
+
+@pytest.fixture
+def redis_topology():
+    """Apply the topology for a Redis broker and restore the settings afterwards."""
+    keys = (
+        'task_routes', 'task_queues', 'task_default_queue', 'task_default_priority',
+        'task_queue_max_priority', 'beat_schedule', 'broker_transport_options'
+    )
+    saved = {key: celery_app.conf.get(key) for key in keys}
+    apply_queue_topology(celery_app, "redis://localhost:6379/0")
+    yield celery_app
+    celery_app.conf.update(saved)
+
+
+def route(app, name):
+    return app.amqp.router.route({}, name)
+
+
+class TestCeleryTopology:
+    """Test routing of registered tasks."""
+
+    def test_every_registered_task_has_a_dedicated_queue(self, redis_topology):
+        """Test that no workflow task falls through to the default queue."""
+        names = [name for name in redis_topology.tasks if name.startswith(TASK_MODULE + ".")]
+
+        assert names
+        for name in names:
+            assert route(redis_topology, name)['queue'].name in QUEUE_POOLS, name
+
+    def test_api_and_ml_work_are_isolated(self, redis_topology):
+        """Test that place fetching and ML analysis use different worker pools."""
+        api = route(redis_topology, f"{TASK_MODULE}.process_places_batch")
+        ml = route(redis_topology, f"{TASK_MODULE}.ml_quality_analysis")
+
+        assert api['queue'].name == 'places_api'
+        assert ml['queue'].name == 'ml_processing'
+        assert QUEUE_POOLS['places_api'].pool in ('threads', 'gevent')
+        assert QUEUE_POOLS['ml_processing'].pool == 'prefork'
+
+    def test_redis_priorities_are_inverted(self, redis_topology):
+        """Test that API work outranks ML work on Redis, where 0 is highest."""
+        api = route(redis_topology, f"{TASK_MODULE}.process_places_batch")
+        ml = route(redis_topology, f"{TASK_MODULE}.ml_quality_analysis")
+
+        assert api['priority'] < ml['priority']
+        assert broker_priority(9, "amqp://localhost") == 9
+        assert redis_topology.conf.broker_transport_options['queue_order_strategy'] == 'priority'
+
+    def test_beat_schedule_uses_registered_tasks(self, redis_topology):
+        """Test that periodic tasks reference names the workers know."""
+        for entry in redis_topology.conf.beat_schedule.values():
+            assert entry['task'] in redis_topology.tasks
+
+    def test_worker_command(self):
+        """Test that each queue gets its own pool type and concurrency."""
+        command = worker_command('places_api')
+
+        assert command[command.index('-Q') + 1] == 'places_api'
+        assert command[command.index('-P') + 1] == QUEUE_POOLS['places_api'].pool
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for claim-check payload passing
+
+Tests content-addressed stores and the reference-passing Celery workflow
+(process_places_batch → aggregate → validate → ML analysis).
+"""
+
+import os
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from shared import distributed_tasks
+from shared.claim_check import LocalClaimCheckStore, RedisClaimCheckStore, is_claim_check
+from shared.distributed_tasks import (
+    aggregate_batch_results,
+    iter_claim_checked_results,
+    ml_quality_analysis,
+    process_places_batch,
+    validate_data_batch,
+)
+from shared.exceptions import ProcessingError
+from shared.ml_engine import AnomalyReport, QualityMetrics
+
+
+def fake_ml_engine(anomalous=()):
+    """MLEngine double that scores every item 0.9 and flags the given place ids."""
+    def analyze(items):
+        return [QualityMetrics(0.9, 1.0, 1.0, 1.0, 1.0, 0.1) for _ in items]
+
+    def detect(items):
+        return [
+            AnomalyReport(item["place_id"], 0.9, "missing_data", "high", "必須項目の欠落", ["データの再取得"], 0.9)
+            if item["place_id"] in anomalous else
+            AnomalyReport(item["place_id"], 0.1, "normal", "none", "異常なし", [], 0.9)
+            for item in items
+        ]
+
+    engine = MagicMock()
+    engine.analyze_data_quality.side_effect = analyze
+    engine.detect_anomalies.side_effect = detect
+    engine._generate_basic_recommendation.return_value = "品質良好"
+    return engine
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Local claim-check store used by the distributed tasks."""
+    store = LocalClaimCheckStore(str(tmp_path), ttl=60)
+    monkeypatch.setattr(distributed_tasks, "_claim_check_store", store)
+    return store
+
+
+class TestClaimCheckStore:
+    """Test claim-check stores."""
+
+    def test_round_trip_is_content_addressed(self, store):
+        """Test that equal payloads share one key and round-trip intact."""
+        items = [{"place_id": "p1", "name": "店舗"}]
+
+        ref = store.put_items(items)
+
+        assert is_claim_check(ref)
+        assert ref["count"] == 1
+        assert store.put_items(list(items)) == ref
+        assert store.get_items(ref) == items
+
+    def test_expired_claim_raises_and_is_purged(self, store):
+        """Test that expired payloads are unreadable and purged."""
+        ref = store.put_items([1, 2, 3])
+        digest = ref["claim_check"].split(":", 1)[1]
+        old = time.time() - 120
+        os.utime(store._path(digest), (old, old))
+
+        with pytest.raises(ProcessingError):
+            store.get_items(ref)
+        assert store.purge_expired() == 1
+
+    def test_redis_store_refreshes_ttl_for_duplicates(self, fake_redis):
+        """Test that duplicate writes only extend the expiry."""
+        store = RedisClaimCheckStore(fake_redis, ttl=30)
+
+        ref = store.put_items(["a"])
+        fake_redis.ttls.clear()
+        store.put_items(["a"])
+
+        assert len(fake_redis.data) == 1
+        assert list(fake_redis.ttls.values()) == [30]
+        assert store.get_items(ref) == ["a"]
+
+
+class TestClaimCheckWorkflow:
+    """Test reference passing between workflow tasks."""
+
+    def test_workflow_passes_references_only(self, store, monkeypatch):
+        """Test that no step carries inline result lists."""
+        batches = [
+            process_places_batch([f"test_{i}" for i in range(start, start + 3)], {})
+            for start in (0, 3)
+        ]
+        batches.append({
+            "status": "success", "processed": 1, "total_requested": 1,
+            "results": [{"place_id": "inline", "name": ""}]
+        })
+
+        aggregated = aggregate_batch_results(batches)
+        validated = validate_data_batch(aggregated)
+        monkeypatch.setattr(distributed_tasks, "get_ml_engine", lambda: fake_ml_engine())
+        analyzed = ml_quality_analysis(validated)
+
+        for payload in [*batches[:2], aggregated, validated, analyzed]:
+            assert "results" not in payload
+        assert aggregated["total_processed"] == 7
+        assert [ref["count"] for ref in aggregated["results_refs"]] == [3, 3, 1]
+        assert validated["validated_count"] == 6
+        assert validated["validation_error_count"] == 1
+        assert analyzed["quality_recommendations"] == {"品質良好": 6}
+
+        high_quality = list(iter_claim_checked_results(analyzed["high_quality_refs"]))
+        assert [item["place_id"] for item in high_quality] == [f"test_{i}" for i in range(6)]
+
+    def test_ml_analysis_scores_each_reference_once(self, store, monkeypatch):
+        """Test that MLEngine scores every claim-checked batch and anomalies are split out."""
+        refs = [
+            store.put_items([{"place_id": "p1"}, {"place_id": "p2"}]),
+            store.put_items([{"place_id": "p3"}])
+        ]
+        engine = fake_ml_engine(anomalous={"p2"})
+        monkeypatch.setattr(distributed_tasks, "get_ml_engine", lambda: engine)
+
+        analyzed = ml_quality_analysis({"validated_refs": refs})
+
+        assert engine.analyze_data_quality.call_count == 2
+        assert engine.detect_anomalies.call_count == 2
+        assert analyzed["anomaly_count"] == 1
+        assert analyzed["overall_quality_score"] == pytest.approx(0.9)
+        assert analyzed["quality_recommendations"] == {"品質良好": 2, "データの再取得": 1}
+        low_quality = list(iter_claim_checked_results(analyzed["low_quality_refs"]))
+        assert [(entry["data"]["place_id"], entry["is_anomaly"]) for entry in low_quality] == [("p2", True)]
@@ -89,6 +89,28 @@ class TestProcessingConfig:
         assert any("max_retries must be non-negative" in error for error in validation_result)
         assert any("timeout must be at least 1" in error for error in validation_result)
 
+    def test_async_scheduling_defaults_to_batch(self):
+        """Test that opt-in async processing features are off by default."""
+        config = ProcessingConfig()
+
+        assert config.scheduling_mode == "batch"
+        assert config.adaptive_concurrency is False
+        assert config.async_instrumentation is False
+        assert any("scheduling_mode" in error for error in ProcessingConfig(scheduling_mode="eager").validate())
+
+    @patch.dict(os.environ, {
+        'SCHEDULING_MODE': 'continuous',
+        'ADAPTIVE_CONCURRENCY': 'true',
+        'ASYNC_INSTRUMENTATION': '1'
+    })
+    def test_async_features_from_environment(self):
+        """Test that the async scheduling switches are read from the environment."""
+        processing = ScraperConfig.from_environment(validate=False).processing
+
+        assert processing.scheduling_mode == "continuous"
+        assert processing.adaptive_concurrency is True
+        assert processing.async_instrumentation is True
+
 
 class TestScraperConfig:
     """Test ScraperConfig class."""
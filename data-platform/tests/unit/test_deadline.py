@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for run deadlines
+
+Tests deadline parsing, context propagation and cancellation in
+OptimizedAsyncProcessor and DataProcessor.
+"""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+
+from core.processors.data_processor import DataProcessor
+from shared.async_processor import OptimizedAsyncProcessor, OptimizedBatchConfig, ProcessingState
+from shared.deadline import Deadline, deadline_scope, parse_duration, remaining_timeout
+from shared.exceptions import DeadlineExceededError
+
+
+class TestDeadline:
+    """Test Deadline helpers."""
+
+    @pytest.mark.parametrize("value,expected", [
+        ("20m", 1200.0), ("90s", 90.0), ("1h30m", 5400.0), ("300", 300.0), ("1.5h", 5400.0)
+    ])
+    def test_parse_duration(self, value, expected):
+        """Test supported duration formats."""
+        assert parse_duration(value) == expected
+
+    @pytest.mark.parametrize("value", ["", "abc", "10x", "0m"])
+    def test_parse_duration_rejects_invalid(self, value):
+        """Test that malformed durations raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_duration(value)
+
+    def test_remaining_timeout_is_clamped(self):
+        """Test that API timeouts shrink to the remaining budget."""
+        assert remaining_timeout(30.0) == 30.0
+
+        with deadline_scope(Deadline(5.0)):
+            assert remaining_timeout(30.0) <= 5.0
+
+        with deadline_scope(Deadline(0.0)):
+            with pytest.raises(DeadlineExceededError):
+                remaining_timeout(30.0)
+
+    @pytest.mark.asyncio
+    async def test_deadline_reaches_worker_threads(self):
+        """Test that asyncio.to_thread carries the deadline into sync code."""
+        with deadline_scope(Deadline(5.0)):
+            timeout = await asyncio.to_thread(remaining_timeout, 30.0)
+
+        assert timeout <= 5.0
+
+
+class TestProcessorDeadline:
+    """Test deadline handling in OptimizedAsyncProcessor."""
+
+    @pytest.mark.asyncio
+    async def test_items_after_deadline_are_cancelled(self):
+        """Test that in-flight work is cut off and queued items are skipped."""
+        processor = OptimizedAsyncProcessor("DeadlineTest", OptimizedBatchConfig(
+            max_concurrent=1, retry_attempts=3, retry_delay=0.0,
+            adaptive_batch_size=False, scheduling_mode="continuous"
+        ))
+        calls = []
+
+        async def slow(item):
+            calls.append(item)
+            await asyncio.sleep(1.0)
+            return item
+
+        with deadline_scope(Deadline(0.05)):
+            result = await processor.process_batch_optimized([1, 2, 3], slow)
+
+        assert calls == [1]
+        assert all(r.state == ProcessingState.CANCELLED for r in result.results)
+        assert isinstance(result.results[0].error, DeadlineExceededError)
+
+
+class TestDataProcessorDeadline:
+    """Test prioritization and partial results in DataProcessor."""
+
+    @pytest.fixture
+    def processor(self, tmp_path):
+        config = SimpleNamespace(
+            processing=SimpleNamespace(batch_size=10, max_workers=1, api_delay=0.0),
+            place_id_cache_path=str(tmp_path / "place_id_cache.json")
+        )
+        return DataProcessor(Mock(), Mock(), Mock(), config, logger=Mock())
+
+    def test_prioritize_queries(self, processor):
+        """Test explicit priority first, then query type, then file order."""
+        queries = [
+            {'type': 'maps_url', 'store_name': 'a'},
+            {'type': 'store_name', 'store_name': 'b'},
+            {'type': 'cid_url', 'store_name': 'c'},
+            {'type': 'store_name', 'store_name': 'd', 'priority': 5},
+        ]
+
+        ordered = [q['store_name'] for q in processor._prioritize_queries(queries)]
+
+        assert ordered == ['d', 'c', 'b', 'a']
+
+    def test_sync_run_returns_partial_results(self, processor):
+        """Test that an expired deadline skips the remaining queries."""
+        queries = [{'type': 'store_name', 'store_name': 'a'}, {'type': 'store_name', 'store_name': 'b'}]
+
+        result = processor.process_all_queries(queries, deadline=Deadline(0.0))
+
+        assert result.skipped_count == 2
+        assert result.error_count == 0
+        processor._api_client.search_places.assert_not_called()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the distributed Places batch task
+
+Tests that the real-API path reuses one per-process runtime (event loop,
+API integration and cache) and returns compact results.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from unittest.mock import patch
+
+import pytest
+
+from shared import distributed_tasks
+from shared.distributed_tasks import _close_worker_runtime, _get_worker_runtime, _process_places_batch_sync
+
+
+class FakePlacesAPIAdapter:
+    """Places API adapter returning Places API (New) style payloads."""
+
+    instances = 0
+
+    def __init__(self, **kwargs):
+        FakePlacesAPIAdapter.instances += 1
+        self.calls = []
+
+    def fetch_place_details(self, place_id):
+        self.calls.append(place_id)
+        if place_id == "slow":
+            time.sleep(1.0)
+        if place_id.startswith("overlap"):
+            time.sleep(0.05)
+        if place_id == "missing":
+            return None
+        return {
+            "id": place_id,
+            "displayName": {"text": f"店舗 {place_id}", "languageCode": "ja"},
+            "formattedAddress": "新潟県佐渡市",
+            "rating": 4.2,
+            "types": ["restaurant"],
+            "reviews": [{"text": "large payload"}],
+        }
+
+
+@pytest.fixture
+def worker_env(monkeypatch):
+    """Worker environment with an API key and in-memory cache."""
+    monkeypatch.setenv("PLACES_API_KEY", "test-key")
+    monkeypatch.setenv("REDIS_CLUSTER_NODES", "")
+    FakePlacesAPIAdapter.instances = 0
+
+    with patch("shared.api_integration.PlacesAPIAdapter", FakePlacesAPIAdapter):
+        yield
+        _close_worker_runtime()
+
+
+class TestProcessPlacesBatch:
+    """Test _process_places_batch_sync."""
+
+    def test_real_api_returns_compact_results(self, worker_env):
+        """Test that real results are fetched and reduced to summary fields."""
+        result = _process_places_batch_sync(["p1", "missing"], "task-1", use_real_api=True)
+
+        assert result["api_mode"] == "real"
+        assert result["results"] == [{
+            "place_id": "p1",
+            "name": "店舗 p1",
+            "rating": 4.2,
+            "address": "新潟県佐渡市",
+            "types": ["restaurant"],
+        }]
+        assert result["error_place_ids"] == ["missing"]
+        assert result["api_calls"] == 2
+
+    def test_runtime_is_reused_across_batches(self, worker_env):
+        """Test that the integration is created once and caches across batches."""
+        _process_places_batch_sync(["p1"], "task-1", use_real_api=True)
+        runtime = _get_worker_runtime()
+        second = _process_places_batch_sync(["p1"], "task-2", use_real_api=True)
+
+        assert _get_worker_runtime() is runtime
+        assert FakePlacesAPIAdapter.instances == 1
+        assert runtime.api_integration.api_adapter.calls == ["p1"]
+        assert second["cache_hits"] == 1
+        assert second["api_calls"] == 0
+
+    def test_missing_api_key_uses_mock_data(self, monkeypatch):
+        """Test that the task falls back to mock data without an API key."""
+        monkeypatch.delenv("PLACES_API_KEY", raising=False)
+
+        result = _process_places_batch_sync(["test_1"], "task-1", use_real_api=True)
+
+        assert result["api_mode"] == "mock"
+        assert distributed_tasks._worker_runtime is None
+
+    def test_real_api_errors_are_raised_not_mocked(self, worker_env):
+        """Test that a failed real fetch is retried by the task instead of mocked."""
+        with pytest.raises(FutureTimeoutError):
+            _process_places_batch_sync(["slow"], "task-1", use_real_api=True, timeout=0.05)
+
+    def test_runtime_init_failure_is_raised(self, worker_env):
+        """Test that a broken worker runtime is not replaced by mock data."""
+        with patch.object(distributed_tasks, "_get_worker_runtime", side_effect=RuntimeError("init failed")):
+            with pytest.raises(RuntimeError):
+                _process_places_batch_sync(["p1"], "task-1", use_real_api=True)
+
+    def test_concurrent_batches_count_only_their_own_calls(self, worker_env):
+        """Test that batches sharing the runtime under a threads pool keep separate counts."""
+        batches = [[f"overlap_{n}_{i}" for i in range(n)] for n in (1, 3, 5)]
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            results = list(pool.map(
+                lambda batch: _process_places_batch_sync(batch, "task", use_real_api=True), batches
+            ))
+
+        assert [result["api_calls"] for result in results] == [1, 3, 5]
+        assert [result["cache_hits"] for result in results] == [0, 0, 0]
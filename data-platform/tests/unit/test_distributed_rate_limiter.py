@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for DistributedRateLimiter
+
+Tests cluster-wide token buckets shared through Redis, local permit
+batching and the in-process fallback when Redis is unavailable.
+"""
+
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from infrastructure.external.places_api_adapter import SKU_PLACE_DETAILS, PlacesAPIAdapter
+from shared.distributed_rate_limiter import DistributedRateLimiter, RateLimit
+
+
+class FakeRedisScriptClient:
+    """Redis client whose registered script emulates the token bucket."""
+
+    def __init__(self, fail=False):
+        self.buckets = {}
+        self.calls = 0
+        self.fail = fail
+
+    def register_script(self, script):
+        def run(keys, args):
+            self.calls += 1
+            if self.fail:
+                raise ConnectionError("redis down")
+
+            rate, burst, requested = float(args[0]), float(args[1]), int(args[2])
+            now = time.monotonic()
+            tokens, ts = self.buckets.get(keys[0], (burst, now))
+            tokens = min(burst, tokens + (now - ts) * rate)
+            granted = min(requested, int(tokens))
+            tokens -= granted
+            self.buckets[keys[0]] = (tokens, now)
+            wait_ms = 0 if granted else int((1 - tokens) / rate * 1000) + 1
+            return [granted, wait_ms]
+
+        return run
+
+
+def make_limiter(client, **limit):
+    settings = {"requests_per_second": 10.0, "burst": 5, "permit_batch": 5, "permit_ttl": 1.0}
+    settings.update(limit)
+    return DistributedRateLimiter(client, RateLimit(**settings))
+
+
+class TestDistributedRateLimiter:
+    """Test permit batching and shared buckets."""
+
+    def test_permits_are_batched_locally(self):
+        """Test that one Redis round-trip serves several acquisitions."""
+        client = FakeRedisScriptClient()
+        limiter = make_limiter(client)
+
+        waits = [limiter.try_acquire("sku") for _ in range(5)]
+
+        assert waits == [0.0] * 5
+        assert client.calls == 1
+        assert limiter.get_stats()["local_hits"] == 4
+
+    def test_workers_share_one_bucket(self):
+        """Test that a second worker must wait once the shared bucket is drained."""
+        client = FakeRedisScriptClient()
+        worker_a = make_limiter(client)
+        worker_b = make_limiter(client)
+
+        worker_a.try_acquire("sku")
+
+        assert worker_b.try_acquire("sku") > 0
+        assert worker_b.try_acquire("other-sku") == 0.0
+
+    def test_expired_permits_are_discarded(self):
+        """Test that hoarded permits cannot be spent after permit_ttl."""
+        client = FakeRedisScriptClient()
+        limiter = make_limiter(client, permit_ttl=0.01, requests_per_second=1000.0)
+
+        limiter.try_acquire("sku")
+        time.sleep(0.02)
+        limiter.try_acquire("sku")
+
+        assert client.calls == 2
+        assert limiter.get_stats()["expired_permits"] == 4
+
+    def test_falls_back_to_local_bucket(self):
+        """Test that Redis errors degrade to an in-process limit without retry storms."""
+        client = FakeRedisScriptClient(fail=True)
+        limiter = make_limiter(client, burst=1, permit_batch=1)
+
+        assert limiter.try_acquire("sku") == 0.0
+        assert limiter.try_acquire("sku") > 0
+
+        stats = limiter.get_stats()
+        assert stats["backend"] == "local"
+        assert client.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_acquire_async_waits_for_refill(self):
+        """Test that async acquisition sleeps until the bucket refills."""
+        limiter = make_limiter(FakeRedisScriptClient(), requests_per_second=50.0, burst=1, permit_batch=1)
+
+        started = time.monotonic()
+        await limiter.acquire_async("sku")
+        await limiter.acquire_async("sku")
+
+        assert time.monotonic() - started >= 0.015
+
+
+class TestAdapterRateLimiting:
+    """Test that PlacesAPIAdapter acquires from the shared limiter."""
+
+    def test_adapter_acquires_per_sku(self):
+        """Test that place details requests use the details SKU key."""
+        limiter = Mock()
+        adapter = PlacesAPIAdapter(api_key="test-key", delay=10.0, rate_limiter=limiter)
+        response = Mock(status_code=200)
+        response.json.return_value = {"id": "p1"}
+
+        with patch("infrastructure.external.places_api_adapter.requests.get", return_value=response):
+            adapter._get_place_details("p1")
+
+        limiter.acquire.assert_called_once_with(SKU_PLACE_DETAILS)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the bucketed execution history store
+
+Tests bucket lookups, per-bucket bounds and persistence across restarts,
+and that PredictiveOptimizer predicts from the stored history.
+"""
+
+import json
+from unittest.mock import MagicMock
+
+from shared.execution_history import ExecutionHistoryStore, bucket_key
+from shared.smart_orchestrator import PredictiveOptimizer
+
+
+def characteristics(total_queries=100, cid_ratio=1.0, url_ratio=0.0):
+    text_ratio = 1.0 - cid_ratio - url_ratio
+    return {
+        "total_queries": total_queries,
+        "cid_ratio": cid_ratio,
+        "url_ratio": url_ratio,
+        "text_ratio": text_ratio,
+        "complexity_score": cid_ratio * 0.2 + url_ratio * 0.5 + text_ratio * 0.8,
+        "size_category": "medium" if 50 <= total_queries < 200 else "small",
+    }
+
+
+class TestExecutionHistoryStore:
+    """Test ExecutionHistoryStore."""
+
+    def test_similar_matches_size_and_mix(self, tmp_path):
+        """Test that lookups return records with the same size and a similar mix."""
+        store = ExecutionHistoryStore(str(tmp_path / "history.json"))
+        store.record(characteristics(100), 50.0, True)
+        store.record(characteristics(120, cid_ratio=0.95), 72.0, True)
+        store.record(characteristics(100, cid_ratio=0.0), 400.0, True)
+        store.record(characteristics(20), 10.0, True)
+
+        similar = store.similar(characteristics(150))
+
+        assert [record["time_per_query"] for record in similar] == [0.5, 0.6]
+
+    def test_similar_spans_neighbouring_buckets(self, tmp_path):
+        """Test that nearly identical mixes match across a quantisation boundary."""
+        store = ExecutionHistoryStore("")
+        store.record(characteristics(100, cid_ratio=0.87, url_ratio=0.0), 50.0, True)
+
+        assert bucket_key(characteristics(100, cid_ratio=0.87)) != bucket_key(characteristics(100, cid_ratio=0.88))
+        assert len(store.similar(characteristics(100, cid_ratio=0.88))) == 1
+
+    def test_similar_applies_tolerance(self, tmp_path):
+        """Test that neighbouring buckets are filtered by the similarity tolerance."""
+        store = ExecutionHistoryStore("")
+        store.record(characteristics(100, cid_ratio=1.0), 50.0, True)
+        store.record(characteristics(100, cid_ratio=0.75, url_ratio=0.25), 60.0, True)
+        store.record(characteristics(100, cid_ratio=0.5, url_ratio=0.0), 70.0, True)
+
+        similar = store.similar(characteristics(100, cid_ratio=0.9, url_ratio=0.1))
+
+        # 0.5 / 0.5 の混在は比率の平均差が 0.27 で対象外
+        assert [record["execution_time"] for record in similar] == [50.0, 60.0]
+
+    def test_buckets_are_bounded(self, tmp_path):
+        """Test that old records and stale buckets are discarded."""
+        store = ExecutionHistoryStore(str(tmp_path / "history.json"), max_records_per_bucket=3, max_buckets=2)
+        for execution_time in range(1, 6):
+            store.record(characteristics(100), float(execution_time), True)
+        store.record(characteristics(100, cid_ratio=0.0), 1.0, True)
+        store.record(characteristics(100, cid_ratio=0.5), 1.0, True)
+
+        assert len(store) == 2
+        assert store.similar(characteristics(100)) == []
+
+    def test_history_survives_restart(self, tmp_path):
+        """Test that a new store loads what the previous one recorded."""
+        path = str(tmp_path / "nested" / "history.json")
+        ExecutionHistoryStore(path).record(characteristics(100), 50.0, False)
+
+        reloaded = ExecutionHistoryStore(path)
+
+        assert len(reloaded) == 1
+        assert reloaded.similar(characteristics(100))[0]["success"] is False
+        with open(path, encoding="utf-8") as f:
+            assert list(json.load(f)["buckets"]) == [bucket_key(characteristics(100))]
+
+    def test_corrupt_file_starts_empty(self, tmp_path):
+        """Test that an unreadable history file is ignored."""
+        path = tmp_path / "history.json"
+        path.write_text("{not json", encoding="utf-8")
+
+        assert len(ExecutionHistoryStore(str(path))) == 0
+
+
+class TestPredictiveOptimizerHistory:
+    """Test PredictiveOptimizer predictions from the history store."""
+
+    def test_prediction_uses_similar_records(self, tmp_path):
+        """Test that predictions scale the recorded time per query."""
+        optimizer = PredictiveOptimizer(MagicMock(), ExecutionHistoryStore(str(tmp_path / "history.json")))
+        assert optimizer._analyze_historical_performance(characteristics(100))["confidence"] == 0.0
+
+        for _ in range(5):
+            optimizer.record_execution(characteristics(100), 50.0, True)
+
+        performance = optimizer._analyze_historical_performance(characteristics(150))
+        assert performance["predicted_time"] == 75.0
+        assert performance["confidence"] == 0.5
+        assert performance["similar_patterns"] == 5
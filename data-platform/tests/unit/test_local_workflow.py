@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the process-pool workflow backend
+
+Tests that DistributedTaskProcessor can run the batch workflow on a local
+ProcessPoolExecutor with shared-memory claim checks.
+"""
+
+import os
+
+import pytest
+
+from shared import distributed_tasks
+from shared.claim_check import LocalClaimCheckStore, SharedMemoryClaimCheckStore
+from shared.distributed_tasks import BatchTaskConfig, DistributedTaskProcessor, iter_claim_checked_results
+
+
+def shared_memory_segments():
+    """Names of claim-check segments currently in /dev/shm."""
+    if not os.path.isdir("/dev/shm"):
+        return set()
+    return {name for name in os.listdir("/dev/shm") if name.startswith("sado_cc_")}
+
+
+class TestSharedMemoryClaimCheckStore:
+    """Test the shared-memory claim-check store."""
+
+    def test_round_trip_and_delete(self):
+        """Test that payloads survive close and are removed by delete."""
+        store = SharedMemoryClaimCheckStore()
+        items = [{"place_id": f"p{i}"} for i in range(100)]
+
+        ref = store.put_items(items)
+        try:
+            assert store.get_items(ref) == items
+        finally:
+            store.delete(ref)
+
+        assert store._get(ref["claim_check"].split(":", 1)[1]) is None
+
+
+class TestProcessPoolWorkflow:
+    """Test the process_pool backend."""
+
+    @pytest.mark.asyncio
+    async def test_workflow_runs_on_process_pool(self, tmp_path, monkeypatch):
+        """Test that results match the Celery workflow and shared memory is released."""
+        monkeypatch.setattr(distributed_tasks, "_claim_check_store", LocalClaimCheckStore(str(tmp_path)))
+        before = shared_memory_segments()
+        place_ids = [f"test_{i}" for i in range(7)]
+
+        result = await DistributedTaskProcessor().process_places_batch_workflow(
+            place_ids, BatchTaskConfig(backend="process_pool", batch_size=3, max_workers=2)
+        )
+
+        assert result["backend"] == "process_pool"
+        assert result["total_processed"] == 7
+        assert result["validated_count"] == 7
+        assert sum(result["quality_recommendations"].values()) == 7
+        high_quality = list(iter_claim_checked_results(result["high_quality_refs"]))
+        low_quality = list(iter_claim_checked_results(result["low_quality_refs"]))
+        analyzed_ids = [item["place_id"] for item in high_quality] + [entry["data"]["place_id"] for entry in low_quality]
+        assert sorted(analyzed_ids) == sorted(place_ids)
+        assert shared_memory_segments() == before
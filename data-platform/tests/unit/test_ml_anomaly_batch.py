@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for batched MLEngine.detect_anomalies
+
+Tests that the batch anomaly engine produces the same AnomalyReport as
+per-item detection and scores the whole batch with one model call.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from shared.ml_engine import MLEngine, QualityMetrics
+
+ITEMS = [
+    {"place_id": "p1", "name": "佐渡食堂", "formatted_address": "新潟県佐渡市", "rating": 4.2,
+     "user_ratings_total": 120, "phone_number": "0259-11-2222", "website": "https://example.com"},
+    {"place_id": "p2", "name": "佐渡食堂", "rating": 4.8, "user_ratings_total": 1},
+    {"place_id": "p3", "name": "佐渡食堂", "rating": "4.0", "user_ratings_total": 20000},
+    {"place_id": "p4", "name": "a", "rating": 6},
+    {"place_id": "p5", "name": "x" * 250, "rating": "bad"},
+    {"name": "佐渡食堂"},
+    {"place_id": "p7", "name": None},
+    {"place_id": "p8", "name": "Sushi", "formatted_address": None, "updated_at": 5},
+    {"invalid": "data"},
+]
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    return MLEngine(str(tmp_path_factory.mktemp("models")))
+
+
+def quality(score):
+    return QualityMetrics(score, 1.0, 1.0, 1.0, 1.0, 0.0)
+
+
+class TestBatchAnomalyDetection:
+    """Test the batched detect_anomalies path."""
+
+    @pytest.mark.parametrize("history", [[], [quality(0.95), quality(0.9)] * 10])
+    def test_matches_per_item_detection(self, engine, history):
+        """Test that reports equal per-item detection, with and without quality history."""
+        engine.quality_history = list(history)
+
+        reports = engine.detect_anomalies(ITEMS)
+
+        assert reports == [engine._detect_single_item_anomaly(item) for item in ITEMS]
+        if history:
+            assert reports[0].anomaly_type == "statistical_outlier"
+        else:
+            assert [r.anomaly_type for r in reports[:4]] == [
+                "normal", "rating_inconsistency", "excessive_ratings", "invalid_rating"
+            ]
+
+    def test_one_model_call_per_batch(self, engine):
+        """Test that the anomaly detector runs once for the whole batch."""
+        engine.quality_history = []
+        batch = ITEMS * 100
+
+        with patch.object(engine.anomaly_detector, "decision_function",
+                          wraps=engine.anomaly_detector.decision_function) as decision_function:
+            reports = engine.detect_anomalies(batch)
+
+        assert len(reports) == len(batch)
+        assert decision_function.call_count == 1
+
+    def test_empty_batch(self, engine):
+        """Test that an empty batch returns no reports."""
+        assert engine.detect_anomalies([]) == []
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for versioned MLEngine model artifacts
+
+Tests that MLEngine defers loading until first use, that artifacts
+round-trip through joblib with mmap and that tampered files are rejected.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from shared.ml_engine import SKLEARN_AVAILABLE, MLEngine
+from shared.ml_models import ModelArtifactStore
+
+pytestmark = pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="scikit-learn not installed")
+
+
+@pytest.fixture(scope="module")
+def trained_dir(tmp_path_factory):
+    model_dir = tmp_path_factory.mktemp("models")
+    assert MLEngine(str(model_dir), auto_train=False).train_models() is not None
+    return model_dir
+
+
+class TestModelArtifactStore:
+    """Test ModelArtifactStore save/load."""
+
+    def test_round_trip_with_mmap(self, tmp_path):
+        """Test that arrays come back memory-mapped from the current version."""
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler().fit(np.arange(20000, dtype=float).reshape(-1, 2))
+        store = ModelArtifactStore(str(tmp_path))
+        version = store.save({"scaler": scaler, "missing": None})
+
+        loaded = store.load()
+
+        assert store.manifest()["version"] == version
+        assert set(loaded) == {"scaler"}
+        assert isinstance(loaded["scaler"].mean_, np.memmap)
+        np.testing.assert_array_equal(loaded["scaler"].mean_, scaler.mean_)
+
+    def test_checksum_mismatch_is_rejected(self, tmp_path):
+        """Test that a modified artifact is not loaded."""
+        store = ModelArtifactStore(str(tmp_path))
+        version = store.save({"weights": np.zeros(10)})
+        artifact = tmp_path / version / "weights.joblib"
+        artifact.write_bytes(artifact.read_bytes() + b"\0")
+
+        assert store.load() is None
+
+    def test_old_versions_are_pruned(self, tmp_path):
+        """Test that only the newest versions are kept on disk."""
+        store = ModelArtifactStore(str(tmp_path), keep_versions=2)
+        versions = [store.save({"weights": np.full(3, i)}) for i in range(4)]
+
+        assert store.versions() == versions[-2:]
+        assert json.loads(store.manifest_path.read_text())["version"] == versions[-1]
+
+
+class TestLazyMLEngine:
+    """Test lazy model loading in MLEngine."""
+
+    def test_construction_does_not_load_models(self, trained_dir):
+        """Test that models are read on first access only."""
+        engine = MLEngine(str(trained_dir))
+
+        assert engine._models == {}
+        assert engine.anomaly_detector is not None
+        assert engine.models_loaded
+        assert engine.model_version == ModelArtifactStore(str(trained_dir)).manifest()["version"]
+
+    def test_loaded_models_match_trained_models(self, trained_dir):
+        """Test that a loaded engine scores like the engine that trained the models."""
+        batch = [
+            {"place_id": "p1", "name": "佐渡食堂", "formatted_address": "新潟県佐渡市両津", "rating": 4.2},
+            {"place_id": "p2", "name": "x", "formatted_address": "", "rating": 9},
+        ]
+        trainer = MLEngine(str(trained_dir), auto_train=False)
+        trainer.train_models()
+
+        loaded = MLEngine(str(trained_dir)).analyze_data_quality(batch)
+        trained = trainer.analyze_data_quality(batch)
+
+        assert [m.overall_score for m in loaded] == [m.overall_score for m in trained]
+
+    def test_without_artifacts_and_auto_train_falls_back(self, tmp_path):
+        """Test that an untrained engine uses the basic implementation."""
+        engine = MLEngine(str(tmp_path), auto_train=False)
+
+        assert engine.quality_classifier is None
+        assert not engine.models_loaded
+        assert engine.analyze_data_quality([{"place_id": "p1"}])[0].overall_score > 0
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for batched MLEngine.analyze_data_quality
+
+Tests that the vectorized batch path scores items exactly like the
+per-item helpers and calls each sklearn model once per batch.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from shared.ml_engine import MLEngine
+
+ITEMS = [
+    {
+        "place_id": "p1", "name": "佐渡食堂", "formatted_address": "新潟県佐渡市両津",
+        "rating": 4.8, "user_ratings_total": 3, "phone_number": "0259-11-2222",
+        "website": "https://example.com", "opening_hours": {"open_now": True},
+        "updated_at": "2020-01-01T00:00:00",
+    },
+    {"place_id": "p2", "name": "a", "formatted_address": "Tokyo", "rating": "bad", "website": "ftp://x"},
+    {"place_id": "p3", "name": "Sushi", "formatted_address": "", "rating": "4.2", "user_ratings_total": "x"},
+    {"place_id": "p4", "name": "x" * 250, "rating": 6, "phone_number": "abc", "updated_at": "garbage"},
+    # Non-string values fall back to the per-item helpers
+    {"place_id": "p5", "name": None, "formatted_address": None, "updated_at": 5},
+    {"invalid": "data"},
+]
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    return MLEngine(str(tmp_path_factory.mktemp("models")))
+
+
+def reference_metrics(engine, item):
+    """Score one item with the per-item helpers and single-row model calls."""
+    features = engine.scaler.transform([engine._extract_quality_features(item)])
+    proba = engine.quality_classifier.predict_proba(features)[0]
+    decision = engine.anomaly_detector.decision_function(features)[0]
+    scores = {
+        "completeness": engine._calculate_completeness(item),
+        "accuracy": engine._calculate_accuracy(item),
+        "consistency": engine._calculate_consistency(item),
+        "timeliness": engine._calculate_timeliness(item),
+    }
+    scores["overall_score"] = (
+        scores["completeness"] * 0.25 + scores["accuracy"] * 0.25 + scores["consistency"] * 0.20 +
+        scores["timeliness"] * 0.15 + proba[1] * 0.15
+    )
+    scores["confidence"] = max(proba)
+    scores["anomaly_score"] = max(0, min(1, (decision + 0.5) * 2))
+    return scores
+
+
+class TestBatchQualityAnalysis:
+    """Test the vectorized analyze_data_quality path."""
+
+    def test_matches_per_item_scoring(self, engine):
+        """Test that batch scores equal the per-item calculation."""
+        metrics = engine.analyze_data_quality(ITEMS)
+
+        assert len(metrics) == len(ITEMS)
+        for item, result in zip(ITEMS, metrics):
+            expected = reference_metrics(engine, item)
+            for name, value in expected.items():
+                assert getattr(result, name) == pytest.approx(value, abs=1e-9), (name, item)
+            assert result.details["validation_checks"] == engine._run_validation_checks(item)
+
+    def test_models_are_called_once_per_batch(self, engine):
+        """Test that the scaler and models run once for the whole batch."""
+        batch = ITEMS * 50
+
+        with patch.object(engine.scaler, "transform", wraps=engine.scaler.transform) as transform, \
+                patch.object(engine.quality_classifier, "predict_proba",
+                             wraps=engine.quality_classifier.predict_proba) as predict_proba, \
+                patch.object(engine.anomaly_detector, "decision_function",
+                             wraps=engine.anomaly_detector.decision_function) as decision_function:
+            metrics = engine.analyze_data_quality(batch)
+
+        assert len(metrics) == len(batch)
+        assert transform.call_count == predict_proba.call_count == decision_function.call_count == 1
+        assert transform.call_args.args[0].shape == (len(batch), 6)
+
+    def test_timeliness_decays_with_age(self, engine):
+        """Test vectorized timeliness for recent, missing and unparsable timestamps."""
+        metrics = engine.analyze_data_quality([
+            {"name": "佐渡食堂", "updated_at": "2000-01-01T00:00:00"},
+            {"name": "佐渡食堂"},
+            {"name": "佐渡食堂", "updated_at": "garbage"},
+        ])
+
+        assert [m.timeliness for m in metrics] == [0.0, 0.7, 0.7]
+
+    def test_empty_batch(self, engine):
+        """Test that an empty batch returns no metrics."""
+        assert engine.analyze_data_quality([]) == []
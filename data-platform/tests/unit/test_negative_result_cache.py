@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for NegativeResultCache
+
+Tests negative caching of empty Places search results including:
+- Skip decisions within TTL
+- Escalating TTL for repeated failures
+- Unresolvable query listing
+- Persistence across instances
+- Integration with PlacesAPIAdapter text search
+"""
+
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from infrastructure.storage.negative_result_cache import NegativeResultCache
+from infrastructure.external.places_api_adapter import PlacesAPIAdapter
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    """Temporary cache file path."""
+    return str(tmp_path / "negative_result_cache.json")
+
+
+@pytest.fixture
+def cache(cache_path):
+    """NegativeResultCache backed by a temporary file."""
+    return NegativeResultCache(cache_path, ttl_hours=1, unresolvable_threshold=2)
+
+
+class TestNegativeResultCache:
+    """Test NegativeResultCache behaviour."""
+
+    def test_unknown_query_is_not_skipped(self, cache):
+        """Test that queries without failures are not skipped."""
+        assert cache.should_skip("テスト食堂") is False
+        assert cache.get_failure_count("テスト食堂") == 0
+
+    def test_record_miss_skips_within_ttl(self, cache):
+        """Test that a recorded miss is skipped until TTL expiry."""
+        cache.record_miss("テスト食堂")
+
+        assert cache.should_skip("テスト食堂") is True
+        assert cache.get_statistics()["skipped_requests"] == 1
+
+    def test_query_normalization(self, cache):
+        """Test that width, spacing and case variants share one entry."""
+        cache.record_miss("ＴＥＳＴ  Cafe")
+
+        assert cache.should_skip("test cafe") is True
+        assert cache.get_failure_count(" Test Cafe ") == 1
+
+    def test_expired_entry_is_not_skipped(self, cache):
+        """Test that expired entries allow a new API call."""
+        cache.record_miss("テスト食堂")
+
+        with patch("infrastructure.storage.negative_result_cache.datetime") as mock_dt:
+            mock_dt.now.return_value = datetime.now() + timedelta(hours=2)
+            mock_dt.fromisoformat = datetime.fromisoformat
+            assert cache.should_skip("テスト食堂") is False
+
+    def test_repeated_failures_extend_ttl(self, cache):
+        """Test that repeated failures demote the query with a longer TTL."""
+        cache.record_miss("テスト食堂")
+        cache.record_miss("テスト食堂")
+
+        entry = cache.get_unresolvable()[0]
+        expires_at = datetime.fromisoformat(entry["expires_at"])
+        last_failed = datetime.fromisoformat(entry["last_failed"])
+
+        assert expires_at - last_failed == timedelta(hours=2)
+
+    def test_record_hit_clears_entry(self, cache):
+        """Test that a successful search removes the negative entry."""
+        cache.record_miss("テスト食堂")
+
+        assert cache.record_hit("テスト食堂") is True
+        assert cache.should_skip("テスト食堂") is False
+        assert cache.record_hit("テスト食堂") is False
+
+    def test_get_unresolvable(self, cache):
+        """Test unresolvable listing ordered by failure count."""
+        cache.record_miss("一回だけ")
+        for _ in range(3):
+            cache.record_miss("三回失敗")
+        for _ in range(2):
+            cache.record_miss("二回失敗")
+
+        unresolvable = cache.get_unresolvable()
+
+        assert [e["query"] for e in unresolvable] == ["三回失敗", "二回失敗"]
+        assert cache.is_unresolvable("一回だけ") is False
+
+    def test_persistence(self, cache_path):
+        """Test that entries survive a reload."""
+        NegativeResultCache(cache_path).record_miss("テスト食堂")
+
+        reloaded = NegativeResultCache(cache_path)
+        assert reloaded.should_skip("テスト食堂") is True
+
+
+class TestPlacesAPIAdapterNegativeCache:
+    """Test negative cache integration in PlacesAPIAdapter."""
+
+    @pytest.fixture
+    def adapter(self, cache):
+        """Adapter with negative cache and no rate limit delay."""
+        return PlacesAPIAdapter(api_key="test_api_key", delay=0, negative_cache=cache)
+
+    @staticmethod
+    def _response(places):
+        response = Mock(status_code=200, headers={})
+        response.raise_for_status.return_value = None
+        response.json.return_value = {"places": places}
+        return response
+
+    def test_zero_results_are_cached(self, adapter):
+        """Test that ZERO_RESULTS is recorded and the next call is skipped."""
+        with patch("infrastructure.external.places_api_adapter.requests.post",
+                   return_value=self._response([])) as mock_post:
+            assert adapter.search_places("存在しない店") == []
+            assert adapter.search_places("存在しない店") == []
+
+        assert mock_post.call_count == 1
+
+    def test_id_only_search_is_cached(self, adapter):
+        """Test that ID-only search skips known empty queries."""
+        with patch("infrastructure.external.places_api_adapter.requests.post",
+                   return_value=self._response([])) as mock_post:
+            assert adapter.search_text_id_only("存在しない店") is None
+            assert adapter.search_text_id_only("存在しない店") is None
+
+        assert mock_post.call_count == 1
+
+    def test_request_failures_are_not_cached(self, adapter, cache):
+        """Test that transient request failures are not negatively cached."""
+        import requests
+
+        with patch("infrastructure.external.places_api_adapter.requests.post",
+                   side_effect=requests.exceptions.ConnectionError("down")):
+            status, _ = adapter._search_text("テスト食堂", "restaurants")
+
+        assert status == "REQUEST_FAILED"
+        assert cache.get_failure_count("テスト食堂") == 0
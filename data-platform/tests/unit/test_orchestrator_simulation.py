@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the orchestrator discrete-event simulator
+
+Tests that simulations are deterministic, exercise the real failover path,
+and rank strategies by tail latency under skewed worker speeds.
+"""
+
+from shared.orchestrator_simulation import (
+    OrchestratorSimulation,
+    build_scenario,
+    compare_strategies,
+)
+from shared.smart_orchestrator import LoadBalancingConfig
+
+
+class TestOrchestratorSimulation:
+    """Test OrchestratorSimulation and compare_strategies."""
+
+    def test_same_seed_gives_same_report(self):
+        """Test that a scenario replays identically."""
+        scenario = build_scenario(workers=4, duration=20, arrival_rate=30, outage=True)
+
+        first = OrchestratorSimulation(scenario, LoadBalancingConfig(algorithm="p2c")).run()
+        second = OrchestratorSimulation(scenario, LoadBalancingConfig(algorithm="p2c")).run()
+
+        assert first == second
+        assert first.completed > 0
+
+    def test_outage_is_detected_and_recovered(self):
+        """Test that a stopped worker is failed over and later restored."""
+        scenario = build_scenario(workers=4, slow_workers=0, duration=120, arrival_rate=20, outage=True)
+
+        report = OrchestratorSimulation(scenario, LoadBalancingConfig(algorithm="p2c")).run()
+
+        assert report.failed == 0
+        assert report.retries > 0
+        assert report.mean_detection_time is not None
+        assert report.mean_recovery_time is not None
+        assert report.unrecovered_outages == 0
+
+    def test_p2c_beats_round_robin_tail_latency_under_skew(self):
+        """Test that latency-aware selection avoids queueing on slow workers."""
+        scenario = build_scenario(
+            workers=6, slow_workers=2, slow_factor=8, duration=30,
+            arrival_rate=80, task_type="cache_operation", seed=3
+        )
+
+        reports = compare_strategies(scenario, ("round_robin", "p2c"))
+
+        assert reports["p2c"].p99_latency_ms < reports["round_robin"].p99_latency_ms
+        assert reports["p2c"].throughput >= reports["round_robin"].throughput
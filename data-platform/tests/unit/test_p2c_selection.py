@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for power-of-two-choices worker selection
+
+Tests that the p2c strategy prefers workers with a lower EWMA latency times
+in-flight load, skips unavailable workers, and selects without scanning.
+"""
+
+from collections import Counter
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from shared.smart_orchestrator import LoadBalancingConfig, SmartOrchestrator, WorkerMetrics, WorkerState
+
+
+def worker(worker_id, response_time, active_tasks=0, load=0.0):
+    return WorkerMetrics(
+        worker_id=worker_id,
+        state=WorkerState.ACTIVE,
+        load=load,
+        active_tasks=active_tasks,
+        completed_tasks=0,
+        failed_tasks=0,
+        last_activity=datetime.now(),
+        response_time=response_time,
+        memory_usage=0.0,
+        cpu_usage=0.0
+    )
+
+
+@pytest.fixture
+def orchestrator():
+    orchestrator = SmartOrchestrator(
+        MagicMock(), MagicMock(), LoadBalancingConfig(algorithm="p2c", random_seed=1)
+    )
+    orchestrator.worker_metrics = {
+        "fast": worker("fast", 50.0),
+        "slow": worker("slow", 500.0),
+    }
+    return orchestrator
+
+
+class TestPowerOfTwoChoices:
+    """Test the p2c load balancing strategy."""
+
+    @pytest.mark.asyncio
+    async def test_prefers_lower_expected_wait(self, orchestrator):
+        """Test that the faster worker wins unless it is much more loaded."""
+        assert await orchestrator.get_optimal_worker("cache_operation") == "fast"
+
+        orchestrator.worker_metrics["fast"].active_tasks = 20
+        assert await orchestrator.get_optimal_worker("cache_operation") == "slow"
+
+    @pytest.mark.asyncio
+    async def test_skips_unavailable_workers(self, orchestrator):
+        """Test that failed and circuit-broken workers are never selected."""
+        orchestrator.failed_workers.add("fast")
+        assert await orchestrator.get_optimal_worker("cache_operation") == "slow"
+
+        orchestrator.circuit_breaker_state["slow"] = True
+        assert await orchestrator.get_optimal_worker("cache_operation") is None
+
+    @pytest.mark.asyncio
+    async def test_selection_does_not_scan_workers(self, orchestrator):
+        """Test that selection neither takes the lock nor lists all workers."""
+        orchestrator.worker_metrics.update({f"w{i}": worker(f"w{i}", 100.0) for i in range(1000)})
+
+        with patch.object(orchestrator, "_get_available_workers", side_effect=AssertionError):
+            with patch.object(orchestrator, "_lock", None):
+                assert await orchestrator.get_optimal_worker("cache_operation") is not None
+
+    @pytest.mark.asyncio
+    async def test_skewed_speeds_favour_fast_workers(self, orchestrator):
+        """Test that slow workers receive a small share of traffic."""
+        orchestrator.worker_metrics = {f"fast{i}": worker(f"fast{i}", 50.0) for i in range(4)}
+        orchestrator.worker_metrics.update({f"slow{i}": worker(f"slow{i}", 1000.0) for i in range(4)})
+
+        picks = Counter()
+        for _ in range(1000):
+            picks[(await orchestrator.get_optimal_worker("cache_operation"))[:4]] += 1
+
+        # A slow worker only wins when both draws are slow (about 12/56)
+        assert picks["slow"] < 300
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the online processing-time model
+
+Tests incremental learning from PerformanceMonitor run timings,
+persistence between runs and its use in MLEngine estimates.
+"""
+
+import random
+
+import pytest
+
+from shared.ml_engine import SKLEARN_AVAILABLE, MLEngine
+from shared.performance_monitor import PerformanceMonitor
+from shared.processing_time_model import OnlineProcessingTimeModel, PROCESSING_RUN_OPERATION
+
+pytestmark = pytest.mark.skipif(not SKLEARN_AVAILABLE, reason="scikit-learn not installed")
+
+# 実測を模した1件あたり処理時間（秒、1ワーカー時）
+SECONDS_PER_QUERY = {"restaurants": 1.6, "parkings": 0.8, "toilets": 0.5}
+
+
+def feed(model, runs=60, seed=1):
+    rng = random.Random(seed)
+    for _ in range(runs):
+        category = rng.choice(list(SECONDS_PER_QUERY))
+        workers = rng.choice([1, 2, 4])
+        queries = rng.randint(50, 500)
+        duration = SECONDS_PER_QUERY[category] * queries / workers ** 0.5 * rng.uniform(0.9, 1.1)
+        model.observe(category, "standard", workers, queries, duration)
+
+
+class TestOnlineProcessingTimeModel:
+    """Test OnlineProcessingTimeModel learning and persistence."""
+
+    def test_no_estimate_until_min_samples(self, tmp_path):
+        """Test that the caller's heuristic is used until enough runs are seen."""
+        model = OnlineProcessingTimeModel(str(tmp_path / "model.joblib"), min_samples=5)
+        feed(model, runs=4)
+
+        assert model.estimate(100, "restaurants", "standard", 1) is None
+        assert not model.ready
+
+    def test_learns_category_and_worker_effects(self, tmp_path):
+        """Test that estimates approach the observed per-query times."""
+        model = OnlineProcessingTimeModel(str(tmp_path / "model.joblib"))
+        feed(model)
+
+        for category, seconds in SECONDS_PER_QUERY.items():
+            for workers in (1, 4):
+                expected = seconds / workers ** 0.5
+                assert model.seconds_per_query(category, "standard", workers) == pytest.approx(expected, rel=0.25)
+        assert model.confidence() > 0.5
+
+    def test_persisted_between_runs(self, tmp_path):
+        """Test that a new instance continues from the saved model."""
+        path = str(tmp_path / "model.joblib")
+        model = OnlineProcessingTimeModel(path)
+        feed(model, runs=10)
+
+        reloaded = OnlineProcessingTimeModel(path)
+
+        assert reloaded.samples == 10
+        assert reloaded.estimate(200, "parkings", "standard", 2) == model.estimate(200, "parkings", "standard", 2)
+
+    def test_fed_from_performance_monitor(self, tmp_path):
+        """Test that run timings recorded on the monitor are learned."""
+        model = OnlineProcessingTimeModel(str(tmp_path / "model.joblib"), min_samples=1)
+        monitor = PerformanceMonitor("test")
+        monitor.add_listener(model.observe_measurement)
+        labels = {"category": "toilets", "mode": "quick", "workers": "3", "queries": "120"}
+
+        monitor.record_timing(PROCESSING_RUN_OPERATION, 60.0, labels=labels)
+        monitor.record_timing(PROCESSING_RUN_OPERATION, 30.0, success=False, labels=labels)
+        monitor.record_timing("category_processing.toilets", 60.0, labels=labels)
+
+        assert model.samples == 1
+
+
+class TestMLEngineOnlineEstimates:
+    """Test MLEngine estimates backed by the online model."""
+
+    def test_predictions_use_learned_timings(self, tmp_path):
+        """Test that predictions and batch sizing follow the learned latency."""
+        model = OnlineProcessingTimeModel(str(tmp_path / "model.joblib"))
+        feed(model)
+        engine = MLEngine(str(tmp_path / "models"), auto_train=False, processing_time_model=model)
+
+        prediction = engine.predict_processing_time(300, 0.5, 4, category="restaurants", mode="standard")
+        plan = engine.optimize_batch_size(1000, 4, target_duration=30.0, category="restaurants", mode="standard")
+
+        assert prediction.model_version == "online"
+        assert prediction.prediction == pytest.approx(300 * 0.8, rel=0.25)
+        # 1件あたり約0.8秒なので、30秒で終わるバッチは約37件以下
+        assert plan["optimal_batch_size"] <= 40
+        assert plan["estimated_total_time"] == pytest.approx(1000 * 0.8, rel=0.25)
+
+    def test_falls_back_without_observations(self, tmp_path):
+        """Test that the heuristic is used while nothing has been learned."""
+        model = OnlineProcessingTimeModel(str(tmp_path / "model.joblib"))
+        engine = MLEngine(str(tmp_path / "models"), auto_train=False, processing_time_model=model)
+
+        prediction = engine.predict_processing_time(100, 0.5, 2)
+
+        assert prediction.model_version == "v1.0"
+        assert prediction.prediction == pytest.approx(100 * 1.2 * 1.25 / 2)
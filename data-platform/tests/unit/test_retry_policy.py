@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for RetryPolicyEngine
+
+Tests per-exception retry policies including:
+- No retry for errors that cannot succeed
+- Retry-After honoring for quota errors
+- Jittered exponential backoff
+- Global retry budget
+"""
+
+import random
+
+import pytest
+
+from shared.async_processor import OptimizedAsyncProcessor, OptimizedBatchConfig
+from shared.exceptions import (
+    APIAuthenticationError,
+    APIError,
+    APIQuotaExceededError,
+    ValidationError,
+)
+from shared.retry_policy import RetryBudget, RetryPolicy, RetryPolicyEngine, create_default_retry_engine
+
+
+@pytest.fixture
+def engine():
+    """Default engine without a retry budget."""
+    return create_default_retry_engine(base_delay=1.0, max_delay=30.0, budget_ratio=0)
+
+
+class TestRetryPolicyEngine:
+    """Test policy lookup and delay computation."""
+
+    def test_non_retryable_errors(self, engine):
+        """Test that validation and authentication errors are never retried."""
+        assert engine.next_delay(ValidationError("bad input"), 0) is None
+        assert engine.next_delay(APIAuthenticationError(), 0) is None
+
+    def test_client_api_errors_are_not_retried(self, engine):
+        """Test that 4xx API errors other than 429 give up immediately."""
+        assert engine.next_delay(APIError("not found", status_code=404), 0) is None
+        assert engine.next_delay(APIError("unavailable", status_code=503), 0) is not None
+
+    def test_retry_after_is_honored(self, engine):
+        """Test that quota errors wait exactly Retry-After seconds."""
+        assert engine.next_delay(APIQuotaExceededError(retry_after=7), 0) == 7.0
+
+    def test_excessive_retry_after_gives_up(self, engine):
+        """Test that a Retry-After beyond the cap is not waited for."""
+        assert engine.next_delay(APIQuotaExceededError(retry_after=600), 0) is None
+
+    def test_jittered_exponential_backoff(self):
+        """Test that backoff is drawn from [0, base * 2**attempt] and capped."""
+        engine = RetryPolicyEngine(
+            default_policy=RetryPolicy(name="exp", base_delay=1.0, max_delay=5.0),
+            rng=random.Random(0)
+        )
+
+        delays = [engine.next_delay(RuntimeError("x"), attempt) for attempt in range(6)]
+
+        assert all(0.0 <= d <= min(5.0, 2 ** i) for i, d in enumerate(delays))
+        assert len(set(delays)) > 1
+
+    def test_budget_limits_retries(self):
+        """Test that retries stop once the budget is exhausted."""
+        budget = RetryBudget(ratio=0.5, initial_tokens=1.0)
+        engine = RetryPolicyEngine(budget=budget)
+
+        assert engine.next_delay(RuntimeError("x"), 0) is not None
+        assert engine.next_delay(RuntimeError("x"), 0) is None
+
+        engine.record_request()
+        engine.record_request()
+        assert engine.next_delay(RuntimeError("x"), 0) is not None
+        assert engine.get_stats()["budget"]["denied"] == 1
+
+
+class TestProcessorRetries:
+    """Test retry policies inside OptimizedAsyncProcessor."""
+
+    @pytest.mark.asyncio
+    async def test_validation_error_is_attempted_once(self):
+        """Test that non-retryable errors do not consume further attempts."""
+        processor = OptimizedAsyncProcessor(
+            "RetryTest",
+            OptimizedBatchConfig(retry_attempts=3, retry_delay=0.0, adaptive_batch_size=False)
+        )
+        calls = []
+
+        async def invalid(item):
+            calls.append(item)
+            raise ValidationError("bad input")
+
+        result = await processor.process_batch_optimized(["q"], invalid)
+
+        assert calls == ["q"]
+        assert result.failed_items == 1
+        assert processor.get_processing_stats()["retry"]["decisions"] == {"no_retry:give_up": 1}
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for task deduplication
+
+Tests that SET NX leases let one worker fetch each place while duplicates
+reuse the published result, and that abandoned leases are taken over.
+"""
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from shared import distributed_tasks
+from shared.claim_check import LocalClaimCheckStore
+from shared.distributed_tasks import (
+    PLACE_DETAILS_TASK_KIND,
+    BatchTaskConfig,
+    _fetch_batch_deduplicated,
+    _plan_dispatch,
+    iter_claim_checked_results,
+)
+from shared.task_dedup import TaskLeaseManager
+
+
+class FakeRuntime:
+    """Worker runtime recording which place IDs it fetched."""
+
+    def __init__(self):
+        self.fetched = []
+
+    def fetch_batch(self, place_ids, timeout=None):
+        self.fetched.extend(place_ids)
+        results = {i: {"place_id": i} for i in place_ids if i != "missing"}
+        errors = [i for i in place_ids if i == "missing"]
+        return results, errors, {"memory_hits": 0, "cache_hits": 0, "api_calls": len(place_ids), "errors": len(errors)}
+
+
+def redis_down(*args, **kwargs):
+    raise RedisConnectionError("down")
+
+
+@pytest.fixture
+def leases(fake_redis):
+    return TaskLeaseManager(fake_redis, lease_ttl=0.05, poll_interval=0.01)
+
+
+class TestTaskLeaseManager:
+    """Test lease acquisition and result sharing."""
+
+    def test_second_claim_waits_then_reuses_result(self, leases):
+        """Test that a duplicate claim is pending until the winner publishes."""
+        first = leases.claim("kind", "1", ["p1"], "a")
+        second = leases.claim("kind", "1", ["p1"], "b")
+
+        assert first.owned == ["p1"]
+        assert second.pending == ["p1"]
+
+        leases.publish("kind", "1", {"p1": {"place_id": "p1"}}, "a")
+
+        assert leases.claim("kind", "1", ["p1"], "b").shared == {"p1": {"place_id": "p1"}}
+
+    def test_release_only_by_owner(self, leases):
+        """Test that another owner cannot release a lease."""
+        leases.claim("kind", "1", ["p1"], "a")
+        leases.release("kind", "1", ["p1"], "b")
+
+        assert leases.claim("kind", "1", ["p1"], "c").pending == ["p1"]
+
+    def test_data_version_separates_results(self, leases):
+        """Test that results of another data version are not shared."""
+        leases.claim("kind", "1", ["p1"], "a")
+        leases.publish("kind", "1", {"p1": {"place_id": "p1"}}, "a")
+
+        assert leases.claim("kind", "2", ["p1"], "b").owned == ["p1"]
+
+    def test_expired_lease_is_taken_over(self, leases):
+        """Test that a waiter takes over when the winner disappears."""
+        leases.claim("kind", "1", ["p1"], "a")
+
+        plan = leases.wait_for_results("kind", "1", ["p1"], "b", timeout=1.0)
+
+        assert plan.owned == ["p1"]
+        assert plan.pending == []
+
+
+class TestDeduplicatedFetch:
+    """Test _fetch_batch_deduplicated and dispatch planning."""
+
+    def test_duplicates_are_fetched_once(self, leases):
+        """Test that overlapping batches fetch each place once."""
+        first, second = FakeRuntime(), FakeRuntime()
+
+        results, _, counts = _fetch_batch_deduplicated(first, leases, ["p1", "p2"], "1")
+        shared, _, shared_counts = _fetch_batch_deduplicated(second, leases, ["p2", "p3"], "1")
+
+        assert first.fetched == ["p1", "p2"]
+        assert second.fetched == ["p3"]
+        assert set(shared) == {"p2", "p3"}
+        assert shared_counts["deduplicated"] == 1
+        assert counts["deduplicated"] == 0
+
+    def test_failed_fetch_releases_lease(self, leases):
+        """Test that a failed place can be retried by another worker."""
+        _, errors, _ = _fetch_batch_deduplicated(FakeRuntime(), leases, ["missing"], "1")
+
+        assert errors == ["missing"]
+        assert leases.claim(PLACE_DETAILS_TASK_KIND, "1", ["missing"], "b").owned == ["missing"]
+
+    def test_redis_error_on_claim_falls_back_to_plain_fetch(self, leases, monkeypatch):
+        """Test that a broken dedup layer still returns real results."""
+        runtime = FakeRuntime()
+        monkeypatch.setattr(leases, "claim", redis_down)
+
+        results, errors, counts = _fetch_batch_deduplicated(runtime, leases, ["p1", "missing"], "1")
+
+        assert runtime.fetched == ["p1", "missing"]
+        assert set(results) == {"p1"} and errors == ["missing"]
+        assert counts["deduplicated"] == 0
+
+    def test_redis_error_while_publishing_keeps_results(self, leases, monkeypatch):
+        """Test that failing to share results does not discard them."""
+        monkeypatch.setattr(leases, "publish", redis_down)
+
+        results, _, _ = _fetch_batch_deduplicated(FakeRuntime(), leases, ["p1"], "1")
+
+        assert set(results) == {"p1"}
+
+    def test_redis_error_while_waiting_fetches_pending(self, leases, monkeypatch):
+        """Test that places another worker holds are fetched when waiting fails."""
+        leases.claim(PLACE_DETAILS_TASK_KIND, "1", ["p2"], "other")
+        monkeypatch.setattr(leases, "wait_for_results", redis_down)
+        runtime = FakeRuntime()
+
+        results, _, _ = _fetch_batch_deduplicated(runtime, leases, ["p1", "p2"], "1")
+
+        assert runtime.fetched == ["p1", "p2"]
+        assert set(results) == {"p1", "p2"}
+
+    def test_plan_dispatch_skips_published_places(self, leases, tmp_path, monkeypatch):
+        """Test that published results bypass dispatch as a precomputed batch."""
+        monkeypatch.setattr(distributed_tasks, "_claim_check_store", LocalClaimCheckStore(str(tmp_path)))
+        monkeypatch.setattr(distributed_tasks, "_get_lease_manager", lambda: leases)
+        leases.claim(PLACE_DETAILS_TASK_KIND, "1", ["p2"], "a")
+        leases.publish(PLACE_DETAILS_TASK_KIND, "1", {"p2": {"place_id": "p2"}}, "a")
+
+        dispatch_ids, precomputed = _plan_dispatch(
+            ["p1", "p2", "p1", "p3"], BatchTaskConfig(use_real_api=True)
+        )
+
+        assert dispatch_ids == ["p1", "p3"]
+        assert precomputed[0]["processed"] == 1
+        assert list(iter_claim_checked_results([precomputed[0]["results_ref"]])) == [{"place_id": "p2"}]
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for event-driven worker telemetry
+
+Tests that Celery task and heartbeat events maintain per-worker EWMA latency,
+in-flight counts and error rates, and that SmartOrchestrator selects workers
+from that data without inspect() broadcasts.
+"""
+
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from celery import Celery
+
+from shared.smart_orchestrator import LoadBalancingConfig, SmartOrchestrator, WorkerState
+from shared.worker_telemetry import CeleryEventConsumer, WorkerTelemetryStore
+
+
+def run_task(store, hostname, task_id, runtime, failed=False):
+    store.on_task_started({"uuid": task_id, "hostname": hostname, "timestamp": time.time()})
+    finish = store.on_task_failed if failed else store.on_task_succeeded
+    finish({"uuid": task_id, "hostname": hostname, "runtime": runtime, "timestamp": time.time()})
+
+
+class TestWorkerTelemetryStore:
+    """Test event handling in WorkerTelemetryStore."""
+
+    def test_ewma_latency_and_error_rate(self):
+        """Test that finished tasks update EWMA latency and error rate."""
+        store = WorkerTelemetryStore(alpha=0.5)
+
+        run_task(store, "w1", "t1", 1.0)
+        run_task(store, "w1", "t2", 3.0, failed=True)
+
+        worker = store.snapshot()["w1"]
+        assert worker.latency == pytest.approx(2.0)
+        assert worker.error_rate == pytest.approx(0.5)
+        assert (worker.completed, worker.failed, worker.in_flight) == (1, 1, 0)
+
+    def test_in_flight_reconciled_by_heartbeat(self):
+        """Test that a heartbeat corrects in-flight counts after lost events."""
+        store = WorkerTelemetryStore()
+        now = time.time()
+        for task_id, started in (("t1", now - 30), ("t2", now - 20), ("t3", now - 10)):
+            store.on_task_started({"uuid": task_id, "hostname": "w1", "timestamp": started})
+
+        store.on_worker_heartbeat(
+            {"hostname": "w1", "freq": 2.0, "active": 1, "loadavg": [0.5, 0.4, 0.3], "timestamp": now}
+        )
+
+        worker = store.snapshot()["w1"]
+        assert worker.in_flight == 1
+        assert worker.loadavg == 0.5
+        # the long-running task is kept, the newer ones are treated as lost
+        store.on_task_succeeded({"uuid": "t1", "hostname": "w1", "runtime": 30.0})
+        assert store.snapshot()["w1"].in_flight == 0
+
+    def test_recently_started_tasks_are_not_reconciled(self):
+        """Test that tasks the heartbeat may not count yet are kept."""
+        store = WorkerTelemetryStore()
+        now = time.time()
+        store.on_task_started({"uuid": "t1", "hostname": "w1", "timestamp": now - 10})
+        store.on_task_started({"uuid": "t2", "hostname": "w1", "timestamp": now - 0.5})
+
+        store.on_worker_heartbeat({"hostname": "w1", "freq": 2.0, "active": 0, "timestamp": now})
+
+        assert store.snapshot()["w1"].in_flight == 1
+        store.on_task_succeeded({"uuid": "t2", "hostname": "w1", "runtime": 1.0})
+        assert store.snapshot()["w1"].in_flight == 0
+
+    def test_events_without_uuid_are_ignored(self):
+        """Test that task events missing a uuid do not create a None task entry."""
+        store = WorkerTelemetryStore()
+
+        store.on_task_started({"hostname": "w1", "timestamp": time.time()})
+        store.on_task_succeeded({"hostname": "w1", "runtime": 1.0})
+        store.on_task_revoked({})
+        store.on_worker_offline({})
+
+        assert store.snapshot() == {}
+        assert None not in store._tasks
+
+    def test_stale_workers_expire(self):
+        """Test that workers without heartbeats are marked offline."""
+        store = WorkerTelemetryStore()
+        store.on_worker_heartbeat({"hostname": "w1", "freq": 2.0, "active": 0})
+
+        assert store.expire_stale(now=time.time() + 10) == 1
+        assert store.snapshot()["w1"].online is False
+
+
+class TestOrchestratorTelemetry:
+    """Test SmartOrchestrator integration."""
+
+    @pytest.mark.asyncio
+    async def test_selection_uses_event_data_without_inspect(self):
+        """Test that workers found through events are selected without broadcasts."""
+        orchestrator = SmartOrchestrator(
+            MagicMock(), MagicMock(), LoadBalancingConfig(algorithm="least_connections")
+        )
+        store = orchestrator.telemetry
+        store.on_worker_heartbeat({"hostname": "w1", "freq": 2.0, "active": 0})
+        store.on_worker_heartbeat({"hostname": "w2", "freq": 2.0, "active": 0})
+        store.on_task_started({"uuid": "t1", "hostname": "w1", "timestamp": time.time()})
+        run_task(store, "w2", "t2", 0.25)
+
+        with patch("shared.smart_orchestrator.celery_app.control.inspect", side_effect=AssertionError):
+            worker_id = await orchestrator.get_optimal_worker("api_call")
+
+        assert worker_id == "w2"
+        assert orchestrator.worker_metrics["w1"].active_tasks == 1
+        assert orchestrator.worker_metrics["w2"].response_time == pytest.approx(250.0)
+
+    @pytest.mark.asyncio
+    async def test_offline_workers_are_not_selected(self):
+        """Test that a worker whose heartbeat expired is skipped."""
+        orchestrator = SmartOrchestrator(MagicMock(), MagicMock())
+        orchestrator.telemetry.on_worker_heartbeat({"hostname": "w1", "freq": 2.0, "active": 0})
+        orchestrator.telemetry.on_worker_offline({"hostname": "w1"})
+
+        assert await orchestrator.get_optimal_worker("api_call") is None
+        assert orchestrator.worker_metrics["w1"].state == WorkerState.OFFLINE
+
+
+class TestCeleryEventConsumer:
+    """Test the background event consumer."""
+
+    def test_consumes_events_from_broker(self):
+        """Test that events sent through the broker reach the store."""
+        app = Celery("telemetry-test", broker="memory://")
+        store = WorkerTelemetryStore()
+        consumer = CeleryEventConsumer(app, store)
+        consumer.start()
+        try:
+            deadline = time.time() + 5
+            while not store.snapshot() and time.time() < deadline:
+                with app.connection_for_write() as connection:
+                    with app.events.Dispatcher(connection, hostname="w1") as dispatcher:
+                        dispatcher.send("worker-heartbeat", freq=2.0, active=0)
+                time.sleep(0.1)
+        finally:
+            consumer.stop()
+
+        assert "w1" in store.snapshot()
+        assert not consumer.running